@@ -0,0 +1,4 @@
+"""
+Benchmarks and offline evaluation reports for APCA ClaimAudit.
+Run each module with `python -m backend.benchmarks.<name>` from the project root.
+"""
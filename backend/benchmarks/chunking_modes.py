@@ -0,0 +1,195 @@
+"""
+Chunking mode benchmark: character windows vs embedding-token windows.
+
+Ingests a synthetic policy corpus with each CHUNKING_MODE and reports chunk
+count, how much chunk text lies past the embedding model's max_seq_length
+(and so is never embedded), ingest time (split + embed + upsert) and
+retrieval recall. Every page of every policy carries one uniquely named
+rider sentence; its query is a hit when a top-k chunk contains that
+sentence.
+
+    python -m backend.benchmarks.chunking_modes --policies 200
+    python -m backend.benchmarks.chunking_modes --encoder model
+
+The tokenizer is the embedding model's (exported tokenizer.json or the Hub
+cache). Offline, pass --tokenizer path/to/tokenizer.json, or a WordPiece
+tokenizer is trained on the corpus as a stand-in; its small vocabulary is
+sized so it splits text about as finely as BERT's does clinical text
+(~4.3 chars/token, reported as chars_per_token). The default "hashing"
+encoder embeds only the first max_seq_length word-pieces of a text, the way
+the model truncates, so recall reflects what the model would actually see.
+"""
+import argparse
+import contextlib
+import json
+import random
+import sys
+import time
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.config import settings
+from backend.rag.chunking import OffsetTextSplitter, TokenTextSplitter
+from backend.rag.ingestion import IngestionPipeline
+from backend.rag.numpy_store import NumpyVectorStore
+from backend.benchmarks.synthetic import METRICS, PAYERS, PROCEDURES, synthetic_policy_sentence
+
+SYLLABLES = ["ka", "lo", "mir", "ven", "tor", "sa", "quel", "dri", "bo", "nax", "pel", "ur", "zan", "fi"]
+
+
+def synthetic_policies(n: int, pages: int, sentences: int, seed: int = 13):
+    """Policy markdown documents plus one (policy_id, query, needle sentence) per page."""
+    rng = random.Random(seed)
+    policies, needles = [], []
+    for p in range(n):
+        payer = PAYERS[p % len(PAYERS)]
+        policy_id = f"synthetic-policy-{p}"
+        parts = [f"# Synthetic Policy {p}\n"]
+        for page in range(1, pages + 1):
+            body = [synthetic_policy_sentence(rng, payer) for _ in range(sentences)]
+            rider = "".join(rng.choice(SYLLABLES) for _ in range(3)).capitalize()
+            code, proc = rng.choice(PROCEDURES)
+            metric = rng.choice(METRICS)
+            needle = f"Members on the {rider} rider need {metric} of at least {rng.randint(1, 40)} for {proc} ({code})."
+            body.insert(rng.randrange(len(body) + 1), needle)
+            parts.append(f"\n## Page {page}\n\n" + " ".join(body) + "\n")
+            needles.append((policy_id, f"{rider} rider {metric} requirement for {proc}", needle))
+        policies.append((policy_id, f"Synthetic Policy {p}", payer, "".join(parts)))
+    return policies, needles
+
+
+def train_tokenizer(texts, vocab_size: int = 400):
+    """A BERT-style uncased WordPiece tokenizer trained on `texts` (offline stand-in)."""
+    from tokenizers import Tokenizer, models, normalizers, pre_tokenizers, trainers
+
+    tokenizer = Tokenizer(models.WordPiece(unk_token="[UNK]"))
+    tokenizer.normalizer = normalizers.BertNormalizer(lowercase=True)
+    tokenizer.pre_tokenizer = pre_tokenizers.BertPreTokenizer()
+    trainer = trainers.WordPieceTrainer(vocab_size=vocab_size, special_tokens=["[UNK]", "[CLS]", "[SEP]", "[PAD]"])
+    tokenizer.train_from_iterator(texts, trainer)
+    return tokenizer
+
+
+def load_tokenizer(path, texts, vocab_size):
+    from tokenizers import Tokenizer
+    from backend.rag.embeddings import load_embedding_tokenizer
+
+    if path:
+        tokenizer = Tokenizer.from_file(path)
+        tokenizer.no_truncation()
+        tokenizer.no_padding()
+        return tokenizer, path
+    try:
+        return load_embedding_tokenizer(), settings.EMBEDDING_MODEL
+    except ValueError as e:
+        print(f"Warning: {e}; training a WordPiece stand-in on the corpus", file=sys.stderr)
+        return train_tokenizer(texts, vocab_size), f"trained-wordpiece-{vocab_size}"
+
+
+class TruncatingHashingEncoder:
+    """Word-piece unigram + bigram feature hashing over the first max_tokens tokens only."""
+
+    def __init__(self, tokenizer, dim: int, max_tokens: int):
+        self.tokenizer = tokenizer
+        self.dim = dim
+        self.max_tokens = max_tokens
+
+    def _embed(self, ids) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        ids = ids[:self.max_tokens]
+        for a, b in zip(ids, ids[1:] + [-1]):
+            vector[a % self.dim] += 1.0
+            vector[zlib.crc32(f"{a}:{b}".encode()) % self.dim] += 0.5
+        return vector
+
+    def embed_documents(self, texts):
+        encodings = self.tokenizer.encode_batch(texts, add_special_tokens=False)
+        return np.stack([self._embed(e.ids) for e in encodings]) if texts else np.zeros((0, self.dim), np.float32)
+
+    def embed_query(self, text):
+        return self._embed(self.tokenizer.encode(text, add_special_tokens=False).ids)
+
+
+def run(splitter, encoder, tokenizer, policies, needles, args):
+    store = NumpyVectorStore(dim=encoder.dim, encoder=encoder, collection_name=f"chunking-{splitter.unit}")
+    pipeline = IngestionPipeline(store, splitter=splitter)
+
+    split_s, texts = 0.0, []
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(sys.stderr):
+        for policy_id, name, payer, markdown in policies:
+            t = time.perf_counter()
+            chunks = pipeline.split_policy_markdown(markdown, policy_id, name, payer)
+            split_s += time.perf_counter() - t
+            store.add_chunks(chunks)
+            texts.extend(c["text"] for c in chunks)
+    ingest_s = time.perf_counter() - start
+
+    lengths = [len(e.ids) for e in tokenizer.encode_batch(texts, add_special_tokens=False)]
+    budget = args.max_seq_length - 2
+    hits = {1: 0, args.k: 0}
+    for policy_id, query, needle in needles:
+        results = store.search(query, limit=args.k)
+        found = [needle in r["text"] and r["metadata"]["policy_id"] == policy_id for r in results]
+        hits[1] += any(found[:1])
+        hits[args.k] += any(found)
+
+    return {
+        "splitter": splitter.signature,
+        "chunks": len(texts),
+        "chunks_per_policy": round(len(texts) / len(policies), 2),
+        "chars_per_token": round(sum(map(len, texts)) / sum(lengths), 2),
+        "tokens_mean": round(float(np.mean(lengths)), 1),
+        "tokens_max": max(lengths),
+        "chunks_truncated": round(sum(n > budget for n in lengths) / len(lengths), 4),
+        "tokens_never_embedded": round(sum(max(0, n - budget) for n in lengths) / sum(lengths), 4),
+        "tokens_embedded_total": sum(min(n, budget) for n in lengths),
+        "split_s": round(split_s, 3),
+        "ingest_s": round(ingest_s, 3),
+        "recall@1": round(hits[1] / len(needles), 4),
+        f"recall@{args.k}": round(hits[args.k] / len(needles), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--policies", type=int, default=200)
+    parser.add_argument("--pages", type=int, default=4)
+    parser.add_argument("--sentences", type=int, default=24, help="Sentences per page")
+    parser.add_argument("--k", type=int, default=6)
+    parser.add_argument("--encoder", choices=["hashing", "model"], default="hashing")
+    parser.add_argument("--tokenizer", default="", help="tokenizer.json to measure with (default: the embedding model's)")
+    parser.add_argument("--max-seq-length", type=int, default=settings.EMBEDDING_MAX_SEQ_LENGTH)
+    parser.add_argument("--hash-dim", type=int, default=4096, help="Feature dimension of the hashing encoder")
+    parser.add_argument("--vocab-size", type=int, default=400, help="Vocabulary of the offline stand-in tokenizer")
+    parser.add_argument("--chars", type=int, nargs=2, default=[settings.CHUNK_SIZE_CHARS, settings.CHUNK_OVERLAP_CHARS],
+                        metavar=("SIZE", "OVERLAP"))
+    parser.add_argument("--token-overlap", type=int, default=settings.CHUNK_OVERLAP_TOKENS)
+    args = parser.parse_args()
+
+    policies, needles = synthetic_policies(args.policies, args.pages, args.sentences)
+    tokenizer, tokenizer_name = load_tokenizer(args.tokenizer, [p[3] for p in policies], args.vocab_size)
+    if args.encoder == "model":
+        from backend.rag.embeddings import get_embeddings
+        encoder = get_embeddings(settings.EMBEDDING_BACKEND)
+        encoder.dim = encoder.dimension
+    else:
+        encoder = TruncatingHashingEncoder(tokenizer, args.hash_dim, args.max_seq_length - 2)
+
+    splitters = [
+        OffsetTextSplitter(*args.chars),
+        TokenTextSplitter(tokenizer, args.max_seq_length - 2, args.token_overlap),
+    ]
+    print(json.dumps({
+        "policies": args.policies, "queries": len(needles), "encoder": args.encoder,
+        "tokenizer": tokenizer_name, "max_seq_length": args.max_seq_length,
+        "modes": [run(s, encoder, tokenizer, policies, needles, args) for s in splitters],
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Bulk claim import benchmark: claims/hour per file format on one core.
+
+Writes synthetic CSV, NDJSON and X12 837P files (with a share of invalid
+rows), imports each into a fresh SQLite claims store, and compares against
+the per-claim path (validate one ClaimInput, upsert one row):
+
+    python -m backend.benchmarks.claim_import --claims 200000
+"""
+import argparse
+import csv
+import json
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from shared.schemas import ClaimInput
+from backend.db.claims_store import SQLiteClaimsStore
+from backend.services.claim_import import import_claims, open_text, read_csv
+from backend.benchmarks.claims_store import synthetic_claims
+
+FIELDS = ["claim_id", "patient_id", "cpt_codes", "icd_codes", "service_date", "payer", "provider_npi", "billed_amount"]
+
+
+def _rows(n: int, invalid_every: int):
+    for i, claim in enumerate(synthetic_claims(n)):
+        row = claim.model_dump(mode="json", exclude={"notes", "policy_id"})
+        if invalid_every and i % invalid_every == 0:
+            row["billed_amount"] = -1
+        yield row
+
+
+def write_csv(path: Path, n: int, invalid_every: int):
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        for row in _rows(n, invalid_every):
+            row["cpt_codes"] = ";".join(row["cpt_codes"])
+            row["icd_codes"] = ";".join(row["icd_codes"])
+            writer.writerow(row)
+
+
+def write_ndjson(path: Path, n: int, invalid_every: int):
+    with open(path, "w") as f:
+        for row in _rows(n, invalid_every):
+            f.write(json.dumps(row) + "\n")
+
+
+def write_x12(path: Path, n: int, invalid_every: int):
+    isa = "ISA*00*          *00*          *ZZ*SUBMITTER      *ZZ*RECEIVER       *240601*1200*^*00501*000000001*0*P*:~"
+    with open(path, "w") as f:
+        f.write(isa + "GS*HC*SUB*REC*20240601*1200*1*X*005010X222A1~ST*837*0001*005010X222A1~")
+        for i, row in enumerate(_rows(n, invalid_every)):
+            f.write(
+                f"HL*{3 * i + 1}**20*1~NM1*85*2*CLINIC*****XX*{row['provider_npi']}~"
+                f"HL*{3 * i + 2}*{3 * i + 1}*22*0~SBR*P*18*******CI~NM1*IL*1*DOE*JANE****MI*{row['patient_id']}~"
+                f"NM1*PR*2*{row['payer']}*****PI*PAYER~"
+                f"CLM*{row['claim_id']}*{row['billed_amount']}***11:B:1*Y*A*Y*Y~"
+                f"HI*ABK:{row['icd_codes'][0].replace('.', '')}~"
+                f"LX*1~SV1*HC:{row['cpt_codes'][0]}*{row['billed_amount']}*UN*1***1~"
+                f"DTP*472*D8*{row['service_date'].replace('-', '')}~"
+            )
+        f.write("SE*1*0001~GE*1*1~IEA*1*000000001~\n")
+
+
+WRITERS = {"csv": (write_csv, ".csv"), "ndjson": (write_ndjson, ".ndjson"), "x12": (write_x12, ".837")}
+
+
+def bench_import(fmt: str, path: Path, workdir: Path, batch_size: int):
+    store = SQLiteClaimsStore(str(workdir / f"{fmt}.db"))
+    with open_text(str(path)) as stream, open(workdir / f"{fmt}.errors.ndjson", "w") as errors:
+        result = import_claims(stream, fmt, store, error_report=errors, batch_size=batch_size)
+    return {
+        "file_mb": round(path.stat().st_size / 1e6, 1),
+        "rows": result.rows,
+        "accepted": result.accepted,
+        "rejected": result.rejected,
+        "elapsed_s": result.elapsed_s,
+        "claims_per_hour": result.claims_per_hour,
+        # Process high-water mark: stays flat as --claims grows when parsing is streamed
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def bench_per_claim(path: Path, workdir: Path, limit: int):
+    """Old path: one validation and one single-row write per claim."""
+    store = SQLiteClaimsStore(str(workdir / "per_claim.db"))
+    rows = 0
+    start = time.perf_counter()
+    with open_text(str(path)) as stream:
+        for _, fields in read_csv(stream):
+            try:
+                store.upsert(ClaimInput.model_validate(fields))
+            except ValueError:
+                pass
+            rows += 1
+            if rows >= limit:
+                break
+    elapsed = time.perf_counter() - start
+    return {"rows": rows, "elapsed_s": round(elapsed, 3), "claims_per_hour": round(rows / elapsed * 3600)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--claims", type=int, default=200000)
+    parser.add_argument("--invalid-every", type=int, default=100, help="Make every Nth row invalid (0: none)")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--per-claim-rows", type=int, default=20000, help="Rows for the per-claim baseline")
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="claim-import-bench-"))
+    report = {"claims": args.claims, "formats": {}}
+    for fmt, (write, suffix) in WRITERS.items():
+        path = workdir / f"claims{suffix}"
+        write(path, args.claims, args.invalid_every)
+        report["formats"][fmt] = bench_import(fmt, path, workdir, args.batch_size)
+    report["per_claim_baseline"] = bench_per_claim(workdir / "claims.csv", workdir, args.per_claim_rows)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Claims store benchmark: bulk insert and cursor-paginated list throughput.
+
+Inserts synthetic claims into a fresh SQLite (WAL) store, then pages through
+them unfiltered, by payer, provider and service month, and reports rows/s and page latency:
+
+    python -m backend.benchmarks.claims_store --claims 1000000
+"""
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from shared.schemas import ClaimInput
+from backend.db.claims_store import ClaimFilter, SQLiteClaimsStore, encode_cursor
+from backend.benchmarks.synthetic import PAYERS, PROCEDURES, DIAGNOSES
+from backend.benchmarks.triage_tiers import percentile
+
+
+def synthetic_claims(n: int, seed: int = 13):
+    rng = random.Random(seed)
+    start = date(2024, 1, 1)
+    npis = [f"{1000000000 + i}" for i in range(2000)]
+    for i in range(n):
+        code, _ = rng.choice(PROCEDURES)
+        yield ClaimInput(
+            claim_id=f"CLM-{i:08d}",
+            patient_id=f"P-{rng.randint(1, n // 3 + 1)}",
+            cpt_codes=[code],
+            icd_codes=[rng.choice(DIAGNOSES)],
+            service_date=start + timedelta(days=rng.randint(0, 364)),
+            payer=rng.choice(PAYERS),
+            provider_npi=rng.choice(npis),
+            billed_amount=round(rng.uniform(20, 5000), 2),
+        )
+
+
+def page_through(store, filters, page_size, max_pages):
+    latencies, rows, cursor = [], 0, None
+    start = time.perf_counter()
+    for _ in range(max_pages):
+        t = time.perf_counter()
+        page, cursor = store.list(limit=page_size, cursor=cursor, filters=filters)
+        latencies.append((time.perf_counter() - t) * 1000)
+        rows += len(page)
+        if cursor is None:
+            break
+    elapsed = time.perf_counter() - start
+    return {
+        "pages": len(latencies),
+        "rows_per_s": round(rows / elapsed, 1),
+        "page_p50_ms": round(percentile(latencies, 50), 3),
+        "page_p95_ms": round(percentile(latencies, 95), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--claims", type=int, default=1000000)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--max-pages", type=int, default=2000)
+    parser.add_argument("--db", default="", help="Database path (default: a temporary file)")
+    args = parser.parse_args()
+
+    path = args.db or str(Path(tempfile.mkdtemp(prefix="claims-bench-")) / "claims.db")
+    store = SQLiteClaimsStore(path)
+
+    start = time.perf_counter()
+    written = store.bulk_insert(synthetic_claims(args.claims), batch_size=args.batch_size)
+    insert_s = time.perf_counter() - start
+
+    # Deep pages: start halfway through to show keyset pages do not slow down with depth
+    deep_cursor = None
+    if args.claims > 2 * args.page_size:
+        deep_cursor = encode_cursor(args.claims // 2)
+
+    t = time.perf_counter()
+    store.list(limit=args.page_size, cursor=deep_cursor)
+    deep_page_ms = (time.perf_counter() - t) * 1000
+
+    t = time.perf_counter()
+    total = store.count()
+    count_ms = (time.perf_counter() - t) * 1000
+
+    report = {
+        "claims": written,
+        "insert_s": round(insert_s, 2),
+        "insert_rows_per_s": round(written / insert_s, 1),
+        "db_mb": round(Path(path).stat().st_size / 1e6, 1),
+        "count_all_ms": round(count_ms, 2),
+        "deep_page_ms": round(deep_page_ms, 3),
+        "list": {
+            "unfiltered": page_through(store, None, args.page_size, args.max_pages),
+            "payer": page_through(store, ClaimFilter(payer=PAYERS[0]), args.page_size, args.max_pages),
+            "provider_npi": page_through(store, ClaimFilter(provider_npi="1000000007"), args.page_size, args.max_pages),
+            "service_month": page_through(
+                store, ClaimFilter(service_date_from=date(2024, 3, 1), service_date_to=date(2024, 3, 31)),
+                args.page_size, args.max_pages
+            ),
+        },
+        "total": total,
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
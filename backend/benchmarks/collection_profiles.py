@@ -0,0 +1,145 @@
+"""
+Qdrant collection profile benchmark: memory, recall@k and latency per profile.
+
+Needs a real Qdrant server; local mode ignores quantization and HNSW settings:
+
+    docker run -p 6333:6333 qdrant/qdrant
+    QDRANT_URL=http://localhost:6333 python -m backend.benchmarks.collection_profiles --points 200000
+    python -m backend.benchmarks.collection_profiles --estimate-only --points 1000000
+
+Each profile gets its own throwaway collection loaded with the same random unit
+vectors. Recall@k is measured against exact NumPy top-k. Memory is reported as
+the server's resident-memory growth (from /metrics, when exposed) and as an
+estimate of RAM-resident vectors, quantized codes and HNSW links.
+--estimate-only prints just that estimate and needs no server.
+"""
+import argparse
+import json
+import sys
+import time
+import urllib.request
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.config import settings
+from backend.rag.collection_profiles import PROFILES, create_collection, get_profile, search_params
+from backend.benchmarks.synthetic import random_unit_vectors
+from backend.benchmarks.triage_tiers import percentile
+
+
+def resident_bytes(url: str) -> Optional[int]:
+    """Server RSS from the Prometheus endpoint, if available."""
+    try:
+        with urllib.request.urlopen(url.rstrip("/") + "/metrics", timeout=5) as resp:
+            for line in resp.read().decode().splitlines():
+                if line.startswith("memory_resident_bytes"):
+                    return int(float(line.split()[-1]))
+    except Exception:
+        return None
+    return None
+
+
+def estimated_ram_bytes(profile, n: int, dim: int) -> int:
+    ram = 0
+    if not profile.on_disk_vectors:
+        ram += n * dim * 4
+    if profile.quantization == "scalar" and profile.quantization_always_ram:
+        ram += n * dim
+    elif profile.quantization == "product" and profile.quantization_always_ram:
+        ram += n * dim * 4 // 16
+    if not profile.hnsw_on_disk:
+        # Level-0 links dominate: 2*m neighbours of 4 bytes per point
+        ram += n * profile.hnsw_m * 2 * 4
+    return ram
+
+
+def wait_until_indexed(client, name: str, timeout_s: float = 1800):
+    from qdrant_client.models import CollectionStatus
+
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout_s:
+        if client.get_collection(name).status == CollectionStatus.GREEN:
+            return time.perf_counter() - start
+        time.sleep(1)
+    raise TimeoutError(f"collection {name} not indexed after {timeout_s}s")
+
+
+def bench_profile(client, profile, vectors, queries, truth, k, url):
+    from qdrant_client.models import PointStruct
+
+    name = f"bench_profile_{profile.name}"
+    client.delete_collection(name)
+    rss_before = resident_bytes(url)
+
+    create_collection(client, name, profile, vectors.shape[1])
+    start = time.perf_counter()
+    for offset in range(0, len(vectors), 1024):
+        batch = vectors[offset:offset + 1024]
+        client.upsert(name, points=[
+            PointStruct(id=offset + i, vector=v.tolist(), payload={}) for i, v in enumerate(batch)
+        ], wait=False)
+    upload_s = time.perf_counter() - start
+    index_s = wait_until_indexed(client, name)
+    rss_after = resident_bytes(url)
+
+    params = search_params(profile)
+    latencies, hits = [], 0
+    for q, expected in zip(queries, truth):
+        start = time.perf_counter()
+        result = client.search(name, query_vector=q.tolist(), limit=k, search_params=params)
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += len({p.id for p in result} & set(expected.tolist()))
+
+    client.delete_collection(name)
+    return {
+        "upload_s": round(upload_s, 2),
+        "index_s": round(index_s, 2),
+        f"recall@{k}": round(hits / (len(queries) * k), 4),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "estimated_ram_mb": round(estimated_ram_bytes(profile, len(vectors), vectors.shape[1]) / 1e6, 1),
+        "server_rss_delta_mb": round((rss_after - rss_before) / 1e6, 1) if rss_before and rss_after else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=settings.EMBEDDING_DIM)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=6)
+    parser.add_argument("--profiles", default=",".join(PROFILES))
+    parser.add_argument("--url", default=settings.QDRANT_URL)
+    parser.add_argument("--estimate-only", action="store_true", help="Print the RAM estimate per profile without a server")
+    args = parser.parse_args()
+    if args.estimate_only:
+        print(json.dumps({"points": args.points, "dim": args.dim, "estimated_ram_mb": {
+            name: round(estimated_ram_bytes(get_profile(name, apply_overrides=False), args.points, args.dim) / 1e6, 1)
+            for name in args.profiles.split(",")
+        }}, indent=2))
+        return
+    if not args.url:
+        parser.error("a Qdrant server is required: pass --url or set QDRANT_URL")
+
+    from qdrant_client import QdrantClient
+
+    client = QdrantClient(url=args.url, api_key=settings.QDRANT_API_KEY or None, timeout=120)
+    vectors = random_unit_vectors(args.points, args.dim)
+    queries = random_unit_vectors(args.queries, args.dim, seed=5)
+    scores = queries @ vectors.T
+    truth = np.argpartition(-scores, args.k - 1, axis=1)[:, :args.k]
+
+    report = {}
+    for name in args.profiles.split(","):
+        report[name] = bench_profile(client, get_profile(name, apply_overrides=False), vectors, queries, truth, args.k, args.url)
+        print(f"✓ {name} done", file=sys.stderr)
+
+    print(json.dumps({"points": args.points, "dim": args.dim, "queries": args.queries, "profiles": report}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Embedding backend benchmark: encode throughput and retrieval-ranking agreement.
+
+Compares each backend against the PyTorch SentenceTransformer baseline on a
+synthetic policy corpus. Export the ONNX models first:
+
+    python -m backend.rag.embeddings export model_cache/onnx
+    python -m backend.benchmarks.embedding_backends --docs 2000 --threads 2
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.config import settings
+from backend.rag.embeddings import LocalEmbeddings, OnnxEmbeddings
+from backend.benchmarks.synthetic import synthetic_chunks, synthetic_queries
+
+
+def top_k(doc_vectors: np.ndarray, query_vectors: np.ndarray, k: int) -> np.ndarray:
+    scores = query_vectors @ doc_vectors.T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def ranking_agreement(baseline: np.ndarray, candidate: np.ndarray) -> dict:
+    """Overlap@k and exact top-1 agreement of candidate rankings vs the baseline."""
+    k = baseline.shape[1]
+    overlap = np.mean([len(set(b) & set(c)) / k for b, c in zip(baseline, candidate)])
+    return {f"overlap@{k}": round(float(overlap), 4), "top1_agreement": round(float(np.mean(baseline[:, 0] == candidate[:, 0])), 4)}
+
+
+def bench_backend(encoder, docs, queries, k):
+    start = time.perf_counter()
+    doc_vectors = np.asarray(encoder.embed_documents(docs), dtype=np.float32)
+    encode_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    query_vectors = np.asarray([encoder.embed_query(q) for q in queries], dtype=np.float32)
+    query_s = time.perf_counter() - start
+
+    return {
+        "docs_per_s": round(len(docs) / encode_s, 1),
+        "query_ms": round(query_s * 1000 / len(queries), 3),
+    }, top_k(doc_vectors, query_vectors, k)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=6)
+    parser.add_argument("--threads", type=int, default=settings.EMBEDDING_THREADS)
+    parser.add_argument("--onnx-dir", default=settings.EMBEDDING_ONNX_DIR)
+    args = parser.parse_args()
+
+    docs = [c["text"] for c in synthetic_chunks(args.docs)]
+    queries = [q["query"] for q in synthetic_queries(args.queries)]
+
+    factories = {
+        "torch": lambda: LocalEmbeddings(threads=args.threads),
+        "onnx": lambda: OnnxEmbeddings(args.onnx_dir, quantized=False, threads=args.threads),
+        "onnx-int8": lambda: OnnxEmbeddings(args.onnx_dir, quantized=True, threads=args.threads),
+    }
+
+    report, baseline = {}, None
+    for name, factory in factories.items():
+        try:
+            start = time.perf_counter()
+            encoder = factory()
+            load_s = time.perf_counter() - start
+        except Exception as e:
+            report[name] = {"error": str(e)}
+            continue
+
+        stats, ranking = bench_backend(encoder, docs, queries, args.k)
+        stats["load_s"] = round(load_s, 3)
+        if baseline is None:
+            baseline = ranking
+        else:
+            stats.update(ranking_agreement(baseline, ranking))
+        report[name] = stats
+
+    print(json.dumps({"docs": args.docs, "queries": args.queries, "threads": args.threads, "backends": report}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Embedding sidecar benchmark: memory and query throughput for N workers that
+each load their own model versus N workers sharing one sidecar.
+
+Every worker is a separate process (as under uvicorn --workers N) issuing
+concurrent embed_query calls from a few threads. Reported memory is the sum
+of resident set sizes of all processes involved, including the sidecar:
+
+    python -m backend.benchmarks.embedding_sidecar --workers 4 --backend onnx
+    python -m backend.benchmarks.embedding_sidecar --workers 4 --backend synthetic --model-mb 90
+
+The "synthetic" backend needs no model download: a hashed token table of
+--model-mb megabytes plus MiniLM-sized feed-forward layers stands in for the transformer, so the
+memory and batching effects can be measured on any machine.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.config import settings
+from backend.benchmarks.synthetic import synthetic_queries
+from backend.benchmarks.triage_tiers import percentile
+
+
+class SyntheticModel:
+    """
+    Model-shaped encoder: hashed token embeddings (the RAM) and per-token
+    feed-forward layers sized like MiniLM's (the compute, ~20 MFLOP per token).
+    """
+
+    backend_name = "synthetic"
+    model_name = "synthetic"
+
+    def __init__(self, model_mb: float, dim: int, layers: int = 6):
+        rng = np.random.default_rng(0)
+        rows = max(1, int(model_mb * 1024 * 1024 / (dim * 4)))
+        self.table = rng.standard_normal((rows, dim), dtype=np.float32)
+        self.layers = [
+            (rng.standard_normal((dim, 4 * dim), dtype=np.float32) / np.sqrt(dim),
+             rng.standard_normal((4 * dim, dim), dtype=np.float32) / np.sqrt(4 * dim))
+            for _ in range(layers)
+        ]
+        self.dimension = dim
+        self.max_seq_length = settings.EMBEDDING_MAX_SEQ_LENGTH
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        ids = [[zlib.crc32(w.encode()) % len(self.table) for w in t.lower().split()] or [0] for t in texts]
+        # All tokens of the batch go through each layer as one matrix, as in a padded transformer batch
+        tokens = self.table[[i for row in ids for i in row]]
+        for up, down in self.layers:
+            tokens = tokens + np.maximum(tokens @ up, 0) @ down
+        bounds = np.cumsum([0] + [len(row) for row in ids])
+        pooled = np.stack([tokens[a:b].mean(axis=0) for a, b in zip(bounds[:-1], bounds[1:])])
+        pooled /= np.linalg.norm(pooled, axis=1, keepdims=True)
+        return pooled.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+def make_encoder(backend: str, model_mb: float):
+    if backend == "synthetic":
+        return SyntheticModel(model_mb, settings.EMBEDDING_DIM)
+    from backend.rag.embeddings import get_embeddings
+    return get_embeddings(backend)
+
+
+def rss_mb(pid="self") -> float:
+    """Current resident set size of a process (Linux /proc)."""
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def _server(socket_path: str, backend: str, model_mb: float, ready):
+    import asyncio
+    from backend.rag.embedding_server import serve
+
+    encoder = make_encoder(backend, model_mb)
+    asyncio.run(serve(socket_path, encoder, ready))
+
+
+def _worker(index: int, mode: str, socket_path: str, backend: str, model_mb: float,
+            queries: int, threads: int, barrier, results):
+    start = time.perf_counter()
+    if mode == "sidecar":
+        from backend.rag.embedding_server import EmbeddingClient
+        encoder = EmbeddingClient(socket_path)
+    else:
+        encoder = make_encoder(backend, model_mb)
+    load_s = time.perf_counter() - start
+    texts = [q["query"] for q in synthetic_queries(queries, seed=index)]
+
+    def timed(text):
+        t = time.perf_counter()
+        encoder.embed_query(text)
+        return (time.perf_counter() - t) * 1000
+
+    encoder.embed_query("warm-up")
+    barrier.wait()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        latencies = list(pool.map(timed, texts))
+    results.put({
+        "load_s": load_s, "wall_s": time.perf_counter() - start, "latencies_ms": latencies, "rss_mb": rss_mb(),
+    })
+
+
+def run_mode(mode: str, args) -> Dict:
+    ctx = multiprocessing.get_context("spawn")
+    socket_path = os.path.join(tempfile.mkdtemp(), "embed.sock")
+    server = None
+    server_load_s = 0.0
+    if mode == "sidecar":
+        ready = ctx.Event()
+        start = time.perf_counter()
+        server = ctx.Process(target=_server, args=(socket_path, args.backend, args.model_mb, ready), daemon=True)
+        server.start()
+        if not ready.wait(300):
+            raise RuntimeError("Embedding server did not start")
+        server_load_s = time.perf_counter() - start
+
+    barrier, results = ctx.Barrier(args.workers), ctx.Queue()
+    workers = [
+        ctx.Process(target=_worker, args=(
+            i, mode, socket_path, args.backend, args.model_mb, args.queries, args.threads, barrier, results
+        ))
+        for i in range(args.workers)
+    ]
+    for w in workers:
+        w.start()
+    reports = [results.get(timeout=600) for _ in workers]
+    server_rss = rss_mb(server.pid) if server is not None else 0.0
+    for w in workers:
+        w.join()
+    if server is not None:
+        server.terminate()
+        server.join()
+
+    latencies = [ms for r in reports for ms in r["latencies_ms"]]
+    wall = max(r["wall_s"] for r in reports)
+    return {
+        "mode": mode,
+        "workers": args.workers,
+        "total_rss_mb": round(sum(r["rss_mb"] for r in reports) + server_rss, 1),
+        "worker_rss_mb": round(sum(r["rss_mb"] for r in reports) / len(reports), 1),
+        "sidecar_rss_mb": round(server_rss, 1),
+        "model_load_s": round(server_load_s + max(r["load_s"] for r in reports), 2),
+        "queries_per_s": round(len(latencies) / wall, 1),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=4, help="Concurrent requests per worker")
+    parser.add_argument("--queries", type=int, default=500, help="Queries per worker")
+    parser.add_argument("--backend", default=settings.EMBEDDING_BACKEND, help="torch, onnx, onnx-int8 or synthetic")
+    parser.add_argument("--model-mb", type=float, default=90.0, help="Size of the synthetic model")
+    parser.add_argument("--modes", default="per-worker,sidecar")
+    args = parser.parse_args()
+
+    results = [run_mode(mode, args) for mode in args.modes.split(",")]
+    print(json.dumps({"backend": args.backend, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Hierarchical retrieval benchmark: policy-routed vs flat chunk search.
+
+Builds synthetic corpora of 1k, 10k and 100k policies in the numpy engine and
+compares a flat top-k over every chunk with two-level retrieval (rank the
+section or policy summaries, then search only the chunks of the top policies):
+
+    python -m backend.benchmarks.hierarchical_retrieval
+    python -m backend.benchmarks.hierarchical_retrieval --sizes 1000 10000 --top-policies 3
+
+Vectors are synthetic and clustered like policy embeddings: each policy has
+a topic, each section a direction near it, each chunk a point near its
+section. A share of every policy is boilerplate (common policy language, one
+shared direction), and each query is a noisy copy of one policy-specific
+chunk with some of that boilerplate mixed in, as claim queries
+("coverage for ... under ... policy") are. recall@k is the share of queries
+whose target chunk is in the top k, on_policy@k the share of the top k from
+the target's own policy, and overlap@k compares results with flat search.
+"""
+import argparse
+import gc
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.config import settings
+from backend.rag.hierarchical import HierarchicalVectorStore
+from backend.rag.numpy_store import NumpyVectorStore
+from backend.benchmarks.synthetic import PAYERS
+from backend.benchmarks.triage_tiers import percentile
+
+BATCH_POLICIES = 5000
+
+
+def _unit(matrix: np.ndarray) -> np.ndarray:
+    return matrix / np.linalg.norm(matrix, axis=-1, keepdims=True)
+
+
+def _noise(rng, shape, scale: float) -> np.ndarray:
+    return rng.standard_normal(shape, dtype=np.float32) * (scale / np.sqrt(shape[-1]))
+
+
+def build_corpus(store: NumpyVectorStore, levels, args, rng):
+    """Import args.policies synthetic policies; returns query target vectors, their chunk ids and the boilerplate direction."""
+    sections, per_section = args.sections, args.chunks // args.sections
+    boilerplate = _unit(rng.standard_normal(args.dim, dtype=np.float32))
+    targets, target_ids = [], []
+    next_id = 0
+    for first in range(0, args.policies, BATCH_POLICIES):
+        n = min(BATCH_POLICIES, args.policies - first)
+        topics = _unit(rng.standard_normal((n, 1, 1, args.dim), dtype=np.float32))
+        section_dirs = _unit(topics + _noise(rng, (n, sections, 1, args.dim), args.spread))
+        vectors = _unit(section_dirs + _noise(rng, (n, sections, per_section, args.dim), args.spread))
+        is_boilerplate = rng.random((n, sections, per_section)) < args.boilerplate
+        vectors[is_boilerplate] = _unit(boilerplate + _noise(rng, (int(is_boilerplate.sum()), args.dim), args.spread))
+        vectors = vectors.reshape(-1, args.dim)
+        is_boilerplate = is_boilerplate.reshape(-1)
+
+        ids, payloads = [], []
+        for p in range(first, first + n):
+            tag = f"policy-{p}@v1"
+            metadata = {"policy_id": f"policy-{p}", "payer": PAYERS[p % len(PAYERS)], "version_tag": tag}
+            for s in range(sections):
+                section = {**metadata, "section_path": f"Section {s}"}
+                for _ in range(per_section):
+                    ids.append(next_id)
+                    payloads.append({"text": "", "full_metadata": section})
+                    next_id += 1
+        store.import_points(ids, vectors, payloads)
+        for level in levels.values():
+            level.write_summaries(vectors, payloads)
+
+        specific = np.flatnonzero(~is_boilerplate)
+        picks = rng.choice(specific, size=min(len(specific), args.queries), replace=False)
+        targets.append(vectors[picks])
+        target_ids.extend(ids[i] for i in picks)
+    return np.concatenate(targets), np.asarray(target_ids), boilerplate
+
+
+def measure(search, queries, target_ids, k, per_policy, flat_results=None):
+    latencies, hits, on_policy, results = [], 0, [], []
+    for query, target in zip(queries, target_ids):
+        start = time.perf_counter()
+        found = [int(h["chunk_id"]) for h in search(query.tolist(), limit=k)]
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += int(target) in found
+        on_policy.append(sum(f // per_policy == target // per_policy for f in found) / k)
+        results.append(found)
+    stats = {
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        f"recall@{k}": round(hits / len(queries), 4),
+        # Share of the top k from the target's own policy (the rest is other policies' text)
+        f"on_policy@{k}": round(float(np.mean(on_policy)), 4),
+    }
+    if flat_results is not None:
+        stats[f"overlap@{k}_vs_flat"] = round(float(np.mean([
+            len(set(a) & set(b)) / k for a, b in zip(results, flat_results)
+        ])), 4)
+    return stats, results
+
+
+def run_size(n_policies: int, args):
+    args.policies = n_policies
+    rng = np.random.default_rng(args.seed)
+    chunks = NumpyVectorStore(dim=args.dim, encoder=object(), collection_name="chunks",
+                              initial_capacity=n_policies * args.chunks)
+    levels = {
+        level: HierarchicalVectorStore(
+            chunks, NumpyVectorStore(dim=args.dim, encoder=object(), collection_name=f"summaries-{level}"),
+            top_policies=args.top_policies, summary_level=level,
+        )
+        for level in args.levels
+    }
+    start = time.perf_counter()
+    targets, target_ids, boilerplate = build_corpus(chunks, levels, args, rng)
+    build_s = time.perf_counter() - start
+
+    pick = rng.choice(len(targets), size=args.queries, replace=False)
+    queries = _unit(targets[pick] + _noise(rng, (args.queries, args.dim), args.query_noise)
+                    + args.query_boilerplate * boilerplate)
+    target_ids = target_ids[pick]
+
+    per_policy = (args.chunks // args.sections) * args.sections
+    flat, flat_results = measure(chunks.search_by_vector, queries, target_ids, args.k, per_policy)
+    report = {"policies": n_policies, "chunks": chunks.count(), "build_s": round(build_s, 1), "flat": flat}
+    for level, store in levels.items():
+        route_hits = np.mean([
+            f"policy-{int(t) // per_policy}" in store.route(q.tolist()) for q, t in zip(queries, target_ids)
+        ])
+        stats, _ = measure(store.search_by_vector, queries, target_ids, args.k, per_policy, flat_results)
+        report[f"hierarchical_{level}"] = {
+            "summaries": store.summaries.count(), "route_recall": round(float(route_hits), 4), **stats
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="Corpus sizes in policies")
+    parser.add_argument("--chunks", type=int, default=8, help="Chunks per policy")
+    parser.add_argument("--sections", type=int, default=4, help="Sections per policy")
+    parser.add_argument("--levels", nargs="+", choices=["section", "policy"], default=["section", "policy"])
+    parser.add_argument("--top-policies", type=int, default=settings.HIERARCHICAL_TOP_POLICIES)
+    parser.add_argument("--k", type=int, default=6)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=settings.EMBEDDING_DIM)
+    parser.add_argument("--spread", type=float, default=0.7, help="Noise of sections around topics and chunks around sections")
+    parser.add_argument("--boilerplate", type=float, default=0.25, help="Share of chunks that are boilerplate")
+    parser.add_argument("--query-noise", type=float, default=1.2)
+    parser.add_argument("--query-boilerplate", type=float, default=0.6, help="Weight of boilerplate in each query")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    reports = []
+    for size in args.sizes:
+        reports.append(run_size(size, args))
+        print(json.dumps(reports[-1]), file=sys.stderr)
+        gc.collect()
+    print(json.dumps({"k": args.k, "chunks_per_policy": args.chunks, "sections": args.sections,
+                      "top_policies": args.top_policies, "runs": reports}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
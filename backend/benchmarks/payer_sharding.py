@@ -0,0 +1,97 @@
+"""
+Payer sharding benchmark: small-payer search latency with and without sharding.
+
+Builds a skewed corpus where one national payer owns most chunks, then times
+payer-filtered searches for the national payer and for a small regional payer,
+against a single collection and against per-payer shards. Also times the
+unfiltered cross-shard fan-out:
+
+    python -m backend.benchmarks.payer_sharding --chunks 50000 --engine qdrant
+    python -m backend.benchmarks.payer_sharding --chunks 500000 --engine numpy
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.config import settings
+from backend.benchmarks.synthetic import random_unit_vectors
+from backend.benchmarks.triage_tiers import percentile
+
+# Share of chunks per payer: one national payer dominates
+PAYER_MIX = [("Medicare", 0.80), ("UHC", 0.15), ("Tufts Health", 0.04), ("Harvard Pilgrim", 0.01)]
+
+
+def skewed_payloads(n: int):
+    payloads, start = [], 0
+    for payer, share in PAYER_MIX:
+        count = int(n * share) if payer != PAYER_MIX[-1][0] else n - start
+        for i in range(start, start + count):
+            payloads.append({"text": f"chunk {i}", "full_metadata": {"policy_id": f"{payer}-{i // 50}", "payer": payer}})
+        start += count
+    return payloads
+
+
+def make_factory(engine: str, dim: int):
+    if engine == "numpy":
+        from backend.rag.numpy_store import NumpyVectorStore
+        return lambda name: NumpyVectorStore(dim=dim, encoder=object(), collection_name=name)
+
+    from qdrant_client import QdrantClient
+    from backend.rag.vector_store import VectorStore
+
+    client = QdrantClient(":memory:")
+    return lambda name: VectorStore(collection_name=f"bench__{name}", client=client, encoder=object())
+
+
+def time_searches(store, queries, filter_metadata, limit):
+    latencies = []
+    for q in queries:
+        start = time.perf_counter()
+        store.search_by_vector(q.tolist(), limit=limit, filter_metadata=filter_metadata)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return {"p50_ms": round(percentile(latencies, 50), 3), "p95_ms": round(percentile(latencies, 95), 3)}
+
+
+def main():
+    from backend.rag.sharding import ShardedVectorStore
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--engine", choices=["qdrant", "numpy"], default="qdrant")
+    parser.add_argument("--dim", type=int, default=settings.EMBEDDING_DIM)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=6)
+    args = parser.parse_args()
+
+    vectors = random_unit_vectors(args.chunks, args.dim)
+    payloads = skewed_payloads(args.chunks)
+    ids = list(range(args.chunks))
+    queries = random_unit_vectors(args.queries, args.dim, seed=5)
+
+    factory = make_factory(args.engine, args.dim)
+    single = factory("single")
+    single.import_points(ids, vectors, payloads, batch_size=1024)
+    sharded = ShardedVectorStore(factory, encoder=object(), payer_groups={})
+    sharded.import_points(ids, vectors, payloads, batch_size=1024)
+
+    report = {}
+    for payer, share in PAYER_MIX:
+        filt = {"payer": payer}
+        report[payer] = {
+            "share": share,
+            "single_collection": time_searches(single, queries, filt, args.limit),
+            "sharded": time_searches(sharded, queries, filt, args.limit),
+        }
+    report["unfiltered"] = {
+        "single_collection": time_searches(single, queries, None, args.limit),
+        "sharded_fan_out": time_searches(sharded, queries, None, args.limit),
+    }
+    print(json.dumps({"engine": args.engine, "chunks": args.chunks, "dim": args.dim, "payers": report}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
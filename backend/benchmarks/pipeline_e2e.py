@@ -0,0 +1,342 @@
+"""
+Offline end-to-end audit benchmark: run_rag_pipeline against a stub LLM.
+
+Synthetic policies are embedded with a hashing encoder into an in-process
+NumPy vector store, and every LLM call goes to a deterministic stub with a
+log-normal latency, a configurable decision mix and a verifier that rejects
+a share of drafts (exercising the refine loop). No API keys or servers are
+involved, so runs are comparable across commits:
+
+    python -m backend.benchmarks.pipeline_e2e --claims 200 --concurrency 1,8,32 --out e2e.json
+    python -m backend.benchmarks.pipeline_e2e --baseline e2e.json --tolerance 0.15
+
+With --baseline the run exits with status 1 when throughput drops or p95
+latency grows by more than the tolerance at any shared concurrency level.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import platform
+import random
+import re
+import resource
+import subprocess
+import sys
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import numpy as np
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from backend.config import settings
+from backend.benchmarks.claims_store import synthetic_claims
+from backend.benchmarks.synthetic import synthetic_chunks
+from backend.benchmarks.triage_tiers import percentile
+
+# Prompt markers identifying which graph node is calling (see the prompts in rag/pipeline.py).
+# First match wins: the refiner prompt also names the Audit Integrity Officer.
+STAGES = [
+    ("refine", "found errors in your previous draft"),
+    ("verify", "Audit Integrity Officer"),
+    ("score", "Final Audit Quality Scorer"),
+    ("fast_audit", "check your own work"),
+    ("audit", "Lead Auditor"),
+]
+POLICY_HEADER = re.compile(r"--- POLICY: (.*?) \| SECTION: .*? ---\n([^\n]*)")
+# Relative changes beyond --tolerance that count as a regression
+REGRESSION_CHECKS = {"throughput_per_s": -1, "p95_ms": 1}
+
+
+class HashingEncoder:
+    """Bag-of-words feature hashing: deterministic, model-free embeddings for offline runs."""
+
+    def __init__(self, dim: int):
+        self.dim = dim
+
+    def _embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in re.findall(r"[a-z0-9.]+", text.lower()):
+            vector[zlib.crc32(word.encode()) % self.dim] += 1.0
+        return vector
+
+    def embed_documents(self, texts: List[str]) -> np.ndarray:
+        return np.stack([self._embed(t) for t in texts]) if texts else np.zeros((0, self.dim), dtype=np.float32)
+
+    def embed_query(self, text: str) -> np.ndarray:
+        return self._embed(text)
+
+
+class StubChatModel(BaseChatModel):
+    """
+    Chat model that answers each audit prompt with a well-formed JSON response.
+    Every draw (latency, decision, verifier verdict) is seeded from the prompt
+    text, so a claim gets the same path at any concurrency.
+    """
+
+    latency_ms: float = 50.0
+    latency_sigma: float = 0.5
+    reject_rate: float = 0.3
+    decisions: Dict[str, float] = {"APPROVE": 0.6, "DENY": 0.2, "PEND_INFO": 0.2}
+    seed: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def _rng(self, prompt: str) -> random.Random:
+        digest = hashlib.blake2b(f"{self.seed}:{prompt}".encode(), digest_size=8).digest()
+        return random.Random(int.from_bytes(digest, "big"))
+
+    def _draft(self, prompt: str, rng: random.Random) -> Dict[str, Any]:
+        match = POLICY_HEADER.search(prompt)
+        title, text = match.groups() if match else ("Unspecified Policy", "")
+        claim = re.search(r"- ID: (\S+)", prompt)
+        decision = rng.choices(list(self.decisions), weights=list(self.decisions.values()))[0]
+        return {
+            "decision": decision,
+            "confidence": round(rng.uniform(0.5, 0.95), 2),
+            "explanation": f"Stub audit of {claim.group(1) if claim else 'claim'} ({rng.getrandbits(32):08x})",
+            "rules": [{
+                "rule_text": text[:120],
+                "satisfied": decision == "APPROVE",
+                "explanation": "Criteria compared against the claim codes.",
+                "citation_text": text[:200],
+                "source_policy_title": title,
+            }],
+            "missing_info": ["Supporting documentation"] if decision == "PEND_INFO" else [],
+        }
+
+    def _respond(self, prompt: str, rng: random.Random) -> Dict[str, Any]:
+        stage = next((name for name, marker in STAGES if marker in prompt), "audit")
+        if stage == "verify":
+            rejected = rng.random() < self.reject_rate
+            return {
+                "is_hallucination": rejected,
+                "errors": ["citation_text is not literally in the context"] if rejected else [],
+                "improvement_notes": "Quote the policy text exactly." if rejected else "",
+            }
+        if stage == "score":
+            return {"final_score": round(rng.uniform(0.6, 0.95), 2), "reasoning": "Stub rubric score."}
+        draft = self._draft(prompt, rng)
+        if stage == "fast_audit":
+            draft["self_check_errors"] = ["unsupported citation"] if rng.random() < self.reject_rate else []
+        return draft
+
+    def _result(self, messages, rng: random.Random) -> ChatResult:
+        prompt = "\n".join(str(m.content) for m in messages)
+        content = json.dumps(self._respond(prompt, rng))
+        # ~4 characters per token, the usual English-text estimate
+        usage = {"input_tokens": len(prompt) // 4, "output_tokens": len(content) // 4}
+        usage["total_tokens"] = usage["input_tokens"] + usage["output_tokens"]
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content, usage_metadata=usage))])
+
+    def _delay(self, rng: random.Random) -> float:
+        return self.latency_ms / 1000 * rng.lognormvariate(0.0, self.latency_sigma) if self.latency_ms > 0 else 0.0
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        rng = self._rng("\n".join(str(m.content) for m in messages))
+        time.sleep(self._delay(rng))
+        return self._result(messages, rng)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        rng = self._rng("\n".join(str(m.content) for m in messages))
+        await asyncio.sleep(self._delay(rng))
+        return self._result(messages, rng)
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """'APPROVE=0.6,DENY=0.2' -> {"APPROVE": 0.6, "DENY": 0.2}."""
+    mix = {}
+    for part in spec.split(","):
+        if part.strip():
+            name, _, weight = part.partition("=")
+            mix[name.strip().upper()] = float(weight)
+    return mix
+
+
+def setup_offline(llm: StubChatModel, policies: int, chunks: int, triage: bool, scorer: str):
+    """Point the pipeline at the stub LLM and a freshly built in-process vector store."""
+    from backend import metrics
+    from backend.rag import pipeline, singletons
+    from backend.rag.numpy_store import NumpyVectorStore
+    from backend.rag.token_budget import usage_handler
+
+    settings.GROQ_API_KEY = settings.GROQ_API_KEY or "offline-benchmark"
+    settings.AUDIT_LOG_ENABLED = False
+    settings.RULE_ENGINE_ENABLED = False
+    settings.TRIAGE_ENABLED = triage
+    settings.CONFIDENCE_SCORER = scorer
+    settings.SCORER_RECORD_PATH = ""
+
+    store = NumpyVectorStore(dim=settings.EMBEDDING_DIM, encoder=HashingEncoder(settings.EMBEDDING_DIM))
+    store.add_chunks(synthetic_chunks(chunks, n_policies=policies))
+    singletons._vector_store_instance = store
+
+    llm.callbacks = [metrics.llm_metrics_handler("stub"), usage_handler("stub")]
+    pipeline.get_llm = lambda temperature=0.0: llm
+    pipeline._audit_graph = None
+
+
+async def run_level(claims, concurrency: int, timeout: Optional[float] = None) -> Dict[str, Any]:
+    """Audit every claim with at most `concurrency` in flight; latency, CPU and memory for the run."""
+    from backend.rag.pipeline import run_audit_graph
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    states: List[Dict[str, Any]] = []
+    failures = 0
+
+    async def one(claim):
+        nonlocal failures
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                state = await run_audit_graph(claim, timeout)
+            except Exception as e:
+                failures += 1
+                print(f"Claim {claim.claim_id} failed: {e}")
+                return
+            latencies.append((time.perf_counter() - start) * 1000)
+            states.append(state)
+
+    before = resource.getrusage(resource.RUSAGE_SELF)
+    start = time.perf_counter()
+    await asyncio.gather(*(one(c) for c in claims))
+    wall = time.perf_counter() - start
+    after = resource.getrusage(resource.RUSAGE_SELF)
+
+    cpu = (after.ru_utime - before.ru_utime) + (after.ru_stime - before.ru_stime)
+    done = max(1, len(states))
+    return {
+        "concurrency": concurrency,
+        "claims": len(states),
+        "failures": failures,
+        "wall_s": round(wall, 3),
+        "throughput_per_s": round(len(states) / wall, 2),
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p95_ms": round(percentile(latencies, 95), 1),
+        "p99_ms": round(percentile(latencies, 99), 1),
+        "cpu_ms_per_claim": round(cpu * 1000 / done, 2),
+        "cpu_utilization": round(cpu / wall, 3),
+        # ru_maxrss is KiB on Linux; it is the process peak so far, not per level
+        "peak_rss_mb": round(after.ru_maxrss / 1024, 1),
+        "llm_calls_per_claim": round(sum(s["llm_calls"] for s in states) / done, 2),
+        "refine_rate": round(sum(s["iteration_count"] > 1 for s in states) / done, 3),
+        "deadline_stop_rate": round(sum(bool(s.get("deadline_stopped")) for s in states) / done, 3),
+        "decisions": _count(s["final_audit"].decision.value for s in states),
+    }
+
+
+def _count(values) -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    for value in values:
+        counts[value] = counts.get(value, 0) + 1
+    return dict(sorted(counts.items()))
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Regressions of `current` against `baseline` at the concurrency levels both ran."""
+    base = {r["concurrency"]: r for r in baseline["results"]}
+    regressions = []
+    for row in current["results"]:
+        old = base.get(row["concurrency"])
+        if old is None:
+            continue
+        for metric, direction in REGRESSION_CHECKS.items():
+            if not old[metric]:
+                continue
+            change = (row[metric] - old[metric]) / old[metric]
+            if change * direction > tolerance:
+                regressions.append(
+                    f"concurrency={row['concurrency']} {metric}: {old[metric]} -> {row[metric]} ({change:+.1%})"
+                )
+    return regressions
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=Path(__file__).parent, timeout=5,
+        ).stdout.strip()
+    except Exception:
+        return ""
+
+
+async def run(args) -> Dict[str, Any]:
+    llm = StubChatModel(
+        latency_ms=args.latency_ms, latency_sigma=args.latency_sigma, reject_rate=args.reject_rate,
+        decisions=parse_mix(args.decisions), seed=args.seed,
+    )
+    setup_offline(llm, args.policies, args.chunks, args.triage, args.scorer)
+
+    claims = list(synthetic_claims(args.claims + args.warmup, seed=args.seed))
+    if args.warmup:
+        await run_level(claims[:args.warmup], 1)
+
+    results = []
+    for concurrency in args.concurrency:
+        row = await run_level(claims[args.warmup:], concurrency, args.timeout)
+        print(
+            f"✓ concurrency={concurrency}: {row['throughput_per_s']}/s "
+            f"p50={row['p50_ms']}ms p95={row['p95_ms']}ms p99={row['p99_ms']}ms",
+            file=sys.stderr,
+        )
+        results.append(row)
+
+    return {
+        "benchmark": "pipeline_e2e",
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "config": {
+            key: getattr(args, key) for key in (
+                "claims", "policies", "chunks", "latency_ms", "latency_sigma", "reject_rate",
+                "decisions", "seed", "triage", "scorer", "timeout",
+            )
+        },
+        "results": results,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--claims", type=int, default=100, help="Claims audited per concurrency level")
+    parser.add_argument("--concurrency", type=lambda s: [int(x) for x in s.split(",")], default=[1, 8, 32])
+    parser.add_argument("--policies", type=int, default=40)
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Median stub LLM latency")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="Log-normal spread of the latency")
+    parser.add_argument("--reject-rate", type=float, default=0.3, help="Share of drafts the verifier rejects")
+    parser.add_argument("--decisions", default="APPROVE=0.6,DENY=0.2,PEND_INFO=0.2")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--triage", action="store_true", help="Enable risk triage (fast lane)")
+    parser.add_argument("--scorer", choices=["llm", "local"], default="llm")
+    parser.add_argument("--timeout", type=float, default=None, help="Per-audit deadline (default AUDIT_TIMEOUT_SECONDS)")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--out", help="Write the JSON report here")
+    parser.add_argument("--baseline", help="Previous JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args))
+    print(json.dumps(report, indent=2))
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=2))
+
+    if args.baseline:
+        regressions = compare(report, json.loads(Path(args.baseline).read_text()), args.tolerance)
+        for line in regressions:
+            print(f"✗ Regression: {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
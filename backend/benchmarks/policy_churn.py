@@ -0,0 +1,113 @@
+"""
+Policy churn benchmark: index size and search latency as policies are replaced.
+
+Each round replaces a share of the policies with a new version. "versioned"
+uses the atomic swap (stage, flip, delete old); "no_delete" models the old
+behaviour where deleted/replaced policies were never removed from the store:
+
+    python -m backend.benchmarks.policy_churn --policies 500 --rounds 5 --engine numpy
+    python -m backend.benchmarks.policy_churn --policies 200 --rounds 5 --engine qdrant
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.config import settings
+from backend.rag.versioning import swap_policy_version, version_tag
+from backend.benchmarks.synthetic import PAYERS, random_unit_vectors
+from backend.benchmarks.triage_tiers import percentile
+
+
+def make_store(engine: str, dim: int):
+    if engine == "numpy":
+        from backend.rag.numpy_store import NumpyVectorStore
+        return NumpyVectorStore(dim=dim, encoder=object(), collection_name="churn")
+
+    from qdrant_client import QdrantClient
+    from backend.rag.vector_store import VectorStore
+    return VectorStore(collection_name="churn", client=QdrantClient(":memory:"), encoder=object())
+
+
+class PolicyWriter:
+    """Writes random-vector chunks for a policy version."""
+
+    def __init__(self, dim: int, chunks_per_policy: int):
+        self.dim = dim
+        self.chunks_per_policy = chunks_per_policy
+        self.next_id = 0
+        self.seed = 0
+
+    def points(self, policy_id: str, tag: str):
+        self.seed += 1
+        vectors = random_unit_vectors(self.chunks_per_policy, self.dim, seed=self.seed)
+        ids = list(range(self.next_id, self.next_id + self.chunks_per_policy))
+        self.next_id += self.chunks_per_policy
+        payer = PAYERS[hash(policy_id) % len(PAYERS)]
+        payloads = [
+            {"text": f"{tag} chunk {i}", "full_metadata": {"policy_id": policy_id, "payer": payer, "version_tag": tag}}
+            for i in range(self.chunks_per_policy)
+        ]
+        return ids, vectors, payloads
+
+
+def measure(store, queries, limit):
+    latencies = []
+    for q in queries:
+        start = time.perf_counter()
+        store.search_by_vector(q.tolist(), limit=limit)
+        latencies.append((time.perf_counter() - start) * 1000)
+    stats = {"points": store.count(), "search_p50_ms": round(percentile(latencies, 50), 3)}
+    if hasattr(store, "nbytes"):
+        stats["index_mb"] = round(store.nbytes / 1e6, 2)
+    return stats
+
+
+def run(mode: str, args, queries):
+    store = make_store(args.engine, args.dim)
+    writer = PolicyWriter(args.dim, args.chunks)
+    policies = [f"policy-{i}" for i in range(args.policies)]
+    versions = {p: 1 for p in policies}
+    for p in policies:
+        store.import_points(*writer.points(p, version_tag(p, "v1")))
+
+    rng = random.Random(1)
+    rounds = [{"round": 0, **measure(store, queries, args.limit)}]
+    for r in range(1, args.rounds + 1):
+        start = time.perf_counter()
+        for p in rng.sample(policies, int(len(policies) * args.churn)):
+            versions[p] += 1
+            tag = version_tag(p, f"v{versions[p]}")
+            points = writer.points(p, tag)
+            if mode == "versioned":
+                swap_policy_version(store, p, tag, lambda: store.import_points(*points))
+            else:
+                store.import_points(*points)
+        rounds.append({"round": r, "replace_s": round(time.perf_counter() - start, 3), **measure(store, queries, args.limit)})
+    return rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--engine", choices=["numpy", "qdrant"], default="numpy")
+    parser.add_argument("--policies", type=int, default=500)
+    parser.add_argument("--chunks", type=int, default=40, help="Chunks per policy")
+    parser.add_argument("--churn", type=float, default=0.2, help="Share of policies replaced per round")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--dim", type=int, default=settings.EMBEDDING_DIM)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=6)
+    args = parser.parse_args()
+
+    queries = random_unit_vectors(args.queries, args.dim, seed=5)
+    report = {mode: run(mode, args, queries) for mode in ("versioned", "no_delete")}
+    print(json.dumps({"engine": args.engine, "policies": args.policies, "chunks_per_policy": args.chunks,
+                      "churn": args.churn, "modes": report}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Rule engine coverage: how many claims the compiled rule tables decide locally.
+
+Compiles the seeded Medicare NCD 240.4 policy (plus any extra markdown policies)
+into rule tables offline, then evaluates a claims file without calling the LLM
+or the embedding model:
+
+    python -m backend.benchmarks.rule_coverage claims.jsonl
+    python -m backend.benchmarks.rule_coverage claims.jsonl --policy my_policy.md:policy-id:"Policy Name"
+"""
+import argparse
+import json
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.benchmarks.triage_tiers import load_claims
+from backend.rag.ingestion import IngestionPipeline
+from backend.rag.rules import RuleIndex, evaluate_with_index
+from backend.routers.policies import (
+    DEFAULT_POLICY_ID, DEFAULT_POLICY_TEXT, DEFAULT_POLICY_CODES, DEFAULT_POLICY_DIAGNOSIS_CODES
+)
+
+
+def build_index(extra_policies):
+    index = RuleIndex()
+    # Chunking only: the vector store is never touched
+    pipeline = IngestionPipeline(vector_store=None, rule_index=index)
+    chunks_by_policy = {}
+
+    policies = [(DEFAULT_POLICY_TEXT, DEFAULT_POLICY_ID, "Medicare NCD 240.4 - CPAP for OSA",
+                 DEFAULT_POLICY_CODES, DEFAULT_POLICY_DIAGNOSIS_CODES)]
+    for spec in extra_policies:
+        path, policy_id, name = spec.split(":", 2)
+        policies.append((Path(path).read_text(encoding="utf-8"), policy_id, name, None, None))
+
+    for text, policy_id, name, codes, diagnoses in policies:
+        chunks = pipeline.split_policy_markdown(text, policy_id, name)
+        pipeline.compile_rules(chunks, policy_id, name, codes, diagnoses)
+        chunks_by_policy[policy_id] = chunks
+    return index, chunks_by_policy
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("claims", help="JSON or JSONL file of ClaimInput records")
+    parser.add_argument("--policy", action="append", default=[], help="path.md:policy_id:Policy Name")
+    args = parser.parse_args()
+
+    index, chunks_by_policy = build_index(args.policy)
+    all_chunks = [c for chunks in chunks_by_policy.values() for c in chunks]
+    claims = load_claims(args.claims)
+
+    decisions = Counter()
+    start = time.perf_counter()
+    for claim in claims:
+        chunks = chunks_by_policy.get(claim.policy_id, all_chunks) if claim.policy_id else all_chunks
+        draft, _ = evaluate_with_index(claim, index, chunks)
+        decisions[draft["decision"] if draft else "DEFERRED_TO_LLM"] += 1
+    elapsed = time.perf_counter() - start
+
+    decided = len(claims) - decisions["DEFERRED_TO_LLM"]
+    print(json.dumps({
+        "claims": len(claims),
+        "decided_locally": decided,
+        "local_decision_rate": round(decided / len(claims), 4) if claims else 0.0,
+        "decisions": dict(decisions),
+        "evaluation_ms_per_claim": round(elapsed * 1000 / max(1, len(claims)), 4),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Agreement report: local rubric scorer vs the LLM scorer.
+
+Record a dataset by running audits with SCORER_RECORD_PATH set (and
+CONFIDENCE_SCORER=llm), then replay it through the local scorer:
+
+    python -m backend.benchmarks.scorer_agreement scoring_samples.jsonl
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.rag.scoring import compute_local_confidence
+
+# Rubric bands from SCORER_PROMPT (lower bound, label)
+BANDS = [(0.95, "1.0"), (0.8, "0.8-0.9"), (0.5, "0.5-0.7"), (0.0, "<0.5")]
+
+
+def rubric_band(score: float) -> str:
+    for lower, label in BANDS:
+        if score >= lower:
+            return label
+    return BANDS[-1][1]
+
+
+def load_samples(path: str):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def build_report(samples) -> dict:
+    rows = []
+    for s in samples:
+        chunks = [{"score": score} for score in s.get("retrieved_scores", [])]
+        local, reasoning = compute_local_confidence(
+            draft=s["audit_draft"],
+            verification=s.get("verification"),
+            iteration_count=s.get("iteration_count", 1),
+            retrieved_chunks=chunks,
+            context=s.get("context", ""),
+        )
+        llm = float(s.get("llm_score", 0.0))
+        rows.append({"claim_id": s.get("claim_id"), "llm": llm, "local": local, "reasoning": reasoning})
+
+    n = len(rows)
+    if not n:
+        return {"samples": 0}
+
+    errors = [abs(r["llm"] - r["local"]) for r in rows]
+    band_matches = sum(rubric_band(r["llm"]) == rubric_band(r["local"]) for r in rows)
+    confusion: dict = {}
+    for r in rows:
+        key = f"{rubric_band(r['llm'])} -> {rubric_band(r['local'])}"
+        confusion[key] = confusion.get(key, 0) + 1
+
+    worst = sorted(rows, key=lambda r: abs(r["llm"] - r["local"]), reverse=True)[:5]
+    return {
+        "samples": n,
+        "mean_abs_error": round(sum(errors) / n, 4),
+        "within_0.1": round(sum(e <= 0.1 for e in errors) / n, 4),
+        "band_agreement": round(band_matches / n, 4),
+        "band_confusion (llm -> local)": dict(sorted(confusion.items())),
+        "largest_disagreements": worst,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("dataset", help="JSONL file recorded via SCORER_RECORD_PATH")
+    args = parser.parse_args()
+    print(json.dumps(build_report(load_samples(args.dataset)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Cold-start benchmark: per-import cost and warm-up phase breakdown.
+
+Every measurement runs in a fresh interpreter so nothing is cached in-process:
+
+    python -m backend.benchmarks.startup
+    python -m backend.benchmarks.startup --repeat 3
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent.parent
+
+HEAVY_IMPORTS = [
+    "backend.main",
+    "langchain_core.prompts",
+    "langgraph.graph",
+    "langchain_groq",
+    "langchain_google_genai",
+    "qdrant_client",
+    "sentence_transformers",
+    "torch",
+    "onnxruntime",
+    "pdfplumber",
+    "backend.rag.pipeline",
+]
+
+PHASES_SCRIPT = """
+import json, time
+t0 = time.perf_counter()
+import backend.main
+t_import = time.perf_counter() - t0
+from backend.services.warmup import run_warmup
+state = run_warmup()
+print("__RESULT__" + json.dumps({"import_app_s": round(t_import, 4), **state.snapshot()}))
+"""
+
+
+def _run(code: str) -> str:
+    proc = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=False
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr else "subprocess failed")
+    return proc.stdout
+
+
+def import_cost(module: str) -> float:
+    out = _run(f"import time; t=time.perf_counter(); import {module}; print(time.perf_counter()-t)")
+    return float(out.strip().splitlines()[-1])
+
+
+def app_import_breakdown(top: int = 12) -> dict:
+    """Top packages by cumulative import time when importing backend.main."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import backend.main"],
+        cwd=ROOT, capture_output=True, text=True, check=False
+    )
+    by_package = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = [p.strip() for p in line.split("|")]
+        if not cumulative.isdigit():
+            continue
+        package = name.strip().split(".")[0]
+        # Only first-level entries for each package, to avoid double counting
+        depth = len(line.split("|")[2]) - len(line.split("|")[2].lstrip())
+        if depth <= 3:
+            by_package[package] = max(by_package.get(package, 0), int(cumulative))
+    ranked = sorted(by_package.items(), key=lambda kv: kv[1], reverse=True)[:top]
+    return {pkg: round(us / 1e6, 4) for pkg, us in ranked}
+
+
+def warmup_phases() -> dict:
+    out = _run(PHASES_SCRIPT)
+    for line in out.splitlines():
+        if line.startswith("__RESULT__"):
+            return json.loads(line[len("__RESULT__"):])
+    raise RuntimeError("warm-up produced no result")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    imports = {}
+    for module in HEAVY_IMPORTS:
+        try:
+            imports[module] = round(statistics.median(import_cost(module) for _ in range(args.repeat)), 4)
+        except RuntimeError as e:
+            imports[module] = f"unavailable: {e}"
+
+    phases = warmup_phases()
+    import_s = phases["import_app_s"]
+    total = phases["phases_s"].get("total")
+    report = {
+        "isolated_import_s": imports,
+        "app_import_breakdown_s": app_import_breakdown(),
+        "warmup": phases,
+        # Fast start serves once the app is imported; blocking start waits for the full warm-up
+        "time_to_serve_s": {
+            "fast_start": import_s,
+            "blocking_start": round(import_s + total, 4) if total is not None else None,
+        },
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
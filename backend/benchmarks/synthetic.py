@@ -0,0 +1,79 @@
+"""
+Synthetic policy corpora and claim queries shared by the benchmarks.
+Deterministic for a given seed so runs are comparable.
+"""
+import random
+from typing import Any, Dict, List
+
+PAYERS = ["Medicare", "Medicaid", "Aetna", "UHC", "Cigna", "Humana", "BCBS", "Kaiser"]
+PROCEDURES = [
+    ("E0601", "CPAP device"), ("95810", "attended polysomnography"), ("95806", "home sleep test"),
+    ("77080", "bone density scan"), ("27447", "total knee arthroplasty"), ("93000", "electrocardiogram"),
+    ("97110", "therapeutic exercise"), ("99213", "office visit"), ("G0438", "annual wellness visit"),
+    ("J1100", "dexamethasone injection"), ("70551", "MRI brain"), ("43239", "upper GI endoscopy"),
+]
+DIAGNOSES = ["G47.33", "M81.0", "M17.11", "I10", "E11.9", "J06.9", "R07.9", "K21.9", "F32.9", "M54.5"]
+METRICS = ["AHI", "RDI", "T-score", "HbA1c", "BMI", "LVEF", "ODI", "PHQ-9"]
+TEMPLATES = [
+    "{proc} ({code}) is covered under {payer} when {metric} >= {value} and the beneficiary has diagnosis {dx}.",
+    "Coverage of {proc} is initially limited to a {weeks}-week period for patients with {dx}.",
+    "The provider of {proc} must document a clinical evaluation and {metric} results prior to use.",
+    "{payer} does not cover {proc} ({code}) when {metric} is below {value} unless symptoms are documented.",
+    "Prior authorization is required for {code} {proc}; records must include {metric} and diagnosis {dx}.",
+    "Repeat {proc} is covered no more than once every {weeks} weeks when {metric} changes by {value} or more.",
+]
+
+
+def synthetic_policy_sentence(rng: random.Random, payer: str = "") -> str:
+    code, proc = rng.choice(PROCEDURES)
+    return rng.choice(TEMPLATES).format(
+        proc=proc, code=code, payer=payer or rng.choice(PAYERS), dx=rng.choice(DIAGNOSES),
+        metric=rng.choice(METRICS), value=rng.randint(1, 40), weeks=rng.choice([4, 8, 12, 26, 52]),
+    )
+
+
+def synthetic_chunks(n: int, n_policies: int = 0, seed: int = 7, sentences: int = 4) -> List[Dict[str, Any]]:
+    """Generate `n` chunk records in the IngestionPipeline output shape."""
+    rng = random.Random(seed)
+    n_policies = n_policies or max(1, n // 20)
+    chunks = []
+    for i in range(n):
+        p = i % n_policies
+        payer = PAYERS[p % len(PAYERS)]
+        policy_id = f"synthetic-policy-{p}"
+        chunks.append({
+            "chunk_id": i,
+            "text": " ".join(synthetic_policy_sentence(rng, payer) for _ in range(sentences)),
+            "source": f"Synthetic Policy {p}",
+            "section": "General",
+            "metadata": {
+                "policy_id": policy_id,
+                "policy_name": f"Synthetic Policy {p}",
+                "payer": payer,
+                "section_path": "General",
+                "page": 1,
+            },
+        })
+    return chunks
+
+
+def synthetic_queries(n: int, seed: int = 11) -> List[Dict[str, Any]]:
+    """Claim-shaped retrieval queries with payer filters."""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(n):
+        code, _ = rng.choice(PROCEDURES)
+        payer = rng.choice(PAYERS)
+        dx = rng.choice(DIAGNOSES)
+        queries.append({"query": f"coverage for {code} and {dx} under {payer} policy", "payer": payer})
+    return queries
+
+
+def random_unit_vectors(n: int, dim: int, seed: int = 3):
+    """Random L2-normalized float32 vectors, for engine benchmarks that skip the encoder."""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((n, dim), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
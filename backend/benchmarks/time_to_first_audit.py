@@ -0,0 +1,97 @@
+"""
+Time-to-first-audit benchmark for the three vector store start modes:
+
+    empty     in-memory store, default policy re-embedded at startup
+    persist   QDRANT_PATH on-disk store reopened from a previous run
+    snapshot  in-memory store loaded from a prebuilt VECTOR_SNAPSHOT_PATH
+
+Each mode runs in a fresh interpreter and is timed from process start to the
+first retrieval for a claim. The LLM calls that follow are identical across
+modes, so they are left out.
+
+    python -m backend.benchmarks.time_to_first_audit --repeat 3
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent.parent
+
+FIRST_RETRIEVAL_SCRIPT = """
+import json, time
+t0 = time.perf_counter()
+from backend.services.warmup import run_warmup
+state = run_warmup()
+from shared.schemas import ClaimInput
+from backend.rag.pipeline import retrieve_context
+claim = ClaimInput(
+    claim_id="BENCH-1", patient_id="P-1", cpt_codes=["E0601"], icd_codes=["G47.33"],
+    service_date="2024-01-15", payer="Medicare", provider_npi="1234567890",
+    billed_amount=250.0, notes="CPAP for obstructive sleep apnea"
+)
+context = retrieve_context(claim)
+print("__RESULT__" + json.dumps({
+    "first_retrieval_s": round(time.perf_counter() - t0, 4),
+    "chunks": len(context["retrieved_chunks"]),
+    **state.snapshot(),
+}))
+"""
+
+
+def _run(env_overrides: dict) -> dict:
+    env = {**os.environ, "FAST_START": "false", "QDRANT_URL": "", **env_overrides}
+    proc = subprocess.run(
+        [sys.executable, "-c", FIRST_RETRIEVAL_SCRIPT], cwd=ROOT, env=env,
+        capture_output=True, text=True, check=False
+    )
+    for line in proc.stdout.splitlines():
+        if line.startswith("__RESULT__"):
+            return json.loads(line[len("__RESULT__"):])
+    raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr else "no result")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="ttfa-"))
+    try:
+        qdrant_path = str(workdir / "qdrant")
+        snapshot_path = str(workdir / "snapshot")
+
+        # Prepare the persisted store and the snapshot once, outside the timings
+        _run({"QDRANT_PATH": qdrant_path, "VECTOR_SNAPSHOT_PATH": ""})
+        subprocess.run(
+            [sys.executable, "-m", "backend.rag.snapshot", "build", snapshot_path],
+            cwd=ROOT, env={**os.environ, "QDRANT_URL": "", "QDRANT_PATH": ""},
+            capture_output=True, text=True, check=True
+        )
+
+        modes = {
+            "empty": {"QDRANT_PATH": "", "VECTOR_SNAPSHOT_PATH": ""},
+            "persist": {"QDRANT_PATH": qdrant_path, "VECTOR_SNAPSHOT_PATH": ""},
+            "snapshot": {"QDRANT_PATH": "", "VECTOR_SNAPSHOT_PATH": snapshot_path},
+        }
+
+        report = {}
+        for name, env in modes.items():
+            runs = [_run(env) for _ in range(args.repeat)]
+            report[name] = {
+                "first_retrieval_s": round(statistics.median(r["first_retrieval_s"] for r in runs), 4),
+                "chunks": runs[-1]["chunks"],
+                "phases_s": runs[-1]["phases_s"],
+            }
+        print(json.dumps({"repeat": args.repeat, "modes": report}, indent=2))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
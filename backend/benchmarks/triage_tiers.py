@@ -0,0 +1,89 @@
+"""
+Per-tier report for risk-tiered triage: LLM calls per claim and p50/p95 latency.
+
+Runs the audit graph over a claims file (JSON list or JSONL of ClaimInput)
+against the configured LLM providers, after seeding the default policy:
+
+    TRIAGE_ENABLED=true python -m backend.benchmarks.triage_tiers claims.jsonl
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from shared.schemas import ClaimInput
+
+
+def load_claims(path: str) -> List[ClaimInput]:
+    text = Path(path).read_text(encoding="utf-8").strip()
+    if text.startswith("["):
+        rows = json.loads(text)
+    else:
+        rows = [json.loads(line) for line in text.splitlines() if line.strip()]
+    return [ClaimInput(**row) for row in rows]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def summarize(samples: List[Dict]) -> Dict:
+    report = {}
+    for tier in sorted({s["tier"] for s in samples}):
+        rows = [s for s in samples if s["tier"] == tier]
+        latencies = [s["latency_s"] for s in rows]
+        calls = [s["llm_calls"] for s in rows]
+        report[tier] = {
+            "claims": len(rows),
+            "llm_calls_per_claim": round(sum(calls) / len(rows), 2),
+            "max_llm_calls": max(calls),
+            "p50_latency_s": round(percentile(latencies, 50), 3),
+            "p95_latency_s": round(percentile(latencies, 95), 3),
+        }
+    return report
+
+
+async def run(claims: List[ClaimInput]) -> List[Dict]:
+    from backend.rag.pipeline import run_audit_graph
+
+    samples = []
+    for claim in claims:
+        start = time.perf_counter()
+        try:
+            state = await run_audit_graph(claim)
+        except Exception as e:
+            print(f"Claim {claim.claim_id} failed: {e}")
+            continue
+        samples.append({
+            "claim_id": claim.claim_id,
+            "tier": state["audit_tier"],
+            "reason": state["triage_reason"],
+            "llm_calls": state["llm_calls"],
+            "latency_s": time.perf_counter() - start,
+        })
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("claims", help="JSON or JSONL file of ClaimInput records")
+    args = parser.parse_args()
+
+    from backend.routers.policies import seed_default_policy
+    seed_default_policy()
+
+    samples = asyncio.run(run(load_claims(args.claims)))
+    print(json.dumps(summarize(samples), indent=2))
+
+
+if __name__ == "__main__":
+    main()
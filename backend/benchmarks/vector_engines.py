@@ -0,0 +1,110 @@
+"""
+Vector engine benchmark: NumPy in-process index vs Qdrant local mode.
+
+Both engines get the same random unit vectors and payer/policy payloads and
+are queried with search_by_vector, so encoder time is excluded. Reports load
+time and p50/p95 query latency, unfiltered and with a payer filter:
+
+    python -m backend.benchmarks.vector_engines --sizes 10000,100000,1000000
+    python -m backend.benchmarks.vector_engines --sizes 10000 --qdrant-max 10000
+
+Qdrant local mode is skipped above --qdrant-max chunks (it keeps every point as
+a Python object and takes minutes to load at 1M).
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.config import settings
+from backend.benchmarks.synthetic import PAYERS, random_unit_vectors
+from backend.benchmarks.triage_tiers import percentile
+
+
+def synthetic_payloads(n: int, n_policies: int = 0):
+    n_policies = n_policies or max(1, n // 20)
+    payloads = []
+    for i in range(n):
+        p = i % n_policies
+        payloads.append({
+            "text": f"synthetic chunk {i}",
+            "source": f"Synthetic Policy {p}",
+            "section": "General",
+            "full_metadata": {"policy_id": f"synthetic-policy-{p}", "payer": PAYERS[p % len(PAYERS)]},
+        })
+    return payloads
+
+
+def make_numpy(dtype: str, dim: int):
+    from backend.rag.numpy_store import NumpyVectorStore
+    return NumpyVectorStore(dim=dim, dtype=dtype, encoder=object())
+
+
+def make_qdrant(dim: int):
+    from qdrant_client import QdrantClient
+    from qdrant_client.models import Distance, VectorParams
+    from backend.rag.vector_store import VectorStore
+
+    # Bypass __init__ so no encoder is loaded
+    store = VectorStore.__new__(VectorStore)
+    store.client = QdrantClient(":memory:")
+    store.collection_name = "bench"
+    store.client.create_collection("bench", vectors_config=VectorParams(size=dim, distance=Distance.COSINE))
+    return store
+
+
+def bench_engine(store, vectors, payloads, queries, limit):
+    ids = list(range(len(vectors)))
+    start = time.perf_counter()
+    store.import_points(ids, vectors, payloads, batch_size=1024)
+    load_s = time.perf_counter() - start
+
+    report = {"load_s": round(load_s, 3)}
+    for label, payer in (("unfiltered", None), ("payer_filter", PAYERS[0])):
+        latencies = []
+        for q in queries:
+            start = time.perf_counter()
+            store.search_by_vector(q.tolist(), limit=limit, filter_metadata={"payer": payer} if payer else None)
+            latencies.append((time.perf_counter() - start) * 1000)
+        report[label] = {"p50_ms": round(percentile(latencies, 50), 3), "p95_ms": round(percentile(latencies, 95), 3)}
+    if hasattr(store, "nbytes"):
+        report["index_mb"] = round(store.nbytes / 1e6, 1)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--dim", type=int, default=settings.EMBEDDING_DIM)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--limit", type=int, default=6)
+    parser.add_argument("--qdrant-max", type=int, default=100000)
+    args = parser.parse_args()
+
+    queries = random_unit_vectors(args.queries, args.dim, seed=5)
+    report = {}
+    for size in [int(s) for s in args.sizes.split(",")]:
+        vectors = random_unit_vectors(size, args.dim)
+        payloads = synthetic_payloads(size)
+        engines = {
+            "numpy-float32": lambda: make_numpy("float32", args.dim),
+            "numpy-float16": lambda: make_numpy("float16", args.dim),
+        }
+        if size <= args.qdrant_max:
+            engines["qdrant-local"] = lambda: make_qdrant(args.dim)
+
+        report[size] = {}
+        for name, factory in engines.items():
+            report[size][name] = bench_engine(factory(), vectors, payloads, queries, args.limit)
+        print(f"✓ {size} chunks done", file=sys.stderr)
+
+    print(json.dumps({"dim": args.dim, "queries": args.queries, "limit": args.limit, "sizes": report}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
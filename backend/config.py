@@ -26,10 +26,65 @@ class Settings:
     # Google (Gemini Fallback)
     GOOGLE_API_KEY: str = os.getenv("GOOGLE_API_KEY", "")
 
+    # Embeddings: backend is "torch", "onnx" or "onnx-int8"
+    EMBEDDING_BACKEND: str = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+    EMBEDDING_MODEL: str = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+    EMBEDDING_DIM: int = int(os.getenv("EMBEDDING_DIM", "384"))
+    # Token limit for the onnx backends when the export records none (torch reads the model's own)
+    EMBEDDING_MAX_SEQ_LENGTH: int = int(os.getenv("EMBEDDING_MAX_SEQ_LENGTH", "256"))
+    EMBEDDING_THREADS: int = int(os.getenv("EMBEDDING_THREADS", "0"))  # 0 = library default
+    EMBEDDING_BATCH_SIZE: int = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+    EMBEDDING_ONNX_DIR: str = os.getenv("EMBEDDING_ONNX_DIR", "model_cache/onnx")
+    # Shared embedding sidecar (backend/rag/embedding_server.py): when the socket is set,
+    # workers send encode requests there instead of loading their own model
+    EMBEDDING_SERVER_SOCKET: str = os.getenv("EMBEDDING_SERVER_SOCKET", "")
+    EMBEDDING_SERVER_MAX_BATCH: int = int(os.getenv("EMBEDDING_SERVER_MAX_BATCH", "64"))
+    EMBEDDING_SERVER_BATCH_WAIT_MS: float = float(os.getenv("EMBEDDING_SERVER_BATCH_WAIT_MS", "2"))
+    EMBEDDING_SERVER_TIMEOUT_SECONDS: float = float(os.getenv("EMBEDDING_SERVER_TIMEOUT_SECONDS", "30"))
+
+    # Policy chunking: "chars" windows, or "tokens" windows measured with the embedding
+    # model's tokenizer and sized to EMBEDDING_MAX_SEQ_LENGTH so no chunk is truncated
+    CHUNKING_MODE: str = os.getenv("CHUNKING_MODE", "chars").lower()
+    CHUNK_SIZE_CHARS: int = int(os.getenv("CHUNK_SIZE_CHARS", "1000"))
+    CHUNK_OVERLAP_CHARS: int = int(os.getenv("CHUNK_OVERLAP_CHARS", "200"))
+    CHUNK_OVERLAP_TOKENS: int = int(os.getenv("CHUNK_OVERLAP_TOKENS", "32"))
+
     # Qdrant
     QDRANT_URL: str = os.getenv("QDRANT_URL", "")
     QDRANT_API_KEY: str = os.getenv("QDRANT_API_KEY", "")
     QDRANT_COLLECTION: str = os.getenv("QDRANT_COLLECTION", "policy_chunks")
+    # Collection profile: default | scalar | product | on_disk | low_latency
+    # (see backend/rag/collection_profiles.py); the QDRANT_* values below override it when set
+    QDRANT_PROFILE: str = os.getenv("QDRANT_PROFILE", "default")
+    QDRANT_QUANTIZATION: str = os.getenv("QDRANT_QUANTIZATION", "")  # none | scalar | product
+    QDRANT_RESCORE: str = os.getenv("QDRANT_RESCORE", "")
+    QDRANT_OVERSAMPLING: str = os.getenv("QDRANT_OVERSAMPLING", "")
+    QDRANT_ON_DISK_VECTORS: str = os.getenv("QDRANT_ON_DISK_VECTORS", "")
+    QDRANT_ON_DISK_PAYLOAD: str = os.getenv("QDRANT_ON_DISK_PAYLOAD", "")
+    QDRANT_HNSW_M: str = os.getenv("QDRANT_HNSW_M", "")
+    QDRANT_HNSW_EF_CONSTRUCT: str = os.getenv("QDRANT_HNSW_EF_CONSTRUCT", "")
+    QDRANT_SEARCH_EF: str = os.getenv("QDRANT_SEARCH_EF", "")
+    # Vector engine: "qdrant" (server or local mode) or "numpy" (in-process exact index)
+    VECTOR_ENGINE: str = os.getenv("VECTOR_ENGINE", "qdrant").lower()
+    # numpy engine only: float32 or float16 (half the memory, upcast per block at query time)
+    VECTOR_DTYPE: str = os.getenv("VECTOR_DTYPE", "float32")
+    # numpy engine only: compact once this fraction of rows is tombstoned
+    VECTOR_COMPACT_RATIO: float = float(os.getenv("VECTOR_COMPACT_RATIO", "0.25"))
+    # One collection per payer (or payer group); queries are routed to the claim's shard
+    VECTOR_SHARDING: bool = os.getenv("VECTOR_SHARDING", "false").lower() == "true"
+    # Payer groups sharing a shard, e.g. "national=Medicare,UHC;northeast=Tufts,Harvard Pilgrim"
+    VECTOR_PAYER_GROUPS: str = os.getenv("VECTOR_PAYER_GROUPS", "")
+    # Parallel shard searches for cross-shard fan-out
+    VECTOR_FANOUT_WORKERS: int = int(os.getenv("VECTOR_FANOUT_WORKERS", "4"))
+    # Two-level retrieval: rank per-policy (or per-section) summary vectors first, then search
+    # chunks only within the top HIERARCHICAL_TOP_POLICIES policies (backend/rag/hierarchical.py)
+    HIERARCHICAL_RETRIEVAL: bool = os.getenv("HIERARCHICAL_RETRIEVAL", "false").lower() == "true"
+    HIERARCHICAL_TOP_POLICIES: int = int(os.getenv("HIERARCHICAL_TOP_POLICIES", "5"))
+    HIERARCHICAL_SUMMARY_LEVEL: str = os.getenv("HIERARCHICAL_SUMMARY_LEVEL", "policy").lower()
+    # On-disk local mode when QDRANT_URL is unset (empty = in-memory)
+    QDRANT_PATH: str = os.getenv("QDRANT_PATH", "")
+    # Prebuilt snapshot imported into an empty store at startup instead of re-ingesting
+    VECTOR_SNAPSHOT_PATH: str = os.getenv("VECTOR_SNAPSHOT_PATH", "")
 
     # R2
     R2_ACCOUNT_ID: str = os.getenv("R2_ACCOUNT_ID", "")
@@ -38,14 +93,99 @@ class Settings:
     R2_BUCKET_NAME: str = os.getenv("R2_BUCKET_NAME", "claimaudit-policies")
     R2_ENDPOINT: str = os.getenv("R2_ENDPOINT", "")
 
+    # Uploaded policy files, stored by content hash: "local" (BLOB_STORE_PATH) or "r2" (the bucket above)
+    BLOB_STORE: str = os.getenv("BLOB_STORE", "local").lower()
+    BLOB_STORE_PATH: str = os.getenv("BLOB_STORE_PATH", "data/blobs")
+    BLOB_CHUNK_BYTES: int = int(os.getenv("BLOB_CHUNK_BYTES", str(1024 * 1024)))
+
     # Upstash Redis
     UPSTASH_REDIS_URL: str = os.getenv("UPSTASH_REDIS_URL", "")
     UPSTASH_REDIS_TOKEN: str = os.getenv("UPSTASH_REDIS_TOKEN", "")
 
+    # Shared cache: "memory" (per process), "redis" (shared by every instance) or "none".
+    # REDIS_URL takes precedence over the Upstash endpoint. TTLs are in seconds; 0 disables that cache.
+    CACHE_BACKEND: str = os.getenv("CACHE_BACKEND", "memory").lower()
+    REDIS_URL: str = os.getenv("REDIS_URL", "")
+    CACHE_PREFIX: str = os.getenv("CACHE_PREFIX", "claimaudit:")
+    CACHE_MAX_ENTRIES: int = int(os.getenv("CACHE_MAX_ENTRIES", "50000"))
+    CACHE_TIMEOUT_SECONDS: float = float(os.getenv("CACHE_TIMEOUT_SECONDS", "0.5"))
+    CACHE_EMBEDDING_TTL_SECONDS: int = int(os.getenv("CACHE_EMBEDDING_TTL_SECONDS", "86400"))
+    CACHE_RETRIEVAL_TTL_SECONDS: int = int(os.getenv("CACHE_RETRIEVAL_TTL_SECONDS", "3600"))
+    # Off by default: identical resubmitted claims would otherwise skip the LLM entirely
+    CACHE_AUDIT_TTL_SECONDS: int = int(os.getenv("CACHE_AUDIT_TTL_SECONDS", "0"))
+    # Audit requests per client per minute, counted in the shared cache (0 = unlimited)
+    AUDIT_RATE_LIMIT_PER_MINUTE: int = int(os.getenv("AUDIT_RATE_LIMIT_PER_MINUTE", "0"))
+    # Reverse proxies in front of the app that append to X-Forwarded-For (e.g. 1 behind Cloud Run).
+    # 0 = use the socket peer; client-supplied X-Forwarded-For entries are never trusted
+    TRUSTED_PROXY_HOPS: int = int(os.getenv("TRUSTED_PROXY_HOPS", "0"))
+
+    # Claims storage: "sqlite" (local WAL file shared by workers) or "supabase" (Postgres table)
+    CLAIMS_STORE: str = os.getenv("CLAIMS_STORE", "sqlite").lower()
+    CLAIMS_DB_PATH: str = os.getenv("CLAIMS_DB_PATH", "data/claims.db")
+    CLAIMS_PAGE_SIZE: int = int(os.getenv("CLAIMS_PAGE_SIZE", "50"))
+
+    # Bulk claim import: rows validated/written per batch, where error reports go,
+    # and how many imported claims go into each audit batch when queued
+    IMPORT_BATCH_SIZE: int = int(os.getenv("IMPORT_BATCH_SIZE", "5000"))
+    IMPORT_ERROR_DIR: str = os.getenv("IMPORT_ERROR_DIR", "data/imports")
+    IMPORT_AUDIT_BATCH_SIZE: int = int(os.getenv("IMPORT_AUDIT_BATCH_SIZE", "50"))
+
+    # Audit work queue: "none" (audits run in the API process), "sqlite" (single node) or
+    # "redis" (REDIS_URL/Upstash). Workers: python -m backend.services.worker
+    WORK_QUEUE_BACKEND: str = os.getenv("WORK_QUEUE_BACKEND", "none").lower()
+    WORK_QUEUE_DB_PATH: str = os.getenv("WORK_QUEUE_DB_PATH", "data/work_queue.db")
+    # A leased job not completed within this time is handed to another worker; keep it above AUDIT_TIMEOUT_SECONDS
+    WORK_QUEUE_VISIBILITY_SECONDS: float = float(os.getenv("WORK_QUEUE_VISIBILITY_SECONDS", "300"))
+    WORK_QUEUE_MAX_ATTEMPTS: int = int(os.getenv("WORK_QUEUE_MAX_ATTEMPTS", "3"))
+    WORK_QUEUE_RESULT_TTL_SECONDS: int = int(os.getenv("WORK_QUEUE_RESULT_TTL_SECONDS", "604800"))
+    WORKER_CONCURRENCY: int = int(os.getenv("WORKER_CONCURRENCY", "4"))
+    WORKER_POLL_SECONDS: float = float(os.getenv("WORKER_POLL_SECONDS", "1.0"))
+
+    # Audit log: append-only record of every audit result ("sqlite" or "supabase")
+    AUDIT_LOG_ENABLED: bool = os.getenv("AUDIT_LOG_ENABLED", "true").lower() == "true"
+    AUDIT_LOG_STORE: str = os.getenv("AUDIT_LOG_STORE", "sqlite").lower()
+    AUDIT_LOG_DB_PATH: str = os.getenv("AUDIT_LOG_DB_PATH", "data/audit_log.db")
+
+    # Prometheus metrics: expose /metrics (collectors are always recorded; they are cheap)
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+    # Fast start: serve immediately, seed + warm the model in the background (gate on /api/ready)
+    FAST_START: bool = os.getenv("FAST_START", "false").lower() == "true"
+
     # App limits
     MAX_TOKENS: int = int(os.getenv("MAX_TOKENS", "4096"))
     MAX_RETRIEVAL_CHUNKS: int = int(os.getenv("MAX_RETRIEVAL_CHUNKS", "10"))
+    # Per-audit deadlines (0 = none): interactive /audit requests and each /audit/batch cohort.
+    # Near the deadline refinement is skipped, scoring goes local, or a partial PEND_INFO is returned.
     AUDIT_TIMEOUT_SECONDS: int = int(os.getenv("AUDIT_TIMEOUT_SECONDS", "30"))
+    BATCH_AUDIT_TIMEOUT_SECONDS: int = int(os.getenv("BATCH_AUDIT_TIMEOUT_SECONDS", "120"))
+
+    # Token budgets (0 = unlimited): per audit and per /audit/batch request.
+    # Past the budget the refine loop stops and the current draft is finalized.
+    AUDIT_TOKEN_BUDGET: int = int(os.getenv("AUDIT_TOKEN_BUDGET", "0"))
+    BATCH_TOKEN_BUDGET: int = int(os.getenv("BATCH_TOKEN_BUDGET", "0"))
+    # USD per million tokens, "provider=prompt/completion,..."
+    LLM_PRICES: str = os.getenv("LLM_PRICES", "gemini=0.10/0.40,groq=0.59/0.79")
+
+    # Confidence scoring: "llm" (SCORER_PROMPT round trip) or "local" (deterministic rubric)
+    CONFIDENCE_SCORER: str = os.getenv("CONFIDENCE_SCORER", "llm").lower()
+    # Optional JSONL path; when set, LLM scorer inputs/outputs are recorded for agreement reports
+    SCORER_RECORD_PATH: str = os.getenv("SCORER_RECORD_PATH", "")
+
+    # Risk-tiered triage: low-risk claims take a single-call fast lane
+    TRIAGE_ENABLED: bool = os.getenv("TRIAGE_ENABLED", "false").lower() == "true"
+    TRIAGE_FAST_MAX_AMOUNT: float = float(os.getenv("TRIAGE_FAST_MAX_AMOUNT", "500"))
+    TRIAGE_FULL_LOOP_PAYERS: str = os.getenv("TRIAGE_FULL_LOOP_PAYERS", "")  # comma-separated
+    TRIAGE_HIGH_RISK_CODES: str = os.getenv("TRIAGE_HIGH_RISK_CODES", "")  # comma-separated CPT/ICD
+    TRIAGE_MIN_RETRIEVAL_SCORE: float = float(os.getenv("TRIAGE_MIN_RETRIEVAL_SCORE", "0.5"))
+
+    # Cohort batch auditing: claims sharing a retrieval signature share one auditor call
+    BATCH_GROUP_SIZE: int = int(os.getenv("BATCH_GROUP_SIZE", "8"))
+    BATCH_CONCURRENCY: int = int(os.getenv("BATCH_CONCURRENCY", "4"))
+
+    # Compiled policy rules: decide mechanically covered claims without the LLM
+    RULE_ENGINE_ENABLED: bool = os.getenv("RULE_ENGINE_ENABLED", "false").lower() == "true"
+    RULE_INDEX_PATH: str = os.getenv("RULE_INDEX_PATH", "")  # optional JSON persistence
 
     @property
     def has_supabase(self) -> bool:
@@ -61,7 +201,7 @@ class Settings:
 
     @property
     def has_redis(self) -> bool:
-        return bool(self.UPSTASH_REDIS_URL)
+        return bool(self.REDIS_URL or self.UPSTASH_REDIS_URL)
 
     @property
     def has_r2(self) -> bool:
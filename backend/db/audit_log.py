@@ -0,0 +1,438 @@
+"""
+Audit Log.
+Append-only record of every AuditOutput with the chunk IDs it was grounded on
+and how long each graph node took, so results can be re-fetched and decision
+distributions analysed without re-running the LLM calls:
+- SQLiteAuditLog: local file in WAL mode; triggers reject UPDATE and DELETE
+- SupabaseAuditLog: Postgres table, aggregations run as SQL functions (RPC)
+Rows are indexed by claim_id, decision, payer and created_at, and all
+aggregations (decision counts, node timings, token spend) are GROUP BY
+queries executed by the database.
+"""
+import json
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+from shared.schemas import AuditOutput
+
+# Bucket -> length of the ISO timestamp prefix that identifies it
+BUCKETS = {"hour": 13, "day": 10, "month": 7}
+SPEND_GROUPS = ("payer", "prompt_version")
+
+
+class AuditRecord(BaseModel):
+    """One audit log entry."""
+    audit: AuditOutput
+    payer: str
+    audit_tier: str = ""
+    llm_calls: int = 0
+    chunk_ids: List[str] = Field(default_factory=list)
+    node_timings_ms: Dict[str, float] = Field(default_factory=dict)
+
+
+def record_from_state(state: Dict[str, Any]) -> AuditRecord:
+    """Build a log entry from a finished audit graph state."""
+    return AuditRecord(
+        audit=state["final_audit"],
+        payer=state["claim"].payer,
+        audit_tier=state.get("audit_tier") or "",
+        llm_calls=state.get("llm_calls") or 0,
+        chunk_ids=[str(c.get("chunk_id")) for c in state.get("retrieved_chunks") or []],
+        node_timings_ms={k: round(v, 3) for k, v in (state.get("node_timings") or {}).items()},
+    )
+
+
+class AuditLog(ABC):
+    """Storage interface for audit results. Entries are never updated or deleted."""
+
+    @abstractmethod
+    def append(self, record: AuditRecord) -> AuditRecord:
+        """Store a new entry. Fails if the audit_id was already logged."""
+
+    @abstractmethod
+    def get(self, audit_id: str) -> Optional[AuditRecord]:
+        """Fetch an entry by audit ID."""
+
+    @abstractmethod
+    def for_claim(self, claim_id: str, limit: int = 50) -> List[AuditRecord]:
+        """Entries for a claim, newest first."""
+
+    @abstractmethod
+    def decision_counts(
+        self,
+        bucket: str = "day",
+        payer: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> List[Dict[str, Any]]:
+        """Number of audits per (time bucket, payer, decision)."""
+
+    @abstractmethod
+    def node_timings(
+        self, since: Optional[datetime] = None, until: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        """Per graph node: runs, mean and max milliseconds."""
+
+    @abstractmethod
+    def spend(
+        self, group_by: str = "payer", since: Optional[datetime] = None, until: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        """Audits, prompt/completion tokens and cost per payer or per prompt_version."""
+
+
+def _check_bucket(bucket: str):
+    if bucket not in BUCKETS:
+        raise ValueError(f"Unknown bucket '{bucket}'. Available: {sorted(BUCKETS)}")
+
+
+def _check_group(group_by: str):
+    if group_by not in SPEND_GROUPS:
+        raise ValueError(f"Unknown spend grouping '{group_by}'. Available: {list(SPEND_GROUPS)}")
+
+
+def _usage_columns(audit: AuditOutput) -> Tuple[int, int, float]:
+    usage = audit.usage
+    return (usage.prompt_tokens, usage.completion_tokens, usage.cost_usd) if usage else (0, 0, 0.0)
+
+
+class SQLiteAuditLog(AuditLog):
+    """SQLite in WAL mode with one connection per thread."""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS audit_log (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        audit_id TEXT NOT NULL UNIQUE,
+        claim_id TEXT NOT NULL,
+        decision TEXT NOT NULL,
+        payer TEXT NOT NULL,
+        created_at TEXT NOT NULL,
+        confidence REAL NOT NULL,
+        audit_tier TEXT NOT NULL,
+        llm_calls INTEGER NOT NULL,
+        chunk_ids TEXT NOT NULL,
+        node_timings TEXT NOT NULL,
+        data TEXT NOT NULL,
+        prompt_version TEXT NOT NULL DEFAULT '',
+        prompt_tokens INTEGER NOT NULL DEFAULT 0,
+        completion_tokens INTEGER NOT NULL DEFAULT 0,
+        cost_usd REAL NOT NULL DEFAULT 0
+    );
+    CREATE INDEX IF NOT EXISTS idx_audit_log_claim_id ON audit_log (claim_id);
+    CREATE INDEX IF NOT EXISTS idx_audit_log_decision ON audit_log (decision);
+    CREATE INDEX IF NOT EXISTS idx_audit_log_payer ON audit_log (payer, created_at);
+    CREATE INDEX IF NOT EXISTS idx_audit_log_created_at ON audit_log (created_at);
+    CREATE TRIGGER IF NOT EXISTS audit_log_no_update BEFORE UPDATE ON audit_log
+    BEGIN SELECT RAISE(ABORT, 'audit_log is append-only'); END;
+    CREATE TRIGGER IF NOT EXISTS audit_log_no_delete BEFORE DELETE ON audit_log
+    BEGIN SELECT RAISE(ABORT, 'audit_log is append-only'); END;
+    """
+
+    INSERT = """
+    INSERT INTO audit_log (audit_id, claim_id, decision, payer, created_at, confidence,
+                           audit_tier, llm_calls, chunk_ids, node_timings, data,
+                           prompt_version, prompt_tokens, completion_tokens, cost_usd)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+
+    # Columns added after the first release of the table: name -> definition
+    ADDED_COLUMNS = {
+        "prompt_version": "TEXT NOT NULL DEFAULT ''",
+        "prompt_tokens": "INTEGER NOT NULL DEFAULT 0",
+        "completion_tokens": "INTEGER NOT NULL DEFAULT 0",
+        "cost_usd": "REAL NOT NULL DEFAULT 0",
+    }
+
+    COLUMNS = "payer, audit_tier, llm_calls, chunk_ids, node_timings, data"
+
+    def __init__(self, path: str):
+        self.path = path
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        conn = self._conn()
+        conn.executescript(self.SCHEMA)
+        existing = {row[1] for row in conn.execute("PRAGMA table_info(audit_log)")}
+        for column, definition in self.ADDED_COLUMNS.items():
+            if column not in existing:
+                conn.execute(f"ALTER TABLE audit_log ADD COLUMN {column} {definition}")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def append(self, record: AuditRecord) -> AuditRecord:
+        audit = record.audit
+        self._conn().execute(self.INSERT, (
+            audit.audit_id,
+            audit.claim_id,
+            audit.decision.value,
+            record.payer,
+            audit.created_at.isoformat(),
+            audit.confidence,
+            record.audit_tier,
+            record.llm_calls,
+            json.dumps(record.chunk_ids),
+            json.dumps(record.node_timings_ms),
+            audit.model_dump_json(),
+            audit.prompt_version,
+            *_usage_columns(audit),
+        ))
+        return record
+
+    @staticmethod
+    def _record(row) -> AuditRecord:
+        payer, tier, llm_calls, chunk_ids, timings, data = row
+        return AuditRecord(
+            audit=AuditOutput.model_validate_json(data),
+            payer=payer,
+            audit_tier=tier,
+            llm_calls=llm_calls,
+            chunk_ids=json.loads(chunk_ids),
+            node_timings_ms=json.loads(timings),
+        )
+
+    def get(self, audit_id: str) -> Optional[AuditRecord]:
+        row = self._conn().execute(
+            f"SELECT {self.COLUMNS} FROM audit_log WHERE audit_id = ?", (audit_id,)
+        ).fetchone()
+        return self._record(row) if row else None
+
+    def for_claim(self, claim_id: str, limit: int = 50) -> List[AuditRecord]:
+        rows = self._conn().execute(
+            f"SELECT {self.COLUMNS} FROM audit_log WHERE claim_id = ? ORDER BY created_at DESC, seq DESC LIMIT ?",
+            (claim_id, limit)
+        ).fetchall()
+        return [self._record(r) for r in rows]
+
+    @staticmethod
+    def _time_range(since: Optional[datetime], until: Optional[datetime], clauses: List[str], params: List[Any]):
+        if since:
+            clauses.append("created_at >= ?")
+            params.append(since.isoformat())
+        if until:
+            clauses.append("created_at < ?")
+            params.append(until.isoformat())
+
+    def decision_counts(
+        self,
+        bucket: str = "day",
+        payer: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> List[Dict[str, Any]]:
+        _check_bucket(bucket)
+        clauses, params = [], []
+        if payer:
+            clauses.append("payer = ?")
+            params.append(payer)
+        self._time_range(since, until, clauses, params)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        rows = self._conn().execute(
+            f"""
+            SELECT substr(created_at, 1, {BUCKETS[bucket]}) AS bucket, payer, decision, COUNT(*)
+            FROM audit_log {where}
+            GROUP BY bucket, payer, decision
+            ORDER BY bucket, payer, decision
+            """,
+            params
+        ).fetchall()
+        return [{"bucket": b, "payer": p, "decision": d, "count": n} for b, p, d, n in rows]
+
+    def node_timings(
+        self, since: Optional[datetime] = None, until: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        clauses, params = [], []
+        self._time_range(since, until, clauses, params)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        rows = self._conn().execute(
+            f"""
+            SELECT t.key, COUNT(*), AVG(t.value), MAX(t.value)
+            FROM audit_log, json_each(audit_log.node_timings) AS t {where}
+            GROUP BY t.key
+            ORDER BY t.key
+            """,
+            params
+        ).fetchall()
+        return [
+            {"node": node, "runs": runs, "mean_ms": round(mean, 3), "max_ms": round(peak, 3)}
+            for node, runs, mean, peak in rows
+        ]
+
+    def spend(
+        self, group_by: str = "payer", since: Optional[datetime] = None, until: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        _check_group(group_by)
+        clauses, params = [], []
+        self._time_range(since, until, clauses, params)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        rows = self._conn().execute(
+            f"""
+            SELECT {group_by}, COUNT(*), SUM(prompt_tokens), SUM(completion_tokens), SUM(cost_usd)
+            FROM audit_log {where}
+            GROUP BY {group_by}
+            ORDER BY SUM(cost_usd) DESC, {group_by}
+            """,
+            params
+        ).fetchall()
+        return [
+            {group_by: key, "audits": audits, "prompt_tokens": prompt, "completion_tokens": completion,
+             "cost_usd": round(cost, 6)}
+            for key, audits, prompt, completion, cost in rows
+        ]
+
+
+class SupabaseAuditLog(AuditLog):
+    """
+    Postgres-backed log through the Supabase client. Expects this schema:
+
+        create table audit_log (
+            seq bigint generated always as identity primary key,
+            audit_id text not null unique,
+            claim_id text not null,
+            decision text not null,
+            payer text not null,
+            created_at timestamptz not null,
+            confidence double precision not null,
+            audit_tier text not null,
+            llm_calls integer not null,
+            chunk_ids jsonb not null,
+            node_timings jsonb not null,
+            data jsonb not null,
+            prompt_version text not null default '',
+            prompt_tokens integer not null default 0,
+            completion_tokens integer not null default 0,
+            cost_usd double precision not null default 0
+        );
+        create index idx_audit_log_claim_id on audit_log (claim_id);
+        create index idx_audit_log_decision on audit_log (decision);
+        create index idx_audit_log_payer on audit_log (payer, created_at);
+        create index idx_audit_log_created_at on audit_log (created_at);
+        revoke update, delete on audit_log from anon, authenticated, service_role;
+
+        create function audit_decision_counts(bucket text, p_payer text, since timestamptz, until timestamptz)
+        returns table (bucket text, payer text, decision text, count bigint) language sql stable as $$
+            select to_char(date_trunc(bucket, created_at), 'YYYY-MM-DD"T"HH24'), payer, decision, count(*)
+            from audit_log
+            where (p_payer is null or payer = p_payer)
+              and (since is null or created_at >= since) and (until is null or created_at < until)
+            group by 1, 2, 3 order by 1, 2, 3
+        $$;
+
+        create function audit_node_timings(since timestamptz, until timestamptz)
+        returns table (node text, runs bigint, mean_ms double precision, max_ms double precision)
+        language sql stable as $$
+            select t.key, count(*), avg(t.value::double precision), max(t.value::double precision)
+            from audit_log, jsonb_each_text(node_timings) as t
+            where (since is null or created_at >= since) and (until is null or created_at < until)
+            group by 1 order by 1
+        $$;
+
+        create function audit_spend(group_by text, since timestamptz, until timestamptz)
+        returns table (key text, audits bigint, prompt_tokens bigint, completion_tokens bigint, cost_usd double precision)
+        language sql stable as $$
+            select case group_by when 'prompt_version' then prompt_version else payer end,
+                   count(*), sum(prompt_tokens), sum(completion_tokens), sum(cost_usd)
+            from audit_log
+            where (since is null or created_at >= since) and (until is null or created_at < until)
+            group by 1 order by 5 desc, 1
+        $$;
+    """
+
+    def __init__(self, client=None, table: str = "audit_log"):
+        if client is None:
+            from supabase import create_client
+            from backend.config import settings
+            client = create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_KEY or settings.SUPABASE_ANON_KEY)
+        self.client = client
+        self.table = table
+
+    def append(self, record: AuditRecord) -> AuditRecord:
+        audit = record.audit
+        self.client.table(self.table).insert({
+            "audit_id": audit.audit_id,
+            "claim_id": audit.claim_id,
+            "decision": audit.decision.value,
+            "payer": record.payer,
+            "created_at": audit.created_at.isoformat(),
+            "confidence": audit.confidence,
+            "audit_tier": record.audit_tier,
+            "llm_calls": record.llm_calls,
+            "chunk_ids": record.chunk_ids,
+            "node_timings": record.node_timings_ms,
+            "data": audit.model_dump(mode="json"),
+            "prompt_version": audit.prompt_version,
+            **dict(zip(("prompt_tokens", "completion_tokens", "cost_usd"), _usage_columns(audit))),
+        }).execute()
+        return record
+
+    @staticmethod
+    def _record(row: Dict[str, Any]) -> AuditRecord:
+        return AuditRecord(
+            audit=AuditOutput.model_validate(row["data"]),
+            payer=row["payer"],
+            audit_tier=row["audit_tier"],
+            llm_calls=row["llm_calls"],
+            chunk_ids=row["chunk_ids"],
+            node_timings_ms=row["node_timings"],
+        )
+
+    def _select(self):
+        return self.client.table(self.table).select("payer, audit_tier, llm_calls, chunk_ids, node_timings, data")
+
+    def get(self, audit_id: str) -> Optional[AuditRecord]:
+        rows = self._select().eq("audit_id", audit_id).limit(1).execute().data
+        return self._record(rows[0]) if rows else None
+
+    def for_claim(self, claim_id: str, limit: int = 50) -> List[AuditRecord]:
+        rows = self._select().eq("claim_id", claim_id).order("created_at", desc=True).limit(limit).execute().data
+        return [self._record(r) for r in rows]
+
+    def decision_counts(
+        self,
+        bucket: str = "day",
+        payer: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> List[Dict[str, Any]]:
+        _check_bucket(bucket)
+        rows = self.client.rpc("audit_decision_counts", {
+            "bucket": bucket,
+            "p_payer": payer,
+            "since": since.isoformat() if since else None,
+            "until": until.isoformat() if until else None,
+        }).execute().data
+        # Postgres returns the hour-resolution label; trim it to the bucket like SQLite does
+        return [{**r, "bucket": r["bucket"][:BUCKETS[bucket]]} for r in rows]
+
+    def node_timings(
+        self, since: Optional[datetime] = None, until: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        return self.client.rpc("audit_node_timings", {
+            "since": since.isoformat() if since else None,
+            "until": until.isoformat() if until else None,
+        }).execute().data
+
+    def spend(
+        self, group_by: str = "payer", since: Optional[datetime] = None, until: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        _check_group(group_by)
+        rows = self.client.rpc("audit_spend", {
+            "group_by": group_by,
+            "since": since.isoformat() if since else None,
+            "until": until.isoformat() if until else None,
+        }).execute().data
+        return [{group_by: r.pop("key"), **r} for r in rows]
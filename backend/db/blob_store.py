@@ -0,0 +1,215 @@
+"""
+Content-Addressed Blob Store.
+Uploaded policy files are stored once under the SHA-256 of their bytes:
+- LocalBlobStore: files under BLOB_STORE_PATH (blobs/<ab>/<sha256>)
+- S3BlobStore:    any S3-compatible bucket; configured from the R2 settings
+
+Uploads are streamed in BLOB_CHUNK_BYTES pieces and hashed on the way, so no
+upload is ever held in memory whole. Derived artifacts (the extracted
+markdown of a PDF) are stored next to the blob under the same hash, so
+identical bytes are only ever parsed once.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional
+from uuid import uuid4
+
+from pydantic import BaseModel
+
+from backend.config import settings
+
+
+class BlobInfo(BaseModel):
+    sha256: str
+    size: int
+    url: str
+    created: bool = True  # False when these bytes were already stored
+
+
+class _HashingReader:
+    """File-like wrapper that hashes and counts everything read through it."""
+
+    def __init__(self, stream: BinaryIO):
+        self.stream = stream
+        self.hash = hashlib.sha256()
+        self.size = 0
+
+    def read(self, n: int = -1) -> bytes:
+        data = self.stream.read(n if n and n > 0 else settings.BLOB_CHUNK_BYTES)
+        self.hash.update(data)
+        self.size += len(data)
+        return data
+
+
+class BlobStore(ABC):
+    """Immutable blobs addressed by the SHA-256 of their content."""
+
+    @abstractmethod
+    def put_stream(self, stream: BinaryIO, suffix: str = "") -> BlobInfo:
+        """Store a stream's bytes, returning their hash. Existing content is not written twice."""
+
+    @abstractmethod
+    def exists(self, sha256: str) -> bool:
+        ...
+
+    @abstractmethod
+    def url(self, sha256: str) -> str:
+        ...
+
+    @abstractmethod
+    @contextmanager
+    def local_path(self, sha256: str) -> Iterator[Path]:
+        """A readable local file with the blob's bytes for the duration of the context."""
+
+    @abstractmethod
+    def get_derived(self, sha256: str, name: str) -> Optional[str]:
+        """A text artifact derived from the blob (e.g. "markdown"), if stored."""
+
+    @abstractmethod
+    def put_derived(self, sha256: str, name: str, text: str):
+        ...
+
+
+def _check_hash(sha256: str):
+    if len(sha256) != 64 or any(c not in "0123456789abcdef" for c in sha256):
+        raise ValueError(f"Not a SHA-256 hex digest: {sha256!r}")
+
+
+class LocalBlobStore(BlobStore):
+    """Blobs on the local filesystem, written via a temp file and an atomic rename."""
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = Path(root or settings.BLOB_STORE_PATH)
+        (self.root / "incoming").mkdir(parents=True, exist_ok=True)
+
+    def _path(self, sha256: str, name: str = "blob") -> Path:
+        _check_hash(sha256)
+        return self.root / sha256[:2] / sha256 / name
+
+    def put_stream(self, stream: BinaryIO, suffix: str = "") -> BlobInfo:
+        reader = _HashingReader(stream)
+        fd, tmp = tempfile.mkstemp(dir=self.root / "incoming", suffix=suffix)
+        try:
+            with os.fdopen(fd, "wb") as out:
+                shutil.copyfileobj(reader, out, settings.BLOB_CHUNK_BYTES)
+            sha256 = reader.hash.hexdigest()
+            target = self._path(sha256)
+            created = not target.exists()
+            if created:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(tmp, target)
+        finally:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+        return BlobInfo(sha256=sha256, size=reader.size, url=self.url(sha256), created=created)
+
+    def exists(self, sha256: str) -> bool:
+        return self._path(sha256).exists()
+
+    def url(self, sha256: str) -> str:
+        return f"file://{self._path(sha256).resolve()}"
+
+    @contextmanager
+    def local_path(self, sha256: str) -> Iterator[Path]:
+        path = self._path(sha256)
+        if not path.exists():
+            raise KeyError(sha256)
+        yield path
+
+    def get_derived(self, sha256: str, name: str) -> Optional[str]:
+        path = self._path(sha256, f"{name}.txt")
+        return path.read_text(encoding="utf-8") if path.exists() else None
+
+    def put_derived(self, sha256: str, name: str, text: str):
+        path = self._path(sha256, f"{name}.txt")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{uuid4().hex}.tmp")
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, path)
+
+
+class S3BlobStore(BlobStore):
+    """
+    S3-compatible bucket (Cloudflare R2 by default). The upload is streamed to
+    a staging key with multipart upload while it is hashed, then copied to
+    blobs/<sha256> unless that key already exists.
+    """
+
+    def __init__(self, client=None, bucket: Optional[str] = None):
+        if client is None:
+            import boto3
+            client = boto3.client(
+                "s3",
+                endpoint_url=settings.R2_ENDPOINT or None,
+                aws_access_key_id=settings.R2_ACCESS_KEY_ID,
+                aws_secret_access_key=settings.R2_SECRET_ACCESS_KEY,
+                region_name="auto",
+            )
+        self.client = client
+        self.bucket = bucket or settings.R2_BUCKET_NAME
+
+    def _key(self, sha256: str, name: str = "blob") -> str:
+        _check_hash(sha256)
+        return f"blobs/{sha256}/{name}"
+
+    def _head(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def put_stream(self, stream: BinaryIO, suffix: str = "") -> BlobInfo:
+        from boto3.s3.transfer import TransferConfig
+
+        reader = _HashingReader(stream)
+        staging = f"incoming/{uuid4().hex}{suffix}"
+        config = TransferConfig(multipart_chunksize=max(settings.BLOB_CHUNK_BYTES, 5 * 1024 * 1024), use_threads=False)
+        self.client.upload_fileobj(reader, self.bucket, staging, Config=config)
+        sha256 = reader.hash.hexdigest()
+        try:
+            created = not self._head(self._key(sha256))
+            if created:
+                self.client.copy_object(
+                    Bucket=self.bucket, Key=self._key(sha256), CopySource={"Bucket": self.bucket, "Key": staging}
+                )
+        finally:
+            self.client.delete_object(Bucket=self.bucket, Key=staging)
+        return BlobInfo(sha256=sha256, size=reader.size, url=self.url(sha256), created=created)
+
+    def exists(self, sha256: str) -> bool:
+        return self._head(self._key(sha256))
+
+    def url(self, sha256: str) -> str:
+        return f"s3://{self.bucket}/{self._key(sha256)}"
+
+    @contextmanager
+    def local_path(self, sha256: str) -> Iterator[Path]:
+        fd, tmp = tempfile.mkstemp(suffix=".blob")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                self.client.download_fileobj(self.bucket, self._key(sha256), out)
+            yield Path(tmp)
+        finally:
+            os.unlink(tmp)
+
+    def get_derived(self, sha256: str, name: str) -> Optional[str]:
+        from botocore.exceptions import ClientError
+        try:
+            body = self.client.get_object(Bucket=self.bucket, Key=self._key(sha256, f"{name}.txt"))["Body"]
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+        return body.read().decode("utf-8")
+
+    def put_derived(self, sha256: str, name: str, text: str):
+        self.client.put_object(Bucket=self.bucket, Key=self._key(sha256, f"{name}.txt"), Body=text.encode("utf-8"))
@@ -0,0 +1,396 @@
+"""
+Shared Cache.
+One key/value interface over two backends, so cache hits carry across
+Cloud Run instances and scale-outs when Redis is configured:
+- "memory": per-process LRU dict with TTLs (the default; no shared state)
+- "redis":  any Redis (REDIS_URL, or the Upstash credentials), with MGET and
+            non-transactional pipelines for multi-get/set
+
+Typed caches on top (embedding vectors, retrieval results, AuditOutputs)
+use compact binary codecs: raw little-endian float32 for vectors and
+zlib-compressed JSON for documents, each behind a one-byte format tag.
+
+Retrieval and audit-result keys include a shared "policy generation" that
+every policy ingest/replace/delete bumps, so stale entries are simply never
+read again and age out through their TTL.
+
+Cache failures never fail a request: reads degrade to misses, writes are
+dropped and rate limits fail open, with a warning.
+"""
+import hashlib
+import json
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backend.config import settings
+from backend import metrics
+
+VECTOR_TAG = b"v"
+JSON_TAG = b"j"
+VECTOR_DTYPE = np.dtype("<f4")
+
+
+# ── Codecs ──────────────────────────────────────────────
+
+def encode_vector(vector: Sequence[float]) -> bytes:
+    return VECTOR_TAG + np.asarray(vector, dtype=VECTOR_DTYPE).tobytes()
+
+
+def decode_vector(data: bytes) -> List[float]:
+    if data[:1] != VECTOR_TAG:
+        raise ValueError("Not an encoded vector")
+    return np.frombuffer(data, dtype=VECTOR_DTYPE, offset=1).tolist()
+
+
+def _json_default(value: Any):
+    # NumPy scalars (search scores) keep their numeric type; anything else becomes a string
+    return value.item() if isinstance(value, np.generic) else str(value)
+
+
+def encode_json(value: Any) -> bytes:
+    return JSON_TAG + zlib.compress(json.dumps(value, separators=(",", ":"), default=_json_default).encode(), 6)
+
+
+def decode_json(data: bytes) -> Any:
+    if data[:1] != JSON_TAG:
+        raise ValueError("Not an encoded JSON document")
+    return json.loads(zlib.decompress(data[1:]))
+
+
+def encode_audit(audit) -> bytes:
+    return JSON_TAG + zlib.compress(audit.model_dump_json().encode(), 6)
+
+
+def decode_audit(data: bytes):
+    from shared.schemas import AuditOutput
+
+    if data[:1] != JSON_TAG:
+        raise ValueError("Not an encoded AuditOutput")
+    return AuditOutput.model_validate_json(zlib.decompress(data[1:]))
+
+
+def digest(*parts: Any) -> str:
+    """Stable short key for arbitrary (JSON-serializable) inputs."""
+    raw = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str).encode()
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+
+# ── Backends ────────────────────────────────────────────
+
+class CacheBackend(ABC):
+    """Byte-valued key/value store with TTLs. ttl is in seconds; 0/None = no expiry."""
+
+    @abstractmethod
+    def get_many(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        ...
+
+    @abstractmethod
+    def set_many(self, items: Dict[str, bytes], ttl: Optional[int] = None):
+        ...
+
+    @abstractmethod
+    def delete(self, *keys: str) -> int:
+        ...
+
+    @abstractmethod
+    def incr(self, key: str, amount: int = 1, ttl: Optional[int] = None) -> int:
+        """Add to an integer counter; ttl applies when the counter is created."""
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.get_many([key])[0]
+
+    def set(self, key: str, value: bytes, ttl: Optional[int] = None):
+        self.set_many({key: value}, ttl)
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Per-process LRU with lazy expiry."""
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = max_entries or settings.CACHE_MAX_ENTRIES
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+
+    def _live(self, key: str, now: float):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires = entry
+        if expires and expires <= now:
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        now = time.monotonic()
+        with self._lock:
+            return [self._live(k, now) for k in keys]
+
+    def set_many(self, items: Dict[str, bytes], ttl: Optional[int] = None):
+        expires = time.monotonic() + ttl if ttl else 0.0
+        with self._lock:
+            for key, value in items.items():
+                self._data[key] = (value, expires)
+                self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, *keys: str) -> int:
+        with self._lock:
+            return sum(self._data.pop(k, None) is not None for k in keys)
+
+    def incr(self, key: str, amount: int = 1, ttl: Optional[int] = None) -> int:
+        now = time.monotonic()
+        with self._lock:
+            current = self._live(key, now)
+            if current is None:
+                value, expires = amount, (now + ttl if ttl else 0.0)
+            else:
+                value, expires = int(current) + amount, self._data[key][1]
+            self._data[key] = (value, expires)
+            return value
+
+
+def redis_url() -> str:
+    """REDIS_URL, or a TLS Redis URL built from the Upstash endpoint and token."""
+    if settings.REDIS_URL:
+        return settings.REDIS_URL
+    url = settings.UPSTASH_REDIS_URL
+    if url.startswith(("redis://", "rediss://")):
+        return url
+    if url:
+        # Upstash REST URL (https://<host>): the same database speaks Redis over TLS on 6379
+        host = url.split("://", 1)[-1].rstrip("/")
+        return f"rediss://default:{settings.UPSTASH_REDIS_TOKEN}@{host}:6379"
+    raise ValueError("CACHE_BACKEND=redis needs REDIS_URL or UPSTASH_REDIS_URL")
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Redis backend: MGET for multi-get, one non-transactional pipeline per
+    multi-set, and a MULTI pipeline per counter increment (needs Redis 7 for
+    EXPIRE NX).
+    """
+
+    def __init__(self, client=None):
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(
+                redis_url(),
+                socket_timeout=settings.CACHE_TIMEOUT_SECONDS,
+                socket_connect_timeout=settings.CACHE_TIMEOUT_SECONDS,
+            )
+        self.client = client
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        if not keys:
+            return []
+        return self.client.mget(list(keys))
+
+    def set_many(self, items: Dict[str, bytes], ttl: Optional[int] = None):
+        if not items:
+            return
+        pipe = self.client.pipeline(transaction=False)
+        for key, value in items.items():
+            pipe.set(key, value, ex=ttl or None)
+        pipe.execute()
+
+    def delete(self, *keys: str) -> int:
+        return self.client.delete(*keys) if keys else 0
+
+    def incr(self, key: str, amount: int = 1, ttl: Optional[int] = None) -> int:
+        if not ttl:
+            return self.client.incrby(key, amount)
+        # One MULTI/EXEC: a counter is never left without a TTL (a rate limit
+        # key without one would lock its client out for good). EXPIRE NX only
+        # starts the window of a counter that has none, so later hits keep it.
+        pipe = self.client.pipeline(transaction=True)
+        pipe.incrby(key, amount)
+        pipe.expire(key, ttl, nx=True)
+        value, _ = pipe.execute()
+        return value
+
+
+# ── Typed caches ────────────────────────────────────────
+
+_warned = set()
+
+
+def _warn(action: str, error: Exception):
+    # One line per failure kind, not one per request, while the backend is down
+    if action not in _warned:
+        _warned.add(action)
+        print(f"Warning: Cache {action} failed, continuing without cache: {error}")
+
+
+class Cache:
+    """
+    A namespace on a backend with one codec and TTL. Keys are prefixed with
+    CACHE_PREFIX + namespace; lookups are counted in the cache metrics.
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        namespace: str,
+        encode: Callable[[Any], bytes],
+        decode: Callable[[bytes], Any],
+        ttl: Optional[int] = None,
+    ):
+        self.backend = backend
+        self.namespace = namespace
+        self.encode = encode
+        self.decode = decode
+        self.ttl = ttl
+        self.prefix = f"{settings.CACHE_PREFIX}{namespace}:"
+
+    def get_many(self, keys: Sequence[str]) -> List[Any]:
+        try:
+            raw = self.backend.get_many([self.prefix + k for k in keys])
+        except Exception as e:
+            _warn("read", e)
+            raw = [None] * len(keys)
+        values = []
+        for data in raw:
+            value = None
+            if data is not None:
+                try:
+                    value = self.decode(data)
+                except Exception as e:
+                    _warn("decode", e)
+            metrics.record_cache(self.namespace, hit=value is not None)
+            values.append(value)
+        return values
+
+    def set_many(self, items: Dict[str, Any]):
+        try:
+            self.backend.set_many({self.prefix + k: self.encode(v) for k, v in items.items()}, self.ttl)
+        except Exception as e:
+            _warn("write", e)
+
+    def get(self, key: str) -> Any:
+        return self.get_many([key])[0]
+
+    def set(self, key: str, value: Any):
+        self.set_many({key: value})
+
+
+def policy_generation(backend: CacheBackend) -> int:
+    """Counter bumped on every policy change; part of retrieval and audit cache keys."""
+    try:
+        data = backend.get(settings.CACHE_PREFIX + "policy_generation")
+        return int(data) if data is not None else 0
+    except Exception as e:
+        _warn("read", e)
+        return 0
+
+
+def bump_policy_generation(backend: CacheBackend):
+    try:
+        backend.incr(settings.CACHE_PREFIX + "policy_generation")
+    except Exception as e:
+        _warn("write", e)
+
+
+def policies_changed():
+    """Invalidate cached retrievals and audits after a policy ingest, replace or delete."""
+    from backend.db.singletons import get_cache_backend
+
+    backend = get_cache_backend()
+    if backend is not None:
+        bump_policy_generation(backend)
+
+
+def embedding_cache(backend: CacheBackend) -> Cache:
+    return Cache(backend, "embedding", encode_vector, decode_vector, settings.CACHE_EMBEDDING_TTL_SECONDS)
+
+
+def retrieval_cache(backend: CacheBackend) -> Cache:
+    return Cache(backend, "retrieval", encode_json, decode_json, settings.CACHE_RETRIEVAL_TTL_SECONDS)
+
+
+def audit_cache(backend: CacheBackend) -> Cache:
+    return Cache(backend, "audit", encode_audit, decode_audit, settings.CACHE_AUDIT_TTL_SECONDS)
+
+
+class CachedEmbeddings:
+    """
+    Embedding backend wrapper: query and document vectors are looked up by
+    model + text before encoding, and only the misses are sent to the model.
+    """
+
+    def __init__(self, encoder, cache: Cache):
+        self.encoder = encoder
+        self.cache = cache
+        self.model_name = getattr(encoder, "model_name", settings.EMBEDDING_MODEL)
+        self.dimension = getattr(encoder, "dimension", settings.EMBEDDING_DIM)
+        self.max_seq_length = getattr(encoder, "max_seq_length", settings.EMBEDDING_MAX_SEQ_LENGTH)
+        self.backend_name = getattr(encoder, "backend_name", "")
+
+    def _key(self, text: str) -> str:
+        return digest(self.model_name, self.dimension, text)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        keys = [self._key(t) for t in texts]
+        vectors = self.cache.get_many(keys)
+        missing = [i for i, v in enumerate(vectors) if v is None]
+        if missing:
+            fresh = self.encoder.embed_documents([texts[i] for i in missing])
+            for i, vector in zip(missing, fresh):
+                vectors[i] = list(vector)
+            self.cache.set_many({keys[i]: vectors[i] for i in missing})
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self._key(text)
+        vector = self.cache.get(key)
+        if vector is None:
+            vector = list(self.encoder.embed_query(text))
+            self.cache.set(key, vector)
+        return vector
+
+
+class RateLimiter:
+    """
+    Fixed-window request counter shared through the cache backend, so the
+    limit holds across instances when the backend is Redis.
+    """
+
+    def __init__(self, backend: CacheBackend, name: str, limit: int, window_seconds: int = 60):
+        self.backend = backend
+        self.name = name
+        self.limit = limit
+        self.window = window_seconds
+
+    def hit(self, identity: str) -> Tuple[bool, int]:
+        """Count one request; returns (allowed, seconds until the window resets)."""
+        now = int(time.time())
+        window_start = now - now % self.window
+        key = f"{settings.CACHE_PREFIX}ratelimit:{self.name}:{identity}:{window_start}"
+        try:
+            count = self.backend.incr(key, ttl=self.window + 1)
+        except Exception as e:
+            _warn("rate limit", e)
+            return True, 0
+        return count <= self.limit, window_start + self.window - now
+
+
+def create_cache_backend(kind: Optional[str] = None) -> Optional[CacheBackend]:
+    """Backend selected by CACHE_BACKEND; None when caching is off."""
+    kind = (kind or settings.CACHE_BACKEND).lower()
+    if kind == "none":
+        return None
+    if kind == "memory":
+        return MemoryCacheBackend()
+    if kind == "redis":
+        return RedisCacheBackend()
+    raise ValueError(f"Unknown CACHE_BACKEND '{kind}'. Use memory, redis or none.")
@@ -0,0 +1,282 @@
+"""
+Claims Storage.
+Persistent, indexed claims store shared by every worker process:
+- SQLiteClaimsStore: local file in WAL mode (concurrent readers, one writer)
+- SupabaseClaimsStore: Postgres table through the Supabase client
+Both index payer, service_date and provider_npi, paginate with an opaque
+keyset cursor (no OFFSET scans) and support bulk inserts.
+"""
+import base64
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from shared.schemas import ClaimInput
+
+
+def encode_cursor(seq: int) -> str:
+    return base64.urlsafe_b64encode(str(seq).encode()).decode()
+
+
+def decode_cursor(cursor: Optional[str]) -> int:
+    if not cursor:
+        return 0
+    try:
+        return int(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+class ClaimFilter(BaseModel):
+    """Optional equality/range filters for listing claims."""
+    payer: Optional[str] = None
+    provider_npi: Optional[str] = None
+    service_date_from: Optional[date] = None
+    service_date_to: Optional[date] = None
+
+
+class ClaimsStore(ABC):
+    """Storage interface for claims."""
+
+    @abstractmethod
+    def upsert(self, claim: ClaimInput) -> ClaimInput:
+        """Insert a claim, replacing any existing claim with the same ID."""
+
+    @abstractmethod
+    def bulk_insert(self, claims: Iterable[ClaimInput], batch_size: int = 5000) -> int:
+        """Insert many claims in batched transactions. Returns the number written."""
+
+    @abstractmethod
+    def get(self, claim_id: str) -> Optional[ClaimInput]:
+        """Fetch a claim by ID."""
+
+    @abstractmethod
+    def delete(self, claim_id: str) -> bool:
+        """Delete a claim. Returns whether it existed."""
+
+    @abstractmethod
+    def list(
+        self, limit: int = 50, cursor: Optional[str] = None, filters: Optional[ClaimFilter] = None
+    ) -> Tuple[List[ClaimInput], Optional[str]]:
+        """One page of claims in insertion order, plus the cursor of the next page (None at the end)."""
+
+    @abstractmethod
+    def count(self, filters: Optional[ClaimFilter] = None) -> int:
+        """Number of claims matching the filters."""
+
+
+def _claim_row(claim: ClaimInput) -> Tuple:
+    return (
+        claim.claim_id,
+        claim.payer,
+        claim.service_date.isoformat(),
+        claim.provider_npi,
+        claim.model_dump_json(),
+    )
+
+
+class SQLiteClaimsStore(ClaimsStore):
+    """SQLite in WAL mode with one connection per thread."""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS claims (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        claim_id TEXT NOT NULL UNIQUE,
+        payer TEXT NOT NULL,
+        service_date TEXT NOT NULL,
+        provider_npi TEXT NOT NULL,
+        data TEXT NOT NULL
+    );
+    -- SQLite appends the rowid (seq) to every index, so these also serve keyset pages
+    CREATE INDEX IF NOT EXISTS idx_claims_payer ON claims (payer);
+    CREATE INDEX IF NOT EXISTS idx_claims_service_date ON claims (service_date);
+    CREATE INDEX IF NOT EXISTS idx_claims_provider_npi ON claims (provider_npi);
+    """
+
+    UPSERT = """
+    INSERT INTO claims (claim_id, payer, service_date, provider_npi, data) VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(claim_id) DO UPDATE SET
+        payer = excluded.payer,
+        service_date = excluded.service_date,
+        provider_npi = excluded.provider_npi,
+        data = excluded.data
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._conn().executescript(self.SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def upsert(self, claim: ClaimInput) -> ClaimInput:
+        self._conn().execute(self.UPSERT, _claim_row(claim))
+        return claim
+
+    def bulk_insert(self, claims: Iterable[ClaimInput], batch_size: int = 5000) -> int:
+        conn = self._conn()
+        written, batch = 0, []
+        for claim in claims:
+            batch.append(_claim_row(claim))
+            if len(batch) >= batch_size:
+                written += self._write_batch(conn, batch)
+                batch = []
+        if batch:
+            written += self._write_batch(conn, batch)
+        return written
+
+    def _write_batch(self, conn: sqlite3.Connection, rows: List[Tuple]) -> int:
+        conn.execute("BEGIN")
+        try:
+            conn.executemany(self.UPSERT, rows)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return len(rows)
+
+    def get(self, claim_id: str) -> Optional[ClaimInput]:
+        row = self._conn().execute("SELECT data FROM claims WHERE claim_id = ?", (claim_id,)).fetchone()
+        return ClaimInput.model_validate_json(row[0]) if row else None
+
+    def delete(self, claim_id: str) -> bool:
+        return self._conn().execute("DELETE FROM claims WHERE claim_id = ?", (claim_id,)).rowcount > 0
+
+    def _where(self, filters: Optional[ClaimFilter]) -> Tuple[List[str], List[Any]]:
+        clauses, params = [], []
+        if filters is None:
+            return clauses, params
+        if filters.payer:
+            clauses.append("payer = ?")
+            params.append(filters.payer)
+        if filters.provider_npi:
+            clauses.append("provider_npi = ?")
+            params.append(filters.provider_npi)
+        if filters.service_date_from:
+            clauses.append("service_date >= ?")
+            params.append(filters.service_date_from.isoformat())
+        if filters.service_date_to:
+            clauses.append("service_date <= ?")
+            params.append(filters.service_date_to.isoformat())
+        return clauses, params
+
+    def list(
+        self, limit: int = 50, cursor: Optional[str] = None, filters: Optional[ClaimFilter] = None
+    ) -> Tuple[List[ClaimInput], Optional[str]]:
+        clauses, params = self._where(filters)
+        clauses.append("seq > ?")
+        params.append(decode_cursor(cursor))
+        rows = self._conn().execute(
+            f"SELECT seq, data FROM claims WHERE {' AND '.join(clauses)} ORDER BY seq LIMIT ?",
+            (*params, limit + 1)
+        ).fetchall()
+
+        claims = [ClaimInput.model_validate_json(data) for _, data in rows[:limit]]
+        next_cursor = encode_cursor(rows[limit - 1][0]) if len(rows) > limit else None
+        return claims, next_cursor
+
+    def count(self, filters: Optional[ClaimFilter] = None) -> int:
+        clauses, params = self._where(filters)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return self._conn().execute(f"SELECT COUNT(*) FROM claims {where}", params).fetchone()[0]
+
+
+class SupabaseClaimsStore(ClaimsStore):
+    """
+    Postgres-backed store through the Supabase client. Expects this table:
+
+        create table claims (
+            seq bigint generated always as identity primary key,
+            claim_id text not null unique,
+            payer text not null,
+            service_date date not null,
+            provider_npi text not null,
+            data jsonb not null
+        );
+        create index idx_claims_payer on claims (payer, seq);
+        create index idx_claims_service_date on claims (service_date, seq);
+        create index idx_claims_provider_npi on claims (provider_npi, seq);
+    """
+
+    def __init__(self, client=None, table: str = "claims"):
+        if client is None:
+            from supabase import create_client
+            from backend.config import settings
+            client = create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_KEY or settings.SUPABASE_ANON_KEY)
+        self.client = client
+        self.table = table
+
+    @staticmethod
+    def _row(claim: ClaimInput) -> Dict[str, Any]:
+        return {
+            "claim_id": claim.claim_id,
+            "payer": claim.payer,
+            "service_date": claim.service_date.isoformat(),
+            "provider_npi": claim.provider_npi,
+            "data": claim.model_dump(mode="json"),
+        }
+
+    def _filtered(self, query, filters: Optional[ClaimFilter]):
+        if filters is None:
+            return query
+        if filters.payer:
+            query = query.eq("payer", filters.payer)
+        if filters.provider_npi:
+            query = query.eq("provider_npi", filters.provider_npi)
+        if filters.service_date_from:
+            query = query.gte("service_date", filters.service_date_from.isoformat())
+        if filters.service_date_to:
+            query = query.lte("service_date", filters.service_date_to.isoformat())
+        return query
+
+    def upsert(self, claim: ClaimInput) -> ClaimInput:
+        self.client.table(self.table).upsert(self._row(claim), on_conflict="claim_id").execute()
+        return claim
+
+    def bulk_insert(self, claims: Iterable[ClaimInput], batch_size: int = 5000) -> int:
+        written, batch = 0, []
+        for claim in claims:
+            batch.append(self._row(claim))
+            if len(batch) >= batch_size:
+                self.client.table(self.table).upsert(batch, on_conflict="claim_id").execute()
+                written, batch = written + len(batch), []
+        if batch:
+            self.client.table(self.table).upsert(batch, on_conflict="claim_id").execute()
+            written += len(batch)
+        return written
+
+    def get(self, claim_id: str) -> Optional[ClaimInput]:
+        result = self.client.table(self.table).select("data").eq("claim_id", claim_id).limit(1).execute()
+        return ClaimInput.model_validate(result.data[0]["data"]) if result.data else None
+
+    def delete(self, claim_id: str) -> bool:
+        result = self.client.table(self.table).delete().eq("claim_id", claim_id).execute()
+        return bool(result.data)
+
+    def list(
+        self, limit: int = 50, cursor: Optional[str] = None, filters: Optional[ClaimFilter] = None
+    ) -> Tuple[List[ClaimInput], Optional[str]]:
+        query = self.client.table(self.table).select("seq, data").gt("seq", decode_cursor(cursor))
+        rows = self._filtered(query, filters).order("seq").limit(limit + 1).execute().data
+
+        claims = [ClaimInput.model_validate(row["data"]) for row in rows[:limit]]
+        next_cursor = encode_cursor(rows[limit - 1]["seq"]) if len(rows) > limit else None
+        return claims, next_cursor
+
+    def count(self, filters: Optional[ClaimFilter] = None) -> int:
+        query = self.client.table(self.table).select("claim_id", count="exact")
+        return self._filtered(query, filters).limit(1).execute().count or 0
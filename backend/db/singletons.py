@@ -0,0 +1,97 @@
+"""
+Singleton instances for persistence components.
+Stores open their connections lazily on first use.
+"""
+import threading
+from typing import TYPE_CHECKING, Optional
+
+from backend.config import settings
+
+if TYPE_CHECKING:
+    from backend.db.blob_store import BlobStore
+    from backend.db.audit_log import AuditLog
+    from backend.db.cache import CacheBackend
+    from backend.db.claims_store import ClaimsStore
+    from backend.db.work_queue import WorkQueue
+
+_claims_store_instance = None
+_audit_log_instance = None
+_cache_backend_instance = None
+_cache_backend_created = False
+_work_queue_instance = None
+_blob_store_instance = None
+_lock = threading.RLock()
+
+def get_claims_store() -> "ClaimsStore":
+    """Get or create the global claims store for the configured backend."""
+    global _claims_store_instance
+    if _claims_store_instance is None:
+        with _lock:
+            if _claims_store_instance is None:
+                from backend.db.claims_store import SQLiteClaimsStore, SupabaseClaimsStore
+                if settings.CLAIMS_STORE == "supabase":
+                    _claims_store_instance = SupabaseClaimsStore()
+                else:
+                    _claims_store_instance = SQLiteClaimsStore(settings.CLAIMS_DB_PATH)
+    return _claims_store_instance
+
+
+def get_audit_log() -> "AuditLog":
+    """Get or create the global audit log for the configured backend."""
+    global _audit_log_instance
+    if _audit_log_instance is None:
+        with _lock:
+            if _audit_log_instance is None:
+                from backend.db.audit_log import SQLiteAuditLog, SupabaseAuditLog
+                if settings.AUDIT_LOG_STORE == "supabase":
+                    _audit_log_instance = SupabaseAuditLog()
+                else:
+                    _audit_log_instance = SQLiteAuditLog(settings.AUDIT_LOG_DB_PATH)
+    return _audit_log_instance
+
+
+
+def get_cache_backend() -> Optional["CacheBackend"]:
+    """Get or create the shared cache backend; None when CACHE_BACKEND=none."""
+    global _cache_backend_instance, _cache_backend_created
+    if not _cache_backend_created:
+        with _lock:
+            if not _cache_backend_created:
+                from backend.db.cache import create_cache_backend
+                _cache_backend_instance = create_cache_backend()
+                _cache_backend_created = True
+    return _cache_backend_instance
+
+
+
+def get_work_queue() -> "WorkQueue":
+    """Get or create the global audit work queue for the configured backend."""
+    global _work_queue_instance
+    if _work_queue_instance is None:
+        with _lock:
+            if _work_queue_instance is None:
+                from backend.db.work_queue import RedisWorkQueue, SQLiteWorkQueue
+                if settings.WORK_QUEUE_BACKEND == "redis":
+                    _work_queue_instance = RedisWorkQueue()
+                elif settings.WORK_QUEUE_BACKEND == "sqlite":
+                    _work_queue_instance = SQLiteWorkQueue(settings.WORK_QUEUE_DB_PATH)
+                else:
+                    raise ValueError(
+                        f"No work queue configured (WORK_QUEUE_BACKEND={settings.WORK_QUEUE_BACKEND}). "
+                        "Use sqlite or redis."
+                    )
+    return _work_queue_instance
+
+
+def get_blob_store() -> "BlobStore":
+    """Get or create the global content-addressed store for uploaded policy files."""
+    global _blob_store_instance
+    if _blob_store_instance is None:
+        with _lock:
+            if _blob_store_instance is None:
+                from backend.db.blob_store import LocalBlobStore, S3BlobStore
+                if settings.BLOB_STORE == "r2":
+                    _blob_store_instance = S3BlobStore()
+                else:
+                    _blob_store_instance = LocalBlobStore(settings.BLOB_STORE_PATH)
+    return _blob_store_instance
@@ -0,0 +1,343 @@
+"""
+Audit Work Queue.
+Durable queue of claims to audit, so API instances only enqueue and separate
+worker processes (python -m backend.services.worker) run the audits:
+- SQLiteWorkQueue: one WAL file, for a single node (API and workers share the disk)
+- RedisWorkQueue:  a Redis Stream with one consumer group, for any number of nodes
+
+Delivery is at-least-once. A worker leases jobs for WORK_QUEUE_VISIBILITY_SECONDS;
+a job that is not completed by then (worker crashed, instance scaled in, audit
+failed) is handed to the next worker that asks, until WORK_QUEUE_MAX_ATTEMPTS
+deliveries have been made and the job is marked dead. Results are stored under
+the job ID and the first completion wins, so a redelivered job that finishes
+twice still has exactly one result. Enqueueing an existing job ID is a no-op.
+"""
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+from uuid import uuid4
+
+from pydantic import BaseModel
+
+from shared.schemas import AuditOutput, ClaimInput
+from backend.config import settings
+
+QUEUED, RUNNING, DONE, DEAD = "queued", "running", "done", "dead"
+
+
+class Job(BaseModel):
+    """A leased job. `receipt` identifies the delivery to the backend (the stream entry for Redis)."""
+    job_id: str
+    claim: ClaimInput
+    attempts: int
+    receipt: Optional[str] = None
+
+
+class JobStatus(BaseModel):
+    job_id: str
+    claim_id: str
+    status: str
+    attempts: int = 0
+    result: Optional[AuditOutput] = None
+    error: Optional[str] = None
+    enqueued_at: float
+    updated_at: float
+
+
+def new_job_ids(claims: Sequence[ClaimInput], job_ids: Optional[Sequence[str]]) -> List[str]:
+    if job_ids is None:
+        return [str(uuid4()) for _ in claims]
+    if len(job_ids) != len(claims):
+        raise ValueError("One job ID per claim is required")
+    return list(job_ids)
+
+
+class WorkQueue(ABC):
+    """Durable at-least-once queue of audit jobs."""
+
+    def __init__(self, visibility_seconds: Optional[float] = None, max_attempts: Optional[int] = None):
+        self.visibility_seconds = visibility_seconds or settings.WORK_QUEUE_VISIBILITY_SECONDS
+        self.max_attempts = max_attempts or settings.WORK_QUEUE_MAX_ATTEMPTS
+
+    @abstractmethod
+    def enqueue(self, claims: Sequence[ClaimInput], job_ids: Optional[Sequence[str]] = None) -> List[str]:
+        """Add one job per claim; returns the job IDs. Existing job IDs are left untouched."""
+
+    @abstractmethod
+    def lease(self, worker_id: str, limit: int) -> List[Job]:
+        """Take up to `limit` queued or lease-expired jobs for `visibility_seconds`."""
+
+    @abstractmethod
+    def complete(self, job: Job, result: AuditOutput) -> bool:
+        """Store the result and retire the job. Returns False if it already had one."""
+
+    @abstractmethod
+    def fail(self, job: Job, error: str):
+        """Record a failed attempt. The job is retried once its lease runs out."""
+
+    @abstractmethod
+    def status(self, job_id: str) -> Optional[JobStatus]:
+        """Current state of a job, with its result once done."""
+
+    @abstractmethod
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs per status (for Redis: stream length and unacknowledged deliveries)."""
+
+
+class SQLiteWorkQueue(WorkQueue):
+    """SQLite in WAL mode; leases are taken inside BEGIN IMMEDIATE so workers never share a job."""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS audit_jobs (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        job_id TEXT NOT NULL UNIQUE,
+        claim_id TEXT NOT NULL,
+        claim TEXT NOT NULL,
+        status TEXT NOT NULL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        lease_until REAL NOT NULL DEFAULT 0,
+        worker TEXT,
+        result TEXT,
+        error TEXT,
+        enqueued_at REAL NOT NULL,
+        updated_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_audit_jobs_ready ON audit_jobs (status, lease_until);
+    """
+
+    def __init__(self, path: str, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._conn().executescript(self.SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, claims: Sequence[ClaimInput], job_ids: Optional[Sequence[str]] = None) -> List[str]:
+        ids = new_job_ids(claims, job_ids)
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN")
+        try:
+            conn.executemany(
+                "INSERT OR IGNORE INTO audit_jobs (job_id, claim_id, claim, status, enqueued_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(job_id, c.claim_id, c.model_dump_json(), QUEUED, now, now) for job_id, c in zip(ids, claims)],
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return ids
+
+    def lease(self, worker_id: str, limit: int) -> List[Job]:
+        now = time.time()
+        conn = self._conn()
+        # IMMEDIATE takes the write lock up front, so two workers cannot select the same rows
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute(
+                "SELECT job_id, claim, attempts FROM audit_jobs "
+                "WHERE status IN (?, ?) AND lease_until <= ? ORDER BY seq LIMIT ?",
+                (QUEUED, RUNNING, now, limit),
+            ).fetchall()
+            jobs, dead = [], []
+            for row in rows:
+                if row["attempts"] >= self.max_attempts:
+                    dead.append(row["job_id"])
+                else:
+                    jobs.append(Job(job_id=row["job_id"], claim=ClaimInput.model_validate_json(row["claim"]),
+                                    attempts=row["attempts"] + 1))
+            conn.executemany(
+                "UPDATE audit_jobs SET status = ?, attempts = attempts + 1, lease_until = ?, worker = ?, "
+                "updated_at = ? WHERE job_id = ?",
+                [(RUNNING, now + self.visibility_seconds, worker_id, now, job.job_id) for job in jobs],
+            )
+            conn.executemany(
+                "UPDATE audit_jobs SET status = ?, updated_at = ? WHERE job_id = ?", [(DEAD, now, j) for j in dead]
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return jobs
+
+    def complete(self, job: Job, result: AuditOutput) -> bool:
+        cursor = self._conn().execute(
+            "UPDATE audit_jobs SET status = ?, result = ?, error = NULL, updated_at = ? "
+            "WHERE job_id = ? AND result IS NULL",
+            (DONE, result.model_dump_json(), time.time(), job.job_id),
+        )
+        return cursor.rowcount == 1
+
+    def fail(self, job: Job, error: str):
+        self._conn().execute(
+            "UPDATE audit_jobs SET error = ?, updated_at = ? WHERE job_id = ? AND result IS NULL",
+            (error, time.time(), job.job_id),
+        )
+
+    def status(self, job_id: str) -> Optional[JobStatus]:
+        row = self._conn().execute(
+            "SELECT job_id, claim_id, status, attempts, result, error, enqueued_at, updated_at "
+            "FROM audit_jobs WHERE job_id = ?",
+            (job_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        data = dict(row)
+        data["result"] = AuditOutput.model_validate_json(data["result"]) if data["result"] else None
+        return JobStatus(**data)
+
+    def counts(self) -> Dict[str, int]:
+        rows = self._conn().execute("SELECT status, COUNT(*) FROM audit_jobs GROUP BY status").fetchall()
+        return {status: n for status, n in rows}
+
+
+class RedisWorkQueue(WorkQueue):
+    """
+    Redis Stream plus one hash per job. New jobs are read with XREADGROUP;
+    entries left unacknowledged past the visibility timeout are reclaimed with
+    XAUTOCLAIM. Hash fields hold the claim, status, attempts and result.
+    """
+
+    GROUP = "workers"
+
+    def __init__(self, client=None, **kwargs):
+        super().__init__(**kwargs)
+        if client is None:
+            import redis
+            from backend.db.cache import redis_url
+            client = redis.Redis.from_url(redis_url())
+        self.client = client
+        self.stream = f"{settings.CACHE_PREFIX}audit_jobs"
+        try:
+            self.client.xgroup_create(self.stream, self.GROUP, id="0", mkstream=True)
+        except Exception as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    def _key(self, job_id: str) -> str:
+        return f"{settings.CACHE_PREFIX}audit_job:{job_id}"
+
+    def enqueue(self, claims: Sequence[ClaimInput], job_ids: Optional[Sequence[str]] = None) -> List[str]:
+        ids = new_job_ids(claims, job_ids)
+        now = time.time()
+        for job_id, claim in zip(ids, claims):
+            self.client.transaction(self._create(job_id, claim, now), self._key(job_id))
+        return ids
+
+    def _create(self, job_id: str, claim: ClaimInput, now: float):
+        """
+        MULTI/EXEC body writing a job hash and its stream entry together, under
+        WATCH on the hash so concurrent enqueues of one job ID add one entry.
+        The job exists once its hash has a status; a hash without one (left by
+        a crash mid-enqueue in older versions) is written over.
+        """
+        key = self._key(job_id)
+
+        def create(pipe):
+            if pipe.hexists(key, "status"):
+                return
+            pipe.multi()
+            pipe.hset(key, mapping={
+                "claim": claim.model_dump_json(), "claim_id": claim.claim_id, "status": QUEUED, "attempts": 0,
+                "enqueued_at": now, "updated_at": now,
+            })
+            pipe.xadd(self.stream, {"job_id": job_id})
+        return create
+
+    def _entries(self, worker_id: str, limit: int) -> List[Tuple[bytes, Dict[bytes, bytes]]]:
+        idle_ms = int(self.visibility_seconds * 1000)
+        _, entries, *_ = self.client.xautoclaim(
+            self.stream, self.GROUP, worker_id, min_idle_time=idle_ms, start_id="0-0", count=limit
+        )
+        entries = [e for e in entries if e[1]]
+        if len(entries) < limit:
+            fresh = self.client.xreadgroup(self.GROUP, worker_id, {self.stream: ">"}, count=limit - len(entries))
+            for _, stream_entries in fresh or []:
+                entries.extend(stream_entries)
+        return entries
+
+    def lease(self, worker_id: str, limit: int) -> List[Job]:
+        jobs = []
+        now = time.time()
+        for entry_id, fields in self._entries(worker_id, limit):
+            receipt = entry_id.decode() if isinstance(entry_id, bytes) else entry_id
+            job_id = fields[b"job_id"].decode()
+            key = self._key(job_id)
+            data = self.client.hgetall(key)
+            if not data or data.get(b"status") in (DONE.encode(), DEAD.encode()):
+                # Completed (or expired) before the acknowledgement landed
+                self._retire(key, receipt)
+                continue
+            attempts = int(data.get(b"attempts", 0))
+            if attempts >= self.max_attempts:
+                self.client.hset(key, mapping={"status": DEAD, "updated_at": now})
+                self._retire(key, receipt)
+                continue
+            attempts = self.client.hincrby(key, "attempts", 1)
+            self.client.hset(key, mapping={"status": RUNNING, "worker": worker_id, "updated_at": now})
+            jobs.append(Job(job_id=job_id, claim=ClaimInput.model_validate_json(data[b"claim"]),
+                            attempts=attempts, receipt=receipt))
+        return jobs
+
+    def complete(self, job: Job, result: AuditOutput) -> bool:
+        key = self._key(job.job_id)
+        first = bool(self.client.hsetnx(key, "result", result.model_dump_json()))
+        if first:
+            self.client.hset(key, mapping={"status": DONE, "updated_at": time.time()})
+            self.client.hdel(key, "error")
+        self._retire(key, job.receipt)
+        return first
+
+    def _retire(self, key: str, receipt: Optional[str]):
+        """Drop the stream entry of a finished job and let its hash expire."""
+        pipe = self.client.pipeline(transaction=False)
+        if receipt:
+            pipe.xack(self.stream, self.GROUP, receipt)
+            pipe.xdel(self.stream, receipt)
+        if settings.WORK_QUEUE_RESULT_TTL_SECONDS:
+            pipe.expire(key, settings.WORK_QUEUE_RESULT_TTL_SECONDS)
+        pipe.execute()
+
+    def fail(self, job: Job, error: str):
+        # Left unacknowledged: XAUTOCLAIM hands it out again after the visibility timeout
+        self.client.hset(self._key(job.job_id), mapping={"error": error, "updated_at": time.time()})
+
+    def status(self, job_id: str) -> Optional[JobStatus]:
+        data = {k.decode(): v.decode() for k, v in self.client.hgetall(self._key(job_id)).items()}
+        if "claim" not in data or "status" not in data:
+            # Never enqueued, or a partial hash that the next enqueue of this job ID completes
+            return None
+        return JobStatus(
+            job_id=job_id,
+            claim_id=data.get("claim_id", ""),
+            status=data["status"],
+            attempts=int(data.get("attempts", 0)),
+            result=AuditOutput.model_validate_json(data["result"]) if data.get("result") else None,
+            error=data.get("error"),
+            enqueued_at=float(data.get("enqueued_at", 0)),
+            updated_at=float(data.get("updated_at", 0)),
+        )
+
+    def counts(self) -> Dict[str, int]:
+        # Job hashes are not indexed by status; report the stream's backlog instead
+        groups = {g["name"]: g for g in self.client.xinfo_groups(self.stream)}
+        group = groups.get(self.GROUP.encode(), groups.get(self.GROUP, {}))
+        return {
+            "stream_length": self.client.xlen(self.stream),
+            "pending": group.get("pending", 0),
+        }
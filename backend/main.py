@@ -11,17 +11,22 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
 
 from backend.routers import audit, claims, policies, services
 from backend.config import settings
+from backend.services.warmup import get_warmup_state, run_warmup, start_background_warmup
 
 from contextlib import asynccontextmanager
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup: Seed default policy
-    from backend.routers.policies import seed_default_policy
-    seed_default_policy()
+    # Startup: Seed default policy, load the embedding model, compile the graph
+    if settings.FAST_START:
+        # Serve immediately; /api/ready gates traffic until warm
+        start_background_warmup()
+    else:
+        run_warmup()
     yield
     # Shutdown logic (none needed yet)
 
@@ -77,5 +82,24 @@ async def health():
             "qdrant": settings.has_qdrant,
             "redis": settings.has_redis,
             "r2": settings.has_r2,
-        }
+        },
+        "cache": settings.CACHE_BACKEND,
     }
+
+
+@app.get("/api/ready")
+async def ready():
+    """Readiness probe: 200 only once seeding and model warm-up have finished."""
+    state = get_warmup_state().snapshot()
+    status = "ready" if state["ready"] else ("failed" if state["error"] else "warming")
+    return JSONResponse(status_code=200 if state["ready"] else 503, content={"status": status, **state})
+
+
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def prometheus_metrics():
+        """Prometheus scrape endpoint."""
+        from backend.metrics import render
+
+        payload, content_type = render()
+        return Response(content=payload, media_type=content_type)
@@ -0,0 +1,154 @@
+"""
+Prometheus Metrics.
+Process-wide collectors for the audit graph, LLM usage, embeddings, vector
+search, caches and ingestion, served at /metrics. Every instrument is a
+prometheus_client counter or histogram (a lock and a few float adds per
+observation), so they are always recorded; METRICS_ENABLED only controls
+whether the endpoint is exposed.
+
+With several uvicorn workers, set PROMETHEUS_MULTIPROC_DIR to a shared empty
+directory so /metrics aggregates every worker.
+"""
+import os
+import time
+from typing import Any, Dict, Optional, Tuple
+from uuid import UUID
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, generate_latest
+
+# Node latencies span sub-millisecond local nodes to multi-second LLM calls
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+AUDIT_NODE_SECONDS = Histogram(
+    "claimaudit_audit_node_seconds", "Wall time of each audit graph node", ["node"], buckets=LATENCY_BUCKETS
+)
+AUDITS = Counter("claimaudit_audits_total", "Finished audits", ["tier", "decision"])
+AUDIT_REFINE_ITERATIONS = Histogram(
+    "claimaudit_audit_refine_iterations", "Audit/refine iterations per finished audit", buckets=(0, 1, 2, 3, 4, 5)
+)
+AUDIT_LLM_CALLS = Histogram(
+    "claimaudit_audit_llm_calls", "LLM calls per finished audit", buckets=(0, 1, 2, 3, 4, 5, 6, 8)
+)
+AUDIT_DEADLINE_STOPS = Counter(
+    "claimaudit_audit_deadline_stops_total", "LLM nodes skipped or cancelled at the audit deadline", ["node"]
+)
+
+LLM_CALLS = Counter("claimaudit_llm_calls_total", "LLM requests", ["provider", "status"])
+LLM_TOKENS = Counter("claimaudit_llm_tokens_total", "LLM tokens", ["provider", "kind"])
+LLM_COST = Counter("claimaudit_llm_cost_usd_total", "Estimated LLM spend in USD (LLM_PRICES)", ["provider"])
+LLM_SECONDS = Histogram("claimaudit_llm_call_seconds", "LLM request latency", ["provider"], buckets=LATENCY_BUCKETS)
+
+EMBEDDING_SECONDS = Histogram(
+    "claimaudit_embedding_encode_seconds", "Embedding encode time per call", ["backend", "kind"], buckets=FAST_BUCKETS
+)
+EMBEDDING_BATCH_SIZE = Histogram(
+    "claimaudit_embedding_batch_size", "Texts per embedding call", ["backend"],
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+)
+
+VECTOR_SEARCH_SECONDS = Histogram(
+    "claimaudit_vector_search_seconds", "Vector store search latency", ["engine"], buckets=FAST_BUCKETS
+)
+
+CACHE_REQUESTS = Counter("claimaudit_cache_requests_total", "Cache lookups", ["cache", "result"])
+RULE_ENGINE = Counter("claimaudit_rule_engine_total", "Compiled rule table evaluations", ["outcome"])
+
+INGESTED_CHUNKS = Counter("claimaudit_ingested_chunks_total", "Policy chunks written to the vector store")
+INGEST_SECONDS = Histogram(
+    "claimaudit_policy_ingest_seconds", "Time to chunk, embed and store one policy", buckets=LATENCY_BUCKETS
+)
+WORK_QUEUE_JOBS = Counter("claimaudit_work_queue_jobs_total", "Audit jobs finished by workers", ["outcome"])
+IMPORTED_CLAIMS = Counter("claimaudit_imported_claims_total", "Claims read by bulk import", ["format", "result"])
+
+
+def observe_audit(state: Dict[str, Any]):
+    """Record outcome, loop iterations and LLM calls of a finished audit graph state."""
+    final = state.get("final_audit")
+    if final is None:
+        return
+    AUDITS.labels(tier=state.get("audit_tier") or "", decision=final.decision.value).inc()
+    AUDIT_REFINE_ITERATIONS.observe(state.get("iteration_count") or 0)
+    AUDIT_LLM_CALLS.observe(state.get("llm_calls") or 0)
+
+
+def observe_encode(backend: str, kind: str, texts: int, seconds: float):
+    EMBEDDING_SECONDS.labels(backend=backend, kind=kind).observe(seconds)
+    EMBEDDING_BATCH_SIZE.labels(backend=backend).observe(texts)
+
+
+def record_cache(cache: str, hit: bool):
+    CACHE_REQUESTS.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+
+def rule_engine_counts() -> Dict[str, int]:
+    """Rule engine outcomes recorded by this process, by outcome label."""
+    counts = {"decided_locally": 0, "deferred": 0}
+    for metric in RULE_ENGINE.collect():
+        for sample in metric.samples:
+            if sample.name.endswith("_total"):
+                counts[sample.labels["outcome"]] = int(sample.value)
+    return counts
+
+
+def token_usage(response) -> Tuple[int, int]:
+    """(prompt, completion) tokens from an LLMResult, across provider conventions."""
+    prompt = completion = 0
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                prompt += usage.get("input_tokens", 0)
+                completion += usage.get("output_tokens", 0)
+    if prompt or completion:
+        return prompt, completion
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    return usage.get("prompt_tokens", 0) or 0, usage.get("completion_tokens", 0) or 0
+
+
+def llm_metrics_handler(provider: str):
+    """LangChain callback handler that counts calls, tokens and latency for one provider."""
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class LLMMetricsHandler(BaseCallbackHandler):
+        # Cheap bookkeeping: run in the caller instead of a thread executor
+        run_inline = True
+
+        def __init__(self):
+            self.provider = provider
+            self._started: Dict[UUID, float] = {}
+
+        def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs):
+            self._started[run_id] = time.perf_counter()
+
+        def on_llm_start(self, serialized, prompts, *, run_id: UUID, **kwargs):
+            self._started[run_id] = time.perf_counter()
+
+        def _finish(self, run_id: UUID, status: str):
+            started = self._started.pop(run_id, None)
+            if started is not None:
+                LLM_SECONDS.labels(provider=self.provider).observe(time.perf_counter() - started)
+            LLM_CALLS.labels(provider=self.provider, status=status).inc()
+
+        def on_llm_end(self, response, *, run_id: UUID, **kwargs):
+            self._finish(run_id, "ok")
+            prompt, completion = token_usage(response)
+            LLM_TOKENS.labels(provider=self.provider, kind="prompt").inc(prompt)
+            LLM_TOKENS.labels(provider=self.provider, kind="completion").inc(completion)
+
+        def on_llm_error(self, error, *, run_id: UUID, **kwargs):
+            self._finish(run_id, "error")
+
+    return LLMMetricsHandler()
+
+
+def render(registry: Optional[CollectorRegistry] = None) -> Tuple[bytes, str]:
+    """Exposition payload and content type, aggregated across workers in multiprocess mode."""
+    if registry is None and os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    if registry is None:
+        from prometheus_client import REGISTRY
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
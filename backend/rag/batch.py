@@ -0,0 +1,236 @@
+"""
+Cohort Batch Auditing.
+Claims in a batch that share CPT/ICD codes and payer retrieve the same policy
+context, so they are audited together:
+1. Group claims by retrieval signature
+2. Retrieve context once per group
+3. One auditor call per group with a per-claim structured output array
+4. Split the array back into individual AuditOutputs (local scoring + finalize)
+Claims the cohort call drops or fails to self-check fall back to the full pipeline.
+Each cohort runs against one BATCH_AUDIT_TIMEOUT_SECONDS deadline, shared by
+its fallback audits.
+"""
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import JsonOutputParser
+from langchain_core.pydantic_v1 import BaseModel, Field
+
+from shared.schemas import ClaimInput, AuditOutput
+from backend.config import settings
+from backend import metrics
+from backend.rag.pipeline import (
+    LLMSelfCheckedDraft,
+    build_retrieval_request,
+    get_llm,
+    retrieve_context,
+    initial_audit_state,
+    local_score_node,
+    finalize_node,
+    record_audit,
+    run_rag_pipeline,
+)
+from backend.rag.token_budget import batch_scope, node_scope
+from backend.rag.deadline import before_deadline, deadline_after, timeout_for
+
+COHORT_TIER = "cohort"
+
+
+class LLMCohortAudit(LLMSelfCheckedDraft):
+    claim_id: str = Field(description="The ID of the claim this audit belongs to, copied exactly")
+
+
+class LLMCohortDraft(BaseModel):
+    audits: List[LLMCohortAudit] = Field(description="One audit per claim, in the same order as the claims")
+
+
+COHORT_AUDITOR_PROMPT = """
+You are the Lead Auditor for APCA ClaimAudit. Audit EACH of the medical claims below against the shared policy context, then check your own work.
+
+CLAIMS:
+{claims}
+
+POLICY CONTEXT:
+{context}
+
+INSTRUCTIONS:
+1. Produce exactly one audit per claim and copy its 'claim_id' exactly.
+2. Audit each claim independently; details of one claim must not influence another.
+3. For each rule, you MUST provide an EXACT citation from the context.
+4. Use the 'source_policy_title' as provided in the context chunks.
+5. If a rule is not explicitly covered, mark the decision as PEND_INFO or NEEDS_HUMAN.
+6. Do NOT use external medical knowledge.
+
+SELF-CHECK (per claim, before answering):
+- Every 'citation_text' must exist LITERALLY in the context.
+- Every 'source_policy_title' must match a title in the context.
+- List anything that fails these checks in that claim's 'self_check_errors'.
+
+OUTPUT FORMAT:
+{format_instructions}
+"""
+
+
+def cohort_query_claim(claim: ClaimInput) -> ClaimInput:
+    """The claim with its codes in a fixed order, so the same codes listed in any order make one retrieval request."""
+    return claim.model_copy(update={"cpt_codes": sorted(claim.cpt_codes), "icd_codes": sorted(claim.icd_codes)})
+
+
+def retrieval_signature(claim: ClaimInput) -> Tuple:
+    """
+    The retrieval request (query and metadata filter) of a claim's cohort.
+    Claims with equal signatures get identical policy context, because the
+    cohort's context is retrieved with exactly that request.
+    """
+    query, filter_meta = build_retrieval_request(cohort_query_claim(claim))
+    return query, tuple(sorted(filter_meta.items()))
+
+
+def group_claims(claims: List[ClaimInput], max_group_size: int) -> List[List[ClaimInput]]:
+    """Group claims by retrieval signature, splitting groups larger than max_group_size."""
+    by_signature: Dict[Tuple, List[ClaimInput]] = {}
+    for claim in claims:
+        by_signature.setdefault(retrieval_signature(claim), []).append(claim)
+
+    groups = []
+    size = max(1, max_group_size)
+    for members in by_signature.values():
+        for i in range(0, len(members), size):
+            groups.append(members[i:i + size])
+    return groups
+
+
+def _format_claims(claims: List[ClaimInput]) -> str:
+    lines = []
+    for claim in claims:
+        lines.append(
+            f"- ID: {claim.claim_id} | Payer: {claim.payer} | "
+            f"Codes: {', '.join(claim.cpt_codes)} / {', '.join(claim.icd_codes)} | "
+            f"Billed: ${claim.billed_amount}"
+            + (f" | Notes: {claim.notes}" if claim.notes else "")
+        )
+    return "\n".join(lines)
+
+
+def split_cohort_response(response: Dict[str, Any], claims: List[ClaimInput]) -> Dict[str, Dict[str, Any]]:
+    """Map the cohort output array back to claim IDs, dropping unknown or duplicate entries."""
+    wanted = {c.claim_id for c in claims}
+    drafts: Dict[str, Dict[str, Any]] = {}
+    for item in response.get("audits", []) or []:
+        claim_id = str(item.pop("claim_id", ""))
+        if claim_id in wanted and claim_id not in drafts:
+            drafts[claim_id] = item
+    return drafts
+
+
+def _usable(draft: Optional[Dict[str, Any]]) -> bool:
+    """A cohort draft that can be finalized as is: present, non-empty and not self-flagged."""
+    return bool(draft) and not draft.get("self_check_errors")
+
+
+async def _finalize_from_draft(
+    claim: ClaimInput, draft: Dict[str, Any], context: Dict[str, Any], usage: Dict[str, float]
+) -> AuditOutput:
+    errors = draft.pop("self_check_errors", []) or []
+    state = initial_audit_state(claim)
+    state.update(context)
+    state.update({
+        "token_usage": {"cohort_audit": usage} if usage else {},
+        "audit_draft": draft,
+        "verification": {"is_hallucination": bool(errors), "errors": errors, "improvement_notes": ""},
+        "iteration_count": 1,
+        "audit_tier": COHORT_TIER,
+        "triage_reason": "cohort batch",
+        "llm_calls": 1,
+    })
+    state.update(local_score_node(state))
+    state.update(await finalize_node(state))
+    metrics.observe_audit(state)
+    await asyncio.to_thread(record_audit, state)
+    return state["final_audit"]
+
+
+async def audit_cohort(claims: List[ClaimInput], timeout: Optional[float] = None) -> List[AuditOutput]:
+    """
+    Audit a group of claims that share a retrieval signature.
+    `timeout` defaults to BATCH_AUDIT_TIMEOUT_SECONDS; 0 runs without a deadline.
+    """
+    timeout = settings.BATCH_AUDIT_TIMEOUT_SECONDS if timeout is None else timeout
+    if len(claims) == 1:
+        return [await run_rag_pipeline(claims[0], timeout)]
+
+    deadline = deadline_after(timeout)
+    context = retrieve_context(cohort_query_claim(claims[0]))
+    if not context["retrieved_chunks"]:
+        raise ValueError("Cannot audit without policy context.")
+
+    llm = get_llm(temperature=0.1)
+    parser = JsonOutputParser(pydantic_object=LLMCohortDraft)
+    prompt = ChatPromptTemplate.from_template(COHORT_AUDITOR_PROMPT)
+    chain = prompt | llm | parser
+
+    with node_scope() as cohort_usage:
+        try:
+            response = await before_deadline(deadline, chain.ainvoke({
+                "claims": _format_claims(claims),
+                "context": context["context_str"],
+                "format_instructions": parser.get_format_instructions()
+            }))
+        except asyncio.TimeoutError:
+            metrics.AUDIT_DEADLINE_STOPS.labels(node="cohort_audit").inc()
+            print(f"Warning: Cohort audit of {len(claims)} claims hit the batch deadline")
+            response = {}
+        except Exception as e:
+            print(f"Warning: Cohort audit failed, auditing {len(claims)} claims individually: {e}")
+            response = {}
+
+    drafts = split_cohort_response(response if isinstance(response, dict) else {}, claims)
+    accepted = [c for c in claims if _usable(drafts.get(c.claim_id))]
+    # The shared call is split evenly over the claims whose audit it produced
+    usage_share = cohort_usage.as_dict(share=1 / len(accepted)) if accepted else {}
+
+    results = []
+    for claim in claims:
+        if _usable(drafts.get(claim.claim_id)):
+            results.append(await _finalize_from_draft(claim, drafts[claim.claim_id], context, usage_share))
+        else:
+            # Dropped, empty or self-flagged: give this claim the full multi-agent loop
+            results.append(await run_rag_pipeline(claim, timeout_for(deadline)))
+    return results
+
+
+async def run_batch_audit(
+    claims: List[ClaimInput],
+    max_group_size: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    timeout: Optional[float] = None,
+) -> List[AuditOutput]:
+    """
+    Audit a batch of claims with cohort grouping. Results follow input order.
+    `timeout` is the per-cohort deadline (default BATCH_AUDIT_TIMEOUT_SECONDS).
+
+    Raises:
+        ValueError: If two claims share a claim_id (cohort outputs are matched by ID)
+    """
+    seen = set()
+    duplicates = sorted({c.claim_id for c in claims if c.claim_id in seen or seen.add(c.claim_id)})
+    if duplicates:
+        raise ValueError(f"Duplicate claim_id in batch: {', '.join(duplicates)}")
+
+    groups = group_claims(claims, max_group_size or settings.BATCH_GROUP_SIZE)
+    semaphore = asyncio.Semaphore(concurrency or settings.BATCH_CONCURRENCY)
+
+    async def _run(group: List[ClaimInput]) -> List[AuditOutput]:
+        async with semaphore:
+            return await audit_cohort(group, timeout)
+
+    # Every audit in the request draws from one BATCH_TOKEN_BUDGET
+    with batch_scope():
+        group_results = await asyncio.gather(*[_run(g) for g in groups])
+
+    by_id = {}
+    for group, outputs in zip(groups, group_results):
+        for claim, output in zip(group, outputs):
+            by_id[claim.claim_id] = output
+    return [by_id[c.claim_id] for c in claims]
@@ -0,0 +1,208 @@
+"""
+Offset-Tracking Chunker.
+Splits policy markdown by headers (Policy > Section > Subsection), then into
+size-bounded, overlapping windows, and records for every chunk where it came
+from: the character span [start_char, end_char) in the source document and
+the page it starts on. Chunk text is always exactly source[start_char:end_char],
+so a citation located inside a chunk maps straight back to the document.
+
+Page numbers come from the "## Page N" headings that pdf_utils writes for each
+PDF page; documents without them are page 1 throughout.
+
+Window length is measured in characters (OffsetTextSplitter) or in the
+embedding model's word-pieces (TokenTextSplitter), selected by CHUNKING_MODE.
+"""
+import bisect
+import re
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from backend.config import settings
+
+# Bump when chunk boundaries change, so stored policies are re-chunked and re-embedded
+CHUNKER_VERSION = "offsets-1"
+
+HEADER_RE = re.compile(r"^(#{1,3})[ \t]+(.+?)[ \t]*#*[ \t]*$", re.MULTILINE)
+PAGE_RE = re.compile(r"^page\s+(\d+)$", re.IGNORECASE)
+HEADER_LEVELS = {1: "Policy", 2: "Section", 3: "Subsection"}
+# Preferred break points, strongest first; a break is only taken in the second half of a window
+SEPARATORS = ("\n\n", "\n", ". ", " ")
+
+
+class ChunkSpan(NamedTuple):
+    text: str
+    start_char: int
+    end_char: int
+    page: int
+    headers: Dict[str, str]
+
+
+class OffsetTextSplitter:
+    """
+    Character-measured windows of at most chunk_size with chunk_overlap of
+    overlap, broken at paragraph, line, sentence or word boundaries.
+    Subclasses change the unit of measure by overriding _measure.
+    """
+
+    unit = "chars"
+
+    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200):
+        if chunk_overlap >= chunk_size:
+            raise ValueError("chunk_overlap must be smaller than chunk_size")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+
+    @property
+    def signature(self) -> str:
+        """Identifies the chunk boundaries this splitter produces (part of the policy version tag)."""
+        return f"{self.unit}-{self.chunk_size}-{self.chunk_overlap}"
+
+    def _measure(self, text: str, start: int, end: int) -> "_CharMeasure":
+        """Measures lengths inside text[start:end] in this splitter's unit."""
+        return _CharMeasure()
+
+    def split_span(self, text: str, start: int, end: int) -> List[Tuple[int, int]]:
+        """Windows over text[start:end] as (start, end) offsets into `text`, whitespace-trimmed."""
+        spans = []
+        measure = self._measure(text, start, end)
+        pos = _skip_space(text, start, end)
+        while pos < end:
+            limit = measure.advance(pos, end, self.chunk_size)
+            stop = limit if limit >= end else _break_before(text, pos, limit)
+            spans.append((pos, _trim_end(text, pos, stop)))
+            if stop >= end:
+                break
+            nxt = measure.retreat(pos, stop, self.chunk_overlap)
+            # Start the overlap on a word boundary
+            if nxt > pos and not text[nxt - 1].isspace():
+                space = _find_space(text, nxt, stop)
+                nxt = space if space != -1 else stop
+            if nxt <= pos:
+                nxt = stop
+            pos = _skip_space(text, nxt, end)
+        return [s for s in spans if s[1] > s[0]]
+
+    def split_markdown(self, markdown_text: str) -> List[ChunkSpan]:
+        """Header-aware chunks of a whole document with their spans and pages."""
+        page_starts, page_numbers = _page_index(markdown_text)
+        chunks = []
+        for headers, body_start, body_end in _sections(markdown_text):
+            for start, end in self.split_span(markdown_text, body_start, body_end):
+                page = page_numbers[bisect.bisect_right(page_starts, start) - 1] if page_starts else 1
+                chunks.append(ChunkSpan(markdown_text[start:end], start, end, page, headers))
+        return chunks
+
+
+class TokenTextSplitter(OffsetTextSplitter):
+    """
+    Windows measured in the embedding model's own word-pieces, so a chunk is
+    never longer than the model reads. With chunk_size = max_seq_length less
+    the [CLS]/[SEP] pair, nothing in a chunk is lost to truncation.
+
+    `tokenizer` is a tokenizers.Tokenizer (see embeddings.load_embedding_tokenizer)
+    with truncation and padding off; each section is tokenized once.
+    """
+
+    unit = "tokens"
+
+    def __init__(self, tokenizer, chunk_size: int = 254, chunk_overlap: int = 32):
+        super().__init__(chunk_size, chunk_overlap)
+        self.tokenizer = tokenizer
+
+    def _measure(self, text: str, start: int, end: int) -> "_TokenMeasure":
+        encoding = self.tokenizer.encode(text[start:end], add_special_tokens=False)
+        return _TokenMeasure([(start + s, start + e) for s, e in encoding.offsets if e > s])
+
+
+class _CharMeasure:
+    def advance(self, start: int, end: int, size: int) -> int:
+        """Offset after `size` units from `start`, not past `end`."""
+        return min(start + size, end)
+
+    def retreat(self, start: int, end: int, size: int) -> int:
+        """Offset `size` units before `end`, not before `start`."""
+        return max(end - size, start)
+
+
+class _TokenMeasure:
+    """Unit arithmetic over the character offsets of a section's tokens."""
+
+    def __init__(self, offsets: List[Tuple[int, int]]):
+        self.starts = [s for s, _ in offsets]
+        self.ends = [e for _, e in offsets]
+
+    def advance(self, start: int, end: int, size: int) -> int:
+        last = bisect.bisect_left(self.starts, start) + size - 1
+        return min(self.ends[last], end) if last < len(self.ends) else end
+
+    def retreat(self, start: int, end: int, size: int) -> int:
+        first = bisect.bisect_right(self.ends, end) - size
+        return max(self.starts[first], start) if first >= 0 else start
+
+
+def create_splitter(mode: Optional[str] = None, tokenizer=None) -> OffsetTextSplitter:
+    """The splitter selected by CHUNKING_MODE ("chars" or "tokens")."""
+    mode = (mode or settings.CHUNKING_MODE).lower()
+    if mode == "chars":
+        return OffsetTextSplitter(settings.CHUNK_SIZE_CHARS, settings.CHUNK_OVERLAP_CHARS)
+    if mode == "tokens":
+        if tokenizer is None:
+            from backend.rag.embeddings import load_embedding_tokenizer
+            tokenizer = load_embedding_tokenizer()
+        # Room for the [CLS] and [SEP] tokens the model adds
+        return TokenTextSplitter(tokenizer, settings.EMBEDDING_MAX_SEQ_LENGTH - 2, settings.CHUNK_OVERLAP_TOKENS)
+    raise ValueError(f"Unknown CHUNKING_MODE '{mode}'. Use chars or tokens.")
+
+
+def _sections(text: str) -> List[Tuple[Dict[str, str], int, int]]:
+    """(header path, body start, body end) for the text under each header."""
+    sections = []
+    headers: Dict[str, str] = {}
+    body_start = 0
+    for match in HEADER_RE.finditer(text):
+        sections.append((dict(headers), body_start, match.start()))
+        level = len(match.group(1))
+        headers = {k: v for k, v in headers.items() if k in [HEADER_LEVELS[l] for l in range(1, level)]}
+        headers[HEADER_LEVELS[level]] = match.group(2)
+        body_start = match.end()
+    sections.append((dict(headers), body_start, len(text)))
+    return [s for s in sections if text[s[1]:s[2]].strip()]
+
+
+def _page_index(text: str) -> Tuple[List[int], List[int]]:
+    starts, numbers = [], []
+    for match in HEADER_RE.finditer(text):
+        page = PAGE_RE.match(match.group(2))
+        if page:
+            starts.append(match.start())
+            numbers.append(int(page.group(1)))
+    return starts, numbers
+
+
+def _skip_space(text: str, pos: int, end: int) -> int:
+    while pos < end and text[pos].isspace():
+        pos += 1
+    return pos
+
+
+def _trim_end(text: str, start: int, end: int) -> int:
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return end
+
+
+def _find_space(text: str, start: int, end: int) -> int:
+    for i in range(start, end):
+        if text[i].isspace():
+            return i
+    return -1
+
+
+def _break_before(text: str, start: int, limit: int) -> int:
+    """Best break point in text[start:limit]: the strongest separator in its second half."""
+    floor = start + (limit - start) // 2
+    for sep in SEPARATORS:
+        i = text.rfind(sep, floor, limit)
+        if i != -1:
+            # Keep a sentence's full stop with it
+            return i + 1 if sep == ". " else i + len(sep)
+    return limit
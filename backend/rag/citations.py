@@ -0,0 +1,141 @@
+"""
+Citation Resolution.
+Locates each citation quote from an audit draft in the retrieved chunks with
+one Aho-Corasick pass over the chunk texts (all quotes matched at once), then
+answers lookups from a dict. Matching ignores case and runs of whitespace,
+since models re-flow quoted text; offsets are mapped back to the original
+chunk text, and through the chunk's start_char to the source document.
+"""
+from collections import deque
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+# Shorter quotes match too many places to identify a chunk
+MIN_QUOTE_CHARS = 12
+ELLIPSES = ("...", "…")
+
+
+class AhoCorasick:
+    """Multi-pattern substring automaton: every occurrence of every pattern in one scan."""
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns: List[str] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        for pattern in patterns:
+            self._add(pattern)
+        self._build()
+
+    def _add(self, pattern: str):
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append(len(self.patterns))
+        self.patterns.append(pattern)
+
+    def _build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(ch, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def finditer(self, text: str) -> Iterator[Tuple[int, int]]:
+        """(pattern index, start offset) of every match, in order of match end."""
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            for p in self._out[node]:
+                yield p, i + 1 - len(self.patterns[p])
+
+
+def normalize(text: str) -> Tuple[str, List[int]]:
+    """Lowercased text with whitespace runs collapsed to one space, and each output char's offset in `text`."""
+    chars, offsets = [], []
+    pending_space = False
+    for i, ch in enumerate(text):
+        if ch.isspace():
+            pending_space = bool(chars)
+            continue
+        if pending_space:
+            chars.append(" ")
+            offsets.append(i - 1)
+            pending_space = False
+        chars.append(ch.lower())
+        offsets.append(i)
+    return "".join(chars), offsets
+
+
+def quote_pattern(quote: str) -> str:
+    """The normalized part of a quote to search for: its longest fragment between ellipses."""
+    fragments = [quote]
+    for mark in ELLIPSES:
+        fragments = [piece for f in fragments for piece in f.split(mark)]
+    text, _ = normalize(max(fragments, key=lambda f: len(f.strip())).strip(" \"'“”."))
+    return text
+
+
+class CitationMatch(NamedTuple):
+    chunk: Dict[str, Any]
+    start_char: int
+    end_char: int
+
+
+class CitationIndex:
+    """Exact locations of a set of quotes across retrieved chunks."""
+
+    def __init__(self, chunks: List[Dict[str, Any]], quotes: Iterable[str]):
+        patterns = {quote_pattern(q) for q in quotes if q}
+        automaton = AhoCorasick(sorted(p for p in patterns if len(p) >= MIN_QUOTE_CHARS))
+        # pattern -> one match per chunk, in retrieval (relevance) order
+        self._matches: Dict[str, List[CitationMatch]] = {}
+        if not automaton.patterns:
+            return
+        for chunk in chunks:
+            text = chunk.get("text") or ""
+            normalized, offsets = normalize(text)
+            base = (chunk.get("metadata") or {}).get("start_char") or 0
+            seen = set()
+            for p, start in automaton.finditer(normalized):
+                if p in seen:
+                    continue
+                seen.add(p)
+                pattern = automaton.patterns[p]
+                end = offsets[start + len(pattern) - 1] + 1
+                self._matches.setdefault(pattern, []).append(
+                    CitationMatch(chunk, base + offsets[start], base + end)
+                )
+
+    def resolve(
+        self, quote: str, chunk_id: Optional[Any] = None, policy_name: Optional[str] = None
+    ) -> Optional[CitationMatch]:
+        """
+        Where `quote` occurs: in chunk `chunk_id` if it is there, else in the
+        most relevant chunk of `policy_name`, else in the most relevant chunk.
+        """
+        matches = self._matches.get(quote_pattern(quote or ""))
+        if not matches:
+            return None
+        if chunk_id is not None:
+            for m in matches:
+                if str(m.chunk.get("chunk_id")) == str(chunk_id):
+                    return m
+        if policy_name:
+            for m in matches:
+                if (m.chunk.get("metadata") or {}).get("policy_name") == policy_name:
+                    return m
+        return matches[0]
@@ -0,0 +1,208 @@
+"""
+Qdrant Collection Profiles.
+Named bundles of collection settings (QDRANT_PROFILE) trading RAM for latency
+and recall as the policy corpus grows:
+- "default":     full float32 vectors and HNSW graph in RAM
+- "scalar":      int8 scalar quantization in RAM, originals on disk, rescored
+- "product":     product quantization (x16) in RAM, originals on disk, rescored
+- "on_disk":     vectors, payloads and HNSW graph on disk, no quantization
+- "low_latency": denser HNSW graph, higher search ef, int8 quantization in RAM
+Individual QDRANT_* overrides are applied on top of the selected profile.
+Existing collections are migrated in place with update_collection; Qdrant
+rebuilds indexes and quantized vectors in the background.
+
+Usage:
+    python -m backend.rag.collection_profiles show
+    python -m backend.rag.collection_profiles migrate --profile scalar
+"""
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.config import settings
+
+
+class CollectionProfile(BaseModel):
+    """Storage, index and search-time parameters of a Qdrant collection."""
+    name: str
+    quantization: str = "none"  # none | scalar | product
+    quantization_always_ram: bool = True
+    rescore: bool = True
+    oversampling: float = 1.0
+    on_disk_vectors: bool = False
+    on_disk_payload: bool = False
+    hnsw_on_disk: bool = False
+    hnsw_m: int = 16
+    hnsw_ef_construct: int = 100
+    search_ef: Optional[int] = None  # None = Qdrant default (ef_construct)
+
+
+PROFILES: Dict[str, CollectionProfile] = {
+    "default": CollectionProfile(name="default"),
+    "scalar": CollectionProfile(
+        name="scalar", quantization="scalar", oversampling=2.0, on_disk_vectors=True, on_disk_payload=True
+    ),
+    "product": CollectionProfile(
+        name="product", quantization="product", oversampling=3.0, on_disk_vectors=True, on_disk_payload=True
+    ),
+    "on_disk": CollectionProfile(
+        name="on_disk", on_disk_vectors=True, on_disk_payload=True, hnsw_on_disk=True
+    ),
+    "low_latency": CollectionProfile(
+        name="low_latency", quantization="scalar", oversampling=1.5, hnsw_m=32, hnsw_ef_construct=200, search_ef=128
+    ),
+}
+
+# Settings attribute -> profile field, applied when the setting is non-empty
+_OVERRIDES = {
+    "QDRANT_QUANTIZATION": ("quantization", str),
+    "QDRANT_RESCORE": ("rescore", lambda v: v.lower() == "true"),
+    "QDRANT_OVERSAMPLING": ("oversampling", float),
+    "QDRANT_ON_DISK_VECTORS": ("on_disk_vectors", lambda v: v.lower() == "true"),
+    "QDRANT_ON_DISK_PAYLOAD": ("on_disk_payload", lambda v: v.lower() == "true"),
+    "QDRANT_HNSW_M": ("hnsw_m", int),
+    "QDRANT_HNSW_EF_CONSTRUCT": ("hnsw_ef_construct", int),
+    "QDRANT_SEARCH_EF": ("search_ef", int),
+}
+
+
+def get_profile(name: Optional[str] = None, apply_overrides: bool = True) -> CollectionProfile:
+    """Resolve a named profile (default: QDRANT_PROFILE) plus any QDRANT_* overrides."""
+    name = name or settings.QDRANT_PROFILE
+    if name not in PROFILES:
+        raise ValueError(f"Unknown Qdrant profile '{name}'. Available: {', '.join(PROFILES)}")
+    profile = PROFILES[name].model_copy()
+    if apply_overrides:
+        for attr, (field, cast) in _OVERRIDES.items():
+            raw = getattr(settings, attr, "")
+            if raw:
+                setattr(profile, field, cast(raw))
+    if profile.quantization not in ("none", "scalar", "product"):
+        raise ValueError(f"Unknown quantization '{profile.quantization}'. Use none, scalar or product.")
+    return profile
+
+
+# --- Qdrant model builders ---
+
+def vector_params(profile: CollectionProfile, dim: int):
+    from qdrant_client.models import Distance, VectorParams
+    return VectorParams(size=dim, distance=Distance.COSINE, on_disk=profile.on_disk_vectors)
+
+
+def hnsw_config(profile: CollectionProfile):
+    from qdrant_client.models import HnswConfigDiff
+    return HnswConfigDiff(m=profile.hnsw_m, ef_construct=profile.hnsw_ef_construct, on_disk=profile.hnsw_on_disk)
+
+
+def quantization_config(profile: CollectionProfile):
+    from qdrant_client import models
+
+    if profile.quantization == "scalar":
+        return models.ScalarQuantization(scalar=models.ScalarQuantizationConfig(
+            type=models.ScalarType.INT8, quantile=0.99, always_ram=profile.quantization_always_ram
+        ))
+    if profile.quantization == "product":
+        return models.ProductQuantization(product=models.ProductQuantizationConfig(
+            compression=models.CompressionRatio.X16, always_ram=profile.quantization_always_ram
+        ))
+    return None
+
+
+def search_params(profile: CollectionProfile):
+    """Search-time HNSW ef and quantization rescoring, or None for Qdrant defaults."""
+    from qdrant_client.models import QuantizationSearchParams, SearchParams
+
+    quantization = None
+    if profile.quantization != "none":
+        quantization = QuantizationSearchParams(rescore=profile.rescore, oversampling=profile.oversampling)
+    if quantization is None and profile.search_ef is None:
+        return None
+    return SearchParams(hnsw_ef=profile.search_ef, quantization=quantization)
+
+
+def create_collection(client, collection_name: str, profile: CollectionProfile, dim: int):
+    client.create_collection(
+        collection_name=collection_name,
+        vectors_config=vector_params(profile, dim),
+        hnsw_config=hnsw_config(profile),
+        quantization_config=quantization_config(profile),
+        on_disk_payload=profile.on_disk_payload,
+    )
+
+
+# --- Migration ---
+
+def profile_drift(client, collection_name: str, profile: CollectionProfile) -> Dict[str, Any]:
+    """Settings where the existing collection differs from the profile: {field: (current, wanted)}."""
+    config = client.get_collection(collection_name).config
+    vectors = config.params.vectors
+    quant = config.quantization_config
+    current_quant = "none"
+    if quant is not None:
+        current_quant = "scalar" if getattr(quant, "scalar", None) is not None else "product"
+
+    current = {
+        "quantization": current_quant,
+        "on_disk_vectors": bool(getattr(vectors, "on_disk", False)),
+        "on_disk_payload": bool(config.params.on_disk_payload),
+        "hnsw_m": config.hnsw_config.m,
+        "hnsw_ef_construct": config.hnsw_config.ef_construct,
+        "hnsw_on_disk": bool(config.hnsw_config.on_disk),
+    }
+    return {
+        field: (value, getattr(profile, field))
+        for field, value in current.items()
+        if value != getattr(profile, field)
+    }
+
+
+def migrate_collection(client, collection_name: str, profile: CollectionProfile) -> Dict[str, Any]:
+    """Bring an existing collection in line with the profile without re-ingesting."""
+    from qdrant_client.models import CollectionParamsDiff, Disabled, VectorParamsDiff
+
+    drift = profile_drift(client, collection_name, profile)
+    if not drift:
+        return drift
+
+    quantization = quantization_config(profile)
+    client.update_collection(
+        collection_name=collection_name,
+        vectors_config={"": VectorParamsDiff(on_disk=profile.on_disk_vectors)},
+        hnsw_config=hnsw_config(profile),
+        quantization_config=quantization if quantization is not None else Disabled.DISABLED,
+        collection_params=CollectionParamsDiff(on_disk_payload=profile.on_disk_payload),
+    )
+    print(f"✓ Migrated collection {collection_name} to profile '{profile.name}': {sorted(drift)}")
+    return drift
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Show or migrate the Qdrant collection profile.")
+    parser.add_argument("command", choices=["show", "migrate"])
+    parser.add_argument("--profile", default=None, help="Profile name (default: QDRANT_PROFILE)")
+    args = parser.parse_args()
+
+    from backend.rag.singletons import get_vector_store
+
+    profile = get_profile(args.profile)
+    store = get_vector_store()
+    if args.command == "show":
+        drift = profile_drift(store.client, store.collection_name, profile)
+    else:
+        drift = migrate_collection(store.client, store.collection_name, profile)
+    print(json.dumps({
+        "collection": store.collection_name,
+        "profile": profile.model_dump(),
+        "drift": {k: {"current": c, "wanted": w} for k, (c, w) in drift.items()},
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
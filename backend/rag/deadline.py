@@ -0,0 +1,61 @@
+"""
+Audit Deadlines.
+Each audit carries an absolute deadline (time.monotonic()) in its graph
+state. LLM nodes check the time left before they start and run their call
+under asyncio.wait_for, so a slow provider request is cancelled when the
+deadline passes instead of holding the request open.
+
+When time is short the graph degrades rather than fails: refinement is
+skipped, scoring falls back to the local rubric, and an audit that has no
+draft yet finishes as a partial PEND_INFO result.
+
+Interactive audits use AUDIT_TIMEOUT_SECONDS and /audit/batch claims use
+BATCH_AUDIT_TIMEOUT_SECONDS; callers can pass their own timeout (0 = none).
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Nodes whose wall time is (almost entirely) one LLM round trip
+LLM_NODES = ("audit", "fast_audit", "verify", "refine", "score")
+
+
+def deadline_after(seconds: Optional[float]) -> Optional[float]:
+    """Absolute monotonic deadline `seconds` from now; None when seconds is 0 or unset."""
+    return time.monotonic() + seconds if seconds and seconds > 0 else None
+
+
+def time_left(deadline: Optional[float]) -> float:
+    """Seconds until the deadline (negative once passed); infinite without one."""
+    return float("inf") if deadline is None else deadline - time.monotonic()
+
+
+def timeout_for(deadline: Optional[float]) -> float:
+    """Remaining time as a timeout argument: 0 means no deadline, so a passed deadline is a tiny positive."""
+    return 0 if deadline is None else max(time_left(deadline), 1e-3)
+
+
+def llm_call_estimate(state: Dict[str, Any]) -> float:
+    """Mean seconds per LLM call so far in this audit (0 before the first call)."""
+    calls = state.get("llm_calls") or 0
+    if not calls:
+        return 0.0
+    timings = state.get("node_timings") or {}
+    return sum(timings.get(node, 0.0) for node in LLM_NODES) / 1000 / calls
+
+
+def time_short(state: Dict[str, Any]) -> bool:
+    """Whether the deadline has passed or another LLM call would likely overrun it."""
+    deadline = state.get("deadline")
+    if deadline is None:
+        return False
+    return time_left(deadline) <= llm_call_estimate(state)
+
+
+async def before_deadline(deadline: Optional[float], awaitable: Awaitable[T]) -> T:
+    """Await `awaitable`, cancelling it and raising asyncio.TimeoutError once the deadline passes."""
+    if deadline is None:
+        return await awaitable
+    return await asyncio.wait_for(awaitable, timeout=max(time_left(deadline), 0))
@@ -0,0 +1,302 @@
+"""
+Embedding Sidecar.
+One process loads the embedding model and serves encode requests over a Unix
+domain socket, so every uvicorn/gunicorn worker shares one copy of the model
+(and its load time) instead of holding its own. Requests from all workers
+are coalesced into micro-batches of up to EMBEDDING_SERVER_MAX_BATCH texts,
+waiting at most EMBEDDING_SERVER_BATCH_WAIT_MS for company.
+
+    python -m backend.rag.embedding_server --socket /tmp/claimaudit-embeddings.sock
+
+Workers opt in with EMBEDDING_SERVER_SOCKET; get_embeddings() then returns an
+EmbeddingClient, which has the LocalEmbeddings interface.
+
+Wire format (all integers big-endian):
+    request   u32 length + JSON {"op": "info"} or {"op": "encode", "texts": [...]}
+    response  u8 status + u32 length + payload
+              status 0, encode: u32 rows + u32 dim + rows*dim little-endian float32
+              status 0, info:   JSON {"model", "backend", "dimension", "max_seq_length"}
+              status 1:         UTF-8 error message
+"""
+import asyncio
+import json
+import os
+import socket
+import struct
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backend.config import settings
+from backend import metrics
+from backend.rag.embeddings import _check_dimension
+
+REQUEST_HEADER = struct.Struct("!I")
+RESPONSE_HEADER = struct.Struct("!BI")
+MATRIX_HEADER = struct.Struct("!II")
+VECTOR_DTYPE = np.dtype("<f4")
+OK, ERROR = 0, 1
+
+
+def _matrix_payload(matrix: np.ndarray) -> bytes:
+    rows, dim = matrix.shape
+    return MATRIX_HEADER.pack(rows, dim) + np.ascontiguousarray(matrix, dtype=VECTOR_DTYPE).tobytes()
+
+
+def _parse_matrix(payload: bytes) -> np.ndarray:
+    rows, dim = MATRIX_HEADER.unpack_from(payload)
+    return np.frombuffer(payload, dtype=VECTOR_DTYPE, offset=MATRIX_HEADER.size).reshape(rows, dim)
+
+
+class EmbeddingServer:
+    """Asyncio Unix socket server that micro-batches encode requests onto one encoder."""
+
+    def __init__(self, encoder, max_batch: Optional[int] = None, batch_wait_ms: Optional[float] = None):
+        self.encoder = encoder
+        self.max_batch = max_batch or settings.EMBEDDING_SERVER_MAX_BATCH
+        wait_ms = settings.EMBEDDING_SERVER_BATCH_WAIT_MS if batch_wait_ms is None else batch_wait_ms
+        self.batch_wait = wait_ms / 1000
+        # The model runs on one thread; the event loop keeps reading requests meanwhile
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding-server")
+        self._pending: Deque[Tuple[List[str], asyncio.Future]] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._batcher: Optional[asyncio.Task] = None
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "model": getattr(self.encoder, "model_name", settings.EMBEDDING_MODEL),
+            "backend": getattr(self.encoder, "backend_name", ""),
+            "dimension": getattr(self.encoder, "dimension", settings.EMBEDDING_DIM),
+            "max_seq_length": getattr(self.encoder, "max_seq_length", settings.EMBEDDING_MAX_SEQ_LENGTH),
+        }
+
+    async def start(self, path: str):
+        _remove_stale_socket(path)
+        self._wakeup = asyncio.Event()
+        self._batcher = asyncio.create_task(self._run_batches())
+        self._server = await asyncio.start_unix_server(self._handle, path=path)
+        os.chmod(path, 0o660)
+        print(f"✓ Embedding server listening on {path} ({self.info()['model']}, batch {self.max_batch})")
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._batcher is not None:
+            self._batcher.cancel()
+        self._executor.shutdown(wait=False)
+
+    async def encode(self, texts: List[str]) -> np.ndarray:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((texts, future))
+        self._wakeup.set()
+        return await future
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    (length,) = REQUEST_HEADER.unpack(await reader.readexactly(REQUEST_HEADER.size))
+                    request = json.loads(await reader.readexactly(length))
+                except asyncio.IncompleteReadError:
+                    break
+                try:
+                    if request.get("op") == "encode":
+                        status, payload = OK, _matrix_payload(await self.encode(list(request.get("texts") or [])))
+                    elif request.get("op") == "info":
+                        status, payload = OK, json.dumps(self.info()).encode()
+                    else:
+                        status, payload = ERROR, f"Unknown op {request.get('op')!r}".encode()
+                except Exception as e:
+                    status, payload = ERROR, f"Encode failed: {e}".encode()
+                writer.write(RESPONSE_HEADER.pack(status, len(payload)) + payload)
+                await writer.drain()
+        except (ConnectionError, json.JSONDecodeError):
+            pass
+        finally:
+            writer.close()
+
+    def _take_batch(self) -> List[Tuple[List[str], asyncio.Future]]:
+        """Pop queued requests up to max_batch texts (always at least one request)."""
+        batch, total = [], 0
+        while self._pending and (not batch or total + len(self._pending[0][0]) <= self.max_batch):
+            texts, future = self._pending.popleft()
+            batch.append((texts, future))
+            total += len(texts)
+        return batch
+
+    async def _run_batches(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self._pending:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            # Give concurrent requests from other workers a moment to join the batch
+            if self.batch_wait and sum(len(t) for t, _ in self._pending) < self.max_batch:
+                await asyncio.sleep(self.batch_wait)
+            batch = self._take_batch()
+            texts = [text for request, _ in batch for text in request]
+            try:
+                matrix = await loop.run_in_executor(self._executor, self._encode, texts)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            offset = 0
+            for request, future in batch:
+                if not future.done():
+                    future.set_result(matrix[offset:offset + len(request)])
+                offset += len(request)
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.info()["dimension"]), dtype=VECTOR_DTYPE)
+        return np.asarray(self.encoder.embed_documents(texts), dtype=VECTOR_DTYPE)
+
+
+def _remove_stale_socket(path: str):
+    """Remove a socket file left by a dead server; refuse to start over a live one."""
+    if not os.path.exists(path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except OSError:
+        os.unlink(path)
+        return
+    finally:
+        probe.close()
+    raise RuntimeError(f"An embedding server is already listening on {path}")
+
+
+class EmbeddingClient:
+    """
+    LocalEmbeddings-compatible client for the embedding sidecar. Each thread
+    keeps its own connection; a broken connection is reopened once per request
+    so a restarted sidecar is picked up transparently.
+    """
+
+    backend_name = "sidecar"
+
+    def __init__(self, socket_path: Optional[str] = None, timeout: Optional[float] = None):
+        self.socket_path = socket_path or settings.EMBEDDING_SERVER_SOCKET
+        self.timeout = timeout if timeout is not None else settings.EMBEDDING_SERVER_TIMEOUT_SECONDS
+        self._local = threading.local()
+
+        info = json.loads(self._request({"op": "info"}))
+        self.model_name = info["model"]
+        self.dimension = info["dimension"]
+        self.max_seq_length = info["max_seq_length"]
+        _check_dimension(self.model_name, self.dimension)
+
+    def _connect(self) -> socket.socket:
+        # Workers may start before the sidecar has loaded its model: retry until the timeout
+        deadline = time.monotonic() + self.timeout
+        delay = 0.05
+        while True:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.socket_path)
+                return sock
+            except OSError as e:
+                sock.close()
+                if time.monotonic() + delay > deadline:
+                    raise ValueError(
+                        f"Embedding server not reachable at {self.socket_path}: {e}. "
+                        f"Start it with `python -m backend.rag.embedding_server`."
+                    ) from e
+                time.sleep(delay)
+                delay = min(delay * 2, 1.0)
+
+    def _request(self, payload: Dict[str, Any]) -> bytes:
+        body = json.dumps(payload).encode()
+        frame = REQUEST_HEADER.pack(len(body)) + body
+        for attempt in range(2):
+            sock = getattr(self._local, "sock", None)
+            if sock is None:
+                sock = self._local.sock = self._connect()
+            try:
+                sock.sendall(frame)
+                status, length = RESPONSE_HEADER.unpack(_recv_exactly(sock, RESPONSE_HEADER.size))
+                response = _recv_exactly(sock, length)
+                break
+            except OSError:
+                sock.close()
+                self._local.sock = None
+                if attempt:
+                    raise
+        if status != OK:
+            raise RuntimeError(response.decode("utf-8", "replace"))
+        return response
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        start = time.perf_counter()
+        vectors = _parse_matrix(self._request({"op": "encode", "texts": list(texts)})).tolist()
+        metrics.observe_encode(self.backend_name, "documents", len(texts), time.perf_counter() - start)
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        start = time.perf_counter()
+        vector = _parse_matrix(self._request({"op": "encode", "texts": [text]}))[0].tolist()
+        metrics.observe_encode(self.backend_name, "query", 1, time.perf_counter() - start)
+        return vector
+
+
+def _recv_exactly(sock: socket.socket, n: int) -> bytes:
+    buffer = bytearray(n)
+    view = memoryview(buffer)
+    received = 0
+    while received < n:
+        count = sock.recv_into(view[received:])
+        if not count:
+            raise ConnectionResetError("Embedding server closed the connection")
+        received += count
+    return bytes(buffer)
+
+
+async def serve(path: str, encoder=None, ready: Optional[threading.Event] = None):
+    """Run the sidecar until cancelled. `encoder` defaults to the EMBEDDING_BACKEND model."""
+    if encoder is None:
+        from backend.rag.embeddings import get_embeddings
+        encoder = get_embeddings(settings.EMBEDDING_BACKEND)
+    server = EmbeddingServer(encoder)
+    await server.start(path)
+    if ready is not None:
+        ready.set()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+        if os.path.exists(path):
+            os.unlink(path)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve the embedding model to local workers over a Unix socket.")
+    parser.add_argument("--socket", default=settings.EMBEDDING_SERVER_SOCKET or "/tmp/claimaudit-embeddings.sock")
+    parser.add_argument("--backend", default=None, help="Embedding backend (defaults to EMBEDDING_BACKEND)")
+    args = parser.parse_args()
+
+    encoder = None
+    if args.backend:
+        from backend.rag.embeddings import get_embeddings
+        encoder = get_embeddings(args.backend)
+    try:
+        asyncio.run(serve(args.socket, encoder))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,276 @@
 """
-Embedding model wrapper using local sentence-transformers.
-Optimized for speed and meaningful semantic search.
+Embedding backends for local sentence embeddings.
+Optimized for speed and meaningful semantic search on CPU-only hosts:
+- "torch": PyTorch SentenceTransformer (reference implementation)
+- "onnx": ONNX Runtime export of the same model
+- "onnx-int8": ONNX Runtime with dynamic int8 quantization
+Model, dimension and thread count come from Settings (EMBEDDING_*). With
+EMBEDDING_SERVER_SOCKET set, workers use the shared sidecar instead
+(backend/rag/embedding_server.py).
 """
-from typing import List
-from sentence_transformers import SentenceTransformer
+import inspect
+import json
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from backend.config import settings
+from backend import metrics
+
 
 class LocalEmbeddings:
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
-        self.model = SentenceTransformer(model_name)
+    """PyTorch SentenceTransformer backend."""
+
+    backend_name = "torch"
+
+    def __init__(self, model_name: Optional[str] = None, threads: Optional[int] = None):
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        threads = threads if threads is not None else settings.EMBEDDING_THREADS
+        if threads:
+            torch.set_num_threads(threads)
+
+        self.model_name = model_name or settings.EMBEDDING_MODEL
+        self.model = SentenceTransformer(self.model_name, device="cpu")
+        self.dimension = self.model.get_sentence_embedding_dimension()
+        self.max_seq_length = self.model.max_seq_length
+        _check_dimension(self.model_name, self.dimension)
 
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
-        embeddings = self.model.encode(texts, convert_to_tensor=False)
+        start = time.perf_counter()
+        embeddings = self.model.encode(
+            texts, batch_size=settings.EMBEDDING_BATCH_SIZE, convert_to_tensor=False
+        )
+        metrics.observe_encode(self.backend_name, "documents", len(texts), time.perf_counter() - start)
         return embeddings.tolist()
 
     def embed_query(self, text: str) -> List[float]:
+        start = time.perf_counter()
         embedding = self.model.encode(text, convert_to_tensor=False)
+        metrics.observe_encode(self.backend_name, "query", 1, time.perf_counter() - start)
         return embedding.tolist()
+
+
+class OnnxEmbeddings:
+    """
+    ONNX Runtime backend: tokenizer + transformer graph + mean pooling + L2 norm,
+    matching the SentenceTransformer pipeline of MiniLM-style models.
+    """
+
+    def __init__(
+        self,
+        model_dir: Optional[str] = None,
+        quantized: bool = False,
+        threads: Optional[int] = None,
+        model_name: Optional[str] = None,
+    ):
+        import numpy as np
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self._np = np
+        self.model_name = model_name or settings.EMBEDDING_MODEL
+        model_dir = Path(model_dir or settings.EMBEDDING_ONNX_DIR)
+        model_file = model_dir / ("model_int8.onnx" if quantized else "model.onnx")
+        if not model_file.exists():
+            raise ValueError(
+                f"ONNX model not found at {model_file}. Export it with "
+                f"`python -m backend.rag.embeddings export {model_dir}`."
+            )
+        self.backend_name = "onnx-int8" if quantized else "onnx"
+
+        options = ort.SessionOptions()
+        threads = threads if threads is not None else settings.EMBEDDING_THREADS
+        if threads:
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(str(model_file), options, providers=["CPUExecutionProvider"])
+        self._input_names = {i.name for i in self.session.get_inputs()}
+
+        self.max_seq_length = _exported_max_seq_length(model_dir)
+        self.tokenizer = Tokenizer.from_file(str(model_dir / "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=self.max_seq_length)
+        self.tokenizer.enable_padding()
+
+        self.dimension = self.session.get_outputs()[0].shape[-1]
+        if not isinstance(self.dimension, int):
+            self.dimension = len(self._encode(["dimension probe"])[0])
+        _check_dimension(self.model_name, self.dimension)
+
+    def _encode(self, texts: List[str]):
+        np = self._np
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+
+        token_embeddings = self.session.run(None, feeds)[0]
+        mask = attention_mask[..., None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return pooled / np.clip(norms, 1e-12, None)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        start_time = time.perf_counter()
+        # Length-sorted batches keep padding (and wasted compute) to a minimum
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        batch = settings.EMBEDDING_BATCH_SIZE
+        out: List[List[float]] = [None] * len(texts)
+        for start in range(0, len(order), batch):
+            idx = order[start:start + batch]
+            for i, vector in zip(idx, self._encode([texts[i] for i in idx]).tolist()):
+                out[i] = vector
+        metrics.observe_encode(self.backend_name, "documents", len(texts), time.perf_counter() - start_time)
+        return out
+
+    def embed_query(self, text: str) -> List[float]:
+        start = time.perf_counter()
+        vector = self._encode([text])[0].tolist()
+        metrics.observe_encode(self.backend_name, "query", 1, time.perf_counter() - start)
+        return vector
+
+
+def _exported_max_seq_length(model_dir: Path) -> int:
+    """
+    The token limit the model was exported with: SentenceTransformer's own
+    max_seq_length (sentence_bert_config.json), else the tokenizer's
+    model_max_length, else EMBEDDING_MAX_SEQ_LENGTH.
+    """
+    for name, key in (("sentence_bert_config.json", "max_seq_length"), ("tokenizer_config.json", "model_max_length")):
+        path = model_dir / name
+        if not path.exists():
+            continue
+        value = json.loads(path.read_text(encoding="utf-8")).get(key)
+        # Tokenizers without a limit report a huge sentinel instead
+        if isinstance(value, int) and 0 < value < 100_000:
+            return value
+    return settings.EMBEDDING_MAX_SEQ_LENGTH
+
+
+def _check_dimension(model_name: str, dimension: int):
+    if settings.EMBEDDING_DIM and dimension != settings.EMBEDDING_DIM:
+        raise ValueError(
+            f"Embedding model '{model_name}' produces {dimension}-dim vectors "
+            f"but EMBEDDING_DIM is {settings.EMBEDDING_DIM}."
+        )
+
+
+def get_embeddings(backend: Optional[str] = None):
+    """
+    Create the embedding backend selected by EMBEDDING_BACKEND, or a client for
+    the embedding sidecar when EMBEDDING_SERVER_SOCKET is set and no backend is named.
+    The application default (no backend named) goes through the shared
+    embedding cache when one is configured.
+    """
+    if backend is None:
+        from backend.db.cache import CachedEmbeddings, embedding_cache
+        from backend.db.singletons import get_cache_backend
+
+        if settings.EMBEDDING_SERVER_SOCKET:
+            from backend.rag.embedding_server import EmbeddingClient
+            encoder = EmbeddingClient()
+        else:
+            encoder = get_embeddings(settings.EMBEDDING_BACKEND)
+        cache_backend = get_cache_backend()
+        if cache_backend is None or not settings.CACHE_EMBEDDING_TTL_SECONDS:
+            return encoder
+        return CachedEmbeddings(encoder, embedding_cache(cache_backend))
+    backend = backend.lower()
+    if backend == "torch":
+        return LocalEmbeddings()
+    if backend == "onnx":
+        return OnnxEmbeddings(quantized=False)
+    if backend == "onnx-int8":
+        return OnnxEmbeddings(quantized=True)
+    raise ValueError(f"Unknown EMBEDDING_BACKEND '{backend}'. Use torch, onnx or onnx-int8.")
+
+
+def load_embedding_tokenizer(model_name: Optional[str] = None, model_dir: Optional[str] = None):
+    """
+    The embedding model's tokenizer (tokenizers.Tokenizer) for measuring text
+    in model tokens: the exported EMBEDDING_ONNX_DIR/tokenizer.json when
+    present, else the model's tokenizer from the Hugging Face Hub cache.
+    Truncation and padding are off, so every token of the input is counted.
+    """
+    from tokenizers import Tokenizer
+
+    path = Path(model_dir or settings.EMBEDDING_ONNX_DIR) / "tokenizer.json"
+    if path.exists():
+        tokenizer = Tokenizer.from_file(str(path))
+    else:
+        model_name = model_name or settings.EMBEDDING_MODEL
+        repo = model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+        try:
+            tokenizer = Tokenizer.from_pretrained(repo)
+        except Exception as e:
+            raise ValueError(
+                f"No tokenizer for {model_name}: {path} does not exist and the Hub download failed ({e}). "
+                f"Export the model with `python -m backend.rag.embeddings export {path.parent}`."
+            ) from e
+    tokenizer.no_truncation()
+    tokenizer.no_padding()
+    return tokenizer
+
+
+def export_onnx_model(output_dir: str, model_name: Optional[str] = None, quantize: bool = True) -> Path:
+    """
+    Export a SentenceTransformer's transformer to ONNX (plus tokenizer.json),
+    and optionally write a dynamically int8-quantized copy next to it.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    model_name = model_name or settings.EMBEDDING_MODEL
+    out = Path(output_dir)
+    out.mkdir(parents=True, exist_ok=True)
+
+    st_model = SentenceTransformer(model_name, device="cpu")
+    transformer = st_model[0].auto_model.eval()
+    st_model.tokenizer.save_pretrained(str(out))
+    (out / "sentence_bert_config.json").write_text(
+        json.dumps({"max_seq_length": st_model.max_seq_length}), encoding="utf-8"
+    )
+
+    dummy = st_model.tokenizer(["export probe"], return_tensors="pt")
+    input_names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in dummy]
+    dynamic_axes = {n: {0: "batch", 1: "sequence"} for n in input_names}
+    dynamic_axes["token_embeddings"] = {0: "batch", 1: "sequence"}
+
+    # Newer torch defaults to the dynamo exporter; the TorchScript one handles dynamic_axes
+    extra = {"dynamo": False} if "dynamo" in inspect.signature(torch.onnx.export).parameters else {}
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            tuple(dummy[n] for n in input_names),
+            str(out / "model.onnx"),
+            input_names=input_names,
+            output_names=["token_embeddings"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+            **extra
+        )
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(str(out / "model.onnx"), str(out / "model_int8.onnx"), weight_type=QuantType.QInt8)
+
+    print(f"✓ Exported {model_name} to {out}")
+    return out
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export the embedding model for the ONNX backends.")
+    parser.add_argument("command", choices=["export"])
+    parser.add_argument("output_dir", nargs="?", default=settings.EMBEDDING_ONNX_DIR)
+    parser.add_argument("--model", default=None, help="Model name (defaults to EMBEDDING_MODEL)")
+    parser.add_argument("--no-quantize", action="store_true")
+    args = parser.parse_args()
+    export_onnx_model(args.output_dir, args.model, quantize=not args.no_quantize)
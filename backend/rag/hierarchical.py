@@ -0,0 +1,209 @@
+"""
+Two-Level (Hierarchical) Retrieval.
+With HIERARCHICAL_RETRIEVAL enabled, a small policy-level index sits next to
+the chunk store: one summary vector per policy (or per section, see
+HIERARCHICAL_SUMMARY_LEVEL), the normalized centroid of its chunk vectors,
+written at ingest time from the embeddings the chunks are stored with.
+Per-policy summaries keep the first level an order of magnitude smaller than
+the chunks; per-section ones route a little more precisely but are only a
+few times smaller, so they save far less search time.
+
+A search first ranks summaries to pick the HIERARCHICAL_TOP_POLICIES most
+relevant policies, then runs the chunk search restricted to them, so the
+chunk-level top-k comes from a few thousand candidate rows instead of the
+whole corpus and never mixes in near-duplicate text from unrelated policies.
+Searches pinned to a policy_id skip routing. Works over any chunk store
+(qdrant, numpy or sharded).
+"""
+import hashlib
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+from backend.config import settings
+from backend import metrics
+from backend.rag.vector_store import chunk_points
+
+SUMMARY_SUFFIX = "__policies"
+# Summaries ranked per selected policy, so a policy with many strong sections does not crowd out the rest
+SECTION_CANDIDATES_PER_POLICY = 4
+
+
+class HierarchicalVectorStore:
+    """Chunk store plus a policy summary index that routes each search to the most relevant policies."""
+
+    def __init__(self, chunks, summaries, top_policies: Optional[int] = None, summary_level: Optional[str] = None):
+        self.chunks = chunks
+        self.summaries = summaries
+        self.encoder = chunks.encoder
+        self.collection_name = chunks.collection_name
+        self.top_policies = top_policies or settings.HIERARCHICAL_TOP_POLICIES
+        self.summary_level = (summary_level or settings.HIERARCHICAL_SUMMARY_LEVEL).lower()
+        if self.summary_level not in ("section", "policy"):
+            raise ValueError(f"Unknown HIERARCHICAL_SUMMARY_LEVEL '{self.summary_level}'. Use section or policy.")
+        # One gate for both levels, so a policy version flips in the chunks and summaries at once
+        self.versions = chunks.versions
+        summaries.versions = chunks.versions
+
+    # ── Writes ───────────────────────────────────────────────
+
+    def add_chunks(self, chunks: List[Dict[str, Any]]):
+        """Embed chunks once, store them, and write the summaries of the sections they belong to."""
+        if not chunks:
+            return
+        vectors = self.encoder.embed_documents([c["text"] for c in chunks])
+        ids, payloads = chunk_points(chunks)
+        self.import_points(ids, vectors, payloads)
+
+    def import_points(self, ids: List[Any], vectors, payloads: List[Dict[str, Any]], batch_size: int = 256):
+        """
+        Store pre-embedded points and (re)write their summaries. A summary is the
+        centroid of the points passed in one call: write a policy version at once.
+        """
+        self.chunks.import_points(ids, vectors, payloads, batch_size)
+        self.write_summaries(vectors, payloads)
+
+    def _summary_key(self, metadata: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+        tag = metadata.get("version_tag") or metadata.get("policy_id")
+        if not metadata.get("policy_id") or not tag:
+            return None
+        return tag, metadata.get("section_path", "") if self.summary_level == "section" else ""
+
+    def write_summaries(self, vectors, payloads: List[Dict[str, Any]]):
+        """Upsert the summary vector of every section (or policy) among these chunk points."""
+        groups: Dict[Tuple[str, str], list] = {}
+        self._accumulate(groups, vectors, payloads)
+        self._write(groups)
+
+    def _accumulate(self, groups: Dict[Tuple[str, str], list], vectors, payloads: List[Dict[str, Any]]):
+        """Add the normalized chunk vectors to the running [sum, count, metadata] of their summary."""
+        rows_by_key: Dict[Tuple[str, str], List[int]] = {}
+        for i, payload in enumerate(payloads):
+            key = self._summary_key(payload.get("full_metadata") or {})
+            if key is not None:
+                rows_by_key.setdefault(key, []).append(i)
+        if not rows_by_key:
+            return
+
+        matrix = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = matrix / np.where(norms == 0, 1.0, norms)
+        for key, rows in rows_by_key.items():
+            total = matrix[rows].sum(axis=0)
+            if key in groups:
+                groups[key][0] += total
+                groups[key][1] += len(rows)
+            else:
+                groups[key] = [total, len(rows), payloads[rows[0]].get("full_metadata") or {}]
+
+    def _write(self, groups: Dict[Tuple[str, str], list]):
+        if not groups:
+            return
+        ids, centroids, summary_payloads = [], [], []
+        for (tag, section), (total, count, metadata) in groups.items():
+            summary = {k: metadata[k] for k in ("policy_id", "policy_name", "payer", "version_tag") if k in metadata}
+            if section:
+                summary["section_path"] = section
+            ids.append(int(hashlib.sha256(f"{tag}|{section}".encode("utf-8")).hexdigest()[:15], 16))
+            centroids.append(total / count)
+            summary_payloads.append({
+                "text": " > ".join(filter(None, [summary.get("policy_name", ""), section])),
+                "full_metadata": summary,
+            })
+        self.summaries.import_points(ids, np.stack(centroids), summary_payloads)
+
+    def rebuild_summaries(self) -> int:
+        """
+        Rebuild the summary index from the stored chunk vectors. Chunks are
+        streamed in export batches and folded into one running sum per summary,
+        so memory grows with the number of summaries, not chunks.
+        """
+        groups: Dict[Tuple[str, str], list] = {}
+        for _, batch_vectors, batch_payloads in self.chunks.export_points():
+            self._accumulate(groups, batch_vectors, batch_payloads)
+        self._write(groups)
+        return self.summaries.count()
+
+    # ── Reads ────────────────────────────────────────────────
+
+    def search(self, query: str, limit: int = 5, filter_metadata: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Semantic search over the chunks of the policies whose summaries best match the query.
+        """
+        try:
+            query_vector = self.encoder.embed_query(query)
+        except Exception as e:
+            print(f"Error embedding query: {e}")
+            return []
+        return self.search_by_vector(query_vector, limit=limit, filter_metadata=filter_metadata)
+
+    @metrics.VECTOR_SEARCH_SECONDS.labels(engine="hierarchical").time()
+    def search_by_vector(self, query_vector: List[float], limit: int = 5, filter_metadata: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        filter_metadata = filter_metadata or {}
+        if filter_metadata.get("policy_id"):
+            return self.chunks.search_by_vector(query_vector, limit=limit, filter_metadata=filter_metadata)
+
+        policies = self.route(query_vector, filter_metadata)
+        if not policies:
+            # No summaries (yet): plain flat search
+            return self.chunks.search_by_vector(query_vector, limit=limit, filter_metadata=filter_metadata)
+        return self.chunks.search_by_vector(
+            query_vector, limit=limit, filter_metadata={**filter_metadata, "policy_id": policies}
+        )
+
+    def route(self, query_vector: List[float], filter_metadata: Optional[Dict[str, Any]] = None) -> List[str]:
+        """IDs of the policies a search visits, most relevant first."""
+        hits = self.summaries.search_by_vector(
+            query_vector, limit=self.top_policies * SECTION_CANDIDATES_PER_POLICY, filter_metadata=filter_metadata
+        )
+        policies: List[str] = []
+        for hit in hits:
+            policy_id = (hit.get("metadata") or {}).get("policy_id")
+            if policy_id and policy_id not in policies:
+                policies.append(policy_id)
+                if len(policies) == self.top_policies:
+                    break
+        return policies
+
+    def count(self) -> int:
+        """Number of chunk points (summaries are not counted)."""
+        return self.chunks.count()
+
+    def has_policy(self, policy_id: str) -> bool:
+        return self.chunks.has_policy(policy_id)
+
+    def version_tags(self, policy_id: str) -> Set[str]:
+        return self.chunks.version_tags(policy_id)
+
+    def delete_policy(
+        self, policy_id: str, keep_version_tag: Optional[str] = None, version_tag: Optional[str] = None
+    ) -> int:
+        """Delete a policy's chunks and summaries. Returns the number of chunks deleted."""
+        self.summaries.delete_policy(policy_id, keep_version_tag=keep_version_tag, version_tag=version_tag)
+        return self.chunks.delete_policy(policy_id, keep_version_tag=keep_version_tag, version_tag=version_tag)
+
+    def activate_version(self, policy_id: str, version_tag: str):
+        self.summaries.activate_version(policy_id, version_tag)
+        self.chunks.activate_version(policy_id, version_tag)
+
+    def export_points(self, batch_size: int = 256) -> Iterator[Tuple[List[Any], List[List[float]], List[Dict[str, Any]]]]:
+        """Chunk points only; summaries are rebuilt from them on import."""
+        yield from self.chunks.export_points(batch_size)
+
+
+def build_hierarchical_store(chunks) -> HierarchicalVectorStore:
+    """Wrap the configured chunk store with a summary index on the same VECTOR_ENGINE."""
+    name = settings.QDRANT_COLLECTION + SUMMARY_SUFFIX
+    if settings.VECTOR_ENGINE == "numpy":
+        from backend.rag.numpy_store import NumpyVectorStore
+        summaries = NumpyVectorStore(encoder=chunks.encoder, collection_name=name)
+    else:
+        from backend.rag.vector_store import VectorStore, create_qdrant_client
+        client = getattr(chunks, "client", None) or create_qdrant_client()
+        summaries = VectorStore(collection_name=name, client=client, encoder=chunks.encoder)
+
+    store = HierarchicalVectorStore(chunks, summaries)
+    if summaries.count() == 0 and chunks.count() > 0:
+        # Policies ingested before routing was enabled
+        print(f"✓ Built {store.rebuild_summaries()} policy summaries for hierarchical retrieval")
+    return store
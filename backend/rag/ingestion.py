@@ -1,89 +1,139 @@
 """
 Ingestion Pipeline.
 Responsible for Structure-Aware Chunking of policy documents.
-Uses MarkdownHeaderTextSplitter to preserve semantic structure.
+Splits by markdown headers to preserve semantic structure, tracking where
+every chunk sits in the source document (character span and page).
 """
-from typing import List, Dict, Any
-from langchain.text_splitter import MarkdownHeaderTextSplitter, RecursiveCharacterTextSplitter
-from langchain_core.documents import Document
-from backend.rag.vector_store import VectorStore
+import hashlib
+import time
+from typing import TYPE_CHECKING, List, Dict, Any, Optional
+
+if TYPE_CHECKING:
+    from backend.rag.vector_store import VectorStore
+from backend import metrics
+from backend.db.cache import policies_changed
+from backend.rag.chunking import CHUNKER_VERSION, OffsetTextSplitter, create_splitter
+from backend.rag.rules import RuleIndex, compile_policy_rules
+from backend.rag.versioning import policy_version, swap_policy_version, version_tag
 
 class IngestionPipeline:
-    def __init__(self, vector_store: VectorStore):
+    def __init__(
+        self,
+        vector_store: "VectorStore",
+        rule_index: Optional[RuleIndex] = None,
+        splitter: Optional[OffsetTextSplitter] = None
+    ):
         self.vector_store = vector_store
+        self.rule_index = rule_index
         
-        # Headers to split on - preserving policy hierarchy
-        self.headers_to_split_on = [
-            ("#", "Policy"),
-            ("##", "Section"),
-            ("###", "Subsection"),
-        ]
-        self.markdown_splitter = MarkdownHeaderTextSplitter(
-            headers_to_split_on=self.headers_to_split_on
-        )
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000, 
-            chunk_overlap=200
-        )
+        # Header-aware splitter that records each chunk's character span and page,
+        # measuring windows in characters or embedding tokens (CHUNKING_MODE)
+        self.splitter = splitter or create_splitter()
 
-    def process_policy_markdown(self, markdown_text: str, policy_id: str, policy_name: str) -> int:
+    def process_policy_markdown(
+        self,
+        markdown_text: str,
+        policy_id: str,
+        policy_name: str,
+        covered_codes: Optional[List[str]] = None,
+        diagnosis_codes: Optional[List[str]] = None,
+        payer: Optional[str] = None
+    ) -> int:
         """
         Structure-Aware Chunking:
         1. Split by headers (Structure awareness: Policy > Section > Subsection).
-        2. Recursively split large chunks (Boundary detection: 1000 chars).
-        3. Add metadata (Citation info).
+        2. Split large sections into overlapping windows (Boundary detection: CHUNKING_MODE).
+        3. Add metadata (Citation info: page and character span, content version tag).
+        4. Swap the new version in atomically, replacing any previous version.
+        5. Compile mechanical coverage rules into the rule index.
         
         Returns:
             Number of chunks created
         """
-        try:
-            # 1. Structure Split
-            header_splits = self.markdown_splitter.split_text(markdown_text)
-            
-            # 2. Size Split
-            if header_splits:
-                final_chunks = self.text_splitter.split_documents(header_splits)
-            else:
-                # Fallback: if no headers found, just do text splitting
-                print("No markdown headers found, using simple text splitting")
-                doc = Document(page_content=markdown_text, metadata={})
-                final_chunks = self.text_splitter.split_documents([doc])
+        start = time.perf_counter()
+        chunk_docs = self.split_policy_markdown(markdown_text, policy_id, policy_name, payer)
+
+        if chunk_docs:
+            new_tag = chunk_docs[0]["metadata"]["version_tag"]
+            replaced = swap_policy_version(
+                self.vector_store, policy_id, new_tag, lambda: self.vector_store.add_chunks(chunk_docs)
+            )
+            policies_changed()
+            metrics.INGESTED_CHUNKS.inc(len(chunk_docs))
+            metrics.INGEST_SECONDS.observe(time.perf_counter() - start)
+            print(f"✓ Processed {len(chunk_docs)} chunks for policy '{policy_name}'"
+                  + (f" (replaced {replaced} chunks of the previous version)" if replaced else ""))
+            self.compile_rules(chunk_docs, policy_id, policy_name, covered_codes, diagnosis_codes)
+        else:
+            print(f"Warning: No chunks created for policy '{policy_name}'")
             
+        return len(chunk_docs)
+
+    def compile_rules(
+        self,
+        chunk_docs: List[Dict[str, Any]],
+        policy_id: str,
+        policy_name: str,
+        covered_codes: Optional[List[str]] = None,
+        diagnosis_codes: Optional[List[str]] = None
+    ):
+        """Extract coverage rules from the policy chunks into a new rule table version."""
+        if self.rule_index is None:
+            return
+        try:
+            rules = compile_policy_rules(policy_id, policy_name, chunk_docs, covered_codes, diagnosis_codes)
+            self.rule_index.put(rules)
+            print(
+                f"✓ Compiled rule table {policy_id}@{rules.version}: "
+                f"{len(rules.criteria)} criteria, {len(rules.documentation)} documentation requirements"
+            )
         except Exception as e:
-            print(f"Markdown splitting failed: {e}, falling back to simple text splitting")
-            # Fallback to simple text splitting
-            doc = Document(page_content=markdown_text, metadata={})
-            final_chunks = self.text_splitter.split_documents([doc])
+            # Rule compilation is an optimization; the LLM path still covers the policy
+            print(f"Warning: Rule compilation failed for policy '{policy_name}': {e}")
+
+    def split_policy_markdown(
+        self, markdown_text: str, policy_id: str, policy_name: str, payer: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Chunk policy markdown into vector store records without embedding them."""
+        # 1. Structure split + 2. size split, keeping each chunk's span and page in the source
+        spans = self.splitter.split_markdown(markdown_text)
         
         # 3. Standardization for Vector Store
+        # The chunker version and settings are part of the tag so re-chunked policies are re-embedded
+        tag = version_tag(
+            policy_id, policy_version(f"{CHUNKER_VERSION}:{self.splitter.signature}\n{markdown_text}")
+        )
         chunk_docs = []
-        for i, split in enumerate(final_chunks):
-            metadata = split.metadata if hasattr(split, 'metadata') else {}
-            path = " > ".join([v for k, v in metadata.items() if k in ["Policy", "Section", "Subsection"]])
+        for i, span in enumerate(spans):
+            path = " > ".join(span.headers[k] for k in ["Policy", "Section", "Subsection"] if k in span.headers)
             
             if not path:
                 path = "General"
             
-            # Use hash of policy_id + index for unique integer ID
-            chunk_id = abs(hash(f"{policy_id}-{i}")) % (10 ** 10)
+            # Stable hash of the version tag + index for a unique integer ID
+            # (builtin hash() is salted per process, which breaks persistent stores);
+            # a new policy version gets new IDs so it can be staged next to the old one
+            chunk_id = int(hashlib.sha256(f"{tag}-{i}".encode("utf-8")).hexdigest()[:15], 16)
             
+            chunk_metadata = {
+                "policy_id": policy_id, 
+                "policy_name": policy_name,
+                "section_path": path,
+                "page": span.page,
+                "start_char": span.start_char,
+                "end_char": span.end_char,
+                "version_tag": tag
+            }
+            if payer:
+                # Lets retrieval filter (and the sharded store route) by the claim's payer
+                chunk_metadata["payer"] = payer
+
             chunk_docs.append({
                 "chunk_id": chunk_id,
-                "text": split.page_content,
+                "text": span.text,
                 "source": policy_name,
                 "section": path,
-                "metadata": {
-                    "policy_id": policy_id, 
-                    "policy_name": policy_name,
-                    "section_path": path,
-                    "page": 1  # Placeholder for PDF page num
-                }
+                "metadata": chunk_metadata
             })
 
-        if chunk_docs:
-            self.vector_store.add_chunks(chunk_docs)
-            print(f"✓ Processed {len(chunk_docs)} chunks for policy '{policy_name}'")
-        else:
-            print(f"Warning: No chunks created for policy '{policy_name}'")
-            
-        return len(chunk_docs)
+        return chunk_docs
@@ -0,0 +1,372 @@
+"""
+In-process NumPy Vector Store.
+Single-node alternative to Qdrant (VECTOR_ENGINE=numpy) with the same interface:
+- Vectors live in one contiguous float32/float16 matrix (L2-normalized, so dot = cosine)
+- Exact top-k is one BLAS matmul plus argpartition
+- policy_id / payer filters use precomputed per-value row postings (sorted
+  row-index arrays; rows are append-only so they stay sorted for free)
+- Growth is append-only; upserts and deletes tombstone the old row and
+  compaction rewrites the matrix once enough rows are dead
+"""
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+from backend.config import settings
+from backend import metrics
+from backend.rag.embeddings import get_embeddings
+from backend.rag.vector_store import chunk_points
+from backend.rag.versioning import ACTIVE, VersionGate
+
+# Metadata fields with per-value row postings; other filter keys fall back to a payload scan
+INDEXED_FIELDS = ("policy_id", "payer", "version_tag")
+# float16 rows are upcast in cache-sized blocks (numpy has no float16 BLAS)
+SCORE_BLOCK_ROWS = 4096
+# Below this fraction of live rows a filter gathers the matching rows instead of scoring all
+GATHER_SELECTIVITY = 0.25
+
+
+class NumpyVectorStore:
+    def __init__(
+        self,
+        dim: Optional[int] = None,
+        dtype: Optional[str] = None,
+        encoder=None,
+        initial_capacity: int = 1024,
+        compact_ratio: Optional[float] = None,
+        collection_name: Optional[str] = None,
+    ):
+        self.encoder = encoder if encoder is not None else get_embeddings()
+        self.collection_name = collection_name or settings.QDRANT_COLLECTION
+        self.dim = dim or settings.EMBEDDING_DIM
+        self.dtype = np.dtype(dtype or settings.VECTOR_DTYPE)
+        self.compact_ratio = compact_ratio if compact_ratio is not None else settings.VECTOR_COMPACT_RATIO
+
+        self._lock = threading.RLock()
+        self._vectors = np.zeros((max(1, initial_capacity), self.dim), dtype=self.dtype)
+        self._alive = np.zeros(len(self._vectors), dtype=bool)
+        # Rows of staged or retired policy versions (payload "active": false)
+        self._inactive = np.zeros(len(self._vectors), dtype=bool)
+        self._size = 0
+        self._dead = 0
+        self._ids: List[Any] = []
+        self._payloads: List[Dict[str, Any]] = []
+        self._row_of: Dict[Any, int] = {}
+        self._postings: Dict[Tuple[str, Any], _Posting] = {}
+        self.versions = VersionGate()
+        print(f"✓ Created NumPy vector index: {self.collection_name} ({self.dim}-dim, {self.dtype.name})")
+
+    # ── Writes ───────────────────────────────────────────────
+
+    def add_chunks(self, chunks: List[Dict[str, Any]]):
+        """Embed and append chunks, replacing any existing rows with the same chunk_id."""
+        if not chunks:
+            return
+
+        embeddings = self.encoder.embed_documents([c["text"] for c in chunks])
+        ids, payloads = chunk_points(chunks)
+        self.import_points(ids, embeddings, payloads)
+        print(f"✓ Upserted {len(ids)} chunks to NumPy index")
+
+    def import_points(self, ids: List[Any], vectors, payloads: List[Dict[str, Any]], batch_size: int = 0):
+        """Append pre-embedded points (e.g. from a snapshot) without re-encoding."""
+        if not ids:
+            return
+        matrix = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = matrix / np.where(norms == 0, 1.0, norms)
+
+        with self._lock:
+            payloads = self.versions.mark(payloads)
+            self._reserve(self._size + len(ids))
+
+            start, end = self._size, self._size + len(ids)
+            self._vectors[start:end] = matrix
+            self._alive[start:end] = True
+            self._inactive[start:end] = [p.get(ACTIVE) is False for p in payloads]
+            new_rows: Dict[Tuple[str, Any], List[int]] = {}
+            for offset, (pid, payload) in enumerate(zip(ids, payloads)):
+                row = start + offset
+                self._tombstone(pid)
+                self._ids.append(pid)
+                self._payloads.append(payload)
+                self._row_of[pid] = row
+                metadata = payload.get("full_metadata") or {}
+                for field in INDEXED_FIELDS:
+                    value = metadata.get(field)
+                    if value is not None:
+                        new_rows.setdefault((field, value), []).append(row)
+            for key, rows in new_rows.items():
+                self._postings.setdefault(key, _Posting()).extend(rows)
+            self._size = end
+            self._maybe_compact()
+
+    def delete(self, ids: List[Any]) -> int:
+        """Tombstone points by id. Returns how many existed."""
+        with self._lock:
+            removed = sum(1 for pid in ids if self._tombstone(pid))
+            self._maybe_compact()
+        return removed
+
+    def delete_policy(
+        self, policy_id: str, keep_version_tag: Optional[str] = None, version_tag: Optional[str] = None
+    ) -> int:
+        """
+        Delete a policy's points through its policy_id posting.
+        keep_version_tag spares one version; version_tag deletes only that version.
+        Returns the number of points deleted.
+        """
+        with self._lock:
+            doomed = []
+            for row in self._live_rows(("policy_id", policy_id)):
+                tag = (self._payloads[row].get("full_metadata") or {}).get("version_tag")
+                if (version_tag and tag != version_tag) or (keep_version_tag and tag == keep_version_tag):
+                    continue
+                doomed.append(self._ids[row])
+            return self.delete(doomed)
+
+    def activate_version(self, policy_id: str, version_tag: str):
+        """Make one version of a policy visible and hide every other point of it, in one step."""
+        with self._lock:
+            for row in self._live_rows(("policy_id", policy_id)):
+                payload = self._payloads[row]
+                tag = (payload.get("full_metadata") or {}).get("version_tag")
+                if tag == version_tag:
+                    self._inactive[row] = False
+                    self._payloads[row] = {k: v for k, v in payload.items() if k != ACTIVE}
+                else:
+                    # Older versions, and untagged points stored before versioning
+                    self._inactive[row] = True
+                    self._payloads[row] = {**payload, ACTIVE: False}
+
+    def _live_rows(self, key: Tuple[str, Any]) -> np.ndarray:
+        posting = self._postings.get(key)
+        if posting is None:
+            return np.empty(0, dtype=np.int64)
+        rows = posting.rows()
+        return rows[self._alive[rows]]
+
+    def _tombstone(self, pid: Any) -> bool:
+        row = self._row_of.pop(pid, None)
+        if row is None:
+            return False
+        self._alive[row] = False
+        self._inactive[row] = False
+        self._dead += 1
+        return True
+
+    def _reserve(self, rows: int):
+        """Grow the matrix geometrically so appends stay amortized O(1)."""
+        capacity = len(self._vectors)
+        if rows <= capacity:
+            return
+        while capacity < rows:
+            capacity *= 2
+        self._vectors = _resized(self._vectors, capacity)
+        self._alive = _resized(self._alive, capacity)
+        self._inactive = _resized(self._inactive, capacity)
+
+    def _maybe_compact(self):
+        if self._size and self._dead / self._size > self.compact_ratio:
+            self.compact()
+
+    def compact(self):
+        """Drop tombstoned rows and rebuild ids, payloads and postings."""
+        with self._lock:
+            keep = np.flatnonzero(self._alive[:self._size])
+            capacity = max(1024, len(keep))
+            vectors = np.zeros((capacity, self.dim), dtype=self.dtype)
+            vectors[:len(keep)] = self._vectors[keep]
+
+            self._vectors = vectors
+            self._alive = np.zeros(capacity, dtype=bool)
+            self._alive[:len(keep)] = True
+            inactive = self._inactive[keep]
+            self._inactive = np.zeros(capacity, dtype=bool)
+            self._inactive[:len(keep)] = inactive
+            self._ids = [self._ids[r] for r in keep]
+            self._payloads = [self._payloads[r] for r in keep]
+            self._row_of = {pid: row for row, pid in enumerate(self._ids)}
+            # Old row -> new row; tombstoned rows map to -1 and are dropped
+            remap = np.full(self._size, -1, dtype=np.int64)
+            remap[keep] = np.arange(len(keep))
+            postings = {}
+            for key, posting in self._postings.items():
+                rows = remap[posting.rows()]
+                rows = rows[rows >= 0]
+                if len(rows):
+                    postings[key] = _Posting(rows)
+            self._postings = postings
+            self._size = len(keep)
+            self._dead = 0
+
+    # ── Reads ────────────────────────────────────────────────
+
+    def search(self, query: str, limit: int = 5, filter_metadata: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Semantic search for relevant chunks with optional metadata filtering.
+        """
+        try:
+            query_vector = self.encoder.embed_query(query)
+        except Exception as e:
+            print(f"Error embedding query: {e}")
+            return []
+        return self.search_by_vector(query_vector, limit=limit, filter_metadata=filter_metadata)
+
+    @metrics.VECTOR_SEARCH_SECONDS.labels(engine="numpy").time()
+    def search_by_vector(self, query_vector: List[float], limit: int = 5, filter_metadata: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Exact top-k by cosine similarity with a pre-computed query embedding."""
+        query = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+
+        with self._lock:
+            live = self.count()
+            rows = self._filter_rows(filter_metadata)
+            matches = live if rows is None else len(rows)
+            if not matches or limit <= 0:
+                return []
+
+            if rows is not None and matches < GATHER_SELECTIVITY * live:
+                # Selective filter: score only the matching rows
+                scores = self._vectors[rows].astype(np.float32) @ query
+                candidates = rows
+            else:
+                scores = self._score_all(query)
+                if rows is not None:
+                    mask = np.zeros(self._size, dtype=bool)
+                    mask[rows] = True
+                    scores[~mask] = -np.inf
+                elif self._dead:
+                    scores[~self._alive[:self._size]] = -np.inf
+                candidates = None
+
+            # Excluded rows score -inf, so the top k (k <= matches) are all valid
+            k = min(limit, matches)
+            top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+            top = top[np.argsort(-scores[top], kind="stable")]
+
+            results = []
+            for i in top:
+                row = int(candidates[i]) if candidates is not None else int(i)
+                payload = self._payloads[row]
+                results.append({
+                    "chunk_id": str(self._ids[row]),
+                    "score": float(scores[i]),
+                    "text": payload.get("text"),
+                    "metadata": payload.get("full_metadata")
+                })
+            return results
+
+    def _score_all(self, query: np.ndarray) -> np.ndarray:
+        if self.dtype == np.float32:
+            return self._vectors[:self._size] @ query
+        scores = np.empty(self._size, dtype=np.float32)
+        block = np.empty((min(SCORE_BLOCK_ROWS, self._size), self.dim), dtype=np.float32)
+        for start in range(0, self._size, SCORE_BLOCK_ROWS):
+            end = min(start + SCORE_BLOCK_ROWS, self._size)
+            upcast = block[:end - start]
+            upcast[...] = self._vectors[start:end]
+            scores[start:end] = upcast @ query
+        return scores
+
+    def _filter_rows(self, filter_metadata: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """
+        Sorted live rows matching every filter, or None when there is no filter.
+        A list value matches any of its items.
+        """
+        rows = None
+        for key, value in (filter_metadata or {}).items():
+            if not value:
+                continue
+            values = value if isinstance(value, (list, tuple, set, frozenset)) else [value]
+            if key in INDEXED_FIELDS:
+                postings = [self._postings.get((key, v)) for v in values]
+                parts = [posting.rows() for posting in postings if posting is not None]
+                if not parts:
+                    matched = np.empty(0, dtype=np.int64)
+                else:
+                    matched = parts[0] if len(parts) == 1 else np.unique(np.concatenate(parts))
+            else:
+                matched = np.flatnonzero(np.fromiter(
+                    ((p.get("full_metadata") or {}).get(key) in values for p in self._payloads),
+                    dtype=bool, count=self._size
+                ))
+            rows = matched if rows is None else np.intersect1d(rows, matched, assume_unique=True)
+        if rows is not None and self._dead:
+            rows = rows[self._alive[rows]]
+
+        # Staged or retired policy versions stay invisible
+        inactive = self._inactive[:self._size]
+        if inactive.any():
+            if rows is None:
+                rows = np.flatnonzero(self._alive[:self._size] & ~inactive)
+            else:
+                rows = rows[~inactive[rows]]
+        return rows
+
+    def count(self) -> int:
+        """Number of live points."""
+        return self._size - self._dead
+
+    def has_policy(self, policy_id: str) -> bool:
+        """Whether any chunks of the given policy are stored."""
+        return len(self._live_rows(("policy_id", policy_id))) > 0
+
+    def version_tags(self, policy_id: str) -> Set[str]:
+        """Version tags of the stored chunks of a policy."""
+        with self._lock:
+            tags = {(self._payloads[row].get("full_metadata") or {}).get("version_tag") for row in self._live_rows(("policy_id", policy_id))}
+        tags.discard(None)
+        return tags
+
+    def export_points(self, batch_size: int = 256) -> Iterator[Tuple[List[Any], List[List[float]], List[Dict[str, Any]]]]:
+        """
+        Yield (ids, vectors, payloads) batches of every point live when the
+        first batch is taken. The rows are copied under the lock and yielded
+        outside it, so a slow (or abandoned) consumer never blocks searches
+        and upserts.
+        """
+        with self._lock:
+            live = np.flatnonzero(self._alive[:self._size])
+            ids = [self._ids[r] for r in live]
+            vectors = self._vectors[live]
+            payloads = [self._payloads[r] for r in live]
+        for start in range(0, len(live), batch_size):
+            end = start + batch_size
+            yield ids[start:end], vectors[start:end].astype(np.float32).tolist(), payloads[start:end]
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the vector matrix and postings."""
+        return self._vectors.nbytes + self._alive.nbytes + self._inactive.nbytes + sum(p.nbytes for p in self._postings.values())
+
+
+class _Posting:
+    """Growable sorted array of row indices for one metadata value."""
+
+    def __init__(self, rows=None):
+        self._rows = np.asarray(rows if rows is not None else [], dtype=np.int64)
+        self._n = len(self._rows)
+
+    def extend(self, rows: List[int]):
+        if self._n + len(rows) > len(self._rows):
+            self._rows = _resized(self._rows, max(16, 2 * (self._n + len(rows))))
+        self._rows[self._n:self._n + len(rows)] = rows
+        self._n += len(rows)
+
+    def rows(self) -> np.ndarray:
+        return self._rows[:self._n]
+
+    @property
+    def nbytes(self) -> int:
+        return self._rows.nbytes
+
+
+def _resized(array: np.ndarray, capacity: int) -> np.ndarray:
+    grown = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+    rows = min(len(array), capacity)
+    grown[:rows] = array[:rows]
+    return grown
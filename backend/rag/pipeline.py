@@ -2,28 +2,37 @@
 RAG Pipeline Implementation using LangGraph.
 Implements a state-of-the-art Multi-Step Auditing flow with:
 1. Context Retrieval with Policy Identification
-2. Recursive Auditing (Auditor -> Verifier -> Refiner loop)
-3. Anti-Hallucination via metadata-gated consistency checks
-4. Robust confidence scoring based on evidence strength
+2. Compiled Rule Evaluation (mechanical criteria decided without the LLM)
+3. Risk Triage (single-call fast lane vs full loop)
+4. Recursive Auditing (Auditor -> Verifier -> Refiner loop)
+5. Anti-Hallucination via metadata-gated consistency checks
+6. Robust confidence scoring based on evidence strength
 """
+import asyncio
 import json
 import operator
-from typing import Annotated, List, Dict, Any, Union, Optional
+import time
+from typing import Annotated, List, Dict, Any, Union, Optional, Tuple
 from datetime import datetime
 from uuid import uuid4
 
-from langchain_groq import ChatGroq
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.prompts import ChatPromptTemplate
+from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
 from langchain_core.pydantic_v1 import BaseModel, Field
 from typing_extensions import TypedDict
 
-from langgraph.graph import StateGraph, END
-
 from shared.schemas import ClaimInput, AuditOutput, Citation, RuleApplied, AuditDecision
 from backend.config import settings
-from backend.rag.singletons import get_vector_store
+from backend import metrics
+from backend.db.cache import audit_cache, digest, policy_generation, retrieval_cache
+from backend.db.singletons import get_cache_backend
+from backend.rag.singletons import get_vector_store, get_rule_index
+from backend.rag.rules import evaluate_with_index
+from backend.rag.citations import CitationIndex
+from backend.rag.scoring import compute_local_confidence, record_scoring_sample
+from backend.rag.triage import triage_claim, CACHED_TIER, FAST_TIER, FULL_TIER, RULES_TIER
+from backend.rag.token_budget import add_usage, budget_exhausted, build_usage, node_scope, usage_handler
+from backend.rag.deadline import before_deadline, deadline_after, time_short
 
 # --- Pydantic Models for LLM Interaction ---
 
@@ -41,6 +50,9 @@ class LLMAuditDraft(BaseModel):
     rules: List[LLMRuleExtra] = Field(description="Detailed rule applications with citations")
     missing_info: List[str] = Field(description="Any missing data required for a definitive decision", default=[])
 
+class LLMSelfCheckedDraft(LLMAuditDraft):
+    self_check_errors: List[str] = Field(description="Any rule, citation or title in this draft that is NOT supported literally by the context", default=[])
+
 class LLMVerification(BaseModel):
     is_hallucination: bool = Field(description="True if any part of the audit is NOT supported by the provided context")
     errors: List[str] = Field(description="Specific list of hallucinated claims or invalid citations")
@@ -52,6 +64,13 @@ class LLMConfidenceScorer(BaseModel):
 
 # --- LangGraph State Definition ---
 
+def _add_timings(left: Dict[str, float], right: Dict[str, float]) -> Dict[str, float]:
+    """Accumulate per-node milliseconds; loop nodes (verify/refine) add up across iterations."""
+    merged = dict(left or {})
+    for node, ms in (right or {}).items():
+        merged[node] = merged.get(node, 0.0) + ms
+    return merged
+
 class AuditState(TypedDict):
     # Inputs
     claim: ClaimInput
@@ -65,6 +84,14 @@ class AuditState(TypedDict):
     verification: Optional[LLMVerification]
     confidence_reasoning: Optional[str]
     iteration_count: int
+    audit_tier: str
+    triage_reason: str
+    llm_calls: int
+    node_timings: Annotated[Dict[str, float], _add_timings]
+    token_usage: Annotated[Dict[str, Dict[str, float]], add_usage]
+    budget_stopped: bool
+    deadline: Optional[float]  # time.monotonic() deadline, None = unlimited
+    deadline_stopped: bool
     
     # Output
     final_audit: Optional[AuditOutput]
@@ -72,6 +99,9 @@ class AuditState(TypedDict):
 
 # --- Prompts ---
 
+# Recorded on every audit; bump when the prompts change (also invalidates cached audits)
+PROMPT_VERSION = "v2.1-sota-multi-agent"
+
 AUDITOR_PROMPT = """
 You are the Lead Auditor for APCA ClaimAudit. Your task is to audit a medical claim against the provided policy context.
 
@@ -95,6 +125,34 @@ OUTPUT FORMAT:
 {format_instructions}
 """
 
+FAST_AUDITOR_PROMPT = """
+You are the Lead Auditor for APCA ClaimAudit. Audit a low-risk medical claim against the provided policy context, then check your own work.
+
+CLAIM DETAILS:
+- ID: {claim_id}
+- Payer: {payer}
+- Codes: {cpt_codes} / {icd_codes}
+- Billed: ${billed_amount}
+
+POLICY CONTEXT:
+{context}
+
+INSTRUCTIONS:
+1. Review the claim against the policies.
+2. Identify specific rules. For each rule, you MUST provide an EXACT citation from the context.
+3. Use the 'source_policy_title' as provided in the context chunks.
+4. If a rule is not explicitly covered, mark the decision as PEND_INFO or NEEDS_HUMAN.
+5. Do NOT use external medical knowledge.
+
+SELF-CHECK (before answering):
+- Every 'citation_text' must exist LITERALLY in the context.
+- Every 'source_policy_title' must match a title in the context.
+- List anything that fails these checks in 'self_check_errors'; leave it empty if the draft is fully supported.
+
+OUTPUT FORMAT:
+{format_instructions}
+"""
+
 VERIFIER_PROMPT = """
 You are the Audit Integrity Officer. Your job is to catch hallucinations.
 Compare the Audit Draft against the Original Context.
@@ -166,10 +224,14 @@ def get_llm(temperature: float = 0.0):
     # Try creating Gemini if key exists (PRIMARY)
     if settings.GOOGLE_API_KEY:
         try:
+            # Provider SDKs are imported on first use to keep cold starts fast
+            from langchain_google_genai import ChatGoogleGenerativeAI
             llms.append(ChatGoogleGenerativeAI(
                 model="gemini-2.0-flash",
                 temperature=temperature,
-                google_api_key=settings.GOOGLE_API_KEY
+                google_api_key=settings.GOOGLE_API_KEY,
+                max_output_tokens=settings.MAX_TOKENS,
+                callbacks=[metrics.llm_metrics_handler("gemini"), usage_handler("gemini")]
             ))
         except Exception as e:
             print(f"Warning: Failed to initialize Gemini: {e}")
@@ -177,10 +239,13 @@ def get_llm(temperature: float = 0.0):
     # Try creating Groq if key exists (SECONDARY)
     if settings.GROQ_API_KEY:
         try:
+            from langchain_groq import ChatGroq
             llms.append(ChatGroq(
                 temperature=temperature, 
                 model_name="llama-3.3-70b-versatile", 
-                api_key=settings.GROQ_API_KEY
+                api_key=settings.GROQ_API_KEY,
+                max_tokens=settings.MAX_TOKENS,
+                callbacks=[metrics.llm_metrics_handler("groq"), usage_handler("groq")]
             ))
         except Exception as e:
             print(f"Warning: Failed to initialize Groq: {e}")
@@ -199,11 +264,8 @@ def get_llm(temperature: float = 0.0):
 
 # --- Node Implementations ---
 
-async def retrieve_node(state: AuditState) -> Dict[str, Any]:
-    """Retrieve relevant chunks and format context string."""
-    vector_store = get_vector_store()
-    claim = state["claim"]
-    
+def build_retrieval_request(claim: ClaimInput) -> Tuple[str, Dict[str, Any]]:
+    """Build the semantic query and metadata filter used to retrieve policy context for a claim."""
     # 1. Build Query
     query = f"coverage for {', '.join(claim.cpt_codes)} and {', '.join(claim.icd_codes)} under {claim.payer} policy"
     
@@ -215,6 +277,30 @@ async def retrieve_node(state: AuditState) -> Dict[str, Any]:
     elif claim.payer:
         filter_meta["payer"] = claim.payer
 
+    return query, filter_meta
+
+
+def retrieve_context(claim: ClaimInput) -> Dict[str, Any]:
+    """
+    Retrieve relevant chunks for a claim and format the context string.
+    Results are shared through the retrieval cache until the next policy change.
+    """
+    query, filter_meta = build_retrieval_request(claim)
+    cache_backend = get_cache_backend() if settings.CACHE_RETRIEVAL_TTL_SECONDS else None
+    if cache_backend is None:
+        return _search_context(query, filter_meta)
+
+    cache = retrieval_cache(cache_backend)
+    key = digest(query, filter_meta, policy_generation(cache_backend))
+    context = cache.get(key)
+    if context is None:
+        context = _search_context(query, filter_meta)
+        cache.set(key, context)
+    return context
+
+
+def _search_context(query: str, filter_meta: Dict[str, Any]) -> Dict[str, Any]:
+    vector_store = get_vector_store()
     chunks = vector_store.search(query=query, limit=6, filter_metadata=filter_meta)
     
     if not chunks:
@@ -238,6 +324,73 @@ async def retrieve_node(state: AuditState) -> Dict[str, Any]:
     }
 
 
+async def retrieve_node(state: AuditState) -> Dict[str, Any]:
+    """Retrieve relevant chunks and format context string."""
+    return retrieve_context(state["claim"])
+
+
+async def rules_node(state: AuditState) -> Dict[str, Any]:
+    """Decide the claim from the compiled policy rule table when it fully covers it."""
+    if not settings.RULE_ENGINE_ENABLED or not state["retrieved_chunks"]:
+        return {"triage_reason": "rule engine skipped"}
+
+    draft, reason = evaluate_with_index(state["claim"], get_rule_index(), state["retrieved_chunks"])
+    if draft is None:
+        return {"triage_reason": reason}
+
+    return {
+        "audit_draft": draft,
+        "verification": {"is_hallucination": False, "errors": [], "improvement_notes": ""},
+        "iteration_count": 1,
+        "audit_tier": RULES_TIER,
+        "triage_reason": reason
+    }
+
+
+async def triage_node(state: AuditState) -> Dict[str, Any]:
+    """Assign the claim to the fast lane or the full audit loop."""
+    tier, reason = triage_claim(state["claim"], state["retrieved_chunks"])
+    return {"audit_tier": tier, "triage_reason": reason}
+
+
+async def fast_audit_node(state: AuditState) -> Dict[str, Any]:
+    """Single combined audit-and-self-check call for low-risk claims."""
+    if not state["context_str"] or state["context_str"] == "NO POLICY DATA FOUND.":
+        raise ValueError("Cannot audit without policy context.")
+
+    llm = get_llm(temperature=0.1)
+    parser = JsonOutputParser(pydantic_object=LLMSelfCheckedDraft)
+
+    prompt = ChatPromptTemplate.from_template(FAST_AUDITOR_PROMPT)
+    chain = prompt | llm | parser
+
+    claim = state["claim"]
+    response = await chain.ainvoke({
+        "claim_id": claim.claim_id,
+        "payer": claim.payer,
+        "cpt_codes": ", ".join(claim.cpt_codes),
+        "icd_codes": ", ".join(claim.icd_codes),
+        "billed_amount": str(claim.billed_amount),
+        "context": state["context_str"],
+        "format_instructions": parser.get_format_instructions()
+    })
+
+    # The self-check stands in for the verifier, so should_refine can escalate
+    errors = response.pop("self_check_errors", []) or []
+    verification = {
+        "is_hallucination": bool(errors),
+        "errors": errors,
+        "improvement_notes": "Remove or correct every unsupported rule and citation." if errors else ""
+    }
+
+    return {
+        "audit_draft": response,
+        "verification": verification,
+        "iteration_count": 1,
+        "llm_calls": state["llm_calls"] + 1
+    }
+
+
 async def audit_node(state: AuditState) -> Dict[str, Any]:
     """Generate the initial audit draft."""
     if not state["context_str"] or state["context_str"] == "NO POLICY DATA FOUND.":
@@ -260,7 +413,7 @@ async def audit_node(state: AuditState) -> Dict[str, Any]:
         "format_instructions": parser.get_format_instructions()
     })
     
-    return {"audit_draft": response, "iteration_count": 1}
+    return {"audit_draft": response, "iteration_count": 1, "llm_calls": state["llm_calls"] + 1}
 
 async def verify_node(state: AuditState) -> Dict[str, Any]:
     """Verify the audit draft for hallucinations."""
@@ -276,7 +429,7 @@ async def verify_node(state: AuditState) -> Dict[str, Any]:
         "format_instructions": parser.get_format_instructions()
     })
     
-    return {"verification": response}
+    return {"verification": response, "llm_calls": state["llm_calls"] + 1}
 
 async def refine_node(state: AuditState) -> Dict[str, Any]:
     """Refine the audit based on verification feedback."""
@@ -297,11 +450,20 @@ async def refine_node(state: AuditState) -> Dict[str, Any]:
     
     return {
         "audit_draft": response, 
-        "iteration_count": state["iteration_count"] + 1
+        "iteration_count": state["iteration_count"] + 1,
+        "llm_calls": state["llm_calls"] + 1
     }
 
 async def score_node(state: AuditState) -> Dict[str, Any]:
     """Calculate a robust confidence score based on the rubric."""
+    # Out of token budget: finish with the rubric instead of another LLM call
+    if budget_exhausted(state):
+        return {**local_score_node(state), "budget_stopped": True}
+
+    # The fast lane and rule table decisions make at most one LLM call, so they are scored locally
+    if settings.CONFIDENCE_SCORER == "local" or state.get("audit_tier") in (FAST_TIER, RULES_TIER):
+        return local_score_node(state)
+
     llm = get_llm(temperature=0)
     parser = JsonOutputParser(pydantic_object=LLMConfidenceScorer)
     
@@ -314,41 +476,88 @@ async def score_node(state: AuditState) -> Dict[str, Any]:
         "format_instructions": parser.get_format_instructions()
     })
     
+    if settings.SCORER_RECORD_PATH:
+        try:
+            record_scoring_sample(
+                settings.SCORER_RECORD_PATH, state,
+                response.get("final_score", 0.0), response.get("reasoning", "")
+            )
+        except Exception as e:
+            print(f"Warning: Failed to record scoring sample: {e}")
+
     # Update the draft's confidence
     draft = state["audit_draft"]
     draft["confidence"] = response.get("final_score", 0.0)
     
-    return {"audit_draft": draft, "confidence_reasoning": response.get("reasoning", "")}
+    return {
+        "audit_draft": draft,
+        "confidence_reasoning": response.get("reasoning", ""),
+        "llm_calls": state["llm_calls"] + 1
+    }
+
+def local_score_node(state: AuditState) -> Dict[str, Any]:
+    """Apply the scoring rubric locally, without an LLM call."""
+    score, reasoning = compute_local_confidence(
+        draft=state["audit_draft"],
+        verification=state["verification"],
+        iteration_count=state["iteration_count"],
+        retrieved_chunks=state["retrieved_chunks"],
+        context=state["context_str"],
+    )
+    draft = state["audit_draft"]
+    if state.get("audit_tier") == RULES_TIER and score > draft.get("confidence", score):
+        # Never score a rule table decision above the confidence it was drafted with
+        score = draft["confidence"]
+        reasoning += f"; capped at {score:.2f} for a rule table {draft.get('decision')}"
+    draft["confidence"] = score
+    return {"audit_draft": draft, "confidence_reasoning": reasoning}
 
 async def finalize_node(state: AuditState) -> Dict[str, Any]:
     """Map draft to final AuditOutput schema."""
     draft = state["audit_draft"]
     chunks = state["retrieved_chunks"]
+    if draft is None:
+        # The deadline passed before any draft: return what was done so far for a human to pick up
+        draft = {
+            "decision": "PEND_INFO",
+            "confidence": 0.0,
+            "explanation": f"Audit deadline reached before a draft was produced; {len(chunks)} policy sections were retrieved.",
+            "rules": [],
+            "missing_info": ["Complete audit (deadline reached)"],
+        }
+        state = {**state, "confidence_reasoning": "No draft to score."}
     
     citations = []
     rules_applied = []
-    
-    for rule in draft.get("rules", []):
-        # Match source policy title to get real IDs
+    rules = draft.get("rules", [])
+    quotes = CitationIndex(chunks, [rule.get("citation_text", "") for rule in rules])
+    chunks_by_id = {str(c.get("chunk_id")): c for c in chunks}
+    chunks_by_policy = {}
+    for c in chunks:
+        chunks_by_policy.setdefault(c["metadata"].get("policy_name"), c)
+
+    for rule in rules:
         source_title = rule.get("source_policy_title", "")
-        matched_chunk = None
-        for c in chunks:
-            if c["metadata"].get("policy_name") == source_title:
-                matched_chunk = c
-                break
-        
-        if not matched_chunk and chunks:
-            matched_chunk = chunks[0] # Fallback
-            
+        # The quote's exact location; rule table decisions also carry their source chunk
+        match = quotes.resolve(rule.get("citation_text", ""), rule.get("chunk_id"), source_title)
+        if match:
+            matched_chunk = match.chunk
+        else:
+            matched_chunk = (
+                chunks_by_id.get(str(rule.get("chunk_id")))
+                or chunks_by_policy.get(source_title)
+                or (chunks[0] if chunks else None)  # Fallback
+            )
+
         cit = Citation(
             policy_id=matched_chunk["metadata"].get("policy_id", "unknown") if matched_chunk else "unknown",
             policy_name=source_title or "Unspecified Policy",
             page=matched_chunk["metadata"].get("page", 1) if matched_chunk else 1,
             section_path=matched_chunk["metadata"].get("section_path", "General") if matched_chunk else "General",
-            chunk_id=str(uuid4()),
+            chunk_id=str(matched_chunk.get("chunk_id", uuid4())) if matched_chunk else str(uuid4()),
             text_excerpt=rule.get("citation_text", ""),
-            start_char=0,
-            end_char=0
+            start_char=match.start_char if match else None,
+            end_char=match.end_char if match else None
         )
         citations.append(cit)
         
@@ -375,6 +584,17 @@ async def finalize_node(state: AuditState) -> Dict[str, Any]:
     if decision in [AuditDecision.APPROVE, AuditDecision.DENY] and not citations:
         decision = AuditDecision.PEND_INFO
 
+    # Stopped early (budget/deadline) on a draft the verifier rejected: not a basis for a decision
+    stopped = state.get("budget_stopped") or state.get("deadline_stopped")
+    if stopped and (state.get("verification") or {}).get("is_hallucination"):
+        decision = AuditDecision.PEND_INFO
+
+    explanation = f"{draft.get('explanation', '')}\n\nConfidence Reasoning: {state.get('confidence_reasoning', 'N/A')}"
+    if state.get("budget_stopped"):
+        explanation += "\n\nToken budget reached: refinement stopped and this is the latest draft."
+    if state.get("deadline_stopped") and state["audit_draft"] is not None:
+        explanation += "\n\nAudit deadline reached: verification stopped and this is the latest draft."
+
     final = AuditOutput(
         audit_id=str(uuid4()),
         claim_id=state["claim"].claim_id,
@@ -382,20 +602,43 @@ async def finalize_node(state: AuditState) -> Dict[str, Any]:
         confidence=draft.get("confidence", 0.0),
         rules_applied=rules_applied,
         citations=citations,
-        explanation=f"{draft.get('explanation', '')}\n\nConfidence Reasoning: {state.get('confidence_reasoning', 'N/A')}",
+        explanation=explanation,
         missing_info=draft.get("missing_info", []),
-        prompt_version="v2.1-sota-multi-agent",
-        created_at=datetime.utcnow()
+        prompt_version=PROMPT_VERSION,
+        created_at=datetime.utcnow(),
+        usage=build_usage(state)
     )
     
     return {"final_audit": final}
 
 # --- Router Logic ---
 
+def route_after_rules(state: AuditState) -> str:
+    """Skip the LLM audit path when the rule table decided the claim."""
+    return "score" if state.get("audit_tier") == RULES_TIER else "triage"
+
+def route_by_tier(state: AuditState) -> str:
+    """Send the claim down the path chosen by triage."""
+    return "fast_audit" if state.get("audit_tier") == FAST_TIER else "audit"
+
+def route_after_draft(state: AuditState) -> str:
+    """Verify the draft unless the token budget or the time is already spent."""
+    if state.get("audit_draft") is None:
+        return "finalize"
+    if budget_exhausted(state) or state.get("deadline_stopped") or time_short(state):
+        return "score"
+    return "verify"
+
 def should_refine(state: AuditState) -> str:
     """Determine if we need another iteration or can finish."""
+    if state.get("audit_draft") is None:
+        return "finalize"
+
     if state["iteration_count"] >= 2: # Max 2 attempts
         return "score"
+
+    if budget_exhausted(state) or state.get("deadline_stopped") or time_short(state):
+        return "score"
     
     if state["verification"] and state["verification"].get("is_hallucination"):
         return "refine"
@@ -404,26 +647,109 @@ def should_refine(state: AuditState) -> str:
 
 # --- Graph Construction ---
 
+def deadline_skip(state: AuditState) -> Dict[str, Any]:
+    """Deadline fallback for draft/verify/refine: keep the work done so far."""
+    return {"deadline_stopped": True}
+
+def deadline_score(state: AuditState) -> Dict[str, Any]:
+    """Deadline fallback for scoring: the local rubric."""
+    if state.get("audit_draft") is None:
+        return {"deadline_stopped": True}
+    return {**local_score_node(state), "deadline_stopped": True}
+
+def timed_node(name: str, node, on_deadline=None):
+    """
+    Wrap a node so its wall time is added to state["node_timings"] and the node
+    histogram, and the tokens of its LLM calls to state["token_usage"].
+
+    LLM nodes pass `on_deadline`: the node is skipped when the audit deadline
+    leaves too little time for its call, and cancelled if it is still running
+    when the deadline passes; `on_deadline(state)` supplies the update instead.
+    """
+    async def call(state: AuditState) -> Dict[str, Any]:
+        if on_deadline is None:
+            return await node(state)
+        if not time_short(state):
+            try:
+                return await before_deadline(state.get("deadline"), node(state))
+            except asyncio.TimeoutError:
+                pass
+        metrics.AUDIT_DEADLINE_STOPS.labels(node=name).inc()
+        return on_deadline(state)
+
+    async def run(state: AuditState) -> Dict[str, Any]:
+        start = time.perf_counter()
+        with node_scope() as usage:
+            update = await call(state)
+        elapsed = time.perf_counter() - start
+        metrics.AUDIT_NODE_SECONDS.labels(node=name).observe(elapsed)
+        update = {**update, "node_timings": {name: elapsed * 1000}}
+        if usage.calls:
+            update["token_usage"] = {name: usage.as_dict()}
+        return update
+    return run
+
 def create_audit_graph():
+    from langgraph.graph import StateGraph, END
+
     workflow = StateGraph(AuditState)
     
-    workflow.add_node("retrieve", retrieve_node)
-    workflow.add_node("audit", audit_node)
-    workflow.add_node("verify", verify_node)
-    workflow.add_node("refine", refine_node)
-    workflow.add_node("score", score_node)
-    workflow.add_node("finalize", finalize_node)
+    workflow.add_node("retrieve", timed_node("retrieve", retrieve_node))
+    workflow.add_node("rules", timed_node("rules", rules_node))
+    workflow.add_node("triage", timed_node("triage", triage_node))
+    workflow.add_node("fast_audit", timed_node("fast_audit", fast_audit_node, deadline_skip))
+    workflow.add_node("audit", timed_node("audit", audit_node, deadline_skip))
+    workflow.add_node("verify", timed_node("verify", verify_node, deadline_skip))
+    workflow.add_node("refine", timed_node("refine", refine_node, deadline_skip))
+    workflow.add_node("score", timed_node("score", score_node, deadline_score))
+    workflow.add_node("finalize", timed_node("finalize", finalize_node))
     
     workflow.set_entry_point("retrieve")
-    workflow.add_edge("retrieve", "audit")
-    workflow.add_edge("audit", "verify")
+    workflow.add_edge("retrieve", "rules")
+    workflow.add_conditional_edges(
+        "rules",
+        route_after_rules,
+        {
+            "score": "score",
+            "triage": "triage"
+        }
+    )
+    workflow.add_conditional_edges(
+        "triage",
+        route_by_tier,
+        {
+            "fast_audit": "fast_audit",
+            "audit": "audit"
+        }
+    )
+    workflow.add_conditional_edges(
+        "audit",
+        route_after_draft,
+        {
+            "verify": "verify",
+            "score": "score",
+            "finalize": "finalize"
+        }
+    )
+
+    # Fast lane: a failed self-check escalates into the refine/verify loop
+    workflow.add_conditional_edges(
+        "fast_audit",
+        should_refine,
+        {
+            "refine": "refine",
+            "score": "score",
+            "finalize": "finalize"
+        }
+    )
     
     workflow.add_conditional_edges(
         "verify",
         should_refine,
         {
             "refine": "refine",
-            "score": "score"
+            "score": "score",
+            "finalize": "finalize"
         }
     )
     
@@ -435,14 +761,34 @@ def create_audit_graph():
 
 # --- Public API ---
 
-async def run_rag_pipeline(claim: ClaimInput) -> AuditOutput:
-    """Entry point for the state-of-the-art audit pipeline."""
+_audit_graph = None
+
+def get_audit_graph():
+    """Compile the audit graph once and reuse it across requests."""
+    global _audit_graph
+    if _audit_graph is None:
+        _audit_graph = create_audit_graph()
+    return _audit_graph
+
+
+async def run_audit_graph(claim: ClaimInput, timeout: Optional[float] = None) -> AuditState:
+    """
+    Run the audit graph and return the full final state (tier, LLM calls, chunks).
+    `timeout` defaults to AUDIT_TIMEOUT_SECONDS; 0 runs without a deadline.
+    """
     if not settings.GROQ_API_KEY and not settings.GOOGLE_API_KEY:
         raise ValueError("Neither GROQ_API_KEY nor GOOGLE_API_KEY is configured")
 
-    app = create_audit_graph()
-    
-    initial_state = {
+    app = get_audit_graph()
+    deadline = deadline_after(settings.AUDIT_TIMEOUT_SECONDS if timeout is None else timeout)
+    state = await app.ainvoke(initial_audit_state(claim, deadline))
+    metrics.observe_audit(state)
+    return state
+
+
+def initial_audit_state(claim: ClaimInput, deadline: Optional[float] = None) -> AuditState:
+    """Empty graph state for a claim."""
+    return {
         "claim": claim,
         "retrieved_chunks": [],
         "context_str": "",
@@ -450,8 +796,55 @@ async def run_rag_pipeline(claim: ClaimInput) -> AuditOutput:
         "verification": None,
         "confidence_reasoning": None,
         "iteration_count": 0,
+        "audit_tier": FULL_TIER,
+        "triage_reason": "",
+        "llm_calls": 0,
+        "node_timings": {},
+        "token_usage": {},
+        "budget_stopped": False,
+        "deadline": deadline,
+        "deadline_stopped": False,
         "final_audit": None
     }
-    
-    result = await app.ainvoke(initial_state)
+
+
+def record_audit(state: AuditState):
+    """Append a finished audit to the audit log. Logging failures never fail the audit."""
+    if not settings.AUDIT_LOG_ENABLED or state.get("final_audit") is None:
+        return
+    try:
+        from backend.db.audit_log import record_from_state
+        from backend.db.singletons import get_audit_log
+        get_audit_log().append(record_from_state(state))
+    except Exception as e:
+        print(f"Warning: Could not record audit {state['final_audit'].audit_id}: {e}")
+
+
+async def run_rag_pipeline(claim: ClaimInput, timeout: Optional[float] = None) -> AuditOutput:
+    """
+    Entry point for the state-of-the-art audit pipeline. With CACHE_AUDIT_TTL_SECONDS
+    set, an identical claim under unchanged policies reuses the cached result
+    (under a new audit_id); audits cut short by a deadline or budget are not cached.
+    """
+    cache_backend = get_cache_backend() if settings.CACHE_AUDIT_TTL_SECONDS else None
+    if cache_backend is not None:
+        cache = audit_cache(cache_backend)
+        key = digest(claim.model_dump(mode="json"), PROMPT_VERSION, policy_generation(cache_backend))
+        cached = cache.get(key)
+        if cached is not None:
+            audit = cached.model_copy(update={"audit_id": str(uuid4()), "created_at": datetime.utcnow()})
+            # Logged and counted like any audit, under its own tier and without LLM calls
+            state = {
+                **initial_audit_state(claim), "audit_tier": CACHED_TIER, "final_audit": audit,
+                "retrieved_chunks": [{"chunk_id": c.chunk_id} for c in audit.citations if c.chunk_id],
+            }
+            metrics.observe_audit(state)
+            await asyncio.to_thread(record_audit, state)
+            return audit
+
+    result = await run_audit_graph(claim, timeout)
+    # The audit log is synchronous SQL; keep it off the event loop
+    await asyncio.to_thread(record_audit, result)
+    if cache_backend is not None and not result["deadline_stopped"] and not result["budget_stopped"]:
+        cache.set(key, result["final_audit"])
     return result["final_audit"]
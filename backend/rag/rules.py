@@ -0,0 +1,420 @@
+"""
+Policy Rule Compilation.
+Extracts mechanical coverage criteria from policy chunks at ingest time into a
+versioned rule table, and evaluates claims against it at audit time:
+1. Numeric thresholds (e.g. "AHI or RDI >= 15 events per hour")
+2. Required documentation (e.g. "must include a clinical evaluation")
+3. Coverage limits (e.g. "12-week period")
+4. Covered procedure/diagnosis codes
+Claims the table fully decides skip the LLM; everything else is deferred.
+"""
+import hashlib
+import json
+import re
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+from shared.schemas import ClaimInput
+from backend import metrics
+
+# --- Rule Table Models ---
+
+class ThresholdCriterion(BaseModel):
+    """One alternative coverage criterion: metric within [min_value, max_value]."""
+    metrics: List[str]
+    min_value: Optional[float] = None
+    max_value: Optional[float] = None
+    unit: str = ""
+    requires_any: List[str] = Field(default_factory=list, description="Documented findings, at least one required")
+    text: str
+    chunk_id: str
+
+
+class DocumentationRequirement(BaseModel):
+    """Documentation that must be present; satisfied by any one alternative term set."""
+    alternatives: List[List[str]]
+    text: str
+    chunk_id: str
+
+
+class CompiledPolicyRules(BaseModel):
+    """Versioned rule table entry for one policy."""
+    policy_id: str
+    policy_name: str
+    version: str
+    compiled_at: datetime = Field(default_factory=datetime.utcnow)
+    codes: List[str] = Field(default_factory=list)
+    diagnosis_codes: List[str] = Field(default_factory=list)
+    criteria: List[ThresholdCriterion] = Field(default_factory=list)
+    documentation: List[DocumentationRequirement] = Field(default_factory=list)
+    limits: List[str] = Field(default_factory=list)
+    source_chunk_ids: List[str] = Field(default_factory=list)
+
+
+# --- Extraction ---
+
+_OPS = r"(>=|≥|=>|<=|≤|=<|>|<)"
+_THRESHOLD = re.compile(
+    r"(?P<metrics>\b[A-Z]{2,6}\b(?:\s+or\s+\b[A-Z]{2,6}\b)*)\s*" + _OPS.replace("(", "(?P<op>", 1) +
+    r"\s*(?P<value>\d+(?:\.\d+)?)"
+    r"(?:\s+and\s+" + _OPS.replace("(", "(?P<op2>", 1) + r"\s*(?P<value2>\d+(?:\.\d+)?))?"
+    r"(?P<unit>\s+[a-z]+(?:\s+per\s+[a-z]+)?)?"
+)
+_REQUIRES = re.compile(r"with documented [^(]*\((?P<items>[^)]*)\)", re.IGNORECASE)
+_MUST = re.compile(r"\bmust\s+(?:include|conduct|document|have|provide)\s+(?P<what>.+?)(?:\s+prior to\b.*|\s+before\b.*)?\.?$", re.IGNORECASE)
+_LIMIT = re.compile(r"\b\d+[- ](?:day|week|month|year)s?\s+period\b", re.IGNORECASE)
+_HCPCS = re.compile(r"\b[A-V]\d{4}\b")
+_CPT = re.compile(r"\bCPT(?:\s+codes?)?[:\s]+(\d{5})\b")
+_ICD10 = re.compile(r"\b[A-TV-Z]\d{2}\.\d{1,4}\b")
+
+_STOPWORDS = {
+    "a", "an", "the", "of", "to", "for", "and", "or", "with", "by", "in", "on",
+    "positive", "prior", "use", "type", "from", "any", "all", "be",
+}
+
+
+def _sentences(text: str) -> List[str]:
+    parts = []
+    for line in text.splitlines():
+        parts.extend(s.strip() for s in re.split(r"(?<=\.)\s+(?=[A-Z0-9])", line) if s.strip())
+    return parts
+
+
+def _normalize_op(op: str) -> str:
+    return {"≥": ">=", "=>": ">=", "≤": "<=", "=<": "<="}.get(op, op)
+
+
+def _split_or(items: str) -> List[str]:
+    return [p.strip() for p in re.split(r",\s*(?:or\s+)?|\s+or\s+", items) if p.strip()]
+
+
+def _terms(phrase: str) -> List[str]:
+    phrase = re.sub(r"\([^)]*\)", " ", phrase)
+    words = re.findall(r"[A-Za-z0-9]+", phrase.lower())
+    return [w for w in words if w not in _STOPWORDS and len(w) > 1]
+
+
+def _parse_threshold(sentence: str, chunk_id: str) -> Optional[ThresholdCriterion]:
+    match = _THRESHOLD.search(sentence)
+    if not match:
+        return None
+
+    metric_names = [m.strip() for m in match.group("metrics").split(" or ")]
+    min_value = max_value = None
+    for op, value in ((match.group("op"), match.group("value")), (match.group("op2"), match.group("value2"))):
+        if not op:
+            continue
+        op, value = _normalize_op(op), float(value)
+        if op in (">=", ">"):
+            min_value = value + (1e-9 if op == ">" else 0.0)
+        else:
+            max_value = value - (1e-9 if op == "<" else 0.0)
+
+    requires = _REQUIRES.search(sentence)
+    return ThresholdCriterion(
+        metrics=metric_names,
+        min_value=min_value,
+        max_value=max_value,
+        unit=(match.group("unit") or "").strip(),
+        requires_any=_split_or(requires.group("items")) if requires else [],
+        text=sentence,
+        chunk_id=chunk_id,
+    )
+
+
+def _parse_documentation(sentence: str, chunk_id: str) -> List[DocumentationRequirement]:
+    match = _MUST.search(sentence)
+    if not match:
+        return []
+
+    requirements = []
+    # "X and Y" are separate requirements; "P, or Q" are alternatives within one
+    for part in re.split(r"\s+and\s+(?![^(]*\))", match.group("what")):
+        part = re.sub(r"\([^)]*\)", "", part).split(":")[-1]
+        alternatives = [t for t in (_terms(alt) for alt in _split_or(part)) if t]
+        if alternatives:
+            requirements.append(DocumentationRequirement(
+                alternatives=alternatives, text=sentence, chunk_id=chunk_id
+            ))
+    return requirements
+
+
+def compile_policy_rules(
+    policy_id: str,
+    policy_name: str,
+    chunks: List[Dict[str, Any]],
+    covered_codes: Optional[List[str]] = None,
+    diagnosis_codes: Optional[List[str]] = None,
+) -> CompiledPolicyRules:
+    """Compile a policy's chunks (as produced by IngestionPipeline) into a rule table entry."""
+    codes = {c.upper() for c in covered_codes or []}
+    diagnoses = {c.upper() for c in diagnosis_codes or []}
+    criteria: List[ThresholdCriterion] = []
+    documentation: List[DocumentationRequirement] = []
+    limits: List[str] = []
+    seen_sentences = set()
+
+    digest = hashlib.sha256()
+    for chunk in chunks:
+        chunk_id = str(chunk["chunk_id"])
+        text = chunk["text"]
+        digest.update(text.encode("utf-8"))
+
+        codes.update(_HCPCS.findall(text))
+        codes.update(_CPT.findall(text))
+        diagnoses.update(_ICD10.findall(text))
+
+        for sentence in _sentences(text):
+            # Chunk overlap repeats sentences; keep the first occurrence only
+            if sentence in seen_sentences:
+                continue
+            seen_sentences.add(sentence)
+
+            criterion = _parse_threshold(sentence, chunk_id)
+            if criterion:
+                criteria.append(criterion)
+            documentation.extend(_parse_documentation(sentence, chunk_id))
+            for limit in _LIMIT.findall(sentence):
+                if limit not in limits:
+                    limits.append(limit)
+
+    digest.update(json.dumps([sorted(codes), sorted(diagnoses)]).encode("utf-8"))
+    return CompiledPolicyRules(
+        policy_id=policy_id,
+        policy_name=policy_name,
+        version=digest.hexdigest()[:12],
+        codes=sorted(codes),
+        diagnosis_codes=sorted(diagnoses),
+        criteria=criteria,
+        documentation=documentation,
+        limits=limits,
+        source_chunk_ids=[str(c["chunk_id"]) for c in chunks],
+    )
+
+
+# --- Rule Index ---
+
+class RuleIndex:
+    """In-process versioned rule table, optionally persisted to a JSON file."""
+
+    def __init__(self, path: str = ""):
+        self.path = path
+        self._lock = threading.Lock()
+        self._versions: Dict[str, List[CompiledPolicyRules]] = {}
+        if path and Path(path).exists():
+            self.load()
+
+    def put(self, rules: CompiledPolicyRules):
+        """Add a compiled version; re-compiling identical content is a no-op."""
+        with self._lock:
+            versions = self._versions.setdefault(rules.policy_id, [])
+            if versions and versions[-1].version == rules.version:
+                return
+            versions.append(rules)
+        if self.path:
+            self.save()
+
+    def latest(self, policy_id: str) -> Optional[CompiledPolicyRules]:
+        versions = self._versions.get(policy_id)
+        return versions[-1] if versions else None
+
+    def versions(self, policy_id: str) -> List[CompiledPolicyRules]:
+        return list(self._versions.get(policy_id, []))
+
+    def remove(self, policy_id: str):
+        """Drop every compiled version of a deleted policy."""
+        with self._lock:
+            removed = self._versions.pop(policy_id, None)
+        if removed and self.path:
+            self.save()
+
+    def save(self):
+        with self._lock:
+            data = {pid: [v.model_dump(mode="json") for v in vs] for pid, vs in self._versions.items()}
+        Path(self.path).write_text(json.dumps(data), encoding="utf-8")
+
+    def load(self):
+        data = json.loads(Path(self.path).read_text(encoding="utf-8"))
+        with self._lock:
+            self._versions = {
+                pid: [CompiledPolicyRules(**v) for v in vs] for pid, vs in data.items()
+            }
+
+
+# --- Evaluation ---
+
+# A DENY rests on metric values parsed from free-text notes, so it is never
+# certain; the local scorer caps rule table decisions at their draft confidence
+APPROVE_CONFIDENCE = 1.0
+DENY_CONFIDENCE = 0.8
+
+# NegEx-style cues: a term with one of these within a few words, in the same
+# sentence, is not evidence ("no attended PSG", "PSG was not performed")
+_NEGATION_BEFORE = {
+    "no", "not", "non", "without", "never", "denies", "denied", "absent", "absence", "negative",
+    "lacks", "lacking", "missing", "pending", "declined", "refused", "unable", "cannot",
+}
+_NEGATION_AFTER = {
+    "not", "never", "absent", "negative", "missing", "pending", "declined", "refused",
+    "unavailable", "incomplete", "cancelled", "canceled", "deferred",
+}
+_NEGATION_WINDOW = 5
+
+
+def _metric_values(notes: str) -> Dict[str, float]:
+    values = {}
+    for metric, value in re.findall(r"\b([A-Z]{2,6})\b\s*(?:[:=]|of|is|was)?\s*(\d+(?:\.\d+)?)", notes or ""):
+        values.setdefault(metric.upper(), float(value))
+    return values
+
+
+def _clauses(notes: str) -> List[List[str]]:
+    """Lowercase word tokens of each sentence of the notes."""
+    text = notes.lower().replace("\u2019", "'")
+    return [tokens for tokens in (re.findall(r"[a-z0-9]+(?:'[a-z]+)?", s) for s in re.split(r"[.;!?\n]+", text)) if tokens]
+
+
+def _is_cue(token: str, cues) -> bool:
+    return token in cues or token.endswith("n't")
+
+
+def _mentions(notes: str, terms: List[str]) -> bool:
+    """
+    Whether one sentence of the notes affirms every term. Terms spread across
+    sentences, or within _NEGATION_WINDOW words of a negation cue, do not count,
+    so negated documentation defers the claim instead of satisfying a rule.
+    """
+    for tokens in _clauses(notes):
+        positions = [tokens.index(t) for t in terms if t in tokens]
+        if len(positions) < len(terms):
+            continue
+        start, end = min(positions), max(positions) + 1
+        before = tokens[max(0, start - _NEGATION_WINDOW):end]
+        after = tokens[end:end + _NEGATION_WINDOW]
+        if not any(_is_cue(t, _NEGATION_BEFORE) for t in before) and not any(_is_cue(t, _NEGATION_AFTER) for t in after):
+            return True
+    return False
+
+
+def _rule_entry(rules: CompiledPolicyRules, text: str, chunk_id: str, satisfied: bool, explanation: str) -> Dict[str, Any]:
+    return {
+        "rule_text": text,
+        "satisfied": satisfied,
+        "explanation": explanation,
+        "citation_text": text,
+        "source_policy_title": rules.policy_name,
+        "chunk_id": chunk_id,
+    }
+
+
+def evaluate_claim(claim: ClaimInput, rules: CompiledPolicyRules) -> Optional[Dict[str, Any]]:
+    """
+    Decide a claim from a compiled rule table, or return None to defer to the LLM.
+
+    Only decides when the claim's codes are covered by the table, every
+    documentation requirement is affirmed (not negated) in the claim notes,
+    and the notes carry values for the threshold metrics. Returns an audit draft in the
+    same shape the auditor LLM produces.
+    """
+    if not rules.codes or not rules.criteria:
+        return None
+    if not all(c.upper() in rules.codes for c in claim.cpt_codes):
+        return None
+    if rules.diagnosis_codes and not {c.upper() for c in claim.icd_codes} & set(rules.diagnosis_codes):
+        return None
+
+    notes = claim.notes or ""
+    values = _metric_values(notes)
+    entries = []
+
+    for req in rules.documentation:
+        if not any(_mentions(notes, alt) for alt in req.alternatives):
+            return None
+        entries.append(_rule_entry(rules, req.text, req.chunk_id, True, "Required documentation is present in the claim notes."))
+
+    satisfied = None
+    ambiguous = False
+    for criterion in rules.criteria:
+        measured = [values[m.upper()] for m in criterion.metrics if m.upper() in values]
+        if not measured:
+            return None
+        value = max(measured)
+        in_range = (
+            (criterion.min_value is None or value >= criterion.min_value)
+            and (criterion.max_value is None or value <= criterion.max_value)
+        )
+        if in_range and criterion.requires_any:
+            if any(_mentions(notes, _terms(item)) for item in criterion.requires_any):
+                satisfied = satisfied or (criterion, value)
+            else:
+                # Findings may be documented outside the notes; leave it to the LLM
+                ambiguous = True
+        elif in_range:
+            satisfied = satisfied or (criterion, value)
+
+    if satisfied:
+        criterion, value = satisfied
+        entries.append(_rule_entry(
+            rules, criterion.text, criterion.chunk_id, True,
+            f"Documented {'/'.join(criterion.metrics)} of {value:g} meets this criterion."
+        ))
+        decision = "APPROVE"
+        summary = f"Claim meets {rules.policy_name} coverage criteria (rule table {rules.version})."
+    elif ambiguous:
+        return None
+    else:
+        for criterion in rules.criteria:
+            value = max(values[m.upper()] for m in criterion.metrics if m.upper() in values)
+            entries.append(_rule_entry(
+                rules, criterion.text, criterion.chunk_id, False,
+                f"Documented {'/'.join(criterion.metrics)} of {value:g} does not meet this criterion."
+            ))
+        decision = "DENY"
+        summary = f"Claim does not meet any {rules.policy_name} coverage criterion (rule table {rules.version})."
+
+    if rules.limits:
+        summary += f" Coverage limits: {', '.join(rules.limits)}."
+
+    return {
+        "decision": decision,
+        "confidence": APPROVE_CONFIDENCE if decision == "APPROVE" else DENY_CONFIDENCE,
+        "explanation": summary,
+        "rules": entries,
+        "missing_info": [],
+    }
+
+
+def evaluate_with_index(
+    claim: ClaimInput, index: RuleIndex, chunks: List[Dict[str, Any]]
+) -> Tuple[Optional[Dict[str, Any]], str]:
+    """
+    Try to decide a claim locally against the policies in its retrieved context.
+
+    Returns:
+        (draft or None, reason)
+    """
+    if claim.policy_id:
+        policy_ids = [claim.policy_id]
+    else:
+        policy_ids = list(dict.fromkeys(c["metadata"].get("policy_id") for c in chunks if c.get("metadata")))
+
+    drafts = []
+    for policy_id in policy_ids:
+        rules = index.latest(policy_id) if policy_id else None
+        if rules:
+            draft = evaluate_claim(claim, rules)
+            if draft:
+                drafts.append((rules, draft))
+
+    # Conflicting or multiple applicable policies still need judgment
+    if len(drafts) == 1:
+        metrics.RULE_ENGINE.labels(outcome="decided_locally").inc()
+        rules, draft = drafts[0]
+        return draft, f"decided by rule table {rules.policy_id}@{rules.version}"
+
+    metrics.RULE_ENGINE.labels(outcome="deferred").inc()
+    return None, "no single compiled rule table fully covers this claim"
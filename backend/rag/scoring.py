@@ -0,0 +1,108 @@
+"""
+Deterministic Confidence Scoring.
+Applies the SCORER_PROMPT rubric locally from structured pipeline signals,
+so the score node does not need an LLM round trip:
+1. Citation coverage (how many rules quote the context literally)
+2. Verification outcome and number of audit iterations
+3. Retrieval strength (vector search scores)
+4. Missing info / PEND_INFO decisions
+"""
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _normalize(text: str) -> str:
+    return _WHITESPACE.sub(" ", text or "").strip().lower()
+
+
+def citation_match_ratio(rules: List[Dict[str, Any]], context: str) -> float:
+    """Fraction of rules whose citation_text appears literally in the context."""
+    if not rules:
+        return 0.0
+    haystack = _normalize(context)
+    matched = 0
+    for rule in rules:
+        quote = _normalize(rule.get("citation_text", ""))
+        if quote and quote in haystack:
+            matched += 1
+    return matched / len(rules)
+
+
+def retrieval_strength(chunks: List[Dict[str, Any]], top_n: int = 3) -> float:
+    """Mean cosine score of the best `top_n` retrieved chunks (0.0 if none)."""
+    scores = sorted((c.get("score") or 0.0 for c in chunks), reverse=True)[:top_n]
+    if not scores:
+        return 0.0
+    return max(0.0, min(1.0, sum(scores) / len(scores)))
+
+
+def compute_local_confidence(
+    draft: Dict[str, Any],
+    verification: Optional[Dict[str, Any]],
+    iteration_count: int,
+    retrieved_chunks: List[Dict[str, Any]],
+    context: str,
+) -> Tuple[float, str]:
+    """
+    Score an audit draft against the rubric used by SCORER_PROMPT.
+
+    Rubric bands:
+    - 1.0: every rule literally cited, verified first time, no missing info.
+    - 0.8-0.9: solid citations with minor ambiguity (weak retrieval).
+    - 0.5-0.7: uncited auxiliary rules, missing info, or PEND_INFO.
+    - <0.5: weak citations, or the verifier flagged hallucinations.
+
+    Returns:
+        (final_score, reasoning)
+    """
+    rules = draft.get("rules", []) or []
+    decision = str(draft.get("decision", "PEND_INFO")).upper()
+    missing_info = draft.get("missing_info", []) or []
+    hallucination = bool(verification and verification.get("is_hallucination"))
+
+    coverage = citation_match_ratio(rules, context)
+    retrieval = retrieval_strength(retrieved_chunks)
+
+    # Start from citation coverage, then nudge by retrieval strength (0.8-1.0)
+    score = coverage * (0.8 + 0.2 * retrieval)
+    reasons = [
+        f"citation coverage {coverage:.2f} ({len(rules)} rules)",
+        f"retrieval strength {retrieval:.2f}",
+    ]
+
+    if decision == "PEND_INFO" or missing_info:
+        score = min(score, 0.7)
+        reasons.append(f"decision {decision} with {len(missing_info)} missing info item(s)")
+
+    if coverage < 0.5:
+        score = min(score, 0.45)
+        reasons.append("weak citations")
+
+    if hallucination or iteration_count > 1:
+        score = min(score, 0.45)
+        reasons.append(
+            "verifier still reports hallucinations" if hallucination
+            else f"verification loop needed {iteration_count} iterations"
+        )
+
+    score = round(max(0.0, min(1.0, score)), 2)
+    return score, "Local rubric: " + "; ".join(reasons) + f" -> {score:.2f}"
+
+
+def record_scoring_sample(path: str, state: Dict[str, Any], llm_score: float, llm_reasoning: str):
+    """Append the scorer inputs and the LLM's verdict to a JSONL dataset."""
+    sample = {
+        "claim_id": state["claim"].claim_id,
+        "audit_draft": state["audit_draft"],
+        "verification": state["verification"],
+        "iteration_count": state["iteration_count"],
+        "retrieved_scores": [c.get("score") for c in state["retrieved_chunks"]],
+        "context": state["context_str"],
+        "llm_score": llm_score,
+        "llm_reasoning": llm_reasoning,
+    }
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(sample, default=str) + "\n")
@@ -0,0 +1,225 @@
+"""
+Per-Payer Vector Store Sharding.
+With VECTOR_SHARDING enabled, each payer (or payer group from
+VECTOR_PAYER_GROUPS) gets its own collection, chosen at ingest time from the
+chunk's payer metadata:
+- Searches filtered by payer go only to that payer's shard
+- Searches filtered by policy_id go to the shard holding the policy
+- Anything else fans out to every shard and merges the top-k by score
+Large national payers therefore no longer slow down searches for small
+regional ones. Works with both vector engines (qdrant and numpy).
+"""
+import heapq
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from backend.config import settings
+from backend import metrics
+from backend.rag.versioning import VersionGate
+
+# Shard for chunks ingested without a payer
+SHARED_SHARD = "shared"
+SHARD_SEPARATOR = "__"
+
+
+def _slug(value: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", value.strip().lower()).strip("_") or SHARED_SHARD
+
+
+def parse_payer_groups(spec: str) -> Dict[str, str]:
+    """
+    Parse "national=Medicare,UHC;northeast=Tufts,Harvard Pilgrim" into a
+    payer slug -> group name map.
+    """
+    groups = {}
+    for entry in filter(None, (e.strip() for e in spec.split(";"))):
+        name, _, payers = entry.partition("=")
+        for payer in filter(None, (p.strip() for p in payers.split(","))):
+            groups[_slug(payer)] = _slug(name)
+    return groups
+
+
+class ShardedVectorStore:
+    """Routes VectorStore operations to one inner store per payer shard."""
+
+    def __init__(
+        self,
+        make_shard: Callable[[str], Any],
+        encoder,
+        existing_shards: Optional[List[str]] = None,
+        payer_groups: Optional[Dict[str, str]] = None,
+    ):
+        self._make_shard = make_shard
+        self.encoder = encoder
+        self.collection_name = settings.QDRANT_COLLECTION
+        self.payer_groups = payer_groups if payer_groups is not None else parse_payer_groups(settings.VECTOR_PAYER_GROUPS)
+        self._lock = threading.RLock()
+        self._shards: Dict[str, Any] = {}
+        self._policy_shard: Dict[str, str] = {}
+        # One gate for all shards, so a policy version flips everywhere at once
+        self.versions = VersionGate()
+        self._pool = ThreadPoolExecutor(max_workers=settings.VECTOR_FANOUT_WORKERS, thread_name_prefix="shard-search")
+        for name in existing_shards or []:
+            self._shard(name)
+
+    def shard_for_payer(self, payer: Optional[str]) -> str:
+        if not payer:
+            return SHARED_SHARD
+        slug = _slug(payer)
+        return self.payer_groups.get(slug, slug)
+
+    def _shard(self, name: str):
+        if name not in self._shards:
+            with self._lock:
+                if name not in self._shards:
+                    store = self._make_shard(name)
+                    store.versions = self.versions
+                    self._shards[name] = store
+        return self._shards[name]
+
+    @property
+    def shards(self) -> Dict[str, Any]:
+        return dict(self._shards)
+
+    # ── Writes ───────────────────────────────────────────────
+
+    def add_chunks(self, chunks: List[Dict[str, Any]]):
+        """Embed and upsert chunks into the shard of each chunk's payer."""
+        by_shard: Dict[str, List[Dict[str, Any]]] = {}
+        for chunk in chunks:
+            by_shard.setdefault(self._assign(chunk.get("metadata") or {}), []).append(chunk)
+        for shard, members in by_shard.items():
+            self._shard(shard).add_chunks(members)
+
+    def import_points(self, ids: List[Any], vectors, payloads: List[Dict[str, Any]], batch_size: int = 256):
+        """Upsert pre-embedded points into the shard of each point's payer."""
+        by_shard: Dict[str, List[int]] = {}
+        for i, payload in enumerate(payloads):
+            by_shard.setdefault(self._assign(payload.get("full_metadata") or {}), []).append(i)
+        for shard, rows in by_shard.items():
+            self._shard(shard).import_points(
+                [ids[i] for i in rows], [vectors[i] for i in rows], [payloads[i] for i in rows], batch_size
+            )
+
+    def _assign(self, metadata: Dict[str, Any]) -> str:
+        """Shard for a chunk's metadata; remembers which shard holds its policy."""
+        shard = self.shard_for_payer(metadata.get("payer"))
+        if metadata.get("policy_id"):
+            self._policy_shard[metadata["policy_id"]] = shard
+        return shard
+
+    # ── Reads ────────────────────────────────────────────────
+
+    def search(self, query: str, limit: int = 5, filter_metadata: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Semantic search routed to the claim's shard, or fanned out across all shards.
+        """
+        try:
+            query_vector = self.encoder.embed_query(query)
+        except Exception as e:
+            print(f"Error embedding query: {e}")
+            return []
+        return self.search_by_vector(query_vector, limit=limit, filter_metadata=filter_metadata)
+
+    @metrics.VECTOR_SEARCH_SECONDS.labels(engine="sharded").time()
+    def search_by_vector(self, query_vector: List[float], limit: int = 5, filter_metadata: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        targets = self.route(filter_metadata)
+        if len(targets) == 1:
+            return targets[0].search_by_vector(query_vector, limit=limit, filter_metadata=filter_metadata)
+
+        futures = [
+            self._pool.submit(store.search_by_vector, query_vector, limit, filter_metadata)
+            for store in targets
+        ]
+        merged = [hit for f in futures for hit in f.result()]
+        return heapq.nlargest(limit, merged, key=lambda hit: hit["score"])
+
+    def route(self, filter_metadata: Optional[Dict[str, Any]] = None) -> List[Any]:
+        """Shards a search with this filter has to visit."""
+        filter_metadata = filter_metadata or {}
+        shard = None
+        policy_id = filter_metadata.get("policy_id")
+        if filter_metadata.get("payer"):
+            shard = self.shard_for_payer(filter_metadata["payer"])
+        elif isinstance(policy_id, (list, tuple, set, frozenset)):
+            # Any of several policies (hierarchical retrieval): only the shards holding them
+            names = {self._locate_policy(p) for p in policy_id} - {None}
+            return [self._shards[name] for name in sorted(names)]
+        elif policy_id:
+            shard = self._locate_policy(policy_id)
+
+        if shard is not None:
+            # An unknown payer has no shard, and therefore no matches
+            return [self._shards[shard]] if shard in self._shards else []
+        return list(self._shards.values())
+
+    def _locate_policy(self, policy_id: str) -> Optional[str]:
+        if policy_id not in self._policy_shard:
+            # Policies ingested before a restart: find them once, then remember
+            for name, store in self.shards.items():
+                if store.has_policy(policy_id):
+                    self._policy_shard[policy_id] = name
+                    break
+        return self._policy_shard.get(policy_id)
+
+    def count(self) -> int:
+        """Number of points across all shards."""
+        return sum(store.count() for store in self.shards.values())
+
+    def has_policy(self, policy_id: str) -> bool:
+        """Whether any shard stores chunks of the given policy."""
+        return self._locate_policy(policy_id) is not None
+
+    def version_tags(self, policy_id: str) -> Set[str]:
+        """Version tags of the stored chunks of a policy."""
+        shard = self._locate_policy(policy_id)
+        return self._shards[shard].version_tags(policy_id) if shard else set()
+
+    def delete_policy(
+        self, policy_id: str, keep_version_tag: Optional[str] = None, version_tag: Optional[str] = None
+    ) -> int:
+        """Delete a policy's points from every shard that holds them."""
+        deleted = sum(
+            store.delete_policy(policy_id, keep_version_tag=keep_version_tag, version_tag=version_tag)
+            for store in self.shards.values()
+        )
+        if not keep_version_tag and not version_tag:
+            self._policy_shard.pop(policy_id, None)
+        return deleted
+
+    def activate_version(self, policy_id: str, version_tag: str):
+        """Flip a policy's active version in every shard (a payer change moves a policy between shards)."""
+        for store in self.shards.values():
+            store.activate_version(policy_id, version_tag)
+
+    def export_points(self, batch_size: int = 256) -> Iterator[Tuple[List[Any], List[List[float]], List[Dict[str, Any]]]]:
+        """Yield (ids, vectors, payloads) batches from every shard."""
+        for store in self.shards.values():
+            yield from store.export_points(batch_size)
+
+
+def build_sharded_store() -> ShardedVectorStore:
+    """Sharded store for the configured VECTOR_ENGINE, reopening existing Qdrant shards."""
+    from backend.rag.embeddings import get_embeddings
+
+    encoder = get_embeddings()
+    prefix = settings.QDRANT_COLLECTION + SHARD_SEPARATOR
+
+    if settings.VECTOR_ENGINE == "numpy":
+        from backend.rag.numpy_store import NumpyVectorStore
+        return ShardedVectorStore(lambda name: NumpyVectorStore(encoder=encoder, collection_name=prefix + name), encoder)
+
+    from backend.rag.vector_store import VectorStore, create_qdrant_client
+
+    client = create_qdrant_client()
+    existing = [c.name[len(prefix):] for c in client.get_collections().collections if c.name.startswith(prefix)]
+    store = ShardedVectorStore(
+        lambda name: VectorStore(collection_name=prefix + name, client=client, encoder=encoder),
+        encoder,
+        existing_shards=existing,
+    )
+    # Shared with the policy summary index of hierarchical retrieval
+    store.client = client
+    return store
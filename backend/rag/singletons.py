@@ -2,23 +2,60 @@
 Singleton instances for RAG components.
 Ensures vector store and ingestion pipeline are shared across the application.
 """
-from backend.rag.vector_store import VectorStore
-from backend.rag.ingestion import IngestionPipeline
+import threading
+from typing import TYPE_CHECKING
+
+from backend.config import settings
+
+if TYPE_CHECKING:
+    from backend.rag.vector_store import VectorStore
+    from backend.rag.ingestion import IngestionPipeline
+    from backend.rag.rules import RuleIndex
 
 # Global singleton instances
 _vector_store_instance = None
 _ingestion_pipeline_instance = None
+_rule_index_instance = None
+# Background warm-up and the first requests may race to build the singletons
+_lock = threading.RLock()
 
-def get_vector_store() -> VectorStore:
+def get_vector_store() -> "VectorStore":
     """Get or create the global vector store instance."""
     global _vector_store_instance
     if _vector_store_instance is None:
-        _vector_store_instance = VectorStore()
+        with _lock:
+            if _vector_store_instance is None:
+                # Imported here so qdrant_client/torch only load when first needed
+                if settings.VECTOR_SHARDING:
+                    from backend.rag.sharding import build_sharded_store
+                    _vector_store_instance = build_sharded_store()
+                elif settings.VECTOR_ENGINE == "numpy":
+                    from backend.rag.numpy_store import NumpyVectorStore
+                    _vector_store_instance = NumpyVectorStore()
+                else:
+                    from backend.rag.vector_store import VectorStore
+                    _vector_store_instance = VectorStore()
+                if settings.HIERARCHICAL_RETRIEVAL:
+                    from backend.rag.hierarchical import build_hierarchical_store
+                    _vector_store_instance = build_hierarchical_store(_vector_store_instance)
     return _vector_store_instance
 
-def get_ingestion_pipeline() -> IngestionPipeline:
+def get_ingestion_pipeline() -> "IngestionPipeline":
     """Get or create the global ingestion pipeline instance."""
     global _ingestion_pipeline_instance
     if _ingestion_pipeline_instance is None:
-        _ingestion_pipeline_instance = IngestionPipeline(get_vector_store())
+        with _lock:
+            if _ingestion_pipeline_instance is None:
+                from backend.rag.ingestion import IngestionPipeline
+                _ingestion_pipeline_instance = IngestionPipeline(get_vector_store(), get_rule_index())
     return _ingestion_pipeline_instance
+
+def get_rule_index() -> "RuleIndex":
+    """Get or create the global compiled policy rule index."""
+    global _rule_index_instance
+    if _rule_index_instance is None:
+        with _lock:
+            if _rule_index_instance is None:
+                from backend.rag.rules import RuleIndex
+                _rule_index_instance = RuleIndex(settings.RULE_INDEX_PATH)
+    return _rule_index_instance
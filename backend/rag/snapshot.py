@@ -0,0 +1,138 @@
+"""
+Vector Store Snapshots.
+Exports a collection to a portable directory and imports it back without
+re-embedding, so a prebuilt collection (including the default NCD policy)
+can be baked into the Docker image:
+
+    snapshot/
+      manifest.json   collection, embedding model/dim, count, policy ids
+      vectors.npy     float32 [count, dim], memory-mapped on import
+      points.jsonl    one {"id", "payload"} per row, same order as vectors
+
+Usage:
+    python -m backend.rag.snapshot build  /app/vector_snapshot
+    python -m backend.rag.snapshot export /path/to/snapshot
+    python -m backend.rag.snapshot import /path/to/snapshot
+"""
+import json
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.config import settings
+
+MANIFEST = "manifest.json"
+VECTORS = "vectors.npy"
+POINTS = "points.jsonl"
+
+
+def read_manifest(path: str) -> Dict[str, Any]:
+    return json.loads((Path(path) / MANIFEST).read_text(encoding="utf-8"))
+
+
+def export_snapshot(store, path: str) -> Dict[str, Any]:
+    """Write every point of the store's collection to a snapshot directory."""
+    out = Path(path)
+    out.mkdir(parents=True, exist_ok=True)
+
+    ids, payloads, vector_batches = [], [], []
+    for batch_ids, batch_vectors, batch_payloads in store.export_points():
+        ids.extend(batch_ids)
+        payloads.extend(batch_payloads)
+        vector_batches.append(np.asarray(batch_vectors, dtype=np.float32))
+
+    dim = settings.EMBEDDING_DIM
+    vectors = np.concatenate(vector_batches) if vector_batches else np.zeros((0, dim), dtype=np.float32)
+    np.save(out / VECTORS, vectors)
+
+    with open(out / POINTS, "w", encoding="utf-8") as f:
+        for pid, payload in zip(ids, payloads):
+            f.write(json.dumps({"id": pid, "payload": payload}) + "\n")
+
+    policy_ids = sorted({(p.get("full_metadata") or {}).get("policy_id") for p in payloads} - {None})
+    manifest = {
+        "collection": store.collection_name,
+        "embedding_model": settings.EMBEDDING_MODEL,
+        "embedding_dim": int(vectors.shape[1]) if len(vectors) else dim,
+        "count": len(ids),
+        "policy_ids": policy_ids,
+        "created_at": datetime.utcnow().isoformat(),
+    }
+    (out / MANIFEST).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    print(f"✓ Exported {len(ids)} points to snapshot {out}")
+    return manifest
+
+
+def import_snapshot(store, path: str) -> Dict[str, Any]:
+    """Load a snapshot into the store without re-embedding. Vectors are memory-mapped."""
+    src = Path(path)
+    manifest = read_manifest(path)
+    if manifest["embedding_model"] != settings.EMBEDDING_MODEL or manifest["embedding_dim"] != settings.EMBEDDING_DIM:
+        raise ValueError(
+            f"Snapshot was built with {manifest['embedding_model']} ({manifest['embedding_dim']}-dim), "
+            f"but EMBEDDING_MODEL is {settings.EMBEDDING_MODEL} ({settings.EMBEDDING_DIM}-dim)."
+        )
+
+    vectors = np.load(src / VECTORS, mmap_mode="r")
+    ids, payloads = [], []
+    with open(src / POINTS, encoding="utf-8") as f:
+        for line in f:
+            row = json.loads(line)
+            ids.append(row["id"])
+            payloads.append(row["payload"])
+
+    store.import_points(ids, vectors, payloads)
+    print(f"✓ Imported {len(ids)} points from snapshot {src}")
+    return manifest
+
+
+def load_snapshot_if_empty(store) -> bool:
+    """Import VECTOR_SNAPSHOT_PATH into an empty store. Returns True if loaded."""
+    path = settings.VECTOR_SNAPSHOT_PATH
+    if not path or not (Path(path) / MANIFEST).exists():
+        return False
+    if store.count() > 0:
+        return False
+    import_snapshot(store, path)
+    return True
+
+
+def build_snapshot(path: str) -> Dict[str, Any]:
+    """Ingest the default policy into the configured store and export it."""
+    from backend.rag.singletons import get_vector_store
+    from backend.routers.policies import seed_default_policy
+
+    seed_default_policy()
+    return export_snapshot(get_vector_store(), path)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export, import or build vector store snapshots.")
+    parser.add_argument("command", choices=["build", "export", "import"])
+    parser.add_argument("path", nargs="?", default=settings.VECTOR_SNAPSHOT_PATH)
+    args = parser.parse_args()
+    if not args.path:
+        parser.error("a snapshot path is required (or set VECTOR_SNAPSHOT_PATH)")
+
+    from backend.rag.singletons import get_vector_store
+
+    start = time.perf_counter()
+    if args.command == "build":
+        manifest = build_snapshot(args.path)
+    elif args.command == "export":
+        manifest = export_snapshot(get_vector_store(), args.path)
+    else:
+        manifest = import_snapshot(get_vector_store(), args.path)
+    print(json.dumps({**manifest, "seconds": round(time.perf_counter() - start, 3)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Token Accounting and Budgets.
+Every LLM call is charged to the graph node that made it through a
+context-local meter fed by an LLM callback; the graph sums the per-node
+usage in state["token_usage"] and finalize attaches it to the AuditOutput.
+
+Budgets (AUDIT_TOKEN_BUDGET per audit, BATCH_TOKEN_BUDGET per batch request)
+are checked before each further LLM step. When the next call would likely
+overshoot (estimated as the mean tokens per call so far), the refine loop
+stops, scoring falls back to the local rubric and the audit is finalized
+from the current draft.
+"""
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from backend.config import settings
+from backend import metrics
+
+
+def parse_prices(spec: str) -> Dict[str, Tuple[float, float]]:
+    """
+    Parse "gemini=0.10/0.40,groq=0.59/0.79" into provider -> (prompt, completion)
+    USD per million tokens.
+    """
+    prices = {}
+    for entry in (spec or "").split(","):
+        if "=" not in entry:
+            continue
+        provider, rates = entry.split("=", 1)
+        prompt, _, completion = rates.partition("/")
+        prices[provider.strip().lower()] = (float(prompt or 0), float(completion or prompt or 0))
+    return prices
+
+
+def llm_cost(provider: str, prompt_tokens: int, completion_tokens: int) -> float:
+    prompt_rate, completion_rate = parse_prices(settings.LLM_PRICES).get(provider.lower(), (0.0, 0.0))
+    return (prompt_tokens * prompt_rate + completion_tokens * completion_rate) / 1_000_000
+
+
+class UsageMeter:
+    """Running token and cost totals for one node run or one batch."""
+
+    def __init__(self, budget: int = 0):
+        self._lock = threading.Lock()
+        self.budget = budget
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost_usd = 0.0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def add(self, prompt_tokens: int, completion_tokens: int, cost_usd: float):
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+            self.cost_usd += cost_usd
+
+    def as_dict(self, share: float = 1.0) -> Dict[str, float]:
+        return {
+            "calls": self.calls * share,
+            "prompt_tokens": self.prompt_tokens * share,
+            "completion_tokens": self.completion_tokens * share,
+            "cost_usd": self.cost_usd * share,
+        }
+
+
+_node_meter: ContextVar[Optional[UsageMeter]] = ContextVar("node_usage_meter", default=None)
+_batch_meter: ContextVar[Optional[UsageMeter]] = ContextVar("batch_usage_meter", default=None)
+
+
+@contextmanager
+def node_scope() -> Iterator[UsageMeter]:
+    """Charge LLM calls made inside the block to a fresh meter."""
+    meter = UsageMeter()
+    token = _node_meter.set(meter)
+    try:
+        yield meter
+    finally:
+        _node_meter.reset(token)
+
+
+@contextmanager
+def batch_scope(budget: Optional[int] = None) -> Iterator[UsageMeter]:
+    """Share one meter (and the batch budget) across every audit started inside the block."""
+    meter = UsageMeter(settings.BATCH_TOKEN_BUDGET if budget is None else budget)
+    token = _batch_meter.set(meter)
+    try:
+        yield meter
+    finally:
+        _batch_meter.reset(token)
+
+
+def charge(provider: str, prompt_tokens: int, completion_tokens: int):
+    """Record one LLM call against the current node and batch meters."""
+    cost = llm_cost(provider, prompt_tokens, completion_tokens)
+    metrics.LLM_COST.labels(provider=provider).inc(cost)
+    for meter in (_node_meter.get(), _batch_meter.get()):
+        if meter is not None:
+            meter.add(prompt_tokens, completion_tokens, cost)
+
+
+def usage_handler(provider: str):
+    """LangChain callback that charges token usage to the active meters."""
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class UsageHandler(BaseCallbackHandler):
+        run_inline = True
+
+        def on_llm_end(self, response, **kwargs):
+            charge(provider, *metrics.token_usage(response))
+
+    return UsageHandler()
+
+
+def add_usage(left: Dict[str, Dict[str, float]], right: Dict[str, Dict[str, float]]) -> Dict[str, Dict[str, float]]:
+    """State reducer: sum per-node usage (loop nodes accumulate across iterations)."""
+    merged = {node: dict(usage) for node, usage in (left or {}).items()}
+    for node, usage in (right or {}).items():
+        target = merged.setdefault(node, {})
+        for key, value in usage.items():
+            target[key] = target.get(key, 0) + value
+    return merged
+
+
+def usage_totals(token_usage: Dict[str, Dict[str, float]]) -> Dict[str, float]:
+    totals = {"calls": 0.0, "prompt_tokens": 0.0, "completion_tokens": 0.0, "cost_usd": 0.0}
+    for usage in (token_usage or {}).values():
+        for key in totals:
+            totals[key] += usage.get(key, 0)
+    return totals
+
+
+def _would_exceed(used: float, calls: float, budget: int) -> bool:
+    if not budget:
+        return False
+    next_call = used / calls if calls else 0
+    return used + next_call > budget
+
+
+def budget_exhausted(state: Dict[str, Any]) -> bool:
+    """Whether another LLM step would likely push this audit or its batch over budget."""
+    totals = usage_totals(state.get("token_usage"))
+    used = totals["prompt_tokens"] + totals["completion_tokens"]
+    if _would_exceed(used, totals["calls"], settings.AUDIT_TOKEN_BUDGET):
+        return True
+    batch = _batch_meter.get()
+    return batch is not None and _would_exceed(batch.total_tokens, batch.calls, batch.budget)
+
+
+def build_usage(state: Dict[str, Any]):
+    """AuditUsage breakdown for a finished graph state."""
+    from shared.schemas import AuditUsage, NodeUsage
+
+    token_usage = state.get("token_usage") or {}
+    totals = usage_totals(token_usage)
+    nodes = {
+        node: NodeUsage(
+            calls=round(u.get("calls", 0), 3),
+            prompt_tokens=round(u.get("prompt_tokens", 0)),
+            completion_tokens=round(u.get("completion_tokens", 0)),
+            cost_usd=round(u.get("cost_usd", 0.0), 6),
+        )
+        for node, u in token_usage.items()
+    }
+    return AuditUsage(
+        nodes=nodes,
+        prompt_tokens=round(totals["prompt_tokens"]),
+        completion_tokens=round(totals["completion_tokens"]),
+        total_tokens=round(totals["prompt_tokens"] + totals["completion_tokens"]),
+        cost_usd=round(totals["cost_usd"], 6),
+        budget_tokens=settings.AUDIT_TOKEN_BUDGET or None,
+        budget_stopped=bool(state.get("budget_stopped")),
+    )
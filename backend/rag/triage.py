@@ -0,0 +1,56 @@
+"""
+Risk-Tiered Triage.
+Routes each claim to one of two audit paths before the auditor runs:
+- "fast": a single combined audit-and-self-check LLM call (low-risk claims)
+- "full": the Auditor -> Verifier -> Refiner -> Scorer loop
+"""
+from typing import Any, Dict, List, Tuple
+
+from shared.schemas import ClaimInput
+from backend.config import settings
+from backend.rag.scoring import retrieval_strength
+
+FAST_TIER = "fast"
+FULL_TIER = "full"
+RULES_TIER = "rules"  # decided by the compiled rule table, no auditor call
+CACHED_TIER = "cached"  # an identical earlier audit reused from the audit cache
+
+
+def _csv_set(value: str) -> set:
+    return {v.strip().upper() for v in value.split(",") if v.strip()}
+
+
+def triage_claim(claim: ClaimInput, chunks: List[Dict[str, Any]]) -> Tuple[str, str]:
+    """
+    Pick the audit tier for a claim.
+
+    A claim only takes the fast lane when every risk check passes:
+    billed amount at or under TRIAGE_FAST_MAX_AMOUNT, payer not in
+    TRIAGE_FULL_LOOP_PAYERS, no code in TRIAGE_HIGH_RISK_CODES, and
+    retrieval strength at or above TRIAGE_MIN_RETRIEVAL_SCORE.
+
+    Returns:
+        (tier, reason)
+    """
+    if not settings.TRIAGE_ENABLED:
+        return FULL_TIER, "triage disabled"
+
+    if not chunks:
+        return FULL_TIER, "no policy context retrieved"
+
+    if claim.billed_amount > settings.TRIAGE_FAST_MAX_AMOUNT:
+        return FULL_TIER, f"billed amount {claim.billed_amount} exceeds {settings.TRIAGE_FAST_MAX_AMOUNT}"
+
+    if claim.payer.upper() in _csv_set(settings.TRIAGE_FULL_LOOP_PAYERS):
+        return FULL_TIER, f"payer {claim.payer} requires full review"
+
+    risky = _csv_set(settings.TRIAGE_HIGH_RISK_CODES)
+    flagged = [c for c in claim.cpt_codes + claim.icd_codes if c.upper() in risky]
+    if flagged:
+        return FULL_TIER, f"high-risk codes {', '.join(flagged)}"
+
+    strength = retrieval_strength(chunks)
+    if strength < settings.TRIAGE_MIN_RETRIEVAL_SCORE:
+        return FULL_TIER, f"retrieval strength {strength:.2f} below {settings.TRIAGE_MIN_RETRIEVAL_SCORE}"
+
+    return FAST_TIER, f"low risk (retrieval strength {strength:.2f})"
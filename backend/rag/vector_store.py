@@ -3,23 +3,55 @@ Qdrant Vector Store Service.
 Handles indexed storage and semantic retrieval of policy chunks.
 """
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional, Set, Tuple
 from uuid import uuid4
 from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct
+from qdrant_client.models import PointStruct
 from backend.config import settings
-from backend.rag.embeddings import LocalEmbeddings
+from backend import metrics
+from backend.rag.embeddings import get_embeddings
+from backend.rag.collection_profiles import create_collection, get_profile, profile_drift, search_params
+from backend.rag.versioning import ACTIVE, VersionGate
+
+# Payload fields with keyword indexes (filtered search, bulk deletes, version lookups)
+INDEXED_PAYLOAD_FIELDS = ("policy_id", "payer", "version_tag")
+
+
+def chunk_points(chunks: List[Dict[str, Any]]) -> Tuple[List[Any], List[Dict[str, Any]]]:
+    """
+    Point ids and payloads of ingestion chunks, in the payload layout every
+    vector store engine reads back. Chunks without a chunk_id get a UUID.
+    """
+    ids, payloads = [], []
+    for chunk in chunks:
+        ids.append(chunk.get("chunk_id", str(uuid4())))
+        payloads.append({
+            "text": chunk["text"],
+            "source": chunk.get("source", ""),
+            "section": chunk.get("section", ""),
+            "full_metadata": chunk.get("metadata", {})
+        })
+    return ids, payloads
+
+def create_qdrant_client() -> QdrantClient:
+    # Connect to cloud/docker if url set, else on-disk local mode if a path is set,
+    # else fall back to local memory
+    if settings.QDRANT_URL:
+        return QdrantClient(url=settings.QDRANT_URL, api_key=settings.QDRANT_API_KEY)
+    if settings.QDRANT_PATH:
+        return QdrantClient(path=settings.QDRANT_PATH)
+    return QdrantClient(":memory:")
+
 
 class VectorStore:
-    def __init__(self):
-        # Fallback to local memory if url not set, or connect to cloud/docker
-        if settings.QDRANT_URL:
-            self.client = QdrantClient(url=settings.QDRANT_URL, api_key=settings.QDRANT_API_KEY)
-        else:
-            self.client = QdrantClient(":memory:")
-        
-        self.encoder = LocalEmbeddings()
-        self.collection_name = settings.QDRANT_COLLECTION
+    def __init__(self, collection_name: Optional[str] = None, client: Optional[QdrantClient] = None, encoder=None):
+        # Shards share one client and encoder
+        self.client = client if client is not None else create_qdrant_client()
+        self.encoder = encoder if encoder is not None else get_embeddings()
+        self.collection_name = collection_name or settings.QDRANT_COLLECTION
+        self.profile = get_profile()
+        self._search_params = search_params(self.profile)
+        self.versions = VersionGate()
         self._ensure_collection_exists()
 
     def _ensure_collection_exists(self):
@@ -29,15 +61,34 @@ class VectorStore:
             exists = any(c.name == self.collection_name for c in collections)
             
             if not exists:
-                # 384 dim for all-MiniLM-L6-v2
-                self.client.create_collection(
-                    collection_name=self.collection_name,
-                    vectors_config=VectorParams(size=384, distance=Distance.COSINE),
-                )
-                print(f"✓ Created Qdrant collection: {self.collection_name}")
+                create_collection(self.client, self.collection_name, self.profile, settings.EMBEDDING_DIM)
+                print(f"✓ Created Qdrant collection: {self.collection_name} (profile '{self.profile.name}')")
+            elif settings.QDRANT_URL:
+                drift = profile_drift(self.client, self.collection_name, self.profile)
+                if drift:
+                    print(
+                        f"Warning: Collection {self.collection_name} differs from profile '{self.profile.name}' "
+                        f"({', '.join(sorted(drift))}); run `python -m backend.rag.collection_profiles migrate`"
+                    )
+            self._ensure_payload_indexes()
         except Exception as e:
             print(f"Warning: Could not verify/create collection: {e}")
 
+    def _ensure_payload_indexes(self):
+        """Keyword indexes on filter fields; idempotent, and only meaningful on a Qdrant server."""
+        if not settings.QDRANT_URL:
+            return
+        from qdrant_client.models import PayloadSchemaType
+
+        existing = self.client.get_collection(self.collection_name).payload_schema or {}
+        for field in INDEXED_PAYLOAD_FIELDS:
+            key = f"full_metadata.{field}"
+            if key not in existing:
+                self.client.create_payload_index(self.collection_name, key, PayloadSchemaType.KEYWORD)
+        if ACTIVE not in existing:
+            # Every search excludes inactive points
+            self.client.create_payload_index(self.collection_name, ACTIVE, PayloadSchemaType.BOOL)
+
     def add_chunks(self, chunks: List[Dict[str, Any]]):
         """
         Embed and upsert chunks into Qdrant.
@@ -51,24 +102,13 @@ class VectorStore:
 
         texts = [c["text"] for c in chunks]
         embeddings = self.encoder.embed_documents(texts)
-        
-        points = []
-        for i, chunk in enumerate(chunks):
-            # Use chunk_id if provided, otherwise generate UUID
-            chunk_id_str = chunk.get("chunk_id", str(uuid4()))
-            
-            payload = {
-                "text": chunk["text"],
-                "source": chunk.get("source", ""),
-                "section": chunk.get("section", ""),
-                "full_metadata": chunk.get("metadata", {})
-            }
-            
-            points.append(PointStruct(
-                id=chunk_id_str,  # Qdrant accepts string IDs
-                vector=embeddings[i], 
-                payload=payload
-            ))
+        ids, payloads = chunk_points(chunks)
+        payloads = self.versions.mark(payloads)
+
+        points = [
+            PointStruct(id=point_id, vector=embeddings[i], payload=payload)  # Qdrant accepts string IDs
+            for i, (point_id, payload) in enumerate(zip(ids, payloads))
+        ]
 
         try:
             self.client.upsert(
@@ -84,36 +124,48 @@ class VectorStore:
         """
         Semantic search for relevant chunks with optional metadata filtering.
         """
-        from qdrant_client.models import Filter, FieldCondition, MatchValue
-
         try:
             query_vector = self.encoder.embed_query(query)
-            
+        except Exception as e:
+            print(f"Error embedding query: {e}")
+            return []
+        return self.search_by_vector(query_vector, limit=limit, filter_metadata=filter_metadata)
+
+    @metrics.VECTOR_SEARCH_SECONDS.labels(engine="qdrant").time()
+    def search_by_vector(self, query_vector: List[float], limit: int = 5, filter_metadata: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Search with a pre-computed query embedding."""
+        from qdrant_client.models import Filter, FieldCondition, MatchAny, MatchValue
+
+        try:
             # Construct Qdrant filter if provided
-            qdrant_filter = None
-            if filter_metadata:
-                must_conditions = []
-                for key, value in filter_metadata.items():
-                    if value:
-                        # Full metadata is nested in the payload
-                        must_conditions.append(FieldCondition(
-                            key=f"full_metadata.{key}",
-                            match=MatchValue(value=value)
-                        ))
-                
-                if must_conditions:
-                    qdrant_filter = Filter(must=must_conditions)
+            must_conditions = []
+            for key, value in (filter_metadata or {}).items():
+                if value:
+                    # Full metadata is nested in the payload; a list value matches any of its items
+                    many = isinstance(value, (list, tuple, set, frozenset))
+                    must_conditions.append(FieldCondition(
+                        key=f"full_metadata.{key}",
+                        match=MatchAny(any=list(value)) if many else MatchValue(value=value)
+                    ))
+
+            # Staged or retired policy versions stay invisible (points without the flag are active)
+            qdrant_filter = Filter(
+                must=must_conditions or None,
+                must_not=[FieldCondition(key=ACTIVE, match=MatchValue(value=False))],
+            )
 
             hits = self.client.search(
                 collection_name=self.collection_name,
                 query_vector=query_vector,
                 query_filter=qdrant_filter,
+                search_params=self._search_params,
                 limit=limit
             )
 
             results = []
             for hit in hits:
                 results.append({
+                    "chunk_id": str(hit.id),
                     "score": hit.score,
                     "text": hit.payload.get("text"),
                     "metadata": hit.payload.get("full_metadata")
@@ -123,3 +175,117 @@ class VectorStore:
         except Exception as e:
             print(f"Error searching Qdrant: {e}")
             return []
+
+    def count(self) -> int:
+        """Number of points in the collection."""
+        return self.client.count(collection_name=self.collection_name, exact=True).count
+
+    def has_policy(self, policy_id: str) -> bool:
+        """Whether any chunks of the given policy are stored."""
+        from qdrant_client.models import Filter, FieldCondition, MatchValue
+
+        result = self.client.count(
+            collection_name=self.collection_name,
+            count_filter=Filter(must=[FieldCondition(key="full_metadata.policy_id", match=MatchValue(value=policy_id))]),
+            exact=True
+        )
+        return result.count > 0
+
+    def version_tags(self, policy_id: str) -> Set[str]:
+        """Version tags of the stored chunks of a policy."""
+        from qdrant_client.models import Filter, FieldCondition, MatchValue
+
+        tags, offset = set(), None
+        while True:
+            records, offset = self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=Filter(must=[FieldCondition(key="full_metadata.policy_id", match=MatchValue(value=policy_id))]),
+                limit=256,
+                offset=offset,
+                with_payload=["full_metadata"],
+                with_vectors=False
+            )
+            tags.update((r.payload.get("full_metadata") or {}).get("version_tag") for r in records)
+            if offset is None:
+                break
+        tags.discard(None)
+        return tags
+
+    def delete_policy(
+        self, policy_id: str, keep_version_tag: Optional[str] = None, version_tag: Optional[str] = None
+    ) -> int:
+        """
+        Bulk-delete a policy's points through the indexed policy_id payload.
+        keep_version_tag spares one version; version_tag deletes only that version.
+        Returns the number of points deleted.
+        """
+        from qdrant_client.models import Filter, FieldCondition, FilterSelector, MatchValue
+
+        must = [FieldCondition(key="full_metadata.policy_id", match=MatchValue(value=policy_id))]
+        must_not = []
+        if version_tag:
+            must.append(FieldCondition(key="full_metadata.version_tag", match=MatchValue(value=version_tag)))
+        if keep_version_tag:
+            must_not.append(FieldCondition(key="full_metadata.version_tag", match=MatchValue(value=keep_version_tag)))
+        selector = Filter(must=must, must_not=must_not or None)
+
+        doomed = self.client.count(collection_name=self.collection_name, count_filter=selector, exact=True).count
+        if doomed:
+            self.client.delete(
+                collection_name=self.collection_name,
+                points_selector=FilterSelector(filter=selector),
+                wait=True
+            )
+        return doomed
+
+    def activate_version(self, policy_id: str, version_tag: str):
+        """
+        Make one version of a policy visible and hide every other point of it
+        (older versions, and untagged points stored before versioning).
+
+        Qdrant applies the two payload updates in order but not atomically, so
+        the new version is shown before the others are hidden: a search in
+        between can see both versions for a moment, but never neither.
+        """
+        from qdrant_client.models import Filter, FieldCondition, MatchValue, SetPayload, SetPayloadOperation
+
+        policy = FieldCondition(key="full_metadata.policy_id", match=MatchValue(value=policy_id))
+        version = FieldCondition(key="full_metadata.version_tag", match=MatchValue(value=version_tag))
+        self.client.batch_update_points(self.collection_name, [
+            SetPayloadOperation(set_payload=SetPayload(payload={ACTIVE: True}, filter=Filter(must=[policy, version]))),
+            SetPayloadOperation(set_payload=SetPayload(
+                payload={ACTIVE: False}, filter=Filter(must=[policy], must_not=[version])
+            )),
+        ], wait=True)
+
+    def export_points(self, batch_size: int = 256) -> Iterator[Tuple[List[Any], List[List[float]], List[Dict[str, Any]]]]:
+        """Yield (ids, vectors, payloads) batches of every stored point."""
+        offset = None
+        while True:
+            records, offset = self.client.scroll(
+                collection_name=self.collection_name,
+                limit=batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=True
+            )
+            if records:
+                yield [r.id for r in records], [r.vector for r in records], [r.payload for r in records]
+            if offset is None:
+                break
+
+    def import_points(self, ids: List[Any], vectors, payloads: List[Dict[str, Any]], batch_size: int = 256):
+        """Upsert pre-embedded points (e.g. from a snapshot) without re-encoding."""
+        for start in range(0, len(ids), batch_size):
+            end = start + batch_size
+            batch_vectors = vectors[start:end]
+            if hasattr(batch_vectors, "tolist"):
+                # numpy (possibly memory-mapped) snapshot rows
+                batch_vectors = batch_vectors.tolist()
+            self.client.upsert(
+                collection_name=self.collection_name,
+                points=[
+                    PointStruct(id=pid, vector=vector, payload=payload)
+                    for pid, vector, payload in zip(ids[start:end], batch_vectors, self.versions.mark(payloads[start:end]))
+                ]
+            )
@@ -0,0 +1,88 @@
+"""
+Policy Version Tags.
+Every ingested chunk carries a version tag ("<policy_id>@<content hash>").
+Replacing a policy writes the new version as inactive points, then activates
+it and retires every other point of the policy (older versions and untagged
+points from before versioning), and only afterwards deletes the old points,
+so retrieval never sees zero chunks of the policy:
+
+    stage(new) -> write new chunks (inactive) -> activate(new, retire the rest) -> delete old
+
+The numpy store flips versions in one locked step. Qdrant applies the two
+payload updates in order but not atomically; the new version is activated
+first, so a search racing the flip may briefly see both versions, never none.
+
+The flag lives in each point's payload ("active": false marks a staged or
+retired version; points without it are active) and every search filters on
+it, so all workers and instances see the same version. A crash at any step
+leaves exactly one version visible: the old one before activation, the new
+one after it. Inactive leftovers are removed by the next replace or delete.
+"""
+import hashlib
+import threading
+from typing import Any, Callable, Dict, FrozenSet, List
+
+# Payload field of inactive points (only ever stored as False)
+ACTIVE = "active"
+
+
+def policy_version(markdown_text: str) -> str:
+    """Content version of a policy document."""
+    return hashlib.sha256(markdown_text.encode("utf-8")).hexdigest()[:12]
+
+
+def version_tag(policy_id: str, version: str) -> str:
+    return f"{policy_id}@{version}"
+
+
+class VersionGate:
+    """Version tags this process is staging: their points are written inactive."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._staged: FrozenSet[str] = frozenset()
+
+    def staged(self) -> FrozenSet[str]:
+        return self._staged
+
+    def stage(self, *tags: str):
+        with self._lock:
+            self._staged = self._staged | set(tags)
+
+    def release(self, *tags: str):
+        with self._lock:
+            self._staged = self._staged - set(tags)
+
+    def mark(self, payloads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Payloads to store, with the points of staged versions marked inactive."""
+        staged = self._staged
+        if not staged:
+            return payloads
+        return [
+            {**p, ACTIVE: False} if (p.get("full_metadata") or {}).get("version_tag") in staged else p
+            for p in payloads
+        ]
+
+
+def swap_policy_version(store, policy_id: str, new_tag: str, write: Callable[[], None]) -> int:
+    """
+    Atomically replace a policy's chunks in `store` with the ones `write` stores
+    under `new_tag`. Returns the number of old points deleted.
+    """
+    existing = store.version_tags(policy_id)
+    # Rewriting the serving version in place (same content) must not take it offline
+    staged = new_tag not in existing
+    if staged:
+        store.versions.stage(new_tag)
+    try:
+        write()
+    except Exception:
+        # Drop the partially written version; the old one never stopped serving
+        if staged:
+            store.delete_policy(policy_id, version_tag=new_tag)
+        raise
+    finally:
+        store.versions.release(new_tag)
+
+    store.activate_version(policy_id, new_tag)
+    return store.delete_policy(policy_id, keep_version_tag=new_tag)
@@ -1,23 +1,62 @@
 """
-Audit router — POST /audit endpoint.
+Audit router — POST /audit endpoint and the audit log read API.
 Phase 0: returns mocked structured response.
 Phase 4: will wire to LangGraph pipeline.
 """
 
 import sys
 from pathlib import Path
-from fastapi import APIRouter, HTTPException
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
 
 # Add shared to path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from shared.schemas import ClaimInput, AuditOutput
-from backend.services.pipeline import run_audit_pipeline
+from backend.config import settings
+from backend.services.pipeline import run_audit_pipeline, run_batch_audit_pipeline
 
 router = APIRouter(prefix="/audit", tags=["audit"])
 
 
-@router.post("/", response_model=AuditOutput)
+def client_address(request: Request) -> str:
+    """
+    The client's address for rate limiting. Each of the TRUSTED_PROXY_HOPS
+    proxies appends the address it received from to X-Forwarded-For, so the
+    client is that many entries from the right; anything further left was
+    sent by the client and can be forged.
+    """
+    peer = request.client.host if request.client else "unknown"
+    hops = settings.TRUSTED_PROXY_HOPS
+    if hops <= 0:
+        return peer
+    forwarded = [a.strip() for a in request.headers.get("x-forwarded-for", "").split(",") if a.strip()]
+    return forwarded[-hops] if len(forwarded) >= hops else peer
+
+
+def audit_rate_limit(request: Request):
+    """
+    Per-client limit of AUDIT_RATE_LIMIT_PER_MINUTE audit requests. The count
+    lives in the shared cache, so with Redis it holds across all instances.
+    """
+    if not settings.AUDIT_RATE_LIMIT_PER_MINUTE:
+        return
+    from backend.db.cache import RateLimiter
+    from backend.db.singletons import get_cache_backend
+
+    backend = get_cache_backend()
+    if backend is None:
+        return
+    allowed, retry_after = RateLimiter(backend, "audit", settings.AUDIT_RATE_LIMIT_PER_MINUTE).hit(client_address(request))
+    if not allowed:
+        raise HTTPException(
+            status_code=429, detail="Audit rate limit exceeded", headers={"Retry-After": str(retry_after)}
+        )
+
+
+@router.post("/", response_model=AuditOutput, dependencies=[Depends(audit_rate_limit)])
 async def run_audit(claim: ClaimInput) -> AuditOutput:
     """
     Run the full audit pipeline on a submitted claim.
@@ -32,6 +71,136 @@ async def run_audit(claim: ClaimInput) -> AuditOutput:
         raise HTTPException(status_code=500, detail=f"Audit pipeline error: {str(e)}")
 
 
+@router.post("/batch", response_model=list[AuditOutput], dependencies=[Depends(audit_rate_limit)])
+async def run_batch_audit(claims: list[ClaimInput]) -> list[AuditOutput]:
+    """
+    Audit many claims at once. Claims sharing CPT/ICD codes and payer
+    are audited together so their policy context is sent once per group.
+    Results are returned in submission order; claim IDs must be unique.
+    """
+    if not claims:
+        raise HTTPException(status_code=422, detail="No claims submitted")
+    try:
+        return await run_batch_audit_pipeline(claims)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch audit pipeline error: {str(e)}")
+
+
+def _work_queue():
+    from backend.db.singletons import get_work_queue
+    try:
+        return get_work_queue()
+    except ValueError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+@router.post("/jobs", status_code=202, dependencies=[Depends(audit_rate_limit)])
+async def enqueue_audits(claims: list[ClaimInput], idempotency_key: Optional[str] = Header(None)):
+    """
+    Queue claims for audit by the worker pool and return one job ID per claim.
+    With an Idempotency-Key header, retrying the same request returns the
+    same job IDs instead of queueing the claims again.
+    """
+    if not claims:
+        raise HTTPException(status_code=422, detail="No claims submitted")
+    job_ids = None
+    if idempotency_key:
+        from backend.db.cache import digest
+        job_ids = [digest(idempotency_key, i, claim.claim_id) for i, claim in enumerate(claims)]
+    queue = _work_queue()
+    job_ids = await run_in_threadpool(queue.enqueue, claims, job_ids)
+    return {"jobs": [{"job_id": j, "claim_id": c.claim_id} for j, c in zip(job_ids, claims)]}
+
+
+@router.get("/jobs/stats")
+async def work_queue_stats():
+    """Jobs per status in the work queue."""
+    return {"backend": settings.WORK_QUEUE_BACKEND, "counts": await run_in_threadpool(_work_queue().counts)}
+
+
+@router.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    """Status of a queued audit, with its AuditOutput once done."""
+    status = await run_in_threadpool(_work_queue().status, job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return status
+
+
+@router.get("/rules/stats")
+async def rule_engine_stats():
+    """How many audited claims the compiled rule tables decided without the LLM (this worker)."""
+    from backend.metrics import rule_engine_counts
+
+    counts = rule_engine_counts()
+    evaluated = sum(counts.values())
+    return {
+        "evaluated": evaluated,
+        **counts,
+        "local_decision_rate": round(counts["decided_locally"] / evaluated, 4) if evaluated else 0.0
+    }
+
+
 @router.get("/health")
 async def health():
     return {"status": "ok", "service": "audit"}
+
+
+def _audit_log():
+    # Imported lazily so the app starts without opening the database
+    from backend.db.singletons import get_audit_log
+    return get_audit_log()
+
+
+@router.get("/stats/decisions")
+async def decision_stats(
+    bucket: str = Query("day", description="hour, day or month"),
+    payer: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+):
+    """Logged audit decisions per payer per time bucket, aggregated by the store."""
+    try:
+        rows = await run_in_threadpool(
+            _audit_log().decision_counts, bucket=bucket, payer=payer, since=since, until=until
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"bucket": bucket, "counts": rows}
+
+
+@router.get("/stats/nodes")
+async def node_stats(since: Optional[datetime] = None, until: Optional[datetime] = None):
+    """Runs, mean and max wall time of each audit graph node across logged audits."""
+    return {"nodes": await run_in_threadpool(_audit_log().node_timings, since=since, until=until)}
+
+
+@router.get("/stats/spend")
+async def spend_stats(
+    by: str = Query("payer", description="payer or prompt_version"),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+):
+    """LLM tokens and estimated cost of logged audits per payer or per prompt version."""
+    try:
+        rows = await run_in_threadpool(_audit_log().spend, group_by=by, since=since, until=until)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"by": by, "spend": rows}
+
+
+@router.get("/claims/{claim_id}")
+async def claim_audits(claim_id: str, limit: int = Query(50, ge=1, le=500)):
+    """Logged audits for a claim, newest first."""
+    return {"claim_id": claim_id, "audits": await run_in_threadpool(_audit_log().for_claim, claim_id, limit=limit)}
+
+
+@router.get("/{audit_id}")
+async def get_audit(audit_id: str):
+    """Re-fetch a logged audit with its retrieved chunk IDs and node timings."""
+    record = await run_in_threadpool(_audit_log().get, audit_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Audit not found")
+    return record
@@ -4,24 +4,59 @@ Claims router — CRUD operations for claims.
 
 import sys
 from pathlib import Path
-from uuid import uuid4
+from uuid import UUID, uuid4
 from datetime import date
-from fastapi import APIRouter, HTTPException
+from typing import List, Optional
+from fastapi import APIRouter, BackgroundTasks, File, HTTPException, Query, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
 
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from shared.schemas import ClaimInput
+from backend.config import settings
 
 router = APIRouter(prefix="/claims", tags=["claims"])
 
-# In-memory store for Phase 0 (replaced by Supabase in Phase 1)
-_claims_store: dict[str, ClaimInput] = {}
+
+def _store():
+    # Imported lazily so the app starts without opening the database
+    from backend.db.singletons import get_claims_store
+    return get_claims_store()
 
 
 @router.get("/")
-async def list_claims():
-    """List all claims."""
-    return {"claims": list(_claims_store.values()), "total": len(_claims_store)}
+async def list_claims(
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    payer: Optional[str] = None,
+    provider_npi: Optional[str] = None,
+    service_date_from: Optional[date] = None,
+    service_date_to: Optional[date] = None,
+    include_total: bool = False,
+):
+    """
+    List claims one page at a time; pass `next_cursor` back as `cursor` for the next page.
+    `total` counts every matching claim, so it is only computed for the first
+    page (or with include_total) and is null on later pages.
+    """
+    from backend.db.claims_store import ClaimFilter
+
+    filters = ClaimFilter(
+        payer=payer,
+        provider_npi=provider_npi,
+        service_date_from=service_date_from,
+        service_date_to=service_date_to,
+    )
+    store = _store()
+    try:
+        claims, next_cursor = await run_in_threadpool(
+            store.list, limit=limit or settings.CLAIMS_PAGE_SIZE, cursor=cursor, filters=filters
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    total = await run_in_threadpool(store.count, filters) if cursor is None or include_total else None
+    return {"claims": claims, "total": total, "next_cursor": next_cursor}
 
 
 @router.post("/", response_model=ClaimInput)
@@ -29,22 +64,126 @@ async def create_claim(claim: ClaimInput):
     """Create a new claim."""
     if not claim.claim_id:
         claim.claim_id = str(uuid4())
-    _claims_store[claim.claim_id] = claim
-    return claim
+    return await run_in_threadpool(_store().upsert, claim)
+
+
+@router.post("/bulk")
+async def bulk_create_claims(claims: List[ClaimInput]):
+    """Create many claims in batched transactions."""
+    for claim in claims:
+        if not claim.claim_id:
+            claim.claim_id = str(uuid4())
+    return {"created": await run_in_threadpool(_store().bulk_insert, claims)}
+
+
+@router.post("/import")
+async def import_claims(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, description="csv, ndjson or x12 (default: from the file name)"),
+    queue_audit: bool = False,
+):
+    """
+    Stream-import a CSV, NDJSON or X12 837 file. Rows are validated in batches;
+    rejected rows go to an error report that can be fetched by import ID.
+    With queue_audit, accepted claims are audited in the background, through
+    the work queue when WORK_QUEUE_BACKEND is set.
+    """
+    from backend.services.claim_import import (
+        FORMATS, AuditSpool, audit_imported_claims, audit_spool_path, detect_format, error_report_path,
+        import_claims as run_import, text_stream,
+    )
+
+    try:
+        fmt = format or detect_format(file.filename or "")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown import format '{fmt}'")
+
+    import_id = str(uuid4())
+    report_path = error_report_path(import_id)
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    queued = 0
+    on_batch = None
+    spool = None
+    if queue_audit and settings.WORK_QUEUE_BACKEND != "none":
+        # Durable: the worker pool audits them, even if this instance goes away
+        from backend.db.singletons import get_work_queue
+        work_queue = get_work_queue()
+
+        def on_batch(batch):
+            nonlocal queued
+            queued += len(work_queue.enqueue(batch))
+    elif queue_audit:
+        # No work queue: IDs wait on disk for the background audit, not in memory
+        spool = AuditSpool(audit_spool_path(import_id))
+
+        def on_batch(batch):
+            nonlocal queued
+            spool.add(batch)
+            queued += len(batch)
+
+    def _run():
+        try:
+            with open(report_path, "w", encoding="utf-8") as report:
+                return run_import(
+                    text_stream(file.file), fmt, _store(),
+                    error_report=report,
+                    batch_size=settings.IMPORT_BATCH_SIZE,
+                    on_batch=on_batch,
+                )
+        finally:
+            if spool is not None:
+                spool.close()
+
+    try:
+        result = await run_in_threadpool(_run)
+    except ValueError as e:
+        report_path.unlink(missing_ok=True)
+        if spool is not None:
+            spool.path.unlink(missing_ok=True)
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if result.rejected:
+        result.error_report = f"/api/claims/import/{import_id}/errors"
+    else:
+        report_path.unlink(missing_ok=True)
+    result.queued_for_audit = queued
+    if spool is not None:
+        if queued:
+            background_tasks.add_task(audit_imported_claims, spool.path, settings.IMPORT_AUDIT_BATCH_SIZE)
+        else:
+            spool.path.unlink(missing_ok=True)
+    return {"import_id": import_id, **result.model_dump()}
+
+
+@router.get("/import/{import_id}/errors")
+async def import_errors(import_id: str):
+    """Download the NDJSON report of rows rejected by an import."""
+    from backend.services.claim_import import error_report_path
+
+    try:
+        path = error_report_path(str(UUID(import_id)))
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Error report not found")
+    if not path.exists():
+        raise HTTPException(status_code=404, detail="Error report not found")
+    return FileResponse(path, media_type="application/x-ndjson", filename=path.name)
 
 
 @router.get("/{claim_id}")
 async def get_claim(claim_id: str):
     """Get a specific claim."""
-    if claim_id not in _claims_store:
+    claim = await run_in_threadpool(_store().get, claim_id)
+    if claim is None:
         raise HTTPException(status_code=404, detail="Claim not found")
-    return _claims_store[claim_id]
+    return claim
 
 
 @router.delete("/{claim_id}")
 async def delete_claim(claim_id: str):
     """Delete a claim."""
-    if claim_id not in _claims_store:
+    if not await run_in_threadpool(_store().delete, claim_id):
         raise HTTPException(status_code=404, detail="Claim not found")
-    del _claims_store[claim_id]
     return {"deleted": True, "claim_id": claim_id}
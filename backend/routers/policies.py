@@ -3,31 +3,56 @@ Policy router — upload and manage policy documents.
 Handles document ingestion into the RAG pipeline.
 """
 
+import hashlib
+import json
 import sys
-import shutil
-import tempfile
 from pathlib import Path
+from typing import Optional
 from uuid import uuid4
 from datetime import date, datetime
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+from fastapi.concurrency import run_in_threadpool
 
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from shared.schemas import PolicyMetadata
-from backend.rag.singletons import get_vector_store, get_ingestion_pipeline
-from backend.rag.pdf_utils import convert_pdf_to_markdown
+from backend.db.blob_store import BlobInfo
 
 router = APIRouter(prefix="/policies", tags=["policies"])
 
 # Default Medicare NCD 240.4 Policy ID
 DEFAULT_POLICY_ID = "medicare-ncd-240-4-cpap"
+# CPAP device (HCPCS) and obstructive sleep apnea (ICD-10) codes covered by NCD 240.4
+DEFAULT_POLICY_PAYER = "Medicare"
+DEFAULT_POLICY_CODES = ["E0601"]
+DEFAULT_POLICY_DIAGNOSIS_CODES = ["G47.33"]
+
+DEFAULT_POLICY_TEXT = """
+National Coverage Determination (NCD)
+Continuous Positive Airway Pressure (CPAP) Therapy For Obstructive Sleep Apnea (OSA) (240.4)
+
+Publication Number: 100-3
+Manual Section Title: Continuous Positive Airway Pressure (CPAP) Therapy For Obstructive Sleep Apnea (OSA)
+Effective Date: 03/13/2008
+
+Item/Service Description
+Continuous Positive Airway Pressure (CPAP) is a non-invasive technique for providing single levels of air pressure from a flow generator. The apnea hypopnea index (AHI) is equal to the average number of episodes of apnea and hypopnea per hour.
+
+Indications and Limitations of Coverage
+1. The use of CPAP is covered under Medicare when used in adult patients with OSA. Coverage of CPAP is initially limited to a 12-week period.
+2. The provider of CPAP must conduct education of the beneficiary prior to use.
+3. A positive diagnosis of OSA for the coverage of CPAP must include a clinical evaluation and a positive: attended PSG, or unattended HST (Type II, III, or IV).
+4. An initial 12-week period of CPAP is covered in adult patients with OSA if:
+   a. AHI or RDI >= 15 events per hour, or
+   b. AHI or RDI >= 5 and <= 14 events per hour with documented symptoms (excessive daytime sleepiness, impaired cognition, mood disorders, insomnia, hypertension, ischemic heart disease, or history of stroke).
+"""
 
 # In-memory store for Phase 0 (replaced by Supabase in Phase 2)
 _policies_store: dict[str, PolicyMetadata] = {
     DEFAULT_POLICY_ID: PolicyMetadata(
         policy_id=DEFAULT_POLICY_ID,
         name="Medicare NCD 240.4 - CPAP for OSA",
-        payer="Medicare",
+        payer=DEFAULT_POLICY_PAYER,
         effective_date=date(2008, 3, 13),
         file_url="/mock-storage/medicare-ncd-240-4-cpap/medicare_ncd.pdf",
         status="active",
@@ -52,55 +77,170 @@ async def upload_policy(
     """
     Upload a new policy document (PDF).
     Triggers:
-    1. Save temporarily.
-    2. Convert PDF -> Markdown (Structure Preserving).
-    3. Ingest into Vector Store (Chunking + Embedding).
+    1. Stream to the content-addressed blob store (SHA-256).
+    2. If the same bytes are already ingested as a policy for this payer, return it as is.
+    3. Convert PDF -> Markdown (Structure Preserving), once per distinct file.
+    4. Ingest into Vector Store (Chunking + Embedding).
+    A failed (or empty) ingest is kept with status "failed" and no content hash,
+    so uploading the file again, or replacing it, retries the ingest.
     """
     if not file.filename or not file.filename.endswith(".pdf"):
         raise HTTPException(status_code=400, detail="Only PDF files are accepted")
 
+    blob = await run_in_threadpool(_store_upload, file)
+    duplicate = await run_in_threadpool(_find_policy_by_content, blob.sha256, payer)
+    if duplicate is not None:
+        return {
+            "policy": duplicate,
+            "message": "Identical file already ingested for this payer; nothing re-processed.",
+            "chunks_created": 0,
+            "duplicate_of": duplicate.policy_id
+        }
+
     policy_id = str(uuid4())
-    
-    # Save to temp file for processing
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
-        shutil.copyfileobj(file.file, tmp_file)
-        tmp_path = tmp_file.name
 
-    chunks_count = 0
+    chunks_count, error = 0, "no text could be extracted"
     try:
-        # Get the shared ingestion pipeline instance
-        ingestion_pipeline = get_ingestion_pipeline()
-        
-        # Simple conversion heuristic
-        # In production, use layout-aware parser (e.g. LayoutParser, Unstructured) as per architecture diagram
-        markdown_text = convert_pdf_to_markdown(tmp_path)
-        
-        # Run ingestion
-        chunks_count = ingestion_pipeline.process_policy_markdown(
-            markdown_text=markdown_text,
-            policy_id=policy_id,
-            policy_name=name
-        )
+        chunks_count = await run_in_threadpool(_ingest_blob, blob.sha256, policy_id, name, payer)
         print(f"Ingested {chunks_count} chunks for policy {policy_id}")
     except Exception as e:
+        error = str(e)
         print(f"Ingestion failed: {e}")
-        # Non-blocking for demo, but we log it
-        pass
+    ingested = chunks_count > 0
 
     policy = PolicyMetadata(
         policy_id=policy_id,
         name=name,
         payer=payer,
         effective_date=date.fromisoformat(effective_date),
-        file_url=f"/mock-storage/{policy_id}/{file.filename}",
-        status="active",
+        file_url=blob.url,
+        # Only an ingested file counts as this policy's content (and for deduplication)
+        content_sha256=blob.sha256 if ingested else None,
+        status="active" if ingested else "failed",
         created_at=datetime.utcnow()
     )
     _policies_store[policy_id] = policy
+    if ingested:
+        await run_in_threadpool(_record_ingest, blob.sha256, policy)
 
     return {
         "policy": policy,
-        "message": f"Policy uploaded and ingested ({chunks_count} chunks relevant for RAG).",
+        "message": (
+            f"Policy uploaded and ingested ({chunks_count} chunks relevant for RAG)." if ingested
+            else f"Policy uploaded but ingestion failed ({error}); upload or replace the file to retry."
+        ),
+        "chunks_created": chunks_count
+    }
+
+
+def _store_upload(file: UploadFile) -> BlobInfo:
+    """Stream an upload into the blob store without reading it into memory."""
+    from backend.db.singletons import get_blob_store
+    return get_blob_store().put_stream(file.file, suffix=".pdf")
+
+
+def _ingest_record_name(payer: str) -> str:
+    """Name of the blob-store artifact recording which policy a file was ingested as for a payer."""
+    return "policy-" + hashlib.sha256(payer.encode("utf-8")).hexdigest()[:16]
+
+
+def _record_ingest(sha256: str, policy: PolicyMetadata):
+    """After a successful ingest, record the policy and the version it serves next to the file."""
+    from backend.db.singletons import get_blob_store
+    from backend.rag.singletons import get_vector_store
+
+    record = {
+        "policy": policy.model_dump(mode="json"),
+        "version_tags": sorted(get_vector_store().version_tags(policy.policy_id)),
+    }
+    get_blob_store().put_derived(sha256, _ingest_record_name(policy.payer), json.dumps(record))
+
+
+def _find_policy_by_content(sha256: str, payer: str) -> Optional[PolicyMetadata]:
+    """
+    The policy these bytes were ingested as for this payer, if the vector store
+    still serves that version. Both lookups are persistent and shared, so every
+    instance agrees, and a deleted or since-replaced policy does not count.
+    """
+    from backend.db.singletons import get_blob_store
+    from backend.rag.singletons import get_vector_store
+
+    raw = get_blob_store().get_derived(sha256, _ingest_record_name(payer))
+    if raw is None:
+        return None
+    record = json.loads(raw)
+    policy = PolicyMetadata.model_validate(record["policy"])
+    if not set(record["version_tags"]) & get_vector_store().version_tags(policy.policy_id):
+        return None
+    # This instance's copy may have newer dates
+    return _policies_store.get(policy.policy_id, policy)
+
+
+def _ingest_blob(sha256: str, policy_id: str, name: str, payer: str) -> int:
+    """Ingest a stored policy PDF under policy_id, reusing its extracted markdown if it was parsed before."""
+    from backend.db.singletons import get_blob_store
+    from backend.rag.singletons import get_ingestion_pipeline
+    from backend.rag.pdf_utils import convert_pdf_to_markdown
+
+    blobs = get_blob_store()
+    markdown_text = blobs.get_derived(sha256, "markdown")
+    if markdown_text is None:
+        # Simple conversion heuristic
+        # In production, use layout-aware parser (e.g. LayoutParser, Unstructured) as per architecture diagram
+        with blobs.local_path(sha256) as path:
+            markdown_text = convert_pdf_to_markdown(path)
+        blobs.put_derived(sha256, "markdown", markdown_text)
+
+    # Run ingestion (replaces any previous version of the policy atomically)
+    return get_ingestion_pipeline().process_policy_markdown(
+        markdown_text=markdown_text,
+        policy_id=policy_id,
+        policy_name=name,
+        payer=payer
+    )
+
+
+@router.post("/{policy_id}/replace")
+async def replace_policy(
+    policy_id: str,
+    effective_date: str = Form(None),
+    file: UploadFile = File(...)
+):
+    """
+    Replace a policy's document with a new version.
+    The new version is staged as inactive points and then activated, so
+    retrieval never sees zero chunks of the policy (see rag/versioning.py).
+    Uploading the file the policy already serves changes nothing but the dates;
+    a policy whose last ingest failed is ingested again.
+    """
+    if policy_id not in _policies_store:
+        raise HTTPException(status_code=404, detail="Policy not found")
+    if not file.filename or not file.filename.endswith(".pdf"):
+        raise HTTPException(status_code=400, detail="Only PDF files are accepted")
+
+    policy = _policies_store[policy_id]
+    blob = await run_in_threadpool(_store_upload, file)
+    chunks_count = 0
+    current = await run_in_threadpool(_find_policy_by_content, blob.sha256, policy.payer)
+    if current is None or current.policy_id != policy_id:
+        try:
+            chunks_count = await run_in_threadpool(_ingest_blob, blob.sha256, policy_id, policy.name, policy.payer)
+        except Exception as e:
+            # The previous version is still the one being served
+            raise HTTPException(status_code=500, detail=f"Replacement failed, previous version kept: {e}")
+        if not chunks_count:
+            raise HTTPException(status_code=422, detail="No text could be extracted, previous version kept")
+
+    updates = {"file_url": blob.url, "content_sha256": blob.sha256, "status": "active"}
+    if effective_date:
+        updates["effective_date"] = date.fromisoformat(effective_date)
+    _policies_store[policy_id] = policy.model_copy(update=updates)
+    if chunks_count:
+        await run_in_threadpool(_record_ingest, blob.sha256, _policies_store[policy_id])
+
+    return {
+        "policy": _policies_store[policy_id],
+        "message": f"Policy replaced ({chunks_count} chunks)." if chunks_count else "Policy file unchanged; nothing re-processed.",
         "chunks_created": chunks_count
     }
 
@@ -113,48 +253,66 @@ async def get_policy(policy_id: str):
     return _policies_store[policy_id]
 
 
+@router.get("/{policy_id}/rules")
+async def get_policy_rules(policy_id: str):
+    """Get the compiled rule table versions for a policy (latest last)."""
+    from backend.rag.singletons import get_rule_index
+
+    versions = get_rule_index().versions(policy_id)
+    if not versions:
+        raise HTTPException(status_code=404, detail="No compiled rules for this policy")
+    return {"policy_id": policy_id, "latest": versions[-1], "versions": [v.version for v in versions]}
+
+
 @router.delete("/{policy_id}")
 async def delete_policy(policy_id: str):
     """Delete a specific policy."""
     if policy_id not in _policies_store:
         raise HTTPException(status_code=404, detail="Policy not found")
     
-    # In Phase 0, we only delete from memory. 
-    # In a real system, we'd also delete from the vector store and storage.
+    from backend.db.cache import policies_changed
+    from backend.rag.singletons import get_rule_index, get_vector_store
+
+    def _delete() -> int:
+        # Remove the chunks so they stop turning up in retrieval, and the compiled
+        # rules so the rule engine stops deciding claims against this policy
+        deleted = get_vector_store().delete_policy(policy_id)
+        get_rule_index().remove(policy_id)
+        policies_changed()
+        return deleted
+
+    chunks_deleted = await run_in_threadpool(_delete)
     del _policies_store[policy_id]
-    return {"message": "Policy deleted successfully", "policy_id": policy_id}
+    return {"message": "Policy deleted successfully", "policy_id": policy_id, "chunks_deleted": chunks_deleted}
 
 
 def seed_default_policy():
     """Helper to ensure the default policy exists in the vector store."""
     from backend.rag.singletons import get_ingestion_pipeline
     
-    # Check if we should seed (we can just run it, it's fairly fast)
-    ncd_text = """
-National Coverage Determination (NCD)
-Continuous Positive Airway Pressure (CPAP) Therapy For Obstructive Sleep Apnea (OSA) (240.4)
-
-Publication Number: 100-3
-Manual Section Title: Continuous Positive Airway Pressure (CPAP) Therapy For Obstructive Sleep Apnea (OSA)
-Effective Date: 03/13/2008
-
-Item/Service Description
-Continuous Positive Airway Pressure (CPAP) is a non-invasive technique for providing single levels of air pressure from a flow generator. The apnea hypopnea index (AHI) is equal to the average number of episodes of apnea and hypopnea per hour.
-
-Indications and Limitations of Coverage
-1. The use of CPAP is covered under Medicare when used in adult patients with OSA. Coverage of CPAP is initially limited to a 12-week period.
-2. The provider of CPAP must conduct education of the beneficiary prior to use.
-3. A positive diagnosis of OSA for the coverage of CPAP must include a clinical evaluation and a positive: attended PSG, or unattended HST (Type II, III, or IV).
-4. An initial 12-week period of CPAP is covered in adult patients with OSA if:
-   a. AHI or RDI >= 15 events per hour, or
-   b. AHI or RDI >= 5 and <= 14 events per hour with documented symptoms (excessive daytime sleepiness, impaired cognition, mood disorders, insomnia, hypertension, ischemic heart disease, or history of stroke).
-"""
     try:
         pipeline = get_ingestion_pipeline()
+
+        # A persistent store or snapshot may already hold this version: skip re-embedding,
+        # but still compile its rule table (cheap, no model call)
+        chunk_docs = pipeline.split_policy_markdown(
+            DEFAULT_POLICY_TEXT, DEFAULT_POLICY_ID, "Medicare NCD 240.4 - CPAP for OSA", DEFAULT_POLICY_PAYER
+        )
+        if chunk_docs[0]["metadata"]["version_tag"] in pipeline.vector_store.version_tags(DEFAULT_POLICY_ID):
+            pipeline.compile_rules(
+                chunk_docs, DEFAULT_POLICY_ID, "Medicare NCD 240.4 - CPAP for OSA",
+                DEFAULT_POLICY_CODES, DEFAULT_POLICY_DIAGNOSIS_CODES
+            )
+            print(f"✓ Default policy {DEFAULT_POLICY_ID} already in Vector Store, skipped re-embedding.")
+            return
+
         pipeline.process_policy_markdown(
-            markdown_text=ncd_text,
+            markdown_text=DEFAULT_POLICY_TEXT,
             policy_id=DEFAULT_POLICY_ID,
-            policy_name="Medicare NCD 240.4 - CPAP for OSA"
+            policy_name="Medicare NCD 240.4 - CPAP for OSA",
+            covered_codes=DEFAULT_POLICY_CODES,
+            diagnosis_codes=DEFAULT_POLICY_DIAGNOSIS_CODES,
+            payer=DEFAULT_POLICY_PAYER
         )
         print(f"✓ Default policy {DEFAULT_POLICY_ID} auto-seeded in Vector Store.")
     except Exception as e:
@@ -0,0 +1,401 @@
+"""
+Bulk claim import.
+Streams CSV, NDJSON and X12 837 (professional or institutional) files in
+constant memory: rows are parsed lazily, validated in batches with one
+TypeAdapter call per batch, and accepted claims are bulk-written to the
+claims store. Rejected rows are written to an NDJSON error report.
+
+    python -m backend.services.claim_import claims.csv --errors rejected.ndjson
+"""
+import csv
+import gzip
+import io
+import json
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, IO, Iterable, Iterator, List, Optional, Tuple
+
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from shared.schemas import ClaimInput
+from backend import metrics
+
+FORMATS = ("csv", "ndjson", "x12")
+EXTENSIONS = {
+    ".csv": "csv",
+    ".ndjson": "ndjson",
+    ".jsonl": "ndjson",
+    ".837": "x12",
+    ".x12": "x12",
+    ".edi": "x12",
+}
+
+_CLAIMS = TypeAdapter(List[ClaimInput])
+_CODE_SPLIT = re.compile(r"[;|,\s]+")
+
+# A parsed row: (line or segment number, fields for ClaimInput)
+Row = Tuple[int, Dict[str, Any]]
+
+
+class ImportResult(BaseModel):
+    """Summary of one import run."""
+    format: str
+    rows: int = 0
+    accepted: int = 0
+    rejected: int = 0
+    queued_for_audit: int = 0
+    elapsed_s: float = 0.0
+    claims_per_hour: float = 0.0
+    error_report: Optional[str] = None
+    errors_sample: List[Dict[str, Any]] = Field(default_factory=list)
+
+
+def detect_format(filename: str) -> str:
+    """Import format from a file name, ignoring a trailing .gz."""
+    name = filename.lower()
+    if name.endswith(".gz"):
+        name = name[:-3]
+    fmt = EXTENSIONS.get(Path(name).suffix)
+    if fmt is None:
+        raise ValueError(f"Cannot detect format of '{filename}'. Use one of: {', '.join(FORMATS)}")
+    return fmt
+
+
+def _codes(value: Any) -> List[str]:
+    if isinstance(value, list):
+        return [str(v).strip() for v in value if str(v).strip()]
+    return [c for c in _CODE_SPLIT.split(str(value or "").strip()) if c]
+
+
+# --- Readers ---
+
+def read_csv(stream: IO[str]) -> Iterator[Row]:
+    """CSV with a header row named after ClaimInput fields. Code lists are ';', '|' or space separated."""
+    reader = csv.DictReader(stream)
+    for row in reader:
+        fields = {k.strip(): v.strip() for k, v in row.items() if k and v is not None and v.strip()}
+        for key in ("cpt_codes", "icd_codes"):
+            if key in fields:
+                fields[key] = _codes(fields[key])
+        yield reader.line_num, fields
+
+
+def read_ndjson(stream: IO[str]) -> Iterator[Row]:
+    """One JSON object per line; blank lines are skipped."""
+    for line_num, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            fields = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_num, {"__error__": f"Invalid JSON: {e.msg}", "__raw__": line[:500]}
+            continue
+        if not isinstance(fields, dict):
+            yield line_num, {"__error__": "Expected a JSON object", "__raw__": line[:500]}
+            continue
+        for key in ("cpt_codes", "icd_codes"):
+            if isinstance(fields.get(key), str):
+                fields[key] = _codes(fields[key])
+        yield line_num, fields
+
+
+def _x12_segments(stream: IO[str], chunk_size: int = 1 << 16) -> Tuple[str, Iterator[List[str]]]:
+    """
+    Split an X12 interchange into segments, each a list of elements. The
+    delimiters are taken from the fixed-width ISA header; returns the
+    component separator and the segment iterator.
+    """
+    buffer = stream.read(chunk_size)
+    start = buffer.find("ISA")
+    if start < 0 or len(buffer) < start + 106:
+        raise ValueError("Not an X12 interchange: missing ISA header")
+    buffer = buffer[start:]
+    element_sep, component_sep, terminator = buffer[3], buffer[104], buffer[105]
+
+    def segments(buffer: str) -> Iterator[List[str]]:
+        while True:
+            *complete, buffer = buffer.split(terminator)
+            for segment in complete:
+                segment = segment.strip()
+                if segment:
+                    yield segment.split(element_sep)
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+            buffer += chunk
+        if buffer.strip():
+            yield buffer.strip().split(element_sep)
+
+    return component_sep, segments(buffer)
+
+
+def _x12_date(value: str) -> str:
+    # D8 "CCYYMMDD" or RD8 "CCYYMMDD-CCYYMMDD" (service start date)
+    value = value.split("-")[0]
+    return f"{value[:4]}-{value[4:6]}-{value[6:8]}" if len(value) == 8 else value
+
+
+def read_x12_837(stream: IO[str]) -> Iterator[Row]:
+    """
+    One row per CLM loop of an 837P/837I file. Billing provider (NM1*85),
+    payer (NM1*PR) and subscriber/patient (NM1*IL/QC) carry over from the
+    enclosing hierarchical levels; procedures come from SV1/SV2 service lines.
+    """
+    billing_npi = payer = subscriber = patient = None
+    claim: Optional[Dict[str, Any]] = None
+    claim_segment = 0
+    component_sep, segments = _x12_segments(stream)
+
+    for seg_num, elements in enumerate(segments, 1):
+        tag = elements[0]
+        get = lambda i: elements[i] if len(elements) > i else ""
+
+        if tag in ("HL", "SE", "CLM"):
+            if claim is not None:
+                yield claim_segment, claim
+            claim = None
+            if tag == "HL":
+                level = get(3)
+                if level == "20":
+                    billing_npi = payer = subscriber = patient = None
+                elif level == "22":
+                    payer = subscriber = patient = None
+                elif level == "23":
+                    patient = None
+            elif tag == "CLM":
+                claim_segment = seg_num
+                claim = {
+                    "claim_id": get(1),
+                    "billed_amount": get(2),
+                    "payer": payer,
+                    "patient_id": patient or subscriber,
+                    "provider_npi": billing_npi,
+                    "cpt_codes": [],
+                    "icd_codes": [],
+                }
+        elif claim is None:
+            # Names inside a claim loop belong to 2310/2330 (rendering provider, other payers)
+            if tag == "NM1":
+                entity, id_value = get(1), get(9)
+                if entity == "85":
+                    billing_npi = id_value
+                elif entity == "PR":
+                    payer = get(3)
+                elif entity == "IL":
+                    subscriber = id_value
+                elif entity == "QC":
+                    patient = id_value or patient
+        elif tag == "HI":
+            # HI*ABK:E119*ABF:I10 -> ICD codes
+            for composite in elements[1:]:
+                parts = composite.split(component_sep)
+                if len(parts) > 1 and parts[0] in ("ABK", "ABF", "BK", "BF"):
+                    claim["icd_codes"].append(parts[1])
+        elif tag in ("SV1", "SV2"):
+            composite = get(1) if tag == "SV1" else get(2)
+            parts = composite.split(component_sep)
+            if len(parts) > 1 and parts[1] and parts[1] not in claim["cpt_codes"]:
+                claim["cpt_codes"].append(parts[1])
+        elif tag == "DTP" and get(1) in ("472", "434") and "service_date" not in claim:
+            claim["service_date"] = _x12_date(get(3))
+        elif tag == "NTE":
+            claim["notes"] = get(2)
+
+    if claim is not None:
+        yield claim_segment, claim
+
+
+READERS: Dict[str, Callable[[IO[str]], Iterator[Row]]] = {
+    "csv": read_csv,
+    "ndjson": read_ndjson,
+    "x12": read_x12_837,
+}
+
+
+# --- Validation ---
+
+def _errors(e: ValidationError) -> Dict[int, List[str]]:
+    """Error messages keyed by the batch index they belong to."""
+    by_index: Dict[int, List[str]] = {}
+    for err in e.errors(include_url=False):
+        index, *field = err["loc"]
+        by_index.setdefault(index, []).append(f"{'.'.join(map(str, field)) or 'row'}: {err['msg']}")
+    return by_index
+
+
+def validate_batch(rows: List[Row]) -> Tuple[List[ClaimInput], List[Dict[str, Any]]]:
+    """
+    Validate a batch with one TypeAdapter call. When some rows fail, the
+    failing ones are reported and the rest are validated again in one call.
+    """
+    rejected: List[Dict[str, Any]] = []
+    candidates: List[Row] = []
+    for line, fields in rows:
+        if "__error__" in fields:
+            rejected.append({"line": line, "errors": [fields["__error__"]], "row": fields.get("__raw__")})
+        else:
+            candidates.append((line, fields))
+
+    try:
+        return _CLAIMS.validate_python([f for _, f in candidates]), rejected
+    except ValidationError as e:
+        failed = _errors(e)
+
+    rejected += [
+        {"line": line, "errors": failed[i], "row": fields}
+        for i, (line, fields) in enumerate(candidates) if i in failed
+    ]
+    accepted = _CLAIMS.validate_python([f for i, (_, f) in enumerate(candidates) if i not in failed])
+    rejected.sort(key=lambda r: r["line"])
+    return accepted, rejected
+
+
+def _batches(rows: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    batch: List[Any] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def import_claims(
+    stream: IO[str],
+    fmt: str,
+    store,
+    error_report: Optional[IO[str]] = None,
+    batch_size: int = 5000,
+    on_batch: Optional[Callable[[List[ClaimInput]], None]] = None,
+    sample_errors: int = 20,
+) -> ImportResult:
+    """
+    Import claims from a text stream into `store`. Rejected rows go to
+    `error_report` as NDJSON; `on_batch` receives every accepted batch after
+    it is written (e.g. to queue the claims for audit).
+    """
+    if fmt not in READERS:
+        raise ValueError(f"Unknown import format '{fmt}'. Available: {', '.join(FORMATS)}")
+
+    result = ImportResult(format=fmt)
+    start = time.perf_counter()
+    for batch in _batches(READERS[fmt](stream), batch_size):
+        accepted, rejected = validate_batch(batch)
+        if accepted:
+            store.bulk_insert(accepted, batch_size=batch_size)
+            if on_batch is not None:
+                on_batch(accepted)
+        for row in rejected:
+            if error_report is not None:
+                error_report.write(json.dumps(row, default=str) + "\n")
+            if len(result.errors_sample) < sample_errors:
+                result.errors_sample.append(row)
+        result.rows += len(batch)
+        result.accepted += len(accepted)
+        result.rejected += len(rejected)
+        metrics.IMPORTED_CLAIMS.labels(format=fmt, result="accepted").inc(len(accepted))
+        metrics.IMPORTED_CLAIMS.labels(format=fmt, result="rejected").inc(len(rejected))
+
+    result.elapsed_s = round(time.perf_counter() - start, 3)
+    result.claims_per_hour = round(result.rows / result.elapsed_s * 3600) if result.elapsed_s else 0.0
+    return result
+
+
+def open_text(path: str) -> IO[str]:
+    """Open a (possibly gzipped) import file as text."""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return open(path, "r", encoding="utf-8", newline="")
+
+
+def text_stream(binary: IO[bytes]) -> IO[str]:
+    """Wrap an uploaded binary file for line-by-line text reading."""
+    return io.TextIOWrapper(binary, encoding="utf-8-sig", newline="")
+
+
+def error_report_path(import_id: str) -> Path:
+    from backend.config import settings
+    return Path(settings.IMPORT_ERROR_DIR) / f"{import_id}.errors.ndjson"
+
+
+def audit_spool_path(import_id: str) -> Path:
+    """Where an import without a work queue spools accepted claim IDs for its follow-up audit."""
+    from backend.config import settings
+    return Path(settings.IMPORT_ERROR_DIR) / f"{import_id}.audit.ids"
+
+
+class AuditSpool:
+    """Accepted claim IDs written one per line to a file, so queueing a large import for audit stays in constant memory."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._file = open(path, "w", encoding="utf-8")
+
+    def add(self, claims: List[ClaimInput]):
+        self._file.writelines(f"{c.claim_id}\n" for c in claims)
+
+    def close(self):
+        self._file.close()
+
+
+async def audit_imported_claims(spool_path: Path, batch_size: int):
+    """
+    Audit the claims an import spooled to `spool_path`, reading the IDs and
+    loading the claims back from the claims store one batch at a time.
+    The spool file is removed afterwards.
+    """
+    import asyncio
+    from backend.db.singletons import get_claims_store
+    from backend.services.pipeline import run_batch_audit_pipeline
+
+    store = get_claims_store()
+
+    def _load(claim_ids: List[str]) -> List[ClaimInput]:
+        return [c for c in (store.get(cid) for cid in claim_ids) if c is not None]
+
+    try:
+        with open(spool_path, encoding="utf-8") as spool:
+            ids = (line.strip() for line in spool if line.strip())
+            for i, claim_ids in enumerate(_batches(ids, batch_size)):
+                claims = await asyncio.to_thread(_load, claim_ids)
+                if not claims:
+                    continue
+                try:
+                    await run_batch_audit_pipeline(claims)
+                except Exception as e:
+                    start = i * batch_size
+                    print(f"Warning: Audit of imported claims {start}-{start + len(claim_ids)} failed: {e}")
+    finally:
+        Path(spool_path).unlink(missing_ok=True)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Bulk import claims from CSV, NDJSON or X12 837 files.")
+    parser.add_argument("path", help="Input file (.csv, .ndjson/.jsonl, .837/.x12/.edi, optionally .gz)")
+    parser.add_argument("--format", choices=FORMATS, help="Override format detection")
+    parser.add_argument("--errors", help="Write rejected rows here (default: <input>.errors.ndjson)")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    from backend.db.singletons import get_claims_store
+
+    fmt = args.format or detect_format(args.path)
+    errors_path = args.errors or f"{args.path}.errors.ndjson"
+    with open_text(args.path) as stream, open(errors_path, "w", encoding="utf-8") as errors:
+        result = import_claims(stream, fmt, get_claims_store(), error_report=errors, batch_size=args.batch_size)
+    result.error_report = errors_path if result.rejected else None
+    result.errors_sample = result.errors_sample[:5]
+    print(result.model_dump_json(indent=2))
+    print(f"✓ Imported {result.accepted}/{result.rows} claims ({result.rejected} rejected) in {result.elapsed_s}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -23,7 +23,7 @@ class ServiceConfig:
             "supabase": {"enabled": False, "available": settings.has_supabase},
             "qdrant": {"enabled": False, "available": settings.has_qdrant},
             "groq": {"enabled": settings.has_groq, "available": settings.has_groq},
-            "redis": {"enabled": False, "available": settings.has_redis},
+            "redis": {"enabled": settings.CACHE_BACKEND == "redis", "available": settings.has_redis},
         }
     
     def get_status(self, service_name: str) -> ServiceStatus:
@@ -7,6 +7,7 @@ Falls back to mock data with clear messaging if external services fail.
 import sys
 from pathlib import Path
 from datetime import datetime
+from typing import Optional
 from uuid import uuid4
 
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
@@ -16,10 +17,9 @@ from shared.schemas import (
     Citation, RuleApplied
 )
 from backend.config import settings
-from backend.rag.pipeline import run_rag_pipeline
 
 
-async def run_audit_pipeline(claim: ClaimInput) -> AuditOutput:
+async def run_audit_pipeline(claim: ClaimInput, timeout: Optional[float] = None) -> AuditOutput:
     """
     Execute the audit pipeline on a claim using the real RAG implementation.
     
@@ -29,7 +29,9 @@ async def run_audit_pipeline(claim: ClaimInput) -> AuditOutput:
     3. Returns structured audit decision with citations
     
     If external services fail (e.g., Groq rate limit), returns mock data
-    with clear messaging to inform the user.
+    with clear messaging to inform the user. Past the deadline (`timeout`,
+    default AUDIT_TIMEOUT_SECONDS) the latest draft or a partial PEND_INFO
+    result is returned.
     
     Raises:
         ValueError: If GROQ_API_KEY is not set or no policies are uploaded
@@ -39,9 +41,12 @@ async def run_audit_pipeline(claim: ClaimInput) -> AuditOutput:
             "No LLM provider configured. Please set GOOGLE_API_KEY or GROQ_API_KEY in your environment."
         )
     
+    # Heavy LLM/graph imports load on first use, not at app startup
+    from backend.rag.pipeline import run_rag_pipeline
+
     # Try to call the real RAG pipeline
     try:
-        result = await run_rag_pipeline(claim)
+        result = await run_rag_pipeline(claim, timeout)
         print(f"✓ RAG Pipeline executed successfully for claim {claim.claim_id}")
         return result
     except ValueError as e:
@@ -70,6 +75,27 @@ async def run_audit_pipeline(claim: ClaimInput) -> AuditOutput:
             raise Exception(f"RAG pipeline execution failed: {str(e)}")
 
 
+async def run_batch_audit_pipeline(claims: list[ClaimInput], timeout: Optional[float] = None) -> list[AuditOutput]:
+    """
+    Audit a batch of claims, grouping claims that share codes and payer
+    so each group's policy context is retrieved and sent to the LLM once.
+    Each group gets `timeout` seconds (default BATCH_AUDIT_TIMEOUT_SECONDS).
+
+    Raises:
+        ValueError: If no LLM provider is configured
+    """
+    if not settings.GOOGLE_API_KEY and not settings.GROQ_API_KEY:
+        raise ValueError(
+            "No LLM provider configured. Please set GOOGLE_API_KEY or GROQ_API_KEY in your environment."
+        )
+
+    from backend.rag.batch import run_batch_audit
+
+    results = await run_batch_audit(claims, timeout=timeout)
+    print(f"✓ Batch audit executed for {len(claims)} claims")
+    return results
+
+
 def _generate_mock_fallback(claim: ClaimInput, reason: str = "rate_limit") -> AuditOutput:
     """
     Generate mock audit output when external services are unavailable.
@@ -0,0 +1,99 @@
+"""
+Startup warm-up and readiness tracking.
+Seeds the default policy, loads the embedding model and compiles the audit
+graph. In fast-start mode this runs in the background while the app already
+serves /api/health; /api/ready only reports ready once every phase is done.
+"""
+import threading
+import time
+from typing import Dict, Optional
+
+
+class WarmupState:
+    """Progress of the startup warm-up phases."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.ready = False
+        self.error: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.phases: Dict[str, float] = {}
+
+    def record(self, phase: str, seconds: float):
+        with self._lock:
+            self.phases[phase] = round(seconds, 4)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "ready": self.ready,
+                "error": self.error,
+                "phases_s": dict(self.phases),
+            }
+
+
+_warmup_state = WarmupState()
+
+
+def get_warmup_state() -> WarmupState:
+    """Get the global warm-up state."""
+    return _warmup_state
+
+
+def _timed(state: WarmupState, phase: str, fn):
+    start = time.perf_counter()
+    result = fn()
+    state.record(phase, time.perf_counter() - start)
+    return result
+
+
+def _load_vector_store():
+    from backend.rag.singletons import get_vector_store
+    get_vector_store()
+
+
+def _load_snapshot():
+    from backend.rag.singletons import get_vector_store
+    from backend.rag.snapshot import load_snapshot_if_empty
+    load_snapshot_if_empty(get_vector_store())
+
+
+def _seed():
+    from backend.routers.policies import seed_default_policy
+    seed_default_policy()
+
+
+def _warm_encoder():
+    from backend.rag.singletons import get_vector_store
+    get_vector_store().encoder.embed_query("warm-up query")
+
+
+def _compile_graph():
+    from backend.rag.pipeline import get_audit_graph
+    get_audit_graph()
+
+
+def run_warmup(state: Optional[WarmupState] = None) -> WarmupState:
+    """Run every warm-up phase in order and mark the app ready."""
+    state = state or _warmup_state
+    state.started_at = time.perf_counter()
+    try:
+        _timed(state, "load_vector_store", _load_vector_store)
+        _timed(state, "load_snapshot", _load_snapshot)
+        _timed(state, "seed_default_policy", _seed)
+        _timed(state, "warm_encoder", _warm_encoder)
+        _timed(state, "compile_audit_graph", _compile_graph)
+        state.record("total", time.perf_counter() - state.started_at)
+        state.ready = True
+        print(f"✓ Warm-up complete in {state.phases['total']:.2f}s")
+    except Exception as e:
+        state.error = str(e)
+        print(f"✗ Warm-up failed: {e}")
+    return state
+
+
+def start_background_warmup(state: Optional[WarmupState] = None) -> threading.Thread:
+    """Run the warm-up on a daemon thread so the server can accept requests immediately."""
+    thread = threading.Thread(target=run_warmup, args=(state,), name="warmup", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,118 @@
+"""
+Audit worker.
+Pulls audit jobs from the work queue (WORK_QUEUE_BACKEND), runs the RAG
+pipeline on each and writes the result back under the job ID. Run any number
+of these next to, or instead of, the API instances:
+
+    WORK_QUEUE_BACKEND=redis python -m backend.services.worker --concurrency 4
+
+On SIGTERM/SIGINT the worker stops leasing and lets in-flight audits finish;
+jobs it cannot finish are redelivered to another worker once their lease
+(WORK_QUEUE_VISIBILITY_SECONDS) expires.
+"""
+
+import asyncio
+import os
+import signal
+import socket
+import sys
+from pathlib import Path
+from typing import Optional, Set
+from uuid import uuid4
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.config import settings
+from backend import metrics
+from backend.db.work_queue import Job, WorkQueue
+
+
+class AuditWorker:
+    """Leases up to `concurrency` jobs at a time and audits them concurrently."""
+
+    def __init__(self, queue: WorkQueue, concurrency: Optional[int] = None, poll_seconds: Optional[float] = None,
+                 timeout: Optional[float] = None):
+        self.queue = queue
+        self.concurrency = concurrency or settings.WORKER_CONCURRENCY
+        self.poll_seconds = settings.WORKER_POLL_SECONDS if poll_seconds is None else poll_seconds
+        self.timeout = timeout
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid4().hex[:6]}"
+        self._stop_requested = False
+        # Created inside run(): on Python 3.9 an Event binds to the loop current at construction
+        self._stopping: Optional[asyncio.Event] = None
+        self._running: Set[asyncio.Task] = set()
+
+    def stop(self):
+        self._stop_requested = True
+        if self._stopping is not None:
+            self._stopping.set()
+
+    async def run_job(self, job: Job):
+        from backend.rag.pipeline import run_rag_pipeline
+
+        try:
+            result = await run_rag_pipeline(job.claim, self.timeout)
+        except Exception as e:
+            print(f"✗ Audit job {job.job_id} (claim {job.claim.claim_id}, attempt {job.attempts}) failed: {e}")
+            await asyncio.to_thread(self.queue.fail, job, str(e))
+            metrics.WORK_QUEUE_JOBS.labels(outcome="failed").inc()
+            return
+        stored = await asyncio.to_thread(self.queue.complete, job, result)
+        metrics.WORK_QUEUE_JOBS.labels(outcome="completed" if stored else "duplicate").inc()
+
+    async def run(self, max_jobs: Optional[int] = None):
+        """Work until stopped (or, for tests and drains, until `max_jobs` have been started)."""
+        started = 0
+        self._stopping = asyncio.Event()
+        if self._stop_requested:
+            self._stopping.set()
+        print(f"✓ Audit worker {self.worker_id} polling {settings.WORK_QUEUE_BACKEND} queue "
+              f"(concurrency {self.concurrency})")
+        while not self._stopping.is_set() and (max_jobs is None or started < max_jobs):
+            free = self.concurrency - len(self._running)
+            if max_jobs is not None:
+                free = min(free, max_jobs - started)
+            jobs = await asyncio.to_thread(self.queue.lease, self.worker_id, free) if free > 0 else []
+            for job in jobs:
+                task = asyncio.create_task(self.run_job(job))
+                self._running.add(task)
+                task.add_done_callback(self._running.discard)
+            started += len(jobs)
+            if jobs and len(self._running) < self.concurrency:
+                continue
+            # Idle or full: wake on the poll interval, a finished job or a stop request
+            waiters = [asyncio.create_task(self._stopping.wait()), *self._running]
+            await asyncio.wait(waiters, timeout=self.poll_seconds, return_when=asyncio.FIRST_COMPLETED)
+            waiters[0].cancel()
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+
+
+async def serve(concurrency: Optional[int] = None):
+    from backend.db.singletons import get_work_queue
+    from backend.services.warmup import run_warmup
+
+    # Policies, the embedding model and the audit graph load before the first lease
+    state = await asyncio.to_thread(run_warmup)
+    if state.error:
+        raise SystemExit(f"Worker warm-up failed: {state.error}")
+
+    worker = AuditWorker(get_work_queue(), concurrency)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, worker.stop)
+    await worker.run()
+    print(f"✓ Audit worker {worker.worker_id} stopped")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run audit jobs from the work queue.")
+    parser.add_argument("--concurrency", type=int, default=None, help="Audits in flight (default WORKER_CONCURRENCY)")
+    args = parser.parse_args()
+    asyncio.run(serve(args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
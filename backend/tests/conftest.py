@@ -0,0 +1,27 @@
+"""
+Shared test helpers.
+"""
+
+import sys
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from shared.schemas import ClaimInput
+
+
+def make_claim(claim_id: str = "C-1", **overrides) -> ClaimInput:
+    """A Medicare CPAP claim (E0601 for G47.33); keyword arguments replace any field."""
+    data = dict(
+        claim_id=claim_id,
+        patient_id="P",
+        cpt_codes=["E0601"],
+        icd_codes=["G47.33"],
+        service_date=date(2024, 6, 1),
+        payer="Medicare",
+        provider_npi="1234567890",
+        billed_amount=100.0,
+    )
+    data.update(overrides)
+    return ClaimInput(**data)
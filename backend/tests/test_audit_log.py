@@ -0,0 +1,146 @@
+"""
+Tests for the append-only SQLite audit log and its aggregations.
+"""
+
+import sqlite3
+import sys
+from pathlib import Path
+from datetime import datetime
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from shared.schemas import AuditOutput, AuditDecision, AuditUsage
+from backend.db.audit_log import AuditRecord, SQLiteAuditLog, record_from_state
+from backend.rag.pipeline import _add_timings
+from backend.tests.conftest import make_claim
+
+
+def _record(claim_id, decision=AuditDecision.PEND_INFO, payer="Medicare", day=1, hour=9, timings=None,
+            prompt_version="v2", tokens=(0, 0, 0.0)):
+    audit = AuditOutput(
+        claim_id=claim_id,
+        decision=decision,
+        confidence=0.5,
+        explanation="test",
+        prompt_version=prompt_version,
+        created_at=datetime(2024, 6, day, hour),
+        usage=AuditUsage(prompt_tokens=tokens[0], completion_tokens=tokens[1], cost_usd=tokens[2]),
+    )
+    return AuditRecord(audit=audit, payer=payer, chunk_ids=["1", "2"], node_timings_ms=timings or {})
+
+
+@pytest.fixture
+def log(tmp_path):
+    log = SQLiteAuditLog(str(tmp_path / "audit_log.db"))
+    log.append(_record("C-1", payer="Medicare", day=1, timings={"retrieve": 10.0, "audit": 100.0}, tokens=(900, 100, 0.01)))
+    log.append(_record("C-1", AuditDecision.NEEDS_HUMAN, payer="Medicare", day=1, hour=15, timings={"retrieve": 20.0},
+                       prompt_version="v1", tokens=(500, 50, 0.002)))
+    log.append(_record("C-2", payer="Aetna", day=1, tokens=(3000, 300, 0.03)))
+    log.append(_record("C-3", payer="Medicare", day=2, timings={"audit": 300.0}))
+    return log
+
+
+class TestSQLiteAuditLog:
+    def test_get_and_claim_history(self, log):
+        history = log.for_claim("C-1")
+        assert [r.audit.decision for r in history] == [AuditDecision.NEEDS_HUMAN, AuditDecision.PEND_INFO]
+        fetched = log.get(history[1].audit.audit_id)
+        assert fetched.chunk_ids == ["1", "2"]
+        assert fetched.node_timings_ms == {"retrieve": 10.0, "audit": 100.0}
+        assert log.get("missing") is None
+
+    def test_append_only(self, log):
+        record = log.for_claim("C-2")[0]
+        with pytest.raises(sqlite3.IntegrityError):
+            log.append(record)
+        with pytest.raises(sqlite3.DatabaseError, match="append-only"):
+            log._conn().execute("DELETE FROM audit_log")
+        with pytest.raises(sqlite3.DatabaseError, match="append-only"):
+            log._conn().execute("UPDATE audit_log SET decision = 'APPROVE'")
+
+    def test_decisions_per_payer_per_day(self, log):
+        assert log.decision_counts(bucket="day") == [
+            {"bucket": "2024-06-01", "payer": "Aetna", "decision": "PEND_INFO", "count": 1},
+            {"bucket": "2024-06-01", "payer": "Medicare", "decision": "NEEDS_HUMAN", "count": 1},
+            {"bucket": "2024-06-01", "payer": "Medicare", "decision": "PEND_INFO", "count": 1},
+            {"bucket": "2024-06-02", "payer": "Medicare", "decision": "PEND_INFO", "count": 1},
+        ]
+        monthly = log.decision_counts(bucket="month", payer="Medicare", since=datetime(2024, 6, 1, 12))
+        assert [(r["bucket"], r["decision"], r["count"]) for r in monthly] == [
+            ("2024-06", "NEEDS_HUMAN", 1), ("2024-06", "PEND_INFO", 1)
+        ]
+        with pytest.raises(ValueError):
+            log.decision_counts(bucket="week")
+
+    def test_node_timings(self, log):
+        assert log.node_timings() == [
+            {"node": "audit", "runs": 2, "mean_ms": 200.0, "max_ms": 300.0},
+            {"node": "retrieve", "runs": 2, "mean_ms": 15.0, "max_ms": 20.0},
+        ]
+
+    def test_spend(self, log):
+        assert log.spend("payer") == [
+            {"payer": "Aetna", "audits": 1, "prompt_tokens": 3000, "completion_tokens": 300, "cost_usd": 0.03},
+            {"payer": "Medicare", "audits": 3, "prompt_tokens": 1400, "completion_tokens": 150, "cost_usd": 0.012},
+        ]
+        assert [(r["prompt_version"], r["audits"]) for r in log.spend("prompt_version")] == [("v2", 3), ("v1", 1)]
+        with pytest.raises(ValueError):
+            log.spend("decision")
+
+    def test_adds_usage_columns_to_existing_table(self, tmp_path):
+        path = str(tmp_path / "old.db")
+        conn = sqlite3.connect(path)
+        conn.executescript(SQLiteAuditLog.SCHEMA.split("prompt_version TEXT")[0].rstrip().rstrip(",") + "\n);")
+        conn.close()
+
+        log = SQLiteAuditLog(path)
+        log.append(_record("C-9", tokens=(10, 5, 0.001)))
+        assert log.spend("payer")[0]["prompt_tokens"] == 10
+
+    def test_record_from_state(self):
+        claim = make_claim("C-9", cpt_codes=["99213"], icd_codes=[], payer="Aetna", billed_amount=10.0)
+        state = {
+            "claim": claim,
+            "final_audit": _record("C-9").audit,
+            "retrieved_chunks": [{"chunk_id": 7}, {"chunk_id": "abc"}],
+            "audit_tier": "fast",
+            "llm_calls": 1,
+            "node_timings": _add_timings({"verify": 1.0}, {"verify": 2.5, "score": 0.1}),
+        }
+        record = record_from_state(state)
+        assert record.payer == "Aetna"
+        assert record.chunk_ids == ["7", "abc"]
+        assert record.node_timings_ms == {"verify": 3.5, "score": 0.1}
+
+
+class TestAuditLogRoutes:
+    def test_reads_and_aggregations(self, log, monkeypatch):
+        from fastapi.testclient import TestClient
+        from backend.main import app
+        from backend.db import singletons
+
+        monkeypatch.setattr(singletons, "_audit_log_instance", log)
+        client = TestClient(app)
+
+        history = client.get("/api/audit/claims/C-1").json()["audits"]
+        assert len(history) == 2
+        audit_id = history[0]["audit"]["audit_id"]
+        assert client.get(f"/api/audit/{audit_id}").json()["audit"]["audit_id"] == audit_id
+        assert client.get("/api/audit/missing").status_code == 404
+        assert sum(r["count"] for r in client.get("/api/audit/stats/decisions").json()["counts"]) == 4
+        assert client.get("/api/audit/stats/decisions", params={"bucket": "week"}).status_code == 400
+        assert {n["node"] for n in client.get("/api/audit/stats/nodes").json()["nodes"]} == {"retrieve", "audit"}
+
+    def test_spend_route(self, log, monkeypatch):
+        from fastapi.testclient import TestClient
+        from backend.main import app
+        from backend.db import singletons
+
+        monkeypatch.setattr(singletons, "_audit_log_instance", log)
+        client = TestClient(app)
+
+        spend = client.get("/api/audit/stats/spend").json()["spend"]
+        assert len(spend) == 2
+        assert client.get("/api/audit/stats/spend", params={"by": "model"}).status_code == 400
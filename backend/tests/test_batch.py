@@ -0,0 +1,89 @@
+"""
+Tests for cohort grouping and splitting in batch audits.
+"""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.rag import batch
+from backend.rag.batch import group_claims, run_batch_audit, split_cohort_response
+from backend.tests.conftest import make_claim
+
+
+class TestGrouping:
+    def test_same_codes_any_order_share_group(self):
+        claims = [
+            make_claim("C-1", cpt_codes=["E0601", "94660"]),
+            make_claim("C-2", cpt_codes=["94660", "E0601"]),
+            make_claim("C-3", payer="Aetna"),
+        ]
+        groups = group_claims(claims, max_group_size=8)
+        assert [[c.claim_id for c in g] for g in groups] == [["C-1", "C-2"], ["C-3"]]
+
+    def test_codes_differing_in_case_do_not_share_context(self):
+        claims = [make_claim("C-1", cpt_codes=["e0601"]), make_claim("C-2"), make_claim("C-3", payer="MEDICARE")]
+        assert [len(g) for g in group_claims(claims, max_group_size=8)] == [1, 1, 1]
+
+    def test_cohort_context_uses_the_shared_request(self, monkeypatch):
+        requests = []
+        monkeypatch.setattr(batch, "retrieve_context", lambda claim: requests.append(claim) or {"retrieved_chunks": []})
+        claims = [make_claim("C-1", cpt_codes=["E0601", "94660"]), make_claim("C-2", cpt_codes=["94660", "E0601"])]
+        with pytest.raises(ValueError):
+            asyncio.run(batch.audit_cohort(claims, timeout=0))
+        assert batch.retrieval_signature(requests[0]) == batch.retrieval_signature(claims[1])
+
+    def test_large_groups_are_split(self):
+        claims = [make_claim(f"C-{i}") for i in range(5)]
+        groups = group_claims(claims, max_group_size=2)
+        assert [len(g) for g in groups] == [2, 2, 1]
+
+
+class TestSplit:
+    def test_split_maps_by_claim_id_and_drops_strays(self):
+        claims = [make_claim("C-1"), make_claim("C-2")]
+        response = {"audits": [
+            {"claim_id": "C-2", "decision": "DENY"},
+            {"claim_id": "C-9", "decision": "APPROVE"},
+            {"claim_id": "C-2", "decision": "APPROVE"},
+        ]}
+        drafts = split_cohort_response(response, claims)
+        assert list(drafts) == ["C-2"]
+        assert drafts["C-2"] == {"decision": "DENY"}
+
+
+class TestCohortAudit:
+    def test_empty_drafts_fall_back_to_the_full_pipeline(self, monkeypatch):
+        from langchain_core.messages import AIMessage
+        from langchain_core.runnables import RunnableLambda
+
+        audits = [{"claim_id": "C-1"}, {"claim_id": "C-2", "decision": "APPROVE", "self_check_errors": []}]
+        monkeypatch.setattr(batch, "retrieve_context", lambda claim: {"retrieved_chunks": [{}], "context_str": "ctx"})
+        monkeypatch.setattr(batch, "get_llm", lambda **kw: RunnableLambda(
+            lambda _: AIMessage(content=json.dumps({"audits": audits}))
+        ))
+        finalized, fallbacks = [], []
+
+        async def finalize(claim, draft, context, usage):
+            finalized.append(claim.claim_id)
+            return claim.claim_id
+
+        async def full_pipeline(claim, timeout=None):
+            fallbacks.append(claim.claim_id)
+            return claim.claim_id
+
+        monkeypatch.setattr(batch, "_finalize_from_draft", finalize)
+        monkeypatch.setattr(batch, "run_rag_pipeline", full_pipeline)
+        results = asyncio.run(batch.audit_cohort([make_claim("C-1"), make_claim("C-2")], timeout=0))
+
+        assert results == ["C-1", "C-2"]
+        assert fallbacks == ["C-1"] and finalized == ["C-2"]
+
+    def test_duplicate_claim_ids_are_rejected(self):
+        with pytest.raises(ValueError, match="C-1"):
+            asyncio.run(run_batch_audit([make_claim("C-1"), make_claim("C-1", payer="Aetna")]))
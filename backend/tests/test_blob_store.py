@@ -0,0 +1,145 @@
+"""
+Tests for the content-addressed blob store (local and S3) and upload deduplication.
+"""
+
+import hashlib
+import io
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import boto3
+import pytest
+from moto import mock_aws
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from shared.schemas import PolicyMetadata
+from backend.config import settings
+from backend.db import singletons
+from backend.db.blob_store import LocalBlobStore, S3BlobStore
+from backend.rag import pdf_utils
+from backend.rag.ingestion import IngestionPipeline
+from backend.rag.numpy_store import NumpyVectorStore
+from backend.rag.rules import RuleIndex
+from backend.routers import policies
+from backend.tests.test_numpy_store import KeywordEncoder
+
+
+@pytest.fixture(params=["local", "s3"])
+def store(request, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "BLOB_CHUNK_BYTES", 1024)
+    if request.param == "local":
+        yield LocalBlobStore(str(tmp_path / "blobs"))
+        return
+    with mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket="policies")
+        yield S3BlobStore(client, bucket="policies")
+
+
+class TestBlobStore:
+    def test_content_addressed_and_deduplicated(self, store):
+        data = bytes(range(256)) * 40  # several read chunks
+        first = store.put_stream(io.BytesIO(data), suffix=".pdf")
+        second = store.put_stream(io.BytesIO(data), suffix=".pdf")
+
+        assert first.sha256 == second.sha256 == hashlib.sha256(data).hexdigest()
+        assert first.size == len(data) and first.created and not second.created
+        assert store.exists(first.sha256) and first.url.endswith(f"{first.sha256}/blob")
+        with store.local_path(first.sha256) as path:
+            assert path.read_bytes() == data
+
+    def test_derived_artifacts(self, store):
+        blob = store.put_stream(io.BytesIO(b"%PDF-1.4 policy"))
+        assert store.get_derived(blob.sha256, "markdown") is None
+        store.put_derived(blob.sha256, "markdown", "## Page 1\n\nCPAP")
+        assert store.get_derived(blob.sha256, "markdown") == "## Page 1\n\nCPAP"
+
+    def test_rejects_non_hash_keys(self, store):
+        with pytest.raises(ValueError):
+            store.exists("../../etc/passwd")
+
+
+class FlakyIngestionPipeline(IngestionPipeline):
+    """Real ingestion into a NumPy store that records each call and can be made to fail."""
+
+    def __init__(self, vector_store):
+        super().__init__(vector_store)
+        self.calls, self.fail = [], False
+
+    def process_policy_markdown(self, markdown_text, policy_id, policy_name, payer=None, **kwargs):
+        self.calls.append((policy_id, payer))
+        if self.fail:
+            raise RuntimeError("embedding backend down")
+        return super().process_policy_markdown(markdown_text, policy_id, policy_name, payer=payer, **kwargs)
+
+
+@pytest.fixture
+def uploads(tmp_path, monkeypatch):
+    """TestClient over the policy routes with a local blob store and an in-process vector store."""
+    from fastapi.testclient import TestClient
+    from backend.main import app
+    from backend.rag import singletons as rag_singletons
+
+    store = NumpyVectorStore(dim=6, encoder=KeywordEncoder())
+    pipeline = FlakyIngestionPipeline(store)
+    conversions = []
+    monkeypatch.setattr(singletons, "_blob_store_instance", LocalBlobStore(str(tmp_path / "blobs")))
+    monkeypatch.setattr(rag_singletons, "_vector_store_instance", store)
+    monkeypatch.setattr(rag_singletons, "_ingestion_pipeline_instance", pipeline)
+    monkeypatch.setattr(rag_singletons, "_rule_index_instance", RuleIndex())
+    monkeypatch.setattr(pdf_utils, "convert_pdf_to_markdown", lambda path: conversions.append(path) or "# P\n\ncpap sleep")
+    monkeypatch.setattr(policies, "_policies_store", dict(policies._policies_store))
+    client = TestClient(app)
+
+    def upload(payer, data=b"%PDF-1.4 same bytes"):
+        return client.post("/api/policies/upload", data={
+            "name": "CPAP", "payer": payer, "effective_date": "2024-01-01",
+        }, files={"file": ("cpap.pdf", data, "application/pdf")}).json()
+
+    return SimpleNamespace(client=client, upload=upload, pipeline=pipeline, conversions=conversions)
+
+
+class TestUploadDeduplication:
+    def test_same_bytes_are_parsed_and_ingested_once(self, uploads):
+        first = uploads.upload("Aetna")
+        again = uploads.upload("Aetna")
+        other_payer = uploads.upload("Cigna")
+
+        assert first["chunks_created"] > 0 and first["policy"]["status"] == "active"
+        assert again["duplicate_of"] == first["policy"]["policy_id"] and again["chunks_created"] == 0
+        assert other_payer["chunks_created"] > 0
+        # Extraction ran once; the second payer's ingest reused the stored markdown
+        assert len(uploads.conversions) == 1 and [p for _, p in uploads.pipeline.calls] == ["Aetna", "Cigna"]
+        assert first["policy"]["content_sha256"] == hashlib.sha256(b"%PDF-1.4 same bytes").hexdigest()
+
+    def test_failed_ingest_is_marked_and_retried(self, uploads):
+        uploads.pipeline.fail = True
+        failed = uploads.upload("Aetna")
+        assert failed["policy"]["status"] == "failed" and failed["policy"]["content_sha256"] is None
+        assert "ingestion failed" in failed["message"]
+
+        uploads.pipeline.fail = False
+        retried = uploads.upload("Aetna")
+        assert "duplicate_of" not in retried and retried["policy"]["status"] == "active"
+
+        # A failed policy's own file is re-ingested by a replace with the same bytes
+        policy_id = failed["policy"]["policy_id"]
+        replaced = uploads.client.post(f"/api/policies/{policy_id}/replace", files={
+            "file": ("cpap.pdf", b"%PDF-1.4 same bytes", "application/pdf"),
+        }).json()
+        assert replaced["chunks_created"] > 0 and replaced["policy"]["status"] == "active"
+        assert len(uploads.pipeline.calls) == 3
+
+    def test_deduplication_uses_persisted_state(self, uploads, monkeypatch):
+        first = uploads.upload("Aetna")
+        # Another instance (or a restart): no in-memory policy list, same blob and vector stores
+        monkeypatch.setattr(policies, "_policies_store", {})
+        again = uploads.upload("Aetna")
+        assert again["duplicate_of"] == first["policy"]["policy_id"]
+
+        policies._policies_store[first["policy"]["policy_id"]] = PolicyMetadata(**first["policy"])
+        uploads.client.delete(f"/api/policies/{first['policy']['policy_id']}")
+        after_delete = uploads.upload("Aetna")
+        assert "duplicate_of" not in after_delete and after_delete["chunks_created"] > 0
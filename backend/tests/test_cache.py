@@ -0,0 +1,222 @@
+"""
+Tests for the shared cache: both backends, codecs, cached embeddings,
+policy-generation invalidation and the rate limiter.
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import fakeredis
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from shared.schemas import AuditDecision, AuditOutput, Citation
+from backend.config import settings
+from backend.db import singletons
+from backend.db.cache import (
+    Cache, CachedEmbeddings, MemoryCacheBackend, RateLimiter, RedisCacheBackend,
+    audit_cache, create_cache_backend, decode_json, decode_vector, encode_json, encode_vector,
+    policies_changed, policy_generation,
+)
+from backend.rag import pipeline
+from backend.tests.conftest import make_claim
+
+
+@pytest.fixture(params=["memory", "redis"])
+def backend(request):
+    if request.param == "memory":
+        return MemoryCacheBackend(max_entries=100)
+    return RedisCacheBackend(fakeredis.FakeRedis())
+
+
+def unreachable_redis():
+    import redis
+    return RedisCacheBackend(redis.Redis(port=1, socket_connect_timeout=0.1))
+
+
+class CountingEncoder:
+    model_name = "counting"
+    dimension = 2
+
+    def __init__(self):
+        self.encoded = []
+
+    def embed_documents(self, texts):
+        self.encoded.extend(texts)
+        return [[float(len(t)), 1.0] for t in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+class TestBackends:
+    def test_get_set_many(self, backend):
+        backend.set_many({"a": b"1", "b": b"2"})
+        assert backend.get_many(["a", "missing", "b"]) == [b"1", None, b"2"]
+        assert backend.delete("a", "missing") == 1
+        assert backend.get("a") is None
+
+    def test_ttl_expires(self, backend):
+        backend.set("short", b"x", ttl=1)
+        backend.set("long", b"y", ttl=60)
+        assert backend.get("short") == b"x"
+        time.sleep(1.1)
+        assert backend.get("short") is None and backend.get("long") == b"y"
+
+    def test_incr(self, backend):
+        assert backend.incr("n", ttl=60) == 1
+        assert backend.incr("n", 2, ttl=60) == 3
+
+    def test_redis_counter_always_gets_a_ttl(self):
+        client = fakeredis.FakeRedis()
+        backend = RedisCacheBackend(client)
+        assert backend.incr("n", ttl=60) == 1 and 0 < client.ttl("n") <= 60
+        time.sleep(1.1)
+        backend.incr("n", ttl=60)
+        # Later hits do not extend the window
+        assert client.ttl("n") < 60
+        # A counter left without a TTL (e.g. by a crash between two calls) gets one on its next hit
+        client.set("stuck", 5)
+        assert backend.incr("stuck", ttl=60) == 6 and 0 < client.ttl("stuck") <= 60
+
+    def test_backend_selection(self):
+        assert create_cache_backend("none") is None
+        with pytest.raises(ValueError, match="Unknown CACHE_BACKEND"):
+            create_cache_backend("memcached")
+
+    def test_memory_lru_eviction(self):
+        backend = MemoryCacheBackend(max_entries=2)
+        backend.set("a", b"1")
+        backend.set("b", b"2")
+        backend.get("a")
+        backend.set("c", b"3")
+        assert backend.get_many(["a", "b", "c"]) == [b"1", None, b"3"]
+
+
+class TestCodecs:
+    def test_vector_round_trip_is_float32(self):
+        data = encode_vector([0.5, -1.25, 3.0])
+        assert len(data) == 1 + 3 * 4
+        assert decode_vector(data) == [0.5, -1.25, 3.0]
+
+    def test_json_and_audit_round_trip(self, backend):
+        assert decode_json(encode_json({"chunks": [{"score": 0.5}]})) == {"chunks": [{"score": 0.5}]}
+
+        audit = AuditOutput(
+            claim_id="C-1", decision=AuditDecision.APPROVE, confidence=0.9, explanation="Covered.",
+            citations=[Citation(policy_id="p", page=1, section_path="Main", chunk_id="1", text_excerpt="CPAP")],
+        )
+        audits = audit_cache(backend)
+        audits.set("k", audit)
+        assert audits.get("k") == audit
+
+    def test_undecodable_entry_is_a_miss(self, backend):
+        vectors = Cache(backend, "embedding", encode_vector, decode_vector)
+        backend.set(vectors.prefix + "bad", b"garbage")
+        assert vectors.get("bad") is None
+
+
+class TestCachedEmbeddings:
+    def test_only_misses_are_encoded(self, backend):
+        encoder = CountingEncoder()
+        cached = CachedEmbeddings(encoder, Cache(backend, "embedding", encode_vector, decode_vector))
+
+        assert cached.embed_documents(["ab", "abc"]) == [[2.0, 1.0], [3.0, 1.0]]
+        assert cached.embed_documents(["abc", "abcd"]) == [[3.0, 1.0], [4.0, 1.0]]
+        assert cached.embed_query("ab") == [2.0, 1.0]
+        assert encoder.encoded == ["ab", "abc", "abcd"]
+
+    def test_backend_failure_falls_back_to_the_encoder(self):
+        broken = unreachable_redis()
+        encoder = CountingEncoder()
+        cached = CachedEmbeddings(encoder, Cache(broken, "embedding", encode_vector, decode_vector))
+        assert cached.embed_query("abc") == [3.0, 1.0]
+
+
+class TestInvalidation:
+    def test_policy_change_invalidates_retrieval(self, backend, monkeypatch):
+        monkeypatch.setattr(singletons, "_cache_backend_instance", backend)
+        monkeypatch.setattr(singletons, "_cache_backend_created", True)
+        searches = []
+        monkeypatch.setattr(pipeline, "_search_context", lambda q, f: searches.append(q) or {"context_str": q})
+        claim = make_claim()
+
+        first = pipeline.retrieve_context(claim)
+        assert pipeline.retrieve_context(claim) == first and len(searches) == 1
+
+        generation = policy_generation(backend)
+        policies_changed()
+        assert policy_generation(backend) == generation + 1
+        pipeline.retrieve_context(claim)
+        assert len(searches) == 2
+
+
+class TestAuditCache:
+    def test_cache_hits_are_logged_and_counted(self, backend, monkeypatch):
+        import asyncio
+        from backend import metrics
+
+        monkeypatch.setattr(singletons, "_cache_backend_instance", backend)
+        monkeypatch.setattr(singletons, "_cache_backend_created", True)
+        monkeypatch.setattr(settings, "CACHE_AUDIT_TTL_SECONDS", 60)
+        claim = make_claim()
+        audit = AuditOutput(
+            claim_id="C-1", decision=AuditDecision.APPROVE, confidence=0.9, explanation="Covered.",
+            citations=[Citation(policy_id="p", page=1, section_path="Main", chunk_id="7", text_excerpt="CPAP")],
+        )
+        runs, logged = [], []
+
+        async def run_audit_graph(claim, timeout):
+            runs.append(claim)
+            return {**pipeline.initial_audit_state(claim), "final_audit": audit, "llm_calls": 3}
+
+        monkeypatch.setattr(pipeline, "run_audit_graph", run_audit_graph)
+        import threading
+        loop_thread = threading.get_ident()
+        monkeypatch.setattr(pipeline, "record_audit", lambda state: logged.append((state, threading.get_ident())))
+        cached_count = metrics.AUDITS.labels(tier="cached", decision="APPROVE")._value.get()
+
+        first = asyncio.run(pipeline.run_rag_pipeline(claim))
+        second = asyncio.run(pipeline.run_rag_pipeline(claim))
+
+        assert len(runs) == 1 and second.audit_id != first.audit_id
+        # The audit log write runs in a worker thread, not on the event loop
+        assert all(thread != loop_thread for _, thread in logged)
+        logged = [state for state, _ in logged]
+        assert [s["final_audit"].audit_id for s in logged] == [first.audit_id, second.audit_id]
+        assert logged[1]["audit_tier"] == "cached" and logged[1]["llm_calls"] == 0
+        assert logged[1]["retrieved_chunks"] == [{"chunk_id": "7"}]
+        assert metrics.AUDITS.labels(tier="cached", decision="APPROVE")._value.get() == cached_count + 1
+
+
+class TestRateLimiter:
+    def test_window_limit_is_shared(self, backend):
+        # Two limiters on one backend stand in for two instances
+        first, second = (RateLimiter(backend, "audit", limit=3) for _ in range(2))
+        results = [first.hit("10.0.0.1")[0], second.hit("10.0.0.1")[0], first.hit("10.0.0.1")[0]]
+        allowed, retry_after = second.hit("10.0.0.1")
+
+        assert results == [True, True, True]
+        assert not allowed and 0 < retry_after <= 60
+        assert first.hit("10.0.0.2")[0]
+
+    def test_fails_open(self):
+        broken = unreachable_redis()
+        assert RateLimiter(broken, "audit", limit=1).hit("x") == (True, 0)
+
+
+    def test_client_identity_ignores_forged_forwarded_for(self, monkeypatch):
+        from starlette.requests import Request
+        from backend.routers.audit import client_address
+
+        def request(forwarded):
+            headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+            return Request({"type": "http", "headers": headers, "client": ("10.1.1.1", 5000)})
+
+        assert client_address(request("6.6.6.6")) == "10.1.1.1"
+        monkeypatch.setattr(settings, "TRUSTED_PROXY_HOPS", 1)
+        # The trusted proxy appended the real client after whatever the client sent
+        assert client_address(request("6.6.6.6, 203.0.113.7")) == "203.0.113.7"
+        assert client_address(request("")) == "10.1.1.1"
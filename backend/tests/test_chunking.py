@@ -0,0 +1,115 @@
+"""
+Tests for offset-tracking chunking and citation resolution.
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import pytest
+
+from backend.benchmarks.chunking_modes import train_tokenizer
+from backend.rag.chunking import OffsetTextSplitter, TokenTextSplitter, create_splitter
+from backend.rag.citations import AhoCorasick, CitationIndex
+from backend.rag.ingestion import IngestionPipeline
+from backend.rag.pipeline import finalize_node, initial_audit_state
+from backend.tests.conftest import make_claim
+
+PDF_MARKDOWN = (
+    "## Page 1\n\nMedicare covers CPAP for adults with obstructive sleep apnea.\n"
+    "\n## Page 2\n\nAn AHI of at least 15 events per hour is required.\n"
+    "Coverage continues after a 12-week trial   when adherence is documented.\n"
+)
+
+
+class TestOffsetTextSplitter:
+    def test_spans_index_the_source_exactly(self):
+        text = "# Policy\n\n## Coverage\n\n" + " ".join(f"Sentence number {i} of the policy." for i in range(60))
+        chunks = OffsetTextSplitter(chunk_size=300, chunk_overlap=60).split_markdown(text)
+
+        assert len(chunks) > 3
+        for chunk in chunks:
+            assert text[chunk.start_char:chunk.end_char] == chunk.text
+            assert len(chunk.text) <= 300
+            assert chunk.headers == {"Policy": "Policy", "Section": "Coverage"}
+        # Consecutive windows overlap and start on a word boundary
+        for a, b in zip(chunks, chunks[1:]):
+            assert b.start_char < a.end_char and text[b.start_char - 1].isspace()
+
+    def test_pages_follow_page_headings(self):
+        chunks = OffsetTextSplitter(chunk_size=60, chunk_overlap=10).split_markdown(PDF_MARKDOWN)
+        pages = {c.text.split()[0]: c.page for c in chunks}
+        assert pages["Medicare"] == 1 and pages["An"] == 2 and chunks[-1].page == 2
+
+    def test_ingestion_records_spans(self):
+        docs = IngestionPipeline(vector_store=None).split_policy_markdown(PDF_MARKDOWN, "cpap", "CPAP Policy")
+        meta = docs[1]["metadata"]
+        assert meta["page"] == 2 and meta["section_path"] == "Page 2"
+        assert PDF_MARKDOWN[meta["start_char"]:meta["end_char"]] == docs[1]["text"]
+
+
+class TestTokenTextSplitter:
+    TEXT = "# Policy\n\n## Coverage\n\n" + " ".join(
+        f"Rule {i}: HbA1c below {i % 9}.5 qualifies for E0601 under G47.33." for i in range(80)
+    )
+
+    @pytest.fixture(scope="class")
+    def tokenizer(self):
+        return train_tokenizer([self.TEXT], vocab_size=200)
+
+    def count(self, tokenizer, text):
+        return len(tokenizer.encode(text, add_special_tokens=False).ids)
+
+    def test_windows_fit_the_token_budget(self, tokenizer):
+        chunks = TokenTextSplitter(tokenizer, chunk_size=40, chunk_overlap=8).split_markdown(self.TEXT)
+
+        assert len(chunks) > 5
+        for chunk in chunks:
+            assert self.TEXT[chunk.start_char:chunk.end_char] == chunk.text
+            assert self.count(tokenizer, chunk.text) <= 40
+        # Overlap is measured in tokens too
+        for a, b in zip(chunks, chunks[1:]):
+            assert b.start_char < a.end_char
+            assert 0 < self.count(tokenizer, self.TEXT[b.start_char:a.end_char]) <= 8
+
+    def test_mode_is_part_of_the_version_tag(self, tokenizer):
+        chars = IngestionPipeline(None, splitter=create_splitter("chars"))
+        tokens = IngestionPipeline(None, splitter=create_splitter("tokens", tokenizer=tokenizer))
+        tag = lambda pipeline: pipeline.split_policy_markdown(self.TEXT, "p", "P")[0]["metadata"]["version_tag"]
+
+        assert tokens.splitter.signature == "tokens-254-32"
+        assert tag(chars) != tag(tokens)
+        with pytest.raises(ValueError):
+            create_splitter("words")
+
+
+class TestCitationIndex:
+    def test_aho_corasick_finds_overlapping_patterns(self):
+        matches = sorted(AhoCorasick(["he", "she", "his", "hers"]).finditer("ushers"))
+        assert matches == [(0, 2), (1, 1), (3, 2)]
+
+    def test_finalize_resolves_quotes_to_chunk_offsets(self):
+        docs = IngestionPipeline(vector_store=None).split_policy_markdown(PDF_MARKDOWN, "cpap", "CPAP Policy")
+        claim = make_claim()
+        quote = "coverage continues after a 12-week trial when adherence is documented."
+        state = {
+            **initial_audit_state(claim), "retrieved_chunks": docs,
+            "audit_draft": {"decision": "APPROVE", "confidence": 0.9, "explanation": "ok", "rules": [
+                {"rule_text": "Trial", "citation_text": quote, "source_policy_title": "Other Title", "satisfied": True},
+                {"rule_text": "Paraphrase", "citation_text": "not in the policy text at all",
+                 "source_policy_title": "CPAP Policy", "satisfied": True},
+            ]},
+        }
+
+        citations = asyncio.run(finalize_node(state))["final_audit"].citations
+        exact, unlocated = citations
+        assert exact.chunk_id == str(docs[1]["chunk_id"]) and exact.page == 2
+        assert PDF_MARKDOWN[exact.start_char:exact.end_char].startswith("Coverage continues")
+        assert PDF_MARKDOWN[exact.start_char:exact.end_char].endswith("is documented")
+        assert unlocated.start_char is None and unlocated.chunk_id == str(docs[0]["chunk_id"])
+
+    def test_short_quotes_are_not_indexed(self):
+        chunks = [{"chunk_id": 1, "text": "CPAP covered.", "metadata": {}}]
+        assert CitationIndex(chunks, ["CPAP"]).resolve("CPAP") is None
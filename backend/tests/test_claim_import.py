@@ -0,0 +1,137 @@
+"""
+Tests for streaming claim import: CSV, NDJSON and X12 837 parsing, batched
+validation with error reports, and bulk writes to the claims store.
+"""
+
+import io
+import json
+import sys
+from pathlib import Path
+from datetime import date
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.db.claims_store import SQLiteClaimsStore
+from backend.services.claim_import import detect_format, import_claims, read_x12_837
+
+CSV = """claim_id,patient_id,cpt_codes,icd_codes,service_date,payer,provider_npi,billed_amount
+C-1,P-1,99213;93000,I10,2024-06-01,Medicare,1234567890,120.50
+C-2,P-2,,I10,2024-06-02,Medicare,1234567890,80
+C-3,P-3,E0601,G47.33,2024-06-03,Aetna,1234567890,900
+C-4,P-4,99214,,not-a-date,Aetna,1234567890,-5
+"""
+
+NDJSON = "\n".join([
+    json.dumps({"claim_id": "N-1", "patient_id": "P", "cpt_codes": ["99213"], "service_date": "2024-06-01",
+                "payer": "UHC", "provider_npi": "1", "billed_amount": 10}),
+    "{not json",
+    "",
+    json.dumps({"claim_id": "N-2", "patient_id": "P", "cpt_codes": "99213 93000", "service_date": "2024-06-01",
+                "payer": "UHC", "provider_npi": "1", "billed_amount": 20}),
+]) + "\n"
+
+X12 = (
+    "ISA*00*          *00*          *ZZ*SUBMITTER      *ZZ*RECEIVER       *240601*1200*^*00501*000000001*0*P*:~\n"
+    "GS*HC*SUB*REC*20240601*1200*1*X*005010X222A1~ST*837*0001*005010X222A1~\n"
+    "HL*1**20*1~NM1*85*2*CLINIC*****XX*1999999999~\n"
+    "HL*2*1*22*1~SBR*P*18*******MB~NM1*IL*1*DOE*JOHN****MI*SUB-1~NM1*PR*2*Medicare*****PI*00430~\n"
+    "HL*3*2*23*0~PAT*19~NM1*QC*1*DOE*JANE****MI*PAT-1~\n"
+    "CLM*X-1*250***11:B:1*Y*A*Y*Y~DTP*431*D8*20240501~HI*ABK:G4733*ABF:I10~NTE*ADD*sleep study\n~"
+    "NM1*82*1*SMITH*ANN****XX*1888888888~NM1*PR*2*Secondary Payer*****PI*99999~\n"
+    "LX*1~SV1*HC:95810*200*UN*1***1~DTP*472*D8*20240610~LX*2~SV1*HC:95810:26*50*UN*1***1~\n"
+    "HL*4*1*22*0~SBR*P*18*******CI~NM1*IL*1*ROE*RICK****MI*SUB-2~NM1*PR*2*Aetna*****PI*60054~\n"
+    "CLM*X-2*75***11:B:1*Y*A*Y*Y~HI*ABK:M545~LX*1~SV1*HC:97110*75*UN*1***1~DTP*472*RD8*20240612-20240614~\n"
+    "CLM*X-3*75***11:B:1*Y*A*Y*Y~HI*ABK:M545~\n"
+    "SE*20*0001~GE*1*1~IEA*1*000000001~\n"
+)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SQLiteClaimsStore(str(tmp_path / "claims.db"))
+
+
+class TestClaimImport:
+    def test_detect_format(self):
+        assert detect_format("batch.CSV") == "csv"
+        assert detect_format("feed.jsonl.gz") == "ndjson"
+        assert detect_format("remit.837") == "x12"
+        with pytest.raises(ValueError):
+            detect_format("claims.xlsx")
+
+    def test_csv_accepts_valid_rows_and_reports_the_rest(self, store):
+        report = io.StringIO()
+        result = import_claims(io.StringIO(CSV), "csv", store, error_report=report, batch_size=2)
+
+        assert (result.rows, result.accepted, result.rejected) == (4, 2, 2)
+        assert store.get("C-1").cpt_codes == ["99213", "93000"]
+        assert store.get("C-3").service_date == date(2024, 6, 3)
+
+        errors = [json.loads(line) for line in report.getvalue().splitlines()]
+        assert [e["line"] for e in errors] == [3, 5]
+        assert errors[0]["errors"] == ["cpt_codes: Field required"]
+        assert {e.split(":")[0] for e in errors[1]["errors"]} == {"service_date", "billed_amount"}
+
+    def test_ndjson_reports_malformed_lines(self, store):
+        batches = []
+        result = import_claims(io.StringIO(NDJSON), "ndjson", store, on_batch=batches.append)
+
+        assert (result.accepted, result.rejected) == (2, 1)
+        assert result.errors_sample[0]["line"] == 2
+        assert store.get("N-2").cpt_codes == ["99213", "93000"]
+        assert [c.claim_id for batch in batches for c in batch] == ["N-1", "N-2"]
+
+    def test_x12_837_claims(self):
+        rows = [fields for _, fields in read_x12_837(io.StringIO(X12))]
+        assert [r["claim_id"] for r in rows] == ["X-1", "X-2", "X-3"]
+
+        first = rows[0]
+        # Patient loop overrides the subscriber; the 2330 secondary payer does not leak in
+        assert (first["payer"], first["patient_id"], first["provider_npi"]) == ("Medicare", "PAT-1", "1999999999")
+        assert first["icd_codes"] == ["G4733", "I10"]
+        assert first["cpt_codes"] == ["95810"]
+        assert first["service_date"] == "2024-06-10"
+        assert first["notes"] == "sleep study"
+
+        assert (rows[1]["payer"], rows[1]["patient_id"], rows[1]["service_date"]) == ("Aetna", "SUB-2", "2024-06-12")
+
+    def test_x12_import_rejects_claims_without_service_lines(self, store):
+        result = import_claims(io.StringIO(X12), "x12", store)
+        assert (result.accepted, result.rejected) == (2, 1)
+        assert store.get("X-2").billed_amount == 75.0
+
+    def test_x12_requires_isa_header(self, store):
+        with pytest.raises(ValueError, match="ISA"):
+            import_claims(io.StringIO("GS*HC~ST*837~"), "x12", store)
+
+
+class TestImportAudit:
+    def test_ids_are_spooled_to_disk_and_audited_in_batches(self, store, tmp_path, monkeypatch):
+        from fastapi.testclient import TestClient
+        from backend.config import settings
+        from backend.db import singletons
+        from backend.main import app
+        from backend.services import pipeline
+
+        audited = []
+
+        async def run_batch_audit_pipeline(claims, timeout=None):
+            audited.append([c.claim_id for c in claims])
+
+        monkeypatch.setattr(singletons, "_claims_store_instance", store)
+        monkeypatch.setattr(pipeline, "run_batch_audit_pipeline", run_batch_audit_pipeline)
+        monkeypatch.setattr(settings, "WORK_QUEUE_BACKEND", "none")
+        monkeypatch.setattr(settings, "IMPORT_ERROR_DIR", str(tmp_path / "imports"))
+        monkeypatch.setattr(settings, "IMPORT_BATCH_SIZE", 1)
+        monkeypatch.setattr(settings, "IMPORT_AUDIT_BATCH_SIZE", 1)
+
+        response = TestClient(app).post(
+            "/api/claims/import", params={"queue_audit": True}, files={"file": ("claims.csv", CSV.encode())}
+        ).json()
+
+        assert response["accepted"] == 2 and response["queued_for_audit"] == 2
+        assert audited == [["C-1"], ["C-3"]]
+        # The spool is removed once the background audit has read it
+        assert not list((tmp_path / "imports").glob("*.audit.ids"))
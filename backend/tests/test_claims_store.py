@@ -0,0 +1,87 @@
+"""
+Tests for the SQLite claims store: upserts, bulk insert, filters and cursor pages.
+"""
+
+import sys
+from pathlib import Path
+from datetime import date
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.db.claims_store import ClaimFilter, SQLiteClaimsStore
+from backend.tests.conftest import make_claim
+
+
+def _claim(i, day=1, **overrides):
+    return make_claim(
+        f"C-{i:04d}", patient_id=f"P-{i}", service_date=date(2024, 6, day), billed_amount=100.0 + i, **overrides
+    )
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = SQLiteClaimsStore(str(tmp_path / "claims.db"))
+    s.bulk_insert(
+        [_claim(i, payer="Medicare" if i % 3 else "Aetna", day=1 + i % 28) for i in range(100)],
+        batch_size=30,
+    )
+    return s
+
+
+class TestSQLiteClaimsStore:
+    def test_wal_mode(self, store):
+        assert store._conn().execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    def test_get_upsert_delete(self, store):
+        assert store.get("C-0005").billed_amount == 105.0
+        store.upsert(_claim(5, payer="UHC"))
+        assert store.get("C-0005").payer == "UHC"
+        assert store.count() == 100
+        assert store.delete("C-0005") and not store.delete("C-0005")
+        assert store.get("C-0005") is None
+
+    def test_cursor_pages_cover_everything_once(self, store):
+        seen, cursor = [], None
+        while True:
+            page, cursor = store.list(limit=30, cursor=cursor)
+            seen += [c.claim_id for c in page]
+            if cursor is None:
+                break
+        assert seen == [f"C-{i:04d}" for i in range(100)]
+
+    def test_filters(self, store):
+        aetna = ClaimFilter(payer="Aetna")
+        assert store.count(aetna) == 34
+        page, cursor = store.list(limit=10, filters=aetna)
+        assert all(c.payer == "Aetna" for c in page) and cursor is not None
+
+        window = ClaimFilter(service_date_from=date(2024, 6, 1), service_date_to=date(2024, 6, 2))
+        page, cursor = store.list(limit=50, filters=window)
+        assert {c.service_date.day for c in page} == {1, 2} and cursor is None
+
+    def test_invalid_cursor(self, store):
+        with pytest.raises(ValueError):
+            store.list(cursor="not-a-cursor")
+
+
+class TestClaimsRoutes:
+    def test_total_only_on_the_first_page(self, store, monkeypatch):
+        from fastapi.testclient import TestClient
+        from backend.main import app
+        from backend.db import singletons
+
+        monkeypatch.setattr(singletons, "_claims_store_instance", store)
+        client = TestClient(app)
+
+        first = client.get("/api/claims/", params={"limit": 30}).json()
+        assert first["total"] == 100 and len(first["claims"]) == 30
+        second = client.get("/api/claims/", params={"limit": 30, "cursor": first["next_cursor"]}).json()
+        assert second["total"] is None and len(second["claims"]) == 30
+        counted = client.get("/api/claims/", params={"limit": 30, "cursor": first["next_cursor"], "include_total": True})
+        assert counted.json()["total"] == 100
+
+        assert client.get("/api/claims/C-0005").json()["claim_id"] == "C-0005"
+        assert client.delete("/api/claims/C-0005").json()["deleted"] is True
+        assert client.get("/api/claims/C-0005").status_code == 404
@@ -0,0 +1,46 @@
+"""
+Tests for Qdrant collection profile resolution and migration planning.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+from qdrant_client import QdrantClient
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.config import settings
+from backend.rag.collection_profiles import (
+    create_collection, get_profile, migrate_collection, profile_drift, search_params
+)
+
+
+class TestCollectionProfiles:
+    def test_overrides_apply_on_top_of_profile(self, monkeypatch):
+        monkeypatch.setattr(settings, "QDRANT_HNSW_M", "48")
+        monkeypatch.setattr(settings, "QDRANT_RESCORE", "false")
+        profile = get_profile("scalar")
+        assert profile.hnsw_m == 48 and profile.rescore is False
+        assert profile.quantization == "scalar"
+        # The shared profile table is not mutated
+        assert get_profile("scalar", apply_overrides=False).hnsw_m == 16
+
+    def test_unknown_profile_rejected(self):
+        with pytest.raises(ValueError):
+            get_profile("turbo")
+
+    def test_search_params(self):
+        assert search_params(get_profile("default", apply_overrides=False)) is None
+        params = search_params(get_profile("low_latency", apply_overrides=False))
+        assert params.hnsw_ef == 128
+        assert params.quantization.rescore is True and params.quantization.oversampling == 1.5
+
+    def test_drift_and_migration(self):
+        client = QdrantClient(":memory:")
+        create_collection(client, "policies", get_profile("default", apply_overrides=False), 8)
+        target = get_profile("on_disk", apply_overrides=False)
+        drift = profile_drift(client, "policies", target)
+        assert drift["on_disk_vectors"] == (False, True)
+        assert drift["on_disk_payload"] == (False, True)
+        assert migrate_collection(client, "policies", target) == drift
@@ -0,0 +1,108 @@
+"""
+Tests for audit deadlines: skipped refinement, cancelled LLM calls and partial results.
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from shared.schemas import AuditDecision
+from backend.config import settings
+from backend.rag import batch, deadline, pipeline
+from backend.benchmarks.pipeline_e2e import StubChatModel
+from backend.tests.conftest import make_claim
+
+CONTEXT = {
+    "retrieved_chunks": [{"chunk_id": "1", "score": 0.9, "text": "CPAP is covered.",
+                          "metadata": {"policy_id": "p", "policy_name": "P"}}],
+    "context_str": "--- POLICY: P | SECTION: Main ---\nCPAP is covered.",
+}
+
+
+class FakeClock:
+    """Stands in for the time module in deadline.py and pipeline.py; only the stub LLM moves it."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    perf_counter = monotonic
+
+
+class ClockedChatModel(StubChatModel):
+    """Stub LLM whose calls take latency_ms on the fake clock; with hang=True they never return."""
+    clock: Any = None
+    hang: bool = False
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.clock.now += self.latency_ms / 1000
+        if self.hang:
+            await asyncio.Event().wait()
+        return self._result(messages, self._rng("\n".join(str(m.content) for m in messages)))
+
+
+@pytest.fixture
+def use_llm(monkeypatch):
+    monkeypatch.setattr(pipeline, "retrieve_context", lambda claim: dict(CONTEXT))
+    monkeypatch.setattr(batch, "retrieve_context", lambda claim: dict(CONTEXT))
+    monkeypatch.setattr(pipeline, "_audit_graph", None)
+    monkeypatch.setattr(settings, "GROQ_API_KEY", "test")
+    monkeypatch.setattr(settings, "AUDIT_LOG_ENABLED", False)
+    monkeypatch.setattr(settings, "RULE_ENGINE_ENABLED", False)
+    monkeypatch.setattr(settings, "TRIAGE_ENABLED", False)
+    monkeypatch.setattr(settings, "CONFIDENCE_SCORER", "llm")
+
+    clock = FakeClock()
+    monkeypatch.setattr(deadline, "time", clock)
+    monkeypatch.setattr(pipeline, "time", clock)
+
+    def use(latency_ms, hang=False):
+        llm = ClockedChatModel(latency_ms=latency_ms, latency_sigma=0.0, reject_rate=1.0, clock=clock, hang=hang)
+        monkeypatch.setattr(pipeline, "get_llm", lambda temperature=0.0: llm)
+        monkeypatch.setattr(batch, "get_llm", lambda temperature=0.0: llm)
+    return use
+
+
+class TestDeadline:
+    def test_no_deadline_runs_the_full_loop(self, use_llm):
+        use_llm(0)
+        state = asyncio.run(pipeline.run_audit_graph(make_claim(), timeout=0))
+        # audit, verify (rejects), refine, verify, score
+        assert state["llm_calls"] == 5 and not state["deadline_stopped"]
+
+    def test_short_deadline_skips_refinement_and_scores_locally(self, use_llm):
+        use_llm(200)
+        # audit + verify take 0.4s; another 0.2s call would not fit in the remaining 0.15s
+        state = asyncio.run(pipeline.run_audit_graph(make_claim(), timeout=0.55))
+
+        assert state["llm_calls"] == 2
+        assert state["deadline_stopped"] and state["iteration_count"] == 1
+        assert "deadline reached" in state["final_audit"].explanation
+        assert "Confidence Reasoning: Local rubric" in state["final_audit"].explanation
+        # The verifier rejected the only draft, so it is not returned as a decision
+        assert state["final_audit"].decision == AuditDecision.PEND_INFO
+
+    def test_slow_call_is_cancelled_with_partial_result(self, use_llm):
+        # The call never returns, so the audit only finishes if it is cancelled
+        use_llm(2000, hang=True)
+        state = asyncio.run(pipeline.run_audit_graph(make_claim(), timeout=0.1))
+
+        audit = state["final_audit"]
+        assert state["llm_calls"] == 0 and state["deadline_stopped"]
+        assert audit.decision == AuditDecision.PEND_INFO and audit.confidence == 0.0
+        assert "1 policy sections were retrieved" in audit.explanation
+
+    def test_batch_cohort_deadline(self, use_llm):
+        use_llm(2000, hang=True)
+        results = asyncio.run(batch.run_batch_audit([make_claim("C-1"), make_claim("C-2")], timeout=0.1))
+
+        # The cohort call is cancelled and its claims' fallback audits get no time left
+        assert [r.claim_id for r in results] == ["C-1", "C-2"]
+        assert all(r.decision == AuditDecision.PEND_INFO and r.confidence == 0.0 for r in results)
@@ -0,0 +1,92 @@
+"""
+Tests for the embedding sidecar: wire round trip, cross-client batching and errors.
+"""
+
+import asyncio
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.config import settings
+from backend.rag.embedding_server import EmbeddingClient, EmbeddingServer
+
+
+class KeywordEncoder:
+    """Deterministic bag-of-words embeddings that records each encode call's batch size."""
+
+    VOCAB = ["cpap", "knee", "mri", "sleep"]
+    model_name = "keyword"
+    dimension = 4
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.batches = []
+
+    def embed_documents(self, texts):
+        if self.fail:
+            raise RuntimeError("model exploded")
+        self.batches.append(len(texts))
+        return [[float(t.split().count(w)) for w in self.VOCAB] for t in texts]
+
+
+@pytest.fixture
+def serve(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "EMBEDDING_DIM", 4)
+    running = []
+
+    def start(encoder, **kwargs):
+        path = str(tmp_path / "embed.sock")
+        loop = asyncio.new_event_loop()
+        server = EmbeddingServer(encoder, **kwargs)
+        ready = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(loop)
+            loop.run_until_complete(server.start(path))
+            ready.set()
+            loop.run_forever()
+
+        threading.Thread(target=run, daemon=True).start()
+        assert ready.wait(5)
+        running.append((server, loop))
+        return path
+
+    yield start
+    for server, loop in running:
+        asyncio.run_coroutine_threadsafe(server.close(), loop).result(5)
+        loop.call_soon_threadsafe(loop.stop)
+
+
+class TestEmbeddingServer:
+    def test_round_trip(self, serve):
+        client = EmbeddingClient(serve(KeywordEncoder()), timeout=5)
+
+        assert client.dimension == 4 and client.model_name == "keyword"
+        assert client.embed_query("cpap sleep sleep") == [1.0, 0.0, 0.0, 2.0]
+        assert client.embed_documents(["knee mri", "mri"]) == [[0.0, 1.0, 1.0, 0.0], [0.0, 0.0, 1.0, 0.0]]
+        assert client.embed_documents([]) == []
+
+    def test_concurrent_clients_share_batches(self, serve):
+        encoder = KeywordEncoder()
+        path = serve(encoder, max_batch=64, batch_wait_ms=50)
+        clients = [EmbeddingClient(path, timeout=5) for _ in range(8)]
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            vectors = list(pool.map(lambda c: c.embed_query("knee knee"), clients))
+
+        assert vectors == [[0.0, 2.0, 0.0, 0.0]] * 8
+        assert sum(encoder.batches) == 8 and len(encoder.batches) < 8
+
+    def test_encoder_errors_reach_the_client(self, serve):
+        client = EmbeddingClient(serve(KeywordEncoder(fail=True)), timeout=5)
+        with pytest.raises(RuntimeError, match="model exploded"):
+            client.embed_query("cpap")
+
+    def test_unreachable_server(self, tmp_path):
+        with pytest.raises(ValueError, match="not reachable"):
+            EmbeddingClient(str(tmp_path / "missing.sock"), timeout=0.2)
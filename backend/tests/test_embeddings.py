@@ -0,0 +1,145 @@
+"""
+Tests for embedding backend selection, the dimension check and the ONNX
+backend's tokenize/pool/normalize path (with a stubbed ONNX Runtime session).
+"""
+
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import onnxruntime
+import pytest
+from tokenizers import Tokenizer, models, pre_tokenizers
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.config import settings
+from backend.db import singletons
+from backend.db.cache import CachedEmbeddings, MemoryCacheBackend
+from backend.rag import embedding_server, embeddings
+from backend.rag.embeddings import OnnxEmbeddings, _check_dimension, get_embeddings
+
+VOCAB = ["[PAD]", "[UNK]", "cpap", "knee", "sleep", "apnea"]
+DIM = 4
+
+
+class StubSession:
+    """ONNX Runtime session whose token embedding is a one-hot of the token id (mod DIM)."""
+
+    def __init__(self, model_file, options=None, providers=None, dim=DIM):
+        self.model_file = model_file
+        self.dim = dim
+
+    def get_inputs(self):
+        return [SimpleNamespace(name=n) for n in ("input_ids", "attention_mask", "token_type_ids")]
+
+    def get_outputs(self):
+        return [SimpleNamespace(shape=["batch", "sequence", self.dim])]
+
+    def run(self, output_names, feeds):
+        assert set(feeds) == {"input_ids", "attention_mask", "token_type_ids"}
+        return [np.eye(self.dim, dtype=np.float32)[feeds["input_ids"] % self.dim]]
+
+
+@pytest.fixture
+def model_dir(tmp_path, monkeypatch):
+    tokenizer = Tokenizer(models.WordLevel({w: i for i, w in enumerate(VOCAB)}, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    tokenizer.save(str(tmp_path / "tokenizer.json"))
+    (tmp_path / "model.onnx").write_bytes(b"")
+    (tmp_path / "model_int8.onnx").write_bytes(b"")
+    monkeypatch.setattr(onnxruntime, "InferenceSession", StubSession)
+    monkeypatch.setattr(settings, "EMBEDDING_ONNX_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "EMBEDDING_DIM", DIM)
+    return tmp_path
+
+
+class TestOnnxEmbeddings:
+    def test_mean_pooled_normalized_and_in_input_order(self, model_dir):
+        encoder = OnnxEmbeddings()
+        assert encoder.dimension == DIM and encoder.backend_name == "onnx"
+
+        # Length-sorted batching must not reorder the results; padding is left out of the mean
+        vectors = np.asarray(encoder.embed_documents(["cpap sleep apnea knee", "knee", "cpap cpap sleep"]))
+        np.testing.assert_allclose(np.linalg.norm(vectors, axis=1), 1.0, rtol=1e-6)
+        np.testing.assert_allclose(vectors[1], [0, 0, 0, 1], atol=1e-6)
+        np.testing.assert_allclose(vectors[2], np.array([1, 0, 2, 0]) / np.sqrt(5), rtol=1e-6)
+        np.testing.assert_allclose(encoder.embed_query("knee"), vectors[1], rtol=1e-6)
+        assert encoder.embed_documents([]) == []
+
+    def test_max_seq_length_comes_from_the_export(self, model_dir, monkeypatch):
+        monkeypatch.setattr(settings, "EMBEDDING_MAX_SEQ_LENGTH", 256)
+        assert OnnxEmbeddings().max_seq_length == 256
+
+        (model_dir / "tokenizer_config.json").write_text(json.dumps({"model_max_length": 512}))
+        assert OnnxEmbeddings().max_seq_length == 512
+        (model_dir / "sentence_bert_config.json").write_text(json.dumps({"max_seq_length": 3}))
+        encoder = OnnxEmbeddings()
+        assert encoder.max_seq_length == 3
+        # Texts past the limit are truncated to it, as SentenceTransformer does
+        np.testing.assert_allclose(encoder.embed_query("cpap sleep apnea knee knee"),
+                                   encoder.embed_query("cpap sleep apnea"), rtol=1e-6)
+
+    def test_unbounded_tokenizer_limit_is_ignored(self, model_dir, monkeypatch):
+        monkeypatch.setattr(settings, "EMBEDDING_MAX_SEQ_LENGTH", 128)
+        (model_dir / "tokenizer_config.json").write_text(json.dumps({"model_max_length": int(1e30)}))
+        assert OnnxEmbeddings().max_seq_length == 128
+
+    def test_symbolic_output_dimension_is_probed(self, model_dir, monkeypatch):
+        class SymbolicSession(StubSession):
+            def get_outputs(self):
+                return [SimpleNamespace(shape=["batch", "sequence", "hidden"])]
+
+        monkeypatch.setattr(onnxruntime, "InferenceSession", SymbolicSession)
+        assert OnnxEmbeddings().dimension == DIM
+
+    def test_missing_model_file(self, tmp_path):
+        with pytest.raises(ValueError, match="Export it with"):
+            OnnxEmbeddings(model_dir=str(tmp_path))
+
+
+class TestDimensionCheck:
+    def test_mismatch_is_rejected(self, monkeypatch):
+        monkeypatch.setattr(settings, "EMBEDDING_DIM", 384)
+        _check_dimension("m", 384)
+        with pytest.raises(ValueError, match="768-dim vectors but EMBEDDING_DIM is 384"):
+            _check_dimension("m", 768)
+
+    def test_unset_dimension_accepts_any_model(self, monkeypatch):
+        monkeypatch.setattr(settings, "EMBEDDING_DIM", 0)
+        _check_dimension("m", 768)
+
+    def test_onnx_model_of_another_dimension_fails_to_load(self, model_dir, monkeypatch):
+        monkeypatch.setattr(settings, "EMBEDDING_DIM", 384)
+        with pytest.raises(ValueError, match="EMBEDDING_DIM is 384"):
+            OnnxEmbeddings()
+
+
+class TestGetEmbeddings:
+    def test_named_backends(self, model_dir, monkeypatch):
+        monkeypatch.setattr(embeddings, "LocalEmbeddings", lambda: "torch-model")
+        assert get_embeddings("torch") == "torch-model"
+        assert get_embeddings("ONNX").session.model_file.endswith("model.onnx")
+        quantized = get_embeddings("onnx-int8")
+        assert quantized.backend_name == "onnx-int8" and quantized.session.model_file.endswith("model_int8.onnx")
+        with pytest.raises(ValueError, match="Unknown EMBEDDING_BACKEND 'tensorflow'"):
+            get_embeddings("tensorflow")
+
+    def test_default_uses_sidecar_and_cache_when_configured(self, monkeypatch):
+        monkeypatch.setattr(embedding_server, "EmbeddingClient", lambda: "sidecar")
+        monkeypatch.setattr(embeddings, "LocalEmbeddings", lambda: "torch-model")
+        monkeypatch.setattr(settings, "EMBEDDING_BACKEND", "torch")
+        monkeypatch.setattr(settings, "CACHE_EMBEDDING_TTL_SECONDS", 60)
+        monkeypatch.setattr(singletons, "_cache_backend_created", True)
+        monkeypatch.setattr(singletons, "_cache_backend_instance", None)
+
+        monkeypatch.setattr(settings, "EMBEDDING_SERVER_SOCKET", "")
+        assert get_embeddings() == "torch-model"
+        monkeypatch.setattr(settings, "EMBEDDING_SERVER_SOCKET", "/tmp/embed.sock")
+        assert get_embeddings() == "sidecar"
+
+        monkeypatch.setattr(singletons, "_cache_backend_instance", MemoryCacheBackend())
+        cached = get_embeddings()
+        assert isinstance(cached, CachedEmbeddings) and cached.encoder == "sidecar"
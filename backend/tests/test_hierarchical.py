@@ -0,0 +1,109 @@
+"""
+Tests for two-level retrieval: policy summary routing, then chunk search.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.rag.hierarchical import HierarchicalVectorStore
+from backend.rag.numpy_store import NumpyVectorStore
+from backend.rag.versioning import swap_policy_version
+from backend.tests.test_numpy_store import KeywordEncoder
+
+CHUNKS = [
+    ("sleep-a", "Coverage", "cpap sleep apnea"),
+    ("sleep-a", "Criteria", "apnea sleep sleep"),
+    ("knee-b", "Coverage", "knee surgery"),
+    ("knee-b", "Imaging", "mri knee"),
+    ("mix-c", "General", "cpap knee"),
+]
+
+
+def _chunks(rows, version="v1", start=0):
+    return [
+        {"chunk_id": start + i, "text": text, "metadata": {
+            "policy_id": policy_id, "policy_name": policy_id, "payer": "Medicare",
+            "section_path": section, "version_tag": f"{policy_id}@{version}",
+        }}
+        for i, (policy_id, section, text) in enumerate(rows)
+    ]
+
+
+def _store(**kwargs):
+    encoder = KeywordEncoder()
+    return HierarchicalVectorStore(
+        NumpyVectorStore(dim=6, encoder=encoder, collection_name="chunks"),
+        NumpyVectorStore(dim=6, encoder=encoder, collection_name="summaries"),
+        **kwargs,
+    )
+
+
+@pytest.fixture
+def store():
+    s = _store(top_policies=1, summary_level="section")
+    s.add_chunks(_chunks(CHUNKS))
+    return s
+
+
+class TestHierarchicalRetrieval:
+    def test_chunk_search_is_restricted_to_routed_policies(self, store):
+        flat = store.chunks.search("cpap sleep apnea", limit=5)
+        assert "mix-c" in {h["metadata"]["policy_id"] for h in flat}
+
+        assert store.route(store.encoder.embed_query("cpap sleep apnea")) == ["sleep-a"]
+        hits = store.search("cpap sleep apnea", limit=5)
+        assert {h["metadata"]["policy_id"] for h in hits} == {"sleep-a"} and len(hits) == 2
+
+    def test_summary_per_section_or_policy(self, store):
+        assert store.summaries.count() == 5 and store.count() == 5
+        by_policy = _store(summary_level="policy")
+        by_policy.add_chunks(_chunks(CHUNKS))
+        assert by_policy.summaries.count() == 3
+
+    def test_pinned_policy_and_list_filters(self, store):
+        hits = store.search("cpap sleep apnea", limit=5, filter_metadata={"policy_id": "mix-c"})
+        assert [h["chunk_id"] for h in hits] == ["4"]
+        hits = store.chunks.search("knee", limit=5, filter_metadata={"policy_id": ["sleep-a", "mix-c"]})
+        assert {h["metadata"]["policy_id"] for h in hits} == {"sleep-a", "mix-c"}
+
+    def test_replace_and_delete_keep_summaries_in_step(self, store):
+        new = _chunks([("knee-b", "Coverage", "knee knee surgery")], version="v2", start=10)
+        swap_policy_version(store, "knee-b", "knee-b@v2", lambda: store.add_chunks(new))
+
+        assert store.summaries.version_tags("knee-b") == {"knee-b@v2"}
+        assert store.summaries.count() == 4
+        assert store.route(store.encoder.embed_query("knee surgery")) == ["knee-b"]
+
+        store.delete_policy("knee-b")
+        assert not store.summaries.has_policy("knee-b")
+        assert "knee-b" not in store.route(store.encoder.embed_query("knee surgery"))
+
+    @pytest.mark.parametrize("level", ["section", "policy"])
+    def test_summaries_rebuilt_from_streamed_chunks_match_ingest(self, level, monkeypatch):
+        ingested = _store(summary_level=level)
+        ingested.add_chunks(_chunks(CHUNKS))
+
+        s = _store(summary_level=level)
+        s.chunks.add_chunks(_chunks(CHUNKS))
+        assert s.summaries.count() == 0
+        # Batches of two split every multi-chunk policy across batches
+        export = s.chunks.export_points
+        monkeypatch.setattr(s.chunks, "export_points", lambda batch_size=256: export(2))
+        assert s.rebuild_summaries() == ingested.summaries.count()
+
+        rebuilt = {i: v for ids, vs, _ in s.summaries.export_points() for i, v in zip(ids, vs)}
+        expected = {i: v for ids, vs, _ in ingested.summaries.export_points() for i, v in zip(ids, vs)}
+        assert rebuilt.keys() == expected.keys()
+        for i in expected:
+            np.testing.assert_allclose(rebuilt[i], expected[i], rtol=1e-6, atol=1e-6)
+
+    def test_chunk_payloads_match_the_flat_store(self, store):
+        flat = NumpyVectorStore(dim=6, encoder=KeywordEncoder(), collection_name="flat")
+        flat.add_chunks(_chunks(CHUNKS))
+        assert [p for _, _, ps in flat.export_points() for p in ps] == \
+            [p for _, _, ps in store.export_points() for p in ps]
@@ -0,0 +1,66 @@
+"""
+Tests for Prometheus instrumentation: node histograms, LLM callbacks and the /metrics endpoint.
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+from prometheus_client import REGISTRY
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+
+from backend import metrics
+from backend.rag.pipeline import timed_node
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+class TestMetrics:
+    def test_timed_node_observes_histogram_and_state(self):
+        async def node(state):
+            return {"llm_calls": 1}
+
+        before = _sample("claimaudit_audit_node_seconds_count", node="verify")
+        update = asyncio.run(timed_node("verify", node)({}))
+
+        assert update["llm_calls"] == 1
+        assert update["node_timings"]["verify"] >= 0
+        assert _sample("claimaudit_audit_node_seconds_count", node="verify") == before + 1
+
+    def test_llm_handler_counts_calls(self):
+        llm = FakeListChatModel(responses=["ok"], callbacks=[metrics.llm_metrics_handler("fake")])
+        before = _sample("claimaudit_llm_calls_total", provider="fake", status="ok")
+
+        asyncio.run(llm.ainvoke("hello"))
+
+        assert _sample("claimaudit_llm_calls_total", provider="fake", status="ok") == before + 1
+        assert _sample("claimaudit_llm_call_seconds_count", provider="fake") >= 1
+
+    def test_token_usage_conventions(self):
+        message = AIMessage(content="x", usage_metadata={"input_tokens": 120, "output_tokens": 30, "total_tokens": 150})
+        assert metrics.token_usage(LLMResult(generations=[[ChatGeneration(message=message)]])) == (120, 30)
+
+        groq_style = LLMResult(
+            generations=[[ChatGeneration(message=AIMessage(content="x"))]],
+            llm_output={"token_usage": {"prompt_tokens": 50, "completion_tokens": 7}},
+        )
+        assert metrics.token_usage(groq_style) == (50, 7)
+
+    def test_metrics_endpoint(self):
+        from fastapi.testclient import TestClient
+        from backend.main import app
+
+        metrics.record_cache("query_embedding", hit=True)
+        response = TestClient(app).get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert 'claimaudit_cache_requests_total{cache="query_embedding",result="hit"}' in response.text
+        assert "claimaudit_audit_node_seconds_bucket" in response.text
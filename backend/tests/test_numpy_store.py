@@ -0,0 +1,104 @@
+"""
+Tests for the in-process NumPy vector store engine.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.rag.numpy_store import NumpyVectorStore
+
+
+class KeywordEncoder:
+    """Deterministic bag-of-words embeddings over a tiny vocabulary."""
+
+    VOCAB = ["cpap", "knee", "mri", "sleep", "apnea", "surgery"]
+
+    def _embed(self, text):
+        words = text.lower().split()
+        return [float(words.count(w)) + 0.01 for w in self.VOCAB]
+
+    def embed_documents(self, texts):
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+def _chunk(chunk_id, text, policy_id, payer):
+    return {"chunk_id": chunk_id, "text": text, "metadata": {"policy_id": policy_id, "payer": payer, "policy_name": policy_id}}
+
+
+@pytest.fixture(params=["float32", "float16"])
+def store(request):
+    s = NumpyVectorStore(dim=6, dtype=request.param, encoder=KeywordEncoder(), initial_capacity=2, compact_ratio=0.5)
+    s.add_chunks([
+        _chunk(1, "cpap sleep apnea", "ncd-cpap", "Medicare"),
+        _chunk(2, "knee surgery", "knee-policy", "Aetna"),
+        _chunk(3, "mri knee", "knee-policy", "Aetna"),
+        _chunk(4, "sleep apnea cpap cpap", "aetna-cpap", "Aetna"),
+    ])
+    return s
+
+
+class TestNumpyVectorStore:
+    def test_top_k_matches_brute_force(self, store):
+        results = store.search("cpap apnea", limit=2)
+        assert [r["chunk_id"] for r in results] == ["4", "1"]
+        assert results[0]["score"] >= results[1]["score"]
+        assert results[0]["metadata"]["policy_id"] == "aetna-cpap"
+
+    def test_filters_use_postings(self, store):
+        results = store.search("cpap apnea", limit=5, filter_metadata={"payer": "Medicare"})
+        assert [r["chunk_id"] for r in results] == ["1"]
+        assert store.search("cpap", filter_metadata={"payer": "Unknown"}) == []
+        both = store.search("knee", limit=5, filter_metadata={"payer": "Aetna", "policy_id": "knee-policy"})
+        assert {r["chunk_id"] for r in both} == {"2", "3"}
+
+    def test_limit_larger_than_matches(self, store):
+        assert len(store.search("knee", limit=50)) == 4
+
+    def test_upsert_replaces_row(self, store):
+        store.add_chunks([_chunk(1, "knee surgery", "ncd-cpap", "Medicare")])
+        assert store.count() == 4
+        hits = store.search("knee surgery", limit=5, filter_metadata={"payer": "Medicare"})
+        assert [r["text"] for r in hits] == ["knee surgery"]
+
+    def test_delete_and_compaction(self, store):
+        assert store.delete([2, 3, 99]) == 2
+        assert store.count() == 2
+        # Half the rows were tombstoned, which triggers compaction at ratio 0.5
+        store.delete([4])
+        assert store._dead == 0 and store._size == 1
+        assert not store.has_policy("knee-policy")
+        assert store.has_policy("ncd-cpap")
+        assert [r["chunk_id"] for r in store.search("cpap")] == ["1"]
+
+    def test_export_roundtrip(self, store):
+        ids, vectors, payloads = [], [], []
+        for batch_ids, batch_vectors, batch_payloads in store.export_points(batch_size=3):
+            ids += batch_ids
+            vectors += batch_vectors
+            payloads += batch_payloads
+        copy = NumpyVectorStore(dim=6, encoder=KeywordEncoder())
+        copy.import_points(ids, np.asarray(vectors), payloads)
+        assert copy.count() == store.count()
+        assert [r["chunk_id"] for r in copy.search("mri knee", limit=2)] == [r["chunk_id"] for r in store.search("mri knee", limit=2)]
+
+    def test_paused_export_does_not_block_writes(self, store):
+        import threading
+
+        export = store.export_points(batch_size=1)
+        first = next(export)
+        writer = threading.Thread(target=store.add_chunks, args=([_chunk(9, "knee brace", "knee-policy", "Aetna")],))
+        writer.start()
+        writer.join(timeout=5)
+        assert not writer.is_alive()
+        assert store.search("knee brace", limit=1)[0]["chunk_id"] == "9"
+
+        # The export is a snapshot of the rows live when it started
+        assert len(first[0]) + sum(len(ids) for ids, _, _ in export) == 4
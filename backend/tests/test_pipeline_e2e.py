@@ -0,0 +1,51 @@
+"""
+Smoke test for the offline end-to-end benchmark (stub LLM, in-process vector store).
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.config import settings
+from backend.rag import pipeline, singletons
+from backend.benchmarks import pipeline_e2e
+
+
+@pytest.fixture
+def restore_globals(monkeypatch):
+    # setup_offline rewires these process globals; monkeypatch puts them back afterwards
+    monkeypatch.setattr(pipeline, "get_llm", pipeline.get_llm)
+    monkeypatch.setattr(pipeline, "_audit_graph", None)
+    monkeypatch.setattr(singletons, "_vector_store_instance", singletons._vector_store_instance)
+    for name in ("GROQ_API_KEY", "AUDIT_LOG_ENABLED", "RULE_ENGINE_ENABLED", "TRIAGE_ENABLED",
+                 "CONFIDENCE_SCORER", "SCORER_RECORD_PATH"):
+        monkeypatch.setattr(settings, name, getattr(settings, name))
+
+
+class TestPipelineBenchmark:
+    def test_runs_offline_and_flags_regressions(self, restore_globals, tmp_path):
+        out = tmp_path / "e2e.json"
+        code = pipeline_e2e.main([
+            "--claims", "12", "--concurrency", "1,4", "--chunks", "200", "--policies", "10",
+            "--latency-ms", "0", "--reject-rate", "0.5", "--warmup", "0", "--out", str(out),
+        ])
+        report = json.loads(out.read_text())
+
+        assert code == 0
+        one, four = report["results"]
+        assert one["claims"] == four["claims"] == 12 and not one["failures"]
+        # Draws are seeded from the prompts, so concurrency does not change the outcomes
+        assert one["decisions"] == four["decisions"]
+        assert 0 < one["refine_rate"] < 1 and one["llm_calls_per_claim"] > 3
+
+        slower = json.loads(out.read_text())
+        slower["results"][0]["throughput_per_s"] *= 0.5
+        slower["results"][1]["p95_ms"] *= 2
+        regressions = pipeline_e2e.compare(slower, report, tolerance=0.2)
+        assert [line.split(" ")[:2] for line in regressions] == [
+            ["concurrency=1", "throughput_per_s:"], ["concurrency=4", "p95_ms:"]
+        ]
@@ -0,0 +1,108 @@
+"""
+Tests for ingest-time rule compilation and local rule evaluation.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend import metrics
+from backend.rag.rules import DENY_CONFIDENCE, RuleIndex, compile_policy_rules, evaluate_claim, evaluate_with_index
+from backend.tests.conftest import make_claim
+
+NCD_CHUNKS = [
+    {"chunk_id": 11, "text": (
+        "2. The provider of CPAP must conduct education of the beneficiary prior to use.\n"
+        "3. A positive diagnosis of OSA for the coverage of CPAP must include a clinical evaluation "
+        "and a positive: attended PSG, or unattended HST (Type II, III, or IV)."
+    )},
+    {"chunk_id": 12, "text": (
+        "4. An initial 12-week period of CPAP is covered in adult patients with OSA if:\n"
+        "a. AHI or RDI >= 15 events per hour, or\n"
+        "b. AHI or RDI >= 5 and <= 14 events per hour with documented symptoms "
+        "(excessive daytime sleepiness, insomnia, or history of stroke)."
+    )},
+]
+DOCS = "clinical evaluation and attended PSG; beneficiary education completed."
+
+
+@pytest.fixture
+def rules():
+    return compile_policy_rules("ncd-240-4", "NCD 240.4", NCD_CHUNKS, ["E0601"], ["G47.33"])
+
+
+class TestCompilation:
+    def test_extracts_thresholds_documentation_and_limits(self, rules):
+        assert [(c.min_value, c.max_value) for c in rules.criteria] == [(15.0, None), (5.0, 14.0)]
+        assert rules.criteria[0].metrics == ["AHI", "RDI"]
+        assert rules.criteria[1].requires_any[-1] == "history of stroke"
+        assert [d.alternatives for d in rules.documentation] == [
+            [["education", "beneficiary"]],
+            [["clinical", "evaluation"]],
+            [["attended", "psg"], ["unattended", "hst"]],
+        ]
+        assert rules.limits == ["12-week period"]
+        assert rules.source_chunk_ids == ["11", "12"]
+
+    def test_index_versions_only_change_with_content(self, rules):
+        index = RuleIndex()
+        index.put(rules)
+        index.put(compile_policy_rules("ncd-240-4", "NCD 240.4", NCD_CHUNKS, ["E0601"], ["G47.33"]))
+        assert len(index.versions("ncd-240-4")) == 1
+        index.put(compile_policy_rules("ncd-240-4", "NCD 240.4", NCD_CHUNKS[:1] + NCD_CHUNKS, ["E0601"]))
+        assert len(index.versions("ncd-240-4")) == 2
+
+
+class TestEvaluation:
+    def test_high_ahi_with_documentation_approves(self, rules):
+        draft = evaluate_claim(make_claim(notes=f"AHI 22. {DOCS}"), rules)
+        assert draft["decision"] == "APPROVE"
+        assert all(r["citation_text"] in NCD_CHUNKS[0]["text"] + NCD_CHUNKS[1]["text"] for r in draft["rules"])
+
+    def test_low_ahi_denies(self, rules):
+        draft = evaluate_claim(make_claim(notes=f"AHI of 3. {DOCS}"), rules)
+        assert draft["decision"] == "DENY" and draft["confidence"] == DENY_CONFIDENCE < 1.0
+
+    @pytest.mark.parametrize("notes", [
+        "AHI 22.",                      # documentation missing
+        f"{DOCS}",                      # no metric values
+        f"AHI 9. {DOCS}",               # mid range without documented symptoms
+    ])
+    def test_defers_when_not_fully_covered(self, rules, notes):
+        assert evaluate_claim(make_claim(notes=notes), rules) is None
+
+    @pytest.mark.parametrize("notes", [
+        "AHI 22. Clinical evaluation done, no attended PSG; beneficiary education completed.",
+        "AHI 22. Clinical evaluation done. Attended PSG was not performed. Beneficiary education completed.",
+        "AHI 22. Clinical evaluation and attended PSG; beneficiary education hasn't been done.",
+        "AHI 3. Clinical evaluation and attended PSG pending; beneficiary education completed.",
+        "AHI 9. {DOCS} Patient denies excessive daytime sleepiness.",
+        "AHI 22. Clinical evaluation and PSG. Attended sleep lab. Beneficiary education completed.",
+    ])
+    def test_negated_or_scattered_documentation_defers(self, rules, notes):
+        assert evaluate_claim(make_claim(notes=notes.format(DOCS=DOCS)), rules) is None
+
+    def test_affirmed_documentation_next_to_unrelated_negation_approves(self, rules):
+        notes = f"AHI 22. No complications. {DOCS} Attended PSG, no adverse events."
+        assert evaluate_claim(make_claim(notes=notes), rules)["decision"] == "APPROVE"
+
+    def test_uncovered_code_defers(self, rules):
+        assert evaluate_claim(make_claim(notes=f"AHI 22. {DOCS}", cpt_codes=["99213"]), rules) is None
+
+
+class TestRuleEngineMetrics:
+    def test_outcomes_are_counted_in_prometheus(self, rules):
+        index = RuleIndex()
+        index.put(rules)
+        chunks = [{"metadata": {"policy_id": "ncd-240-4"}}]
+        before = metrics.rule_engine_counts()
+
+        evaluate_with_index(make_claim(notes=f"AHI 22. {DOCS}"), index, chunks)
+        evaluate_with_index(make_claim(notes="AHI 22."), index, chunks)
+
+        after = metrics.rule_engine_counts()
+        assert after["decided_locally"] - before["decided_locally"] == 1
+        assert after["deferred"] - before["deferred"] == 1
@@ -0,0 +1,68 @@
+"""
+Tests for the deterministic local confidence scorer.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.rag.scoring import compute_local_confidence, citation_match_ratio
+
+CONTEXT = (
+    "--- POLICY: Medicare NCD 240.4 | SECTION: Main ---\n"
+    "Coverage of CPAP is initially limited to a 12-week period.\n"
+    "The provider of CPAP must conduct education of the beneficiary prior to use."
+)
+CHUNKS = [{"score": 0.9}, {"score": 0.8}]
+
+
+def _draft(decision="APPROVE", quotes=None, missing=None):
+    quotes = quotes or ["Coverage of CPAP is initially limited to a 12-week period."]
+    return {
+        "decision": decision,
+        "rules": [{"citation_text": q} for q in quotes],
+        "missing_info": missing or [],
+    }
+
+
+class TestLocalScorer:
+    def test_fully_cited_verified_audit_scores_high(self):
+        score, reasoning = compute_local_confidence(
+            _draft(), {"is_hallucination": False}, 1, CHUNKS, CONTEXT
+        )
+        assert score >= 0.9
+        assert "citation coverage 1.00" in reasoning
+
+    def test_citation_match_ignores_whitespace_and_case(self):
+        rules = [{"citation_text": "coverage of  CPAP is\ninitially limited"}, {"citation_text": "invented"}]
+        assert citation_match_ratio(rules, CONTEXT) == 0.5
+
+    def test_pend_info_is_capped(self):
+        score, _ = compute_local_confidence(
+            _draft("PEND_INFO", missing=["AHI value"]), {"is_hallucination": False}, 1, CHUNKS, CONTEXT
+        )
+        assert 0.5 <= score <= 0.7
+
+    def test_refinement_loop_drops_below_half(self):
+        score, _ = compute_local_confidence(
+            _draft(), {"is_hallucination": False}, 2, CHUNKS, CONTEXT
+        )
+        assert score < 0.5
+
+    def test_no_rules_scores_zero(self):
+        score, _ = compute_local_confidence(
+            {"decision": "APPROVE", "rules": []}, None, 1, CHUNKS, CONTEXT
+        )
+        assert score == 0.0
+
+    def test_rule_table_deny_keeps_its_drafted_confidence(self):
+        from backend.rag.pipeline import local_score_node
+        from backend.rag.triage import RULES_TIER
+
+        draft = {**_draft("DENY"), "confidence": 0.8}
+        state = {"audit_draft": draft, "verification": {"is_hallucination": False}, "iteration_count": 1,
+                 "retrieved_chunks": CHUNKS, "context_str": CONTEXT, "audit_tier": RULES_TIER}
+        result = local_score_node(state)
+        assert result["audit_draft"]["confidence"] == 0.8
+        assert "capped at 0.80" in result["confidence_reasoning"]
@@ -0,0 +1,71 @@
+"""
+Tests for per-payer vector store sharding and query routing.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.rag.numpy_store import NumpyVectorStore
+from backend.rag.sharding import SHARED_SHARD, ShardedVectorStore, parse_payer_groups
+from backend.tests.test_numpy_store import KeywordEncoder
+
+
+def _chunk(chunk_id, text, policy_id, payer=None):
+    metadata = {"policy_id": policy_id}
+    if payer:
+        metadata["payer"] = payer
+    return {"chunk_id": chunk_id, "text": text, "metadata": metadata}
+
+
+@pytest.fixture
+def store():
+    encoder = KeywordEncoder()
+    s = ShardedVectorStore(
+        lambda name: NumpyVectorStore(dim=6, encoder=encoder, collection_name=name),
+        encoder,
+        payer_groups=parse_payer_groups("national=Medicare,UHC"),
+    )
+    s.add_chunks([
+        _chunk(1, "cpap sleep apnea", "ncd-cpap", "Medicare"),
+        _chunk(2, "knee surgery", "uhc-knee", "UHC"),
+        _chunk(3, "cpap apnea", "tufts-cpap", "Tufts Health"),
+        _chunk(4, "mri knee", "generic-mri"),
+    ])
+    return s
+
+
+class TestSharding:
+    def test_payer_groups(self):
+        groups = parse_payer_groups("national = Medicare, UHC ; northeast=Harvard Pilgrim")
+        assert groups == {"medicare": "national", "uhc": "national", "harvard_pilgrim": "northeast"}
+
+    def test_chunks_land_in_payer_shards(self, store):
+        assert set(store.shards) == {"national", "tufts_health", SHARED_SHARD}
+        assert store.shards["national"].count() == 2
+        assert store.count() == 4
+
+    def test_payer_filter_routes_to_one_shard(self, store):
+        assert store.route({"payer": "Tufts Health"}) == [store.shards["tufts_health"]]
+        hits = store.search("cpap apnea", limit=5, filter_metadata={"payer": "Tufts Health"})
+        assert [h["chunk_id"] for h in hits] == ["3"]
+        # Grouped payers share a shard but the payload filter still separates them
+        hits = store.search("cpap knee", limit=5, filter_metadata={"payer": "UHC"})
+        assert [h["chunk_id"] for h in hits] == ["2"]
+
+    def test_unknown_payer_has_no_shard(self, store):
+        assert store.route({"payer": "Nobody"}) == []
+        assert store.search("cpap", filter_metadata={"payer": "Nobody"}) == []
+
+    def test_policy_filter_routes_to_holding_shard(self, store):
+        assert store.route({"policy_id": "generic-mri"}) == [store.shards[SHARED_SHARD]]
+        assert store.has_policy("ncd-cpap") and not store.has_policy("missing")
+
+    def test_fan_out_merges_top_k(self, store):
+        hits = store.search("cpap apnea", limit=2)
+        assert [h["chunk_id"] for h in hits] == ["3", "1"]
+        assert hits[0]["score"] >= hits[1]["score"]
+        assert len(store.search("knee", limit=10)) == 4
@@ -0,0 +1,85 @@
+"""
+Tests for vector store snapshots: export, import and the startup import.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.config import settings
+from backend.rag.numpy_store import NumpyVectorStore
+from backend.rag.snapshot import MANIFEST, export_snapshot, import_snapshot, load_snapshot_if_empty, read_manifest
+from backend.tests.test_numpy_store import KeywordEncoder, _chunk
+
+
+@pytest.fixture(autouse=True)
+def embedding_settings(monkeypatch):
+    monkeypatch.setattr(settings, "EMBEDDING_MODEL", "keyword-test")
+    monkeypatch.setattr(settings, "EMBEDDING_DIM", 6)
+
+
+def _store(chunks=()):
+    store = NumpyVectorStore(dim=6, encoder=KeywordEncoder())
+    store.add_chunks(list(chunks))
+    return store
+
+
+def _points(store):
+    ids, vectors, payloads = [], [], []
+    for batch_ids, batch_vectors, batch_payloads in store.export_points():
+        ids.extend(batch_ids)
+        vectors.extend(batch_vectors)
+        payloads.extend(batch_payloads)
+    return ids, np.asarray(vectors, dtype=np.float32), payloads
+
+
+@pytest.fixture
+def source():
+    return _store([
+        _chunk(1, "cpap sleep apnea", "ncd-cpap", "Medicare"),
+        _chunk(2, "knee surgery", "knee-policy", "Aetna"),
+        _chunk(3, "mri knee", "knee-policy", "Aetna"),
+    ])
+
+
+class TestSnapshot:
+    def test_round_trip_keeps_vectors_payloads_and_header(self, source, tmp_path):
+        manifest = export_snapshot(source, str(tmp_path))
+        assert read_manifest(str(tmp_path)) == manifest
+        assert manifest["embedding_model"] == "keyword-test" and manifest["embedding_dim"] == 6
+        assert manifest["count"] == 3 and manifest["policy_ids"] == ["knee-policy", "ncd-cpap"]
+
+        target = _store()
+        assert import_snapshot(target, str(tmp_path)) == manifest
+        ids, vectors, payloads = _points(source)
+        new_ids, new_vectors, new_payloads = _points(target)
+        assert new_ids == ids and new_payloads == payloads
+        np.testing.assert_allclose(new_vectors, vectors, rtol=1e-6)
+        assert [r["chunk_id"] for r in target.search("knee mri", limit=1)] == ["3"]
+
+    def test_startup_import_skips_a_non_empty_store(self, source, tmp_path, monkeypatch):
+        export_snapshot(source, str(tmp_path))
+        monkeypatch.setattr(settings, "VECTOR_SNAPSHOT_PATH", str(tmp_path))
+
+        existing = _store([_chunk(9, "cpap", "other", "Aetna")])
+        assert not load_snapshot_if_empty(existing)
+        assert existing.count() == 1
+
+        empty = _store()
+        assert load_snapshot_if_empty(empty)
+        assert empty.count() == 3
+
+    def test_snapshot_of_another_dimension_is_rejected(self, source, tmp_path):
+        export_snapshot(source, str(tmp_path))
+        manifest = read_manifest(str(tmp_path))
+        (tmp_path / MANIFEST).write_text(json.dumps({**manifest, "embedding_dim": 384}), encoding="utf-8")
+
+        target = _store()
+        with pytest.raises(ValueError, match="384-dim"):
+            import_snapshot(target, str(tmp_path))
+        assert target.count() == 0
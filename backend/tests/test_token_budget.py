@@ -0,0 +1,105 @@
+"""
+Tests for per-audit token accounting and token budgets in the audit graph.
+"""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+from backend.config import settings
+from backend.rag import pipeline
+from backend.rag.token_budget import batch_scope, llm_cost, parse_prices, usage_handler
+from backend.tests.conftest import make_claim
+
+DRAFT = {"decision": "PEND_INFO", "confidence": 0.5, "explanation": "draft", "rules": [], "missing_info": []}
+RESPONSES = {
+    "audit": DRAFT,
+    "verify_bad": {"is_hallucination": True, "errors": ["unsupported rule"], "improvement_notes": "fix"},
+    "refine": {**DRAFT, "explanation": "refined"},
+    "verify_ok": {"is_hallucination": False, "errors": [], "improvement_notes": ""},
+    "score": {"final_score": 0.8, "reasoning": "solid"},
+}
+
+
+def _llm(*steps, tokens=(900, 100)):
+    messages = iter([
+        AIMessage(
+            content=json.dumps(RESPONSES[step]),
+            usage_metadata={"input_tokens": tokens[0], "output_tokens": tokens[1], "total_tokens": sum(tokens)},
+        )
+        for step in steps
+    ])
+    return GenericFakeChatModel(messages=messages, callbacks=[usage_handler("groq")])
+
+
+@pytest.fixture
+def graph(monkeypatch):
+    async def retrieve(state):
+        chunk = {"chunk_id": "1", "score": 0.9, "text": "policy", "metadata": {"policy_id": "p", "policy_name": "P"}}
+        return {"retrieved_chunks": [chunk], "context_str": "policy"}
+
+    monkeypatch.setattr(pipeline, "retrieve_node", retrieve)
+    monkeypatch.setattr(settings, "RULE_ENGINE_ENABLED", False)
+    monkeypatch.setattr(settings, "TRIAGE_ENABLED", False)
+    monkeypatch.setattr(settings, "CONFIDENCE_SCORER", "llm")
+    monkeypatch.setattr(settings, "SCORER_RECORD_PATH", "")
+    monkeypatch.setattr(settings, "LLM_PRICES", "groq=1/2")
+    return pipeline.create_audit_graph()
+
+
+def _run(graph, monkeypatch, llm):
+    monkeypatch.setattr(pipeline, "get_llm", lambda temperature=0.0: llm)
+    claim = make_claim("C-1", cpt_codes=["99213"], icd_codes=[])
+    return asyncio.run(graph.ainvoke(pipeline.initial_audit_state(claim)))
+
+
+class TestTokenBudget:
+    def test_prices(self):
+        assert parse_prices("gemini=0.10/0.40, groq=0.59") == {"gemini": (0.10, 0.40), "groq": (0.59, 0.59)}
+
+    def test_usage_breakdown_per_node(self, graph, monkeypatch):
+        monkeypatch.setattr(settings, "AUDIT_TOKEN_BUDGET", 0)
+        state = _run(graph, monkeypatch, _llm("audit", "verify_bad", "refine", "verify_ok", "score"))
+
+        usage = state["final_audit"].usage
+        assert state["llm_calls"] == 5
+        assert usage.total_tokens == 5000 and usage.prompt_tokens == 4500
+        assert usage.nodes["verify"].calls == 2 and usage.nodes["verify"].prompt_tokens == 1800
+        assert set(usage.nodes) == {"audit", "verify", "refine", "score"}
+        assert usage.cost_usd == pytest.approx(5 * llm_cost("groq", 900, 100))
+        assert not usage.budget_stopped
+
+    def test_budget_stops_refine_loop(self, graph, monkeypatch):
+        # After audit + verify (2000 tokens) another ~1000-token call would pass 2500
+        monkeypatch.setattr(settings, "AUDIT_TOKEN_BUDGET", 2500)
+        state = _run(graph, monkeypatch, _llm("audit", "verify_bad", "refine", "verify_ok", "score"))
+
+        usage = state["final_audit"].usage
+        assert state["llm_calls"] == 2
+        assert set(usage.nodes) == {"audit", "verify"}
+        assert usage.budget_stopped and usage.budget_tokens == 2500
+        assert "Token budget reached" in state["final_audit"].explanation
+
+    def test_batch_budget_is_shared(self, graph, monkeypatch):
+        monkeypatch.setattr(settings, "AUDIT_TOKEN_BUDGET", 0)
+
+        async def audit_in_spent_batch():
+            with batch_scope(budget=1500) as meter:
+                meter.add(1000, 0, 0.0)
+                monkeypatch.setattr(pipeline, "get_llm", lambda temperature=0.0: _llm("audit", "verify_bad"))
+                claim = make_claim("C-2", cpt_codes=["99213"], icd_codes=[])
+                return await graph.ainvoke(pipeline.initial_audit_state(claim)), meter
+
+        state, meter = asyncio.run(audit_in_spent_batch())
+        # The batch had 1000 used; the draft pushed it to 2000, so verify is skipped
+        assert state["llm_calls"] == 1
+        assert state["final_audit"].usage.budget_stopped
+        assert meter.total_tokens == 2000
@@ -0,0 +1,54 @@
+"""
+Tests for risk-tiered triage routing.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.config import settings
+from backend.rag.triage import triage_claim, FAST_TIER, FULL_TIER
+from backend.tests.conftest import make_claim
+
+CHUNKS = [{"score": 0.8}, {"score": 0.7}]
+
+
+# An office visit for a cold: no risk signal
+LOW_RISK = {"cpt_codes": ["99213"], "icd_codes": ["J06.9"], "billed_amount": 40.00}
+
+
+@pytest.fixture
+def triage_settings(monkeypatch):
+    monkeypatch.setattr(settings, "TRIAGE_ENABLED", True)
+    monkeypatch.setattr(settings, "TRIAGE_FAST_MAX_AMOUNT", 500.0)
+    monkeypatch.setattr(settings, "TRIAGE_FULL_LOOP_PAYERS", "Aetna")
+    monkeypatch.setattr(settings, "TRIAGE_HIGH_RISK_CODES", "E0601, 27447")
+    monkeypatch.setattr(settings, "TRIAGE_MIN_RETRIEVAL_SCORE", 0.5)
+
+
+class TestTriage:
+    def test_low_risk_claim_takes_fast_lane(self, triage_settings):
+        tier, _ = triage_claim(make_claim(**LOW_RISK), CHUNKS)
+        assert tier == FAST_TIER
+
+    @pytest.mark.parametrize("overrides", [
+        {"billed_amount": 40000.0},
+        {"payer": "aetna"},
+        {"cpt_codes": ["27447"]},
+    ])
+    def test_risk_signals_force_full_loop(self, triage_settings, overrides):
+        tier, _ = triage_claim(make_claim(**{**LOW_RISK, **overrides}), CHUNKS)
+        assert tier == FULL_TIER
+
+    def test_weak_retrieval_forces_full_loop(self, triage_settings):
+        tier, reason = triage_claim(make_claim(**LOW_RISK), [{"score": 0.2}])
+        assert tier == FULL_TIER
+        assert "retrieval strength" in reason
+
+    def test_disabled_triage_always_full(self, triage_settings, monkeypatch):
+        monkeypatch.setattr(settings, "TRIAGE_ENABLED", False)
+        tier, _ = triage_claim(make_claim(**LOW_RISK), CHUNKS)
+        assert tier == FULL_TIER
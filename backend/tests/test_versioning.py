@@ -0,0 +1,118 @@
+"""
+Tests for policy deletion and atomic version replacement in the vector stores.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+from qdrant_client import QdrantClient
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend.config import settings
+from backend.rag.numpy_store import NumpyVectorStore
+from backend.rag.vector_store import VectorStore
+from backend.rag.versioning import VersionGate, swap_policy_version
+from backend.tests.test_numpy_store import KeywordEncoder
+
+
+def _chunks(policy_id, tag, texts, start_id):
+    return [
+        {"chunk_id": start_id + i, "text": text, "metadata": {"policy_id": policy_id, "version_tag": tag}}
+        for i, text in enumerate(texts)
+    ]
+
+
+@pytest.fixture(params=["numpy", "qdrant"])
+def store(request, monkeypatch):
+    monkeypatch.setattr(settings, "EMBEDDING_DIM", 6)
+    if request.param == "numpy":
+        s = NumpyVectorStore(dim=6, encoder=KeywordEncoder())
+    else:
+        s = VectorStore(collection_name="versioning", client=QdrantClient(":memory:"), encoder=KeywordEncoder())
+    s.add_chunks(_chunks("cpap", "cpap@v1", ["cpap sleep", "cpap apnea"], 1))
+    s.add_chunks(_chunks("knee", "knee@v1", ["knee surgery"], 10))
+    return s
+
+
+def _policy_texts(store, policy_id):
+    return sorted(h["text"] for h in store.search("cpap sleep apnea", limit=10, filter_metadata={"policy_id": policy_id}))
+
+
+class TestPolicyVersioning:
+    def test_delete_policy(self, store):
+        assert store.delete_policy("cpap") == 2
+        assert not store.has_policy("cpap")
+        assert store.delete_policy("cpap") == 0
+        assert [h["text"] for h in store.search("cpap knee", limit=10)] == ["knee surgery"]
+
+    def test_replace_has_no_empty_or_duplicate_window(self, store):
+        seen_during_write = []
+
+        def write():
+            store.add_chunks(_chunks("cpap", "cpap@v2", ["cpap apnea sleep apnea"], 100))
+            # New version is stored but still hidden: retrieval serves only v1
+            seen_during_write.append(_policy_texts(store, "cpap"))
+
+        deleted = swap_policy_version(store, "cpap", "cpap@v2", write)
+
+        assert seen_during_write == [["cpap apnea", "cpap sleep"]]
+        assert deleted == 2
+        assert _policy_texts(store, "cpap") == ["cpap apnea sleep apnea"]
+        assert store.version_tags("cpap") == {"cpap@v2"}
+        assert not store.versions.staged()
+
+    def test_failed_replace_keeps_previous_version(self, store):
+        def write():
+            store.add_chunks(_chunks("cpap", "cpap@v2", ["cpap"], 100))
+            raise RuntimeError("embedding backend down")
+
+        with pytest.raises(RuntimeError):
+            swap_policy_version(store, "cpap", "cpap@v2", write)
+
+        assert _policy_texts(store, "cpap") == ["cpap apnea", "cpap sleep"]
+        assert store.version_tags("cpap") == {"cpap@v1"}
+        assert not store.versions.staged()
+
+    @pytest.mark.parametrize("crash_in", ["activate_version", "delete_policy"])
+    def test_crash_mid_replace_leaves_one_visible_version(self, store, monkeypatch, crash_in):
+        def crash(*args, **kwargs):
+            raise SystemExit("worker killed")
+        # Die before activating the new version, or after activating it but before deleting the old one
+        monkeypatch.setattr(store, crash_in, crash)
+        with pytest.raises(SystemExit):
+            swap_policy_version(store, "cpap", "cpap@v2", lambda: store.add_chunks(
+                _chunks("cpap", "cpap@v2", ["cpap apnea sleep apnea"], 100)
+            ))
+        monkeypatch.delattr(store, crash_in)
+
+        # Another worker (its own gate, the same stored points) serves exactly one version
+        store.versions = VersionGate()
+        expected = ["cpap apnea", "cpap sleep"] if crash_in == "activate_version" else ["cpap apnea sleep apnea"]
+        assert _policy_texts(store, "cpap") == expected
+        assert store.version_tags("cpap") == {"cpap@v1", "cpap@v2"}
+
+        # The next replace (here: retrying the same version) clears the leftovers
+        swap_policy_version(store, "cpap", "cpap@v2", lambda: store.add_chunks(
+            _chunks("cpap", "cpap@v2", ["cpap apnea sleep apnea"], 100)
+        ))
+        assert _policy_texts(store, "cpap") == ["cpap apnea sleep apnea"]
+        assert store.version_tags("cpap") == {"cpap@v2"}
+
+    def test_first_replace_retires_untagged_legacy_points(self, store, monkeypatch):
+        # Chunks ingested before version tags existed
+        store.add_chunks([{"chunk_id": 50, "text": "cpap legacy", "metadata": {"policy_id": "legacy"}}])
+
+        def crash(*args, **kwargs):
+            raise SystemExit("worker killed")
+        # Die after activating the new version, before the old points are deleted
+        monkeypatch.setattr(store, "delete_policy", crash)
+        with pytest.raises(SystemExit):
+            swap_policy_version(store, "legacy", "legacy@v1", lambda: store.add_chunks(
+                _chunks("legacy", "legacy@v1", ["cpap sleep apnea"], 60)
+            ))
+        monkeypatch.delattr(store, "delete_policy")
+
+        assert _policy_texts(store, "legacy") == ["cpap sleep apnea"]
+        assert store.delete_policy("legacy", keep_version_tag="legacy@v1") == 1
@@ -0,0 +1,57 @@
+"""
+Tests for the startup warm-up and the /api/ready readiness probe.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from backend import main
+from backend.services import warmup
+from backend.services.warmup import WarmupState, run_warmup
+
+PHASES = ["load_vector_store", "load_snapshot", "seed_default_policy", "warm_encoder", "compile_audit_graph"]
+
+
+@pytest.fixture
+def state(monkeypatch):
+    """A fresh warm-up state behind /api/ready, with every phase a no-op."""
+    state = WarmupState()
+    monkeypatch.setattr(main, "get_warmup_state", lambda: state)
+    for name in ("_load_vector_store", "_load_snapshot", "_seed", "_warm_encoder", "_compile_graph"):
+        monkeypatch.setattr(warmup, name, lambda: None)
+    return state
+
+
+class TestWarmup:
+    def test_ready_is_503_until_warmup_completes(self, state):
+        # No lifespan: the app serves requests before any warm-up has run
+        client = TestClient(main.app)
+        response = client.get("/api/ready")
+        assert response.status_code == 503 and response.json()["status"] == "warming"
+
+        run_warmup(state)
+        response = client.get("/api/ready")
+        assert response.status_code == 200
+        body = response.json()
+        assert body["status"] == "ready" and body["error"] is None
+        assert set(body["phases_s"]) == {*PHASES, "total"}
+
+    def test_failed_phase_stops_warmup_and_stays_unready(self, state, monkeypatch):
+        def broken_encoder():
+            raise RuntimeError("model download failed")
+        monkeypatch.setattr(warmup, "_warm_encoder", broken_encoder)
+
+        run_warmup(state)
+        assert not state.ready and state.error == "model download failed"
+
+        response = TestClient(main.app).get("/api/ready")
+        assert response.status_code == 503
+        body = response.json()
+        assert body["status"] == "failed" and body["error"] == "model download failed"
+        # Phases after the failing one never ran
+        assert set(body["phases_s"]) == set(PHASES[:3])
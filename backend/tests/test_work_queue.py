@@ -0,0 +1,109 @@
+"""
+Tests for the audit work queue (SQLite and Redis Streams) and the worker.
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import fakeredis
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from shared.schemas import AuditDecision, AuditOutput
+from backend.config import settings
+from backend.db.work_queue import DEAD, DONE, QUEUED, RedisWorkQueue, SQLiteWorkQueue
+from backend.rag import pipeline
+from backend.services.worker import AuditWorker
+from backend.benchmarks.pipeline_e2e import StubChatModel
+from backend.tests.conftest import make_claim
+
+
+def _result(claim_id="C-1"):
+    return AuditOutput(claim_id=claim_id, decision=AuditDecision.PEND_INFO, confidence=0.5, explanation="x")
+
+
+@pytest.fixture(params=["sqlite", "redis"])
+def make_queue(request, tmp_path):
+    client = fakeredis.FakeRedis()
+
+    def make(**kwargs):
+        if request.param == "sqlite":
+            return SQLiteWorkQueue(str(tmp_path / "queue.db"), **kwargs)
+        return RedisWorkQueue(client, **kwargs)
+    return make
+
+
+class TestWorkQueue:
+    def test_enqueue_is_idempotent_per_job_id(self, make_queue):
+        queue = make_queue()
+        assert queue.enqueue([make_claim("C-1"), make_claim("C-2")], ["a", "b"]) == ["a", "b"]
+        queue.enqueue([make_claim("C-1")], ["a"])
+
+        jobs = queue.lease("w1", 10)
+        assert sorted(j.job_id for j in jobs) == ["a", "b"]
+        assert queue.lease("w2", 10) == []
+
+    def test_expired_lease_is_redelivered_and_first_result_wins(self, make_queue):
+        queue = make_queue(visibility_seconds=0.2)
+        queue.enqueue([make_claim()], ["a"])
+        first = queue.lease("w1", 1)[0]
+        time.sleep(0.3)
+        second = queue.lease("w2", 1)[0]
+
+        assert second.job_id == "a" and second.attempts == 2
+        assert queue.complete(second, _result())
+        assert not queue.complete(first, _result())
+        status = queue.status("a")
+        assert status.status == DONE and status.result.claim_id == "C-1"
+        assert queue.lease("w3", 1) == []
+
+    def test_failed_job_dies_after_max_attempts(self, make_queue):
+        queue = make_queue(visibility_seconds=0.1, max_attempts=2)
+        queue.enqueue([make_claim()], ["a"])
+        for _ in range(2):
+            job = queue.lease("w1", 1)[0]
+            queue.fail(job, "provider down")
+            time.sleep(0.15)
+
+        assert queue.lease("w1", 1) == []
+        status = queue.status("a")
+        assert status.status == DEAD and status.attempts == 2 and status.error == "provider down"
+
+    def test_redis_enqueue_completes_a_partial_job_hash(self):
+        # A hash holding only the claim, as a crash between HSETNX and XADD used to leave behind
+        queue = RedisWorkQueue(fakeredis.FakeRedis())
+        queue.client.hset(queue._key("a"), "claim", make_claim().model_dump_json())
+        assert queue.status("a") is None
+
+        queue.enqueue([make_claim()], ["a"])
+        assert queue.status("a").status == QUEUED
+        assert [j.job_id for j in queue.lease("w1", 10)] == ["a"]
+        queue.enqueue([make_claim()], ["a"])
+        assert queue.client.xlen(queue.stream) == 1
+        assert queue.status("missing") is None
+
+
+class TestAuditWorker:
+    def test_worker_audits_queued_claims(self, make_queue, monkeypatch):
+        context = {
+            "retrieved_chunks": [{"chunk_id": "1", "score": 0.9, "text": "CPAP is covered.",
+                                  "metadata": {"policy_id": "p", "policy_name": "P"}}],
+            "context_str": "--- POLICY: P | SECTION: Main ---\nCPAP is covered.",
+        }
+        monkeypatch.setattr(pipeline, "retrieve_context", lambda claim: dict(context))
+        monkeypatch.setattr(pipeline, "_audit_graph", None)
+        monkeypatch.setattr(pipeline, "get_llm", lambda temperature=0.0: StubChatModel(latency_ms=0))
+        monkeypatch.setattr(settings, "GROQ_API_KEY", "test")
+        monkeypatch.setattr(settings, "AUDIT_LOG_ENABLED", False)
+        monkeypatch.setattr(settings, "RULE_ENGINE_ENABLED", False)
+
+        queue = make_queue()
+        job_ids = queue.enqueue([make_claim(f"C-{i}") for i in range(3)])
+        asyncio.run(AuditWorker(queue, concurrency=2, poll_seconds=0.05, timeout=0).run(max_jobs=3))
+
+        statuses = [queue.status(j) for j in job_ids]
+        assert [s.status for s in statuses] == [DONE] * 3
+        assert [s.result.claim_id for s in statuses] == ["C-0", "C-1", "C-2"]
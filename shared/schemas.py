@@ -68,6 +68,26 @@ class RuleApplied(BaseModel):
     explanation: Optional[str] = None
 
 
+# ── Token Usage ───────────────────────────────────────────
+class NodeUsage(BaseModel):
+    """LLM usage of one audit graph node (summed over loop iterations)."""
+    calls: float = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost_usd: float = 0.0
+
+
+class AuditUsage(BaseModel):
+    """Per-node and total LLM token/cost breakdown of an audit."""
+    nodes: dict[str, NodeUsage] = Field(default_factory=dict)
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+    cost_usd: float = 0.0
+    budget_tokens: Optional[int] = None
+    budget_stopped: bool = Field(default=False, description="Refinement stopped early to stay within the token budget")
+
+
 # ── Audit Output ──────────────────────────────────────────
 class AuditOutput(BaseModel):
     """
@@ -86,6 +106,7 @@ class AuditOutput(BaseModel):
     missing_info: list[str] = Field(default_factory=list)
     prompt_version: str = Field(default="v1.0")
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    usage: Optional[AuditUsage] = None
 
     @model_validator(mode="after")
     def citations_required_for_approve_deny(self) -> "AuditOutput":
@@ -119,6 +140,7 @@ class PolicyMetadata(BaseModel):
     effective_date: date
     expiration_date: Optional[date] = None
     file_url: Optional[str] = None
+    content_sha256: Optional[str] = Field(default=None, description="SHA-256 of the uploaded file's bytes")
     status: str = "active"
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
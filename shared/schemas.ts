@@ -53,6 +53,25 @@ export interface RuleApplied {
   explanation?: string;
 }
 
+// ── Audit Usage ───────────────────────────────────────────
+
+export interface NodeUsage {
+  calls: number; // summed over loop iterations
+  prompt_tokens: number;
+  completion_tokens: number;
+  cost_usd: number;
+}
+
+export interface AuditUsage {
+  nodes: Record<string, NodeUsage>;
+  prompt_tokens: number;
+  completion_tokens: number;
+  total_tokens: number;
+  cost_usd: number;
+  budget_tokens?: number;
+  budget_stopped: boolean; // refinement stopped early to stay within the token budget
+}
+
 // ── Audit Output ──────────────────────────────────────────
 
 export interface AuditOutput {
@@ -66,6 +85,7 @@ export interface AuditOutput {
   missing_info: string[];
   prompt_version: string;
   created_at: string; // ISO datetime
+  usage?: AuditUsage;
 }
 
 // ── Feedback ───────────────────────────────────────────────
@@ -88,7 +108,8 @@ export interface PolicyMetadata {
   effective_date: string;
   expiration_date?: string;
   file_url?: string;
-  status: "active" | "archived" | "draft";
+  content_sha256?: string; // SHA-256 of the uploaded file's bytes; unset until an ingest succeeds
+  status: "active" | "archived" | "draft" | "failed";
   created_at: string;
 }
 